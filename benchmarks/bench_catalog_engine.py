@@ -0,0 +1,144 @@
+"""Benchmark of faceted catalog queries, answered by the in-memory catalog
+engine vs. by the equivalent SQLAlchemy queries.
+
+Loads the Criterion films of data/criterion.csv, with their directors and
+spine numbers, into an in-memory database, then times each query both
+ways: counts of a decade, films of a director, a sorted slice of a year
+range, and counts by decade and director. Also times a rebuild of the
+engine, and an incremental update after one film changes.
+
+Usage: python benchmarks/bench_catalog_engine.py [num_runs]
+"""
+
+import os
+import sys
+import csv
+import time
+import statistics
+
+import stub_tmdb   # Sets up environment and path.
+
+from cinescout import app, db
+from cinescout.models import Film, CriterionFilm, Person, FilmPerson
+from cinescout.catalogengine import engine
+
+CRITERION_FILE = os.path.join(stub_tmdb.PROJ_PATH, "data", "criterion.csv")
+
+
+def load_films():
+    with open(CRITERION_FILE, newline='') as csvfile:
+        rows = list(csv.DictReader(csvfile))
+    films = [Film(title=row['title'].replace('@', ','), year=int(row['release_year']),
+                  director=row['director'], tmdb_id=int(row['tmdb_id']) if row['tmdb_id'] else None)
+             for row in rows]
+    db.session.add_all(films)
+    db.session.flush()
+    db.session.add_all(CriterionFilm(film_id=film.id, spine_num=int(row['spine_num']))
+                       for film, row in zip(films, rows))
+    db.session.commit()
+    return len(films)
+
+
+# **** EQUIVALENT SQLALCHEMY QUERIES ****
+
+def catalog_films():
+    return db.session.query(Film).join(CriterionFilm, CriterionFilm.film_id == Film.id)
+
+
+def directed_by(query, director_id):
+    return query.join(FilmPerson, FilmPerson.film_id == Film.id).filter(
+        FilmPerson.person_id == director_id, FilmPerson.role == 'director')
+
+
+def sql_decade_count(decade):
+    return catalog_films().filter(Film.year >= decade, Film.year < decade + 10).count()
+
+
+def sql_director_films(director_id):
+    films = directed_by(catalog_films(), director_id).order_by(Film.year, Film.id).all()
+    return [film.title for film in films]
+
+
+def sql_year_slice(year_min, year_max):
+    films = (catalog_films().filter(Film.year >= year_min, Film.year <= year_max)
+             .order_by(db.func.lower(Film.title), Film.id).limit(20).all())
+    return [(film.title, [person.name for person in film.directors]) for film in films]
+
+
+def sql_facets():
+    decade = (Film.year // 10 * 10).label('decade')
+    decades = dict(db.session.query(decade, db.func.count()).select_from(Film)
+                   .join(CriterionFilm, CriterionFilm.film_id == Film.id)
+                   .group_by(decade).all())
+    directors = (db.session.query(Person.id, Person.name, db.func.count())
+                 .join(FilmPerson, FilmPerson.person_id == Person.id)
+                 .join(CriterionFilm, CriterionFilm.film_id == FilmPerson.film_id)
+                 .filter(FilmPerson.role == 'director')
+                 .group_by(Person.id).order_by(db.func.count().desc(), Person.name).limit(10).all())
+    return decades, directors
+
+
+# **** SAME QUERIES, BY THE ENGINE ****
+
+def engine_year_slice(year_min, year_max):
+    return [(film['title'], film['directors'])
+            for film in engine.films(order='title', length=20, year_min=year_min,
+                                     year_max=year_max)]
+
+
+def time_runs(function, num_runs):
+    """Returns median time of function, in microseconds, and its result."""
+    timings = []
+    for _ in range(num_runs):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6, result
+
+
+def main(num_runs=200):
+    with app.app_context():
+        db.create_all()
+        num_films = load_films()
+        director_id = Person.query.filter_by(name="Akira Kurosawa").one().id
+
+        start = time.perf_counter()
+        engine.count()
+        print(f"{num_films} Criterion films; engine built in "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms.\n")
+
+        queries = (
+            ("count of a decade", lambda: sql_decade_count(1960),
+             lambda: engine.count(decade=1960)),
+            ("films of a director", lambda: sql_director_films(director_id),
+             lambda: [film['title'] for film in engine.films(director_id=director_id)]),
+            ("sorted slice of years", lambda: sql_year_slice(1950, 1969),
+             lambda: engine_year_slice(1950, 1969)),
+            ("counts by decade, director", sql_facets, lambda: engine.facets()),
+        )
+        print(f"{'query':<28}{'SQL µs':>10}{'engine µs':>11}{'speedup':>9}")
+        for name, sql_query, engine_query in queries:
+            sql_time, sql_result = time_runs(sql_query, num_runs)
+            engine_time, engine_result = time_runs(engine_query, num_runs)
+            if name == "counts by decade, director":
+                assert sql_result[0] == engine_result['decades'], name
+                assert ([list(row) for row in sql_result[1]]
+                        == [list(director.values()) for director in engine_result['directors']]), name
+            else:
+                assert sql_result == engine_result, name
+            print(f"{name:<28}{sql_time:>10.0f}{engine_time:>11.0f}{sql_time / engine_time:>8.0f}x")
+
+        film = Film.query.filter_by(title="Ikiru").one()
+        timings = []
+        for year in range(num_runs // 10):
+            film.year = 1952 + year % 2
+            db.session.commit()
+            start = time.perf_counter()
+            engine.count()
+            timings.append(time.perf_counter() - start)
+        print(f"\nUpdate after one film changed: {statistics.median(timings) * 1000:.2f} ms. "
+              f"Engine stats: {engine.stats()}")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
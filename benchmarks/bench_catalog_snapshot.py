@@ -0,0 +1,84 @@
+"""Benchmark of /api/criterion-films, built per request vs. served from the
+catalog snapshot.
+
+Loads the Criterion films of data/criterion.csv into an in-memory database,
+then times requests to the endpoint through Flask's test client: with the
+snapshot thrown away before each request (the join and serialization the
+endpoint used to do every time), with the snapshot kept, and with the
+snapshot kept and the client revalidating its ETag (304). Also reports the
+size of the body, plain and gzipped.
+
+Usage: python benchmarks/bench_catalog_snapshot.py [num_requests]
+"""
+
+import io
+import os
+import sys
+import csv
+import time
+import statistics
+import contextlib
+
+import stub_tmdb   # Sets up environment and path.
+
+from cinescout import app, db, limiter, catalog
+from cinescout.models import Film, CriterionFilm
+
+CRITERION_FILE = os.path.join(stub_tmdb.PROJ_PATH, "data", "criterion.csv")
+
+
+def load_films():
+    with open(CRITERION_FILE, newline='') as csvfile:
+        films = [Film(title=row['title'], year=int(row['release_year']),
+                      director=row['director'], tmdb_id=int(row['tmdb_id']) if row['tmdb_id'] else None)
+                 for row in csv.DictReader(csvfile)]
+    db.session.add_all(films)
+    db.session.flush()
+    db.session.add_all(CriterionFilm(film_id=film.id) for film in films)
+    db.session.commit()
+    return len(films)
+
+
+def time_requests(client, num_requests, before=None, headers=None):
+    """Returns list of request times, in seconds, and last response."""
+    timings = []
+    for _ in range(num_requests):
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        response = client.get('/api/criterion-films', headers=headers or {})
+        timings.append(time.perf_counter() - start)
+    return timings, response
+
+
+def main(num_requests=200):
+    limiter.enabled = False
+    with app.app_context():
+        db.create_all()
+        num_films = load_films()
+        client = app.test_client()
+
+        print(f"{num_films} Criterion films.\n")
+        print(f"{'request':<26}{'median ms':>10}{'p99 ms':>9}{'status':>8}{'bytes':>8}")
+        gzip_header = {'Accept-Encoding': 'gzip'}
+        etag = client.get('/api/criterion-films', headers=gzip_header).headers['ETag']
+        runs = (("built each time", catalog.snapshot.invalidate, gzip_header),
+                ("from snapshot", None, gzip_header),
+                ("revalidated (304)", None, dict(gzip_header, **{'If-None-Match': etag})))
+        medians = []
+        for name, before, headers in runs:
+            with contextlib.redirect_stdout(io.StringIO()):
+                timings, response = time_requests(client, num_requests, before, headers)
+            timings.sort()
+            median = statistics.median(timings) * 1000
+            medians.append(median)
+            print(f"{name:<26}{median:>10.2f}{timings[int(len(timings) * .99)] * 1000:>9.2f}"
+                  f"{response.status_code:>8}{len(response.get_data()):>8}")
+
+        snapshot = catalog.snapshot.get()
+        print(f"\nBody: {len(snapshot.body)} bytes, {len(snapshot.gzipped)} gzipped. "
+              f"Snapshot {medians[0] / medians[1]:.0f}x faster than building each time.")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
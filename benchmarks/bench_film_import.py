@@ -0,0 +1,108 @@
+"""Benchmark of scripts/film_data.py's catalog import, row by row vs. in
+bulk.
+
+Writes a synthetic catalog CSV, in the format of data/criterion.csv, of
+num_rows films by num_rows / 8 directors (some films by two of them), then
+imports it into an in-memory database with film_data.update_table, and
+imports its first num_legacy_rows rows the way the script used to: a
+SELECT and two commits per row. Reports the throughput of both, and the
+time a re-import of the whole file takes, inserting nothing.
+
+Usage: python benchmarks/bench_film_import.py [num_rows] [num_legacy_rows]
+"""
+
+import io
+import os
+import sys
+import csv
+import time
+import random
+import tempfile
+import itertools
+import contextlib
+
+import stub_tmdb   # Sets up environment and path.
+
+sys.path.insert(0, os.path.join(stub_tmdb.PROJ_PATH, "scripts"))
+with contextlib.redirect_stdout(io.StringIO()):
+    import film_data
+
+from cinescout import app, db
+from cinescout.models import Film, CriterionFilm, Person, FilmPerson
+
+
+def write_catalog(path, num_rows, seed=7):
+    """Writes synthetic catalog of num_rows films to path."""
+    rng = random.Random(seed)
+    directors = [f"Director {i}" for i in range(max(1, num_rows // 8))]
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(('release_year', 'title', 'director', 'spine_num', 'tmdb_id', 'iffy'))
+        for i in range(num_rows):
+            director = rng.choice(directors)
+            if rng.random() < .05:
+                director += f" & {rng.choice(directors)}"
+            writer.writerow((rng.randint(1915, 2020), f"Film@ Number {i}", director, i + 1,
+                             100000 + i, False))
+
+
+def legacy_update_table(file_name, ModelClass, num_rows):
+    """Imports first num_rows rows of file as film_data.update_table used
+    to, printing aside: a query and two commits per row."""
+    with open(file_name, newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        next(reader, None)
+        for release_year, title, director, spine_num, tmdb_id, iffy in itertools.islice(
+                reader, num_rows):
+            title = title.replace('@', ',').strip()
+            if not Film.query.filter(Film.title==title, Film.year==release_year).all():
+                film = Film(title=title, year=release_year, tmdb_id=tmdb_id, director=director)
+                db.session.add(film)
+                db.session.commit()
+            else:
+                film = Film.query.filter(Film.title==title).first()
+            db.session.add(ModelClass(film_id=film.id, spine_num=int(spine_num)))
+            db.session.commit()
+
+
+def reset_database():
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+
+def main(num_rows=100000, num_legacy_rows=2000):
+    with app.app_context(), tempfile.TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, "catalog.csv")
+        write_catalog(path, num_rows)
+        print(f"Synthetic catalog: {num_rows} rows, {os.path.getsize(path) / 1e6:.1f} MB.\n")
+
+        reset_database()
+        start = time.perf_counter()
+        legacy_update_table(path, CriterionFilm, num_legacy_rows)
+        legacy_rate = num_legacy_rows / (time.perf_counter() - start)
+
+        reset_database()
+        with contextlib.redirect_stdout(io.StringIO()):
+            counts = film_data.update_table(path, CriterionFilm)
+        bulk_rate = counts['rows'] / counts['seconds']
+        assert counts['films'] == Film.query.count() == CriterionFilm.query.count() == num_rows
+        assert counts['credits'] == FilmPerson.query.count()
+        assert counts['persons'] == Person.query.count()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            again = film_data.update_table(path, CriterionFilm)
+        assert again['films'] == again['listed'] == 0
+
+        print(f"{'import':<28}{'rows':>9}{'seconds':>9}{'rows/s':>10}")
+        print(f"{'row by row (legacy)':<28}{num_legacy_rows:>9}"
+              f"{num_legacy_rows / legacy_rate:>9.2f}{legacy_rate:>10.0f}")
+        print(f"{'bulk':<28}{counts['rows']:>9}{counts['seconds']:>9.2f}{bulk_rate:>10.0f}")
+        print(f"{'bulk, all films known':<28}{again['rows']:>9}{again['seconds']:>9.2f}"
+              f"{again['rows'] / again['seconds']:>10.0f}")
+        print(f"\n{counts['persons']} persons, {counts['credits']} credits. "
+              f"Bulk import {bulk_rate / legacy_rate:.0f}x faster than row by row.")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,69 @@
+"""Benchmarks latency of the filmography page's upstream calls.
+
+Compares the two sequential calls the /person/<id> view used to make
+(get_movie_list_by_person_id, then get_bio_data_by_person_id) with the single
+get_filmography_by_person_id call, against a local stub of the TMDB API that
+waits a fixed delay before answering each request.
+
+Usage: python benchmarks/bench_filmography.py [delay_ms] [num_calls]
+"""
+
+import io
+import sys
+import time
+import contextlib
+
+from stub_tmdb import StubTmdbServer
+
+from cinescout import sessions
+from cinescout.movies import TmdbMovie
+
+
+def sequential(person_id):
+    """Old way: credits first, then bio data."""
+    credits = TmdbMovie.get_movie_list_by_person_id(person_id)
+    bio = TmdbMovie.get_bio_data_by_person_id(person_id)
+    return credits, bio
+
+
+def combined(person_id):
+    """New way: bio data with credits appended."""
+    return TmdbMovie.get_filmography_by_person_id(person_id)
+
+
+def run(server, fetch, num_calls):
+    """Returns (upstream requests per call, mean ms per call)."""
+    server.reset_counters()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for person_id in range(num_calls):
+            fetch(person_id)
+    elapsed = time.perf_counter() - start
+    return server.counters['requests'] / num_calls, elapsed / num_calls * 1000
+
+
+def main(delay_ms=50, num_calls=20):
+    server = StubTmdbServer(delay=delay_ms / 1000).start()
+    TmdbMovie.api_base_url = server.base_url
+
+    try:
+        # Both ways must build the same page.
+        with contextlib.redirect_stdout(io.StringIO()):
+            credits, bio = sequential(1)
+            result = combined(1)
+        assert [c['movie'].id for c in credits['cast']] == [c['movie'].id for c in result['cast']]
+        assert [c['job'] for c in credits['crew']] == [c['job'] for c in result['crew']]
+        assert (bio['name'], bio['image_url']) == (result['name'], result['image_url'])
+
+        print(f"{num_calls} filmography pages, {delay_ms} ms injected upstream delay\n")
+        print(f"{'mode':<12}{'calls/page':>12}{'ms/page':>10}")
+        for name, fetch in (('sequential', sequential), ('combined', combined)):
+            calls, ms = run(server, fetch, num_calls)
+            print(f"{name:<12}{calls:>12.1f}{ms:>10.1f}")
+    finally:
+        sessions.close_sessions()
+        server.stop()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,120 @@
+"""Measures the memory held by cached movie details, old vs. new model objects.
+
+Fills a TTLCache with the details of num_movies synthetic movies, each with
+40 cast and 60 crew credits, the way TmdbMovie.get_movie_info_by_id caches
+them, then builds a movie object out of every entry. The old layout keeps
+credits as lists of dictionaries and movies as plain __dict__ objects; the
+new one uses the slotted credit and movie classes of cinescout.movies.
+
+Every payload goes through json.loads, as a real response would, so no
+strings are shared between movies unless the code shares them. Expect a
+run to take a minute or two: tracemalloc slows every allocation down.
+
+Usage: python benchmarks/bench_model_memory.py [num_movies]
+"""
+
+import sys
+import json
+import random
+import tracemalloc
+
+import stub_tmdb   # Sets up environment and path.
+
+from cinescout.cache import TTLCache
+from cinescout.movies import TmdbMovie
+
+JOBS = ("Director", "Screenplay", "Producer", "Executive Producer", "Editor",
+        "Director of Photography", "Original Music Composer", "Casting",
+        "Production Design", "Costume Design", "Sound Designer", "Makeup Artist")
+
+
+def synthetic_credits(movie_id, rng, num_cast=40, num_crew=60):
+    """Returns /movie/{id} credits payload, decoded from JSON."""
+    payload = {
+        'cast': [{'id': rng.randrange(10**7), 'name': f"Actor {movie_id}-{i}",
+                  'character': f"Role {i}"} for i in range(num_cast)],
+        'crew': [{'id': rng.randrange(10**7), 'name': f"Crew {movie_id}-{i}",
+                  'job': rng.choice(JOBS)} for i in range(num_crew)],
+    }
+    return json.loads(json.dumps(payload))
+
+
+class LegacyTmdbMovie:
+    """TmdbMovie as it was: attributes kept in a per-instance __dict__."""
+    def __init__(self, id=None, title=None, release_year=None,
+                 release_date=None, overview=None, runtime=None,
+                 original_title=None, filmcredits=None, providers=None,
+                 poster_full_url=None, imdb_full_url=None, tmdb_full_url=None):
+        self.id = id
+        self.title = title
+        self.release_year = release_year
+        self.release_date = release_date
+        self.overview = overview
+        self.runtime = runtime
+        self.original_title = original_title
+        self.filmcredits = filmcredits
+        self.poster_full_url = poster_full_url
+        self.imdb_full_url = imdb_full_url
+        self.tmdb_full_url = tmdb_full_url
+        self.providers = providers
+
+
+def legacy_extract_credits(tmdbcredits):
+    """Previous implementation, kept here for comparison."""
+    filmcredits = {'cast': [], 'crew': []}
+    for credit in tmdbcredits['cast']:
+        filmcredits['cast'].append({'name': credit.get('name', None),
+                                    'character': credit.get('character', None),
+                                    'id': credit.get('id', None)})
+    for credit in tmdbcredits['crew']:
+        filmcredits['crew'].append({'name': credit.get('name', None),
+                                    'job': credit.get('job', None),
+                                    'id': credit.get('id', None)})
+    return filmcredits
+
+
+def measure(num_movies, extract_credits, movie_class):
+    """Returns (bytes held by cache, bytes held by movie objects)."""
+    rng = random.Random(1)
+    cache = TTLCache('benchmark', maxsize=num_movies)
+    providers = {'stream': ["Criterion Channel"], 'rent': ["Apple TV"]}
+
+    tracemalloc.start()
+    for movie_id in range(num_movies):
+        details = dict(id=movie_id, title=f"Movie {movie_id}",
+                       release_year=1999, release_date='1999-10-01',
+                       overview="A film that exists only for benchmarking.",
+                       runtime=101, original_title=f"Movie {movie_id}",
+                       poster_full_url=None, imdb_full_url=None,
+                       tmdb_full_url=TmdbMovie.tmdb_base_url + str(movie_id),
+                       filmcredits=extract_credits(synthetic_credits(movie_id, rng)))
+        cache.set(movie_id, details)
+    cached = tracemalloc.get_traced_memory()[0]
+
+    movies = [movie_class(providers=providers, **cache.get(movie_id))
+              for movie_id in range(num_movies)]
+    total = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(movies) == num_movies
+    return cached, total - cached
+
+
+def main(num_movies=10000):
+    results = {
+        'legacy': measure(num_movies, legacy_extract_credits, LegacyTmdbMovie),
+        'slotted': measure(num_movies, TmdbMovie._extract_credits, TmdbMovie),
+    }
+
+    print(f"{num_movies} movies, 40 cast + 60 crew credits each\n")
+    print(f"{'layout':<10}{'cache MiB':>12}{'objects MiB':>14}{'B/movie':>10}")
+    for name, (cached, objects) in results.items():
+        print(f"{name:<10}{cached / 2**20:>12.1f}{objects / 2**20:>14.2f}"
+              f"{(cached + objects) / num_movies:>10.0f}")
+
+    legacy, slotted = (sum(results[name]) for name in ('legacy', 'slotted'))
+    print(f"\nsaved: {(legacy - slotted) / 2**20:.1f} MiB "
+          f"({1 - slotted / legacy:.0%})")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,95 @@
+"""Benchmark of the local NYT review archive.
+
+Loads a synthetic dump the size of NYT's movie review archive (about 30k
+reviews) into a temporary archive, then times candidate searches for the
+Criterion films as NytMovieReview makes them, by release year and by
+release date. Each replaces an NYT api call, which takes hundreds of
+milliseconds plus up to 6 seconds of pacing.
+
+Usage: python benchmarks/bench_nyt_archive.py [num_reviews]
+"""
+
+import io
+import os
+import sys
+import csv
+import json
+import random
+import tempfile
+import contextlib
+import statistics
+import time
+
+import stub_tmdb   # Sets up environment and path.
+
+from cinescout import nytarchive
+
+CRITERION_FILE = os.path.join(stub_tmdb.PROJ_PATH, "data", "criterion.csv")
+
+WORDS = ("night", "love", "man", "city", "river", "last", "summer", "house",
+         "blood", "story", "dark", "woman", "king", "war", "dream", "road")
+
+
+def criterion_films():
+    with open(CRITERION_FILE, newline='') as csvfile:
+        return [(row['title'], int(row['release_year'])) for row in csv.DictReader(csvfile)]
+
+
+def synthetic_dump(num_reviews, films, seed=3):
+    """Returns JSON lines of num_reviews reviews: one per Criterion film,
+    the rest made of common words, from 1920 to 2023."""
+    rng = random.Random(seed)
+
+    def review(title, year):
+        date = f"{year}-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}"
+        return json.dumps({'display_title': title, 'publication_date': date,
+                           'opening_date': date, 'critics_pick': rng.randint(0, 1),
+                           'summary_short': f"A review of {title}."})
+
+    lines = [review(title, year + rng.randint(0, 1)) for title, year in films]
+    while len(lines) < num_reviews:
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+        lines.append(review(title, rng.randint(1920, 2023)))
+    return lines
+
+
+def percentiles(timings):
+    timings = sorted(timings)
+    return (statistics.median(timings) * 1000,
+            timings[int(len(timings) * .99)] * 1000, max(timings) * 1000)
+
+
+def main(num_reviews=30000):
+    films = criterion_films()
+    lines = synthetic_dump(num_reviews, films)
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        path = os.path.join(tempdir, "archive.db")
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            nytarchive.ingest(path, lines)
+            ingest_time = time.perf_counter() - start
+
+        archive = nytarchive.NytArchive(path)
+        print(f"{len(lines)} reviews ingested in {ingest_time:.2f} s, "
+              f"archive {os.path.getsize(path) / 2**20:.1f} MiB\n")
+        print(f"{'search':<18}{'median ms':>10}{'p99 ms':>9}{'max ms':>9}{'hits':>7}")
+
+        searches = (("by release year", lambda title, year:
+                     archive.search_by_release_year(title, year, 5)),
+                    ("by release date", lambda title, year:
+                     archive.search_by_release_date(title, f"{year}-01-01", 5)))
+        for name, search in searches:
+            timings, hits = [], 0
+            for title, year in films:
+                start = time.perf_counter()
+                found = search(title, year)
+                timings.append(time.perf_counter() - start)
+                hits += any(result['display_title'] == title for result in found['results'])
+            median, p99, worst = percentiles(timings)
+            print(f"{name:<18}{median:>10.2f}{p99:>9.2f}{worst:>9.2f}{hits:>7}")
+        archive.close()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
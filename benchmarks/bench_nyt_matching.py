@@ -0,0 +1,200 @@
+"""Benchmark and accuracy suite of the NYT review matching engine.
+
+Replays a corpus of NYT search responses, one JSON line per Criterion film,
+through nytmatch.match_review: no HTTP calls are made. Reports decisions per
+second and how many picks agree with the corpus's expected reviews.
+
+Each corpus line holds:
+    film: title, original_title, release_year and release_date of the film.
+    responses: NYT search responses, in the order they were made: the one
+               for the film's title, then the one for its original title if
+               the first had no results.
+    expected: display_title and publication_date of the film's review; null
+              if NYT did not review it.
+
+Record a corpus of real responses with scripts/record_nyt_corpus.py. Without
+one, a synthetic corpus is built from data/criterion.csv: each film gets one
+of the situations the engine meets in practice (a single exact result, a
+review published a year or two later, a crowd of namesakes, a review under
+the original title, no review, a much later remake...), some of which it is
+known to get wrong.
+
+Usage: python benchmarks/bench_nyt_matching.py [--corpus FILE] [--repeats N]
+"""
+
+import os
+import csv
+import json
+import random
+import timeit
+import argparse
+from collections import Counter
+
+import stub_tmdb   # Sets up environment and path.
+
+from cinescout import nytmatch
+from cinescout.movies import Movie
+
+CRITERION_FILE = os.path.join(stub_tmdb.PROJ_PATH, "data", "criterion.csv")
+
+# Situations of the synthetic corpus, with their share of films.
+SCENARIOS = (("exact", 35), ("late", 15), ("crowded", 12), ("retitled", 8),
+             ("original", 5), ("none", 12), ("remake", 5), ("early", 4),
+             ("inverted", 4))
+
+
+def nyt_result(display_title, publication_date, rng):
+    """Returns element of NYT api 'results' list."""
+    return {'display_title': display_title, 'publication_date': publication_date,
+            'opening_date': publication_date, 'critics_pick': rng.randint(0, 1),
+            'summary_short': f"A review of {display_title}."}
+
+
+def nyt_data(results):
+    """Returns NYT api search response holding results."""
+    return {'status': 'OK', 'num_results': len(results), 'results': results}
+
+
+def synthetic_entry(film, scenario, titles, rng):
+    """Returns corpus entry of film in given scenario."""
+    title, year = film['title'], film['release_year']
+
+    def date(offset=0):
+        return f"{year + offset}-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}"
+
+    def namesakes(count):
+        return [nyt_result(rng.choice(titles), date(rng.randint(0, 5)), rng)
+                for _ in range(count)]
+
+    review = None
+    responses = []
+    if scenario == "exact":
+        review = nyt_result(title, date(), rng)
+        responses = [nyt_data([review])]
+    elif scenario == "late":
+        review = nyt_result(title, date(rng.randint(1, 2)), rng)
+        responses = [nyt_data([review])]
+    elif scenario == "crowded":
+        review = nyt_result(title.upper() if rng.random() < .2 else title, date(), rng)
+        results = namesakes(rng.randint(2, 15)) + [review]
+        rng.shuffle(results)
+        responses = [nyt_data(results)]
+    elif scenario == "retitled":
+        variant = rng.choice((f"{title} (Restored)", f"{title}: Director's Cut",
+                              title.replace("The ", "", 1)))
+        review = nyt_result(variant, date(1), rng)
+        responses = [nyt_data(namesakes(rng.randint(1, 5)) + [review])]
+    elif scenario == "original":
+        film['original_title'] = f"{rng.choice(('Le', 'La', 'Der', 'Il'))} {title}"
+        review = nyt_result(film['original_title'], date(rng.randint(0, 2)), rng)
+        responses = [nyt_data([]), nyt_data([review])]
+    elif scenario == "none":
+        responses = [nyt_data([])]
+    elif scenario == "remake":
+        responses = [nyt_data([nyt_result(title, date(rng.randint(20, 40)), rng)])]
+    elif scenario == "early":
+        # TMDB dates the film by its US release, after NYT reviewed it.
+        review = nyt_result(title, date(-1), rng)
+        responses = [nyt_data([review])]
+    elif scenario == "inverted":
+        # NYT files some titles as 'Seventh Seal, The'.
+        words = title.split(" ", 1)
+        inverted = f"{words[1]}, {words[0]}" if len(words) > 1 else f"{title}, The"
+        review = nyt_result(inverted, date(), rng)
+        responses = [nyt_data([review] + namesakes(rng.randint(0, 3)))]
+
+    expected = None
+    if review:
+        expected = {'display_title': review['display_title'],
+                    'publication_date': review['publication_date']}
+    return {'film': film, 'scenario': scenario, 'responses': responses,
+            'expected': expected}
+
+
+def synthetic_corpus(seed=14):
+    """Returns list of synthetic corpus entries, one per Criterion film."""
+    rng = random.Random(seed)
+    with open(CRITERION_FILE, newline='') as csvfile:
+        films = [{'title': row['title'], 'original_title': row['title'],
+                  'release_year': int(row['release_year']),
+                  'release_date': f"{row['release_year']}-06-01"}
+                 for row in csv.DictReader(csvfile)]
+    titles = [film['title'] for film in films]
+    scenarios = [name for name, share in SCENARIOS for _ in range(share)]
+    return [synthetic_entry(film, rng.choice(scenarios), titles, rng)
+            for film in films]
+
+
+def load_corpus(path):
+    """Returns list of corpus entries read from JSON lines file."""
+    with open(path) as corpus_file:
+        return [json.loads(line) for line in corpus_file if line.strip()]
+
+
+def replay(entry, movie):
+    """Returns engine's decision for corpus entry, making the same searches
+    NytMovieReview would."""
+    nyt_data = entry['responses'][0]
+    original_title_used = False
+    if nytmatch.should_try_original_title(movie, nyt_data) and len(entry['responses']) > 1:
+        nyt_data = entry['responses'][1]
+        original_title_used = True
+    return nytmatch.match_review(movie, nyt_data, original_title_used)
+
+
+def grade(decision, expected):
+    """Returns how decision compares with the expected review."""
+    if decision['result'] is None:
+        return "missed" if expected else "correct, none"
+    if expected is None:
+        return "false review"
+    picked = (decision['result'].get('display_title'),
+              decision['result'].get('publication_date'))
+    if picked == (expected['display_title'], expected['publication_date']):
+        return "correct"
+    return "wrong review"
+
+
+def main(corpus_path=None, repeats=20):
+    corpus = load_corpus(corpus_path) if corpus_path else synthetic_corpus()
+    movies = [Movie(**entry['film']) for entry in corpus]
+    pairs = list(zip(corpus, movies))
+
+    def replay_all():
+        return [replay(entry, movie) for entry, movie in pairs]
+
+    elapsed = min(timeit.repeat(replay_all, number=1, repeat=repeats))
+    decisions = replay_all()
+
+    print(f"corpus: {corpus_path or 'synthetic'}, {len(corpus)} films, "
+          f"best of {repeats} runs\n")
+    print(f"replay: {elapsed * 1000:.1f} ms, {elapsed / len(corpus) * 1e6:.0f} µs per film, "
+          f"{len(corpus) / elapsed:,.0f} films/s\n")
+
+    grades = Counter(grade(decision, entry['expected'])
+                     for entry, decision in zip(corpus, decisions))
+    picked = grades['correct'] + grades['wrong review'] + grades['false review']
+    reviewed = grades['correct'] + grades['wrong review'] + grades['missed']
+    print("accuracy")
+    for name in ("correct", "correct, none", "missed", "wrong review", "false review"):
+        print(f"  {name:<15}{grades[name]:>6}")
+    print(f"  {'precision':<15}{grades['correct'] / picked if picked else 0:>6.1%}")
+    print(f"  {'recall':<15}{grades['correct'] / reviewed if reviewed else 0:>6.1%}")
+
+    # Where engine goes wrong, by situation when known.
+    misses = Counter((entry.get('scenario', '-'), decision['message'] or "picked")
+                     for entry, decision in zip(corpus, decisions)
+                     if grade(decision, entry['expected']) in ("missed", "wrong review", "false review"))
+    if misses:
+        print("\nerrors by scenario and reason")
+        for (scenario, reason), count in misses.most_common():
+            print(f"  {count:>4}  {scenario:<10}{reason}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay NYT search responses through nytmatch.")
+    parser.add_argument('--corpus', default=None,
+                        help="JSON lines corpus; synthetic corpus if omitted")
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+    main(args.corpus, args.repeats)
@@ -0,0 +1,97 @@
+"""Micro-benchmark of picking NYT reviews by title similarity.
+
+Times the titlematch batch functions against the previous implementation
+(fuzz.ratio and fuzz.partial_ratio called per title, with both titles
+stripped and lowercased on every call) on synthetic candidate lists of the
+sizes NYT searches return for common words, and checks both make the same
+decisions.
+
+Usage: python benchmarks/bench_title_scoring.py [repeats]
+"""
+
+import io
+import sys
+import random
+import timeit
+import contextlib
+
+import stub_tmdb   # Sets up environment and path.
+
+from fuzzywuzzy import fuzz
+
+from cinescout import titlematch
+from cinescout.reviews import NytMovieReview
+
+# Number of candidate titles per search.
+SIZES = (20, 50, 100, 200, 500)
+
+WORDS = ("the", "night", "of", "a", "seal", "seventh", "love", "man", "city",
+         "river", "last", "summer", "house", "blood", "story", "dark")
+
+
+def synthetic_titles(num_titles, seed=5):
+    """Returns list of titles made of common words, a fifth of them repeats,
+    as NYT results list a film under several critics' picks."""
+    rng = random.Random(seed)
+    titles = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 5))).title()
+              for _ in range(num_titles - num_titles // 5)]
+    titles += rng.sample(titles, num_titles // 5)
+    rng.shuffle(titles)
+    return titles
+
+
+def legacy_filter(query, titles, threshold):
+    """Previous filter_title closure, without its prints."""
+    mask = []
+    for title in titles:
+        ratio = fuzz.ratio(query.strip().lower(), title.strip().lower())
+        partial = fuzz.partial_ratio(query.strip().lower(), title.strip().lower())
+        mask.append(ratio >= threshold or (ratio >= 50 and partial >= threshold))
+    return mask
+
+
+def legacy_best(query, titles):
+    """Previous highest_levenshtein closure."""
+    weight_full, weight_partial = 2, 1
+    highest_score, index, tie = 0, 0, False
+    for i, title in enumerate(titles):
+        full = fuzz.ratio(query.strip().lower(), title.strip().lower())
+        partial = fuzz.partial_ratio(query.strip().lower(), title.strip().lower())
+        score = weight_full * full + weight_full + weight_partial * partial
+        if score > highest_score:
+            highest_score, index, tie = score, i, False
+        elif score == highest_score:
+            tie = True
+    return None if tie else index
+
+
+def main(repeats=20):
+    threshold = NytMovieReview.threshold
+    query = "The Seventh Seal"
+
+    print(f"query '{query}', best of {repeats} runs\n")
+    print(f"{'titles':>7}{'legacy ms':>11}{'batch ms':>10}{'speed-up':>10}")
+    for size in SIZES:
+        titles = synthetic_titles(size)
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert legacy_filter(query, titles, threshold) == \
+                titlematch.good_enough_mask(query, titles, threshold)
+            assert legacy_best(query, titles) == titlematch.best_match(query, titles)
+
+            def old():
+                legacy_filter(query, titles, threshold)
+                legacy_best(query, titles)
+
+            def new():
+                titlematch.good_enough_mask(query, titles, threshold)
+                titlematch.best_match(query, titles)
+
+            old_time = min(timeit.repeat(old, number=1, repeat=repeats))
+            new_time = min(timeit.repeat(new, number=1, repeat=repeats))
+
+        print(f"{size:>7}{old_time * 1000:>11.2f}{new_time * 1000:>10.2f}"
+              f"{old_time / new_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,91 @@
+"""Benchmarks pooled vs. unpooled TMDB API calls against a local stub server.
+
+For each TmdbMovie route, the script makes the same number of calls twice:
+once with a bare requests.get() per call (the old behaviour) and once through
+the process's pooled session. It reports the number of TCP connections the
+stub server accepted and the mean latency per call.
+
+Every call must reach the stub, and only the connection should differ
+between the two: TmdbMovie's caches are cleared before each call, and its
+rate limiter is swapped for one that never makes calls wait.
+
+N.B. The stub speaks plain HTTP on localhost, so the savings shown are those
+of the TCP handshake alone; against api.themoviedb.org each avoided
+connection also saves a TLS handshake and a network round trip or two.
+
+Usage: python benchmarks/bench_tmdb_session.py [num_calls]
+"""
+
+import io
+import sys
+import time
+import contextlib
+
+import requests
+
+from stub_tmdb import StubTmdbServer
+
+from cinescout import sessions
+from cinescout.movies import TmdbMovie
+from cinescout.ratelimit import TokenBucket
+
+ROUTES = {
+    'get_movie_list_by_title': lambda: TmdbMovie.get_movie_list_by_title("Movie"),
+    'get_person_list_by_name_known_for':
+        lambda: TmdbMovie.get_person_list_by_name_known_for("Person", "All"),
+    'get_bio_data_by_person_id': lambda: TmdbMovie.get_bio_data_by_person_id(1),
+    'get_movie_list_by_person_id': lambda: TmdbMovie.get_movie_list_by_person_id(1),
+    'get_movie_info_by_id': lambda: TmdbMovie.get_movie_info_by_id(1),
+}
+
+CACHES = (TmdbMovie.details_cache, TmdbMovie.providers_cache, TmdbMovie.search_cache)
+
+
+def run(server, route, num_calls):
+    """Calls route num_calls times; returns (connections, mean ms per call)."""
+    server.reset_counters()
+    start = time.perf_counter()
+    # Methods print progress messages: keep them out of the report.
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(num_calls):
+            for cache in CACHES:
+                cache.clear()
+            result = route()
+            assert result['success'], result
+    elapsed = time.perf_counter() - start
+    return server.counters['connections'], elapsed / num_calls * 1000
+
+
+def main(num_calls=200):
+    server = StubTmdbServer().start()
+    TmdbMovie.api_base_url = server.base_url
+    get_session = sessions.get_session
+    rate_limiter = TmdbMovie.rate_limiter
+    TmdbMovie.rate_limiter = TokenBucket('tmdb', rate=1e9, capacity=10**9)
+
+    print(f"{num_calls} calls per route against {server.base_url}\n")
+    print(f"{'route':<36}{'mode':<10}{'conns':>7}{'ms/call':>10}")
+
+    try:
+        for name, route in ROUTES.items():
+            # requests.get() builds and throws away a session on every call.
+            sessions.get_session = lambda name: requests
+            bare_conns, bare_ms = run(server, route, num_calls)
+
+            sessions.get_session = get_session
+            sessions.close_sessions()
+            pooled_conns, pooled_ms = run(server, route, num_calls)
+
+            print(f"{name:<36}{'bare':<10}{bare_conns:>7}{bare_ms:>10.3f}")
+            print(f"{'':<36}{'pooled':<10}{pooled_conns:>7}{pooled_ms:>10.3f}")
+            print(f"{'':<36}{'saved':<10}{bare_conns - pooled_conns:>7}"
+                  f"{bare_ms - pooled_ms:>10.3f}")
+    finally:
+        TmdbMovie.rate_limiter = rate_limiter
+        sessions.get_session = get_session
+        sessions.close_sessions()
+        server.stop()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
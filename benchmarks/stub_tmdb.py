@@ -0,0 +1,167 @@
+"""Local stand-in for the TMDB API used by the benchmark scripts.
+
+The stub answers the endpoints Cinescout calls with small canned JSON
+payloads, can inject a fixed delay before every response, and counts how
+many TCP connections and requests it has served.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Importing cinescout builds the app, which needs these to be set.
+os.environ.setdefault('SECRET_KEY', 'benchmark')
+os.environ.setdefault('NYT_API_KEY', 'benchmark')
+os.environ.setdefault('TMDB_API_KEY', 'benchmark')
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+PROJ_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJ_PATH)
+
+
+def movie_payload(movie_id):
+    """Returns canned /movie/{id} response with credits and providers."""
+    return {
+        'id': movie_id,
+        'title': f"Movie {movie_id}",
+        'original_title': f"Movie {movie_id}",
+        'release_date': '1999-10-01',
+        'overview': "A film that exists only for benchmarking.",
+        'runtime': 101,
+        'poster_path': '/poster.jpg',
+        'imdb_id': 'tt0000001',
+        'credits': {
+            'cast': [{'name': f"Actor {i}", 'character': f"Role {i}", 'id': i}
+                     for i in range(20)],
+            'crew': [{'name': f"Crew {i}", 'job': 'Director', 'id': 100 + i}
+                     for i in range(10)],
+        },
+        'watch/providers': {
+            'results': {
+                'CA': {'flatrate': [{'provider_name': 'Criterion Channel'}],
+                       'rent': [{'provider_name': 'Apple TV'}]}
+            }
+        },
+    }
+
+
+def credits_payload(num_credits=40):
+    """Returns canned /person/{id}/movie_credits response."""
+    cast = [{'id': i, 'title': f"Movie {i}", 'original_title': f"Movie {i}",
+             'release_date': f"{1950 + i % 70}-01-01", 'character': f"Role {i}"}
+            for i in range(num_credits)]
+    crew = [{'id': i, 'title': f"Movie {i}", 'original_title': f"Movie {i}",
+             'release_date': f"{1950 + i % 70}-01-01", 'job': 'Director'}
+            for i in range(num_credits)]
+    return {'cast': cast, 'crew': crew}
+
+
+def person_payload(person_id, append=None):
+    """Returns canned /person/{id} response; credits appended if asked."""
+    data = {'id': person_id, 'name': f"Person {person_id}",
+            'profile_path': '/profile.jpg'}
+    if append and 'movie_credits' in append:
+        data['movie_credits'] = credits_payload()
+    return data
+
+
+def search_payload(kind):
+    """Returns canned /search/movie or /search/person response."""
+    if kind == 'movie':
+        results = [{'id': i, 'title': f"Movie {i}", 'original_title': f"Movie {i}",
+                    'overview': "Overview.", 'release_date': f"{1950 + i}-01-01"}
+                   for i in range(20)]
+    else:
+        results = [{'id': i, 'name': f"Person {i}",
+                    'known_for_department': 'Directing' if i % 2 else 'Acting'}
+                   for i in range(20)]
+    return {'total_results': len(results), 'results': results}
+
+
+class StubTmdbHandler(BaseHTTPRequestHandler):
+    """Serves canned TMDB payloads over keep-alive HTTP/1.1."""
+
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body are written separately; without TCP_NODELAY a
+    # keep-alive client would wait on delayed ACKs between them.
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        # Called once per new TCP connection.
+        BaseHTTPRequestHandler.setup(self)
+        self.server.count('connections')
+
+    def do_GET(self):
+        self.server.count('requests')
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        append = query.get('append_to_response', [''])[0]
+
+        match = re.match(r'^/3/(search/movie|search/person|movie/(\d+)'
+                         r'|person/(\d+)/movie_credits|person/(\d+))$', url.path)
+        if not match:
+            payload, status = {'status_message': 'Not found.'}, 404
+        elif match.group(1) == 'search/movie':
+            payload, status = search_payload('movie'), 200
+        elif match.group(1) == 'search/person':
+            payload, status = search_payload('person'), 200
+        elif match.group(2):
+            payload, status = movie_payload(int(match.group(2))), 200
+        elif match.group(3):
+            payload, status = credits_payload(), 200
+        else:
+            payload, status = person_payload(int(match.group(4)), append), 200
+
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable.
+        pass
+
+
+class StubTmdbServer(ThreadingHTTPServer):
+    """Threaded stub server; run it with start() and stop()."""
+
+    daemon_threads = True
+
+    def __init__(self, delay=0):
+        ThreadingHTTPServer.__init__(self, ('127.0.0.1', 0), StubTmdbHandler)
+        self.delay = delay
+        self.counters = {'connections': 0, 'requests': 0}
+        self._counter_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/3"
+
+    def count(self, name):
+        with self._counter_lock:
+            self.counters[name] += 1
+
+    def reset_counters(self):
+        with self._counter_lock:
+            self.counters = {'connections': 0, 'requests': 0}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
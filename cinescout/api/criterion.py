@@ -1,21 +1,88 @@
 """API to fetch list of Criterion films."""
 
-from flask import jsonify
-from flask_login import current_user, login_user, logout_user, login_required
+from flask import request
 
-from cinescout import db # Get db object defined in __init__.py
-from cinescout.models import Film, CriterionFilm
+from cinescout import app
+from cinescout import catalog   # Prebuilt response; see catalog module.
+from cinescout.catalogengine import engine, ORDER_COLUMNS
 
 from cinescout.api import bp
 from cinescout import limiter
 
-# Rate-limit calls to this api route. 
+
+def _is_page_request():
+    """Private function; whether request asks for one page of the catalog."""
+    return 'draw' in request.args
+
+
+def _page_request_error(err_message):
+    """Private function that returns JSON object and status code of a bad
+    page request."""
+    print(err_message)
+    return {'success': False, 'err_message': err_message}, 400
+
+
+def _get_criterion_page():
+    """Private function that answers a page request of DataTables'
+    server-side processing protocol."""
+    try:
+        draw = int(request.args['draw'])
+        start = int(request.args.get('start', 0))
+        length = int(request.args.get('length', catalog.MAX_PAGE_LENGTH))
+        order_index = int(request.args.get('order[0][column]', 1))
+        director_id = request.args.get('director_id')
+        director_id = int(director_id) if director_id is not None else None
+    except ValueError:
+        return _page_request_error("draw, start, length, order[0][column] and director_id "
+                                   "must be integers.")
+    if not 0 <= order_index < len(catalog.ORDER_COLUMNS):
+        return _page_request_error(f"Can't sort by column {order_index}.")
+    # DataTables asks for all films with a length of -1: send as many as allowed.
+    if length < 0:
+        length = catalog.MAX_PAGE_LENGTH
+
+    page = catalog.catalog_page(start=start, length=length,
+                                order=catalog.ORDER_COLUMNS[order_index],
+                                descending=request.args.get('order[0][dir]') == 'desc',
+                                search=request.args.get('search[value]', ''),
+                                director_id=director_id)
+    return {'success': True,
+            'draw': draw,
+            'recordsTotal': page['records_total'],
+            'recordsFiltered': page['records_filtered'],
+            'data': page['results']}, 200
+
+
+# Rate-limit calls to this api route. Tables paging through the catalog
+# make a request per page, sort and search, so they are allowed more.
 @bp.route("/criterion-films")
-@limiter.limit("30 per minute, 2 per second")    
+@limiter.limit("30 per minute, 2 per second", exempt_when=_is_page_request)
+@limiter.limit("120 per minute, 5 per second", exempt_when=lambda: not _is_page_request())
 def get_criterion_films():
     """Builds data object required to display a list of critically-acclaimed movies.
     on the client side.
 
+    The response is served from the catalog snapshot, gzip-compressed if the
+    client accepts it, with an ETag: clients sending it back in
+    If-None-Match get 304 Not Modified until the catalog changes.
+
+    Requests with a 'draw' parameter get one page of the catalog instead,
+    following DataTables' server-side processing protocol: the page's
+    films are sorted, searched and limited by the database.
+
+    Args (page requests only, in query string):
+        draw: Integer echoed back in response.
+        start: Integer representing index of page's first film.
+        length: Integer representing number of films in page, at most
+            catalog.MAX_PAGE_LENGTH; -1 for as many as allowed.
+        order[0][column]: Integer representing column to sort by: 0 for
+            title, 1 for year (default), 2 for directors.
+        order[0][dir]: 'asc' (default) or 'desc'.
+        search[value]: String; only films whose title, or name of one of
+            whose directors, starts with it, ignoring case, are returned.
+        director_id: Integer; only films directed by person of this id
+            are returned.
+
     Returns:
         JSON object with the following fields:
         In case of errors:
@@ -28,42 +95,92 @@ def get_criterion_films():
                 'title': String representing a movie's title.
                 'year': String represent movie's release year.
                 'directors': A list of strings representing directors' namees.
+                'director_ids': A list of integers representing directors' ids,
+                    to filter page requests by.
+                'tmdb_id': Integer representing movie's TMDB id.
+        For page requests:
+            'success': Boolean set to True.
+            'draw': Integer of request's draw parameter.
+            'recordsTotal': Integer indicating number of films in catalog.
+            'recordsFiltered': Integer indicating number of films matching search.
+            'data': List of dictionaries representing page's films, as in 'results'.
     """
-    criterion_films = db.session.query(Film).join(CriterionFilm).all()
-
-    # Check for error cases.
-    if criterion_films is None:
-        return jsonify({
-            'success': False,
-            'err_message': "Query for Criterion films returned NoneType object."
-        }), 404
-
-    num_films = len(criterion_films)
-    if num_films == 0:
-        return jsonify({
-            'success': False,
-            'err_message': "Query for Criterion films returned no films."
-        }), 404
-
-    # All good. Build JSON object.
-    movies = {
-        'success': True,
-        'num_results': len(criterion_films),
-        'results': []
-    }
-
-    # Extract film info from ORM object.
-    for film in criterion_films:
-        result = {}
-        result['title'] = film.title
-        result['year'] = film.year
-
-        directors = film.director.split('&')
-        directors = [ director.strip() for director in directors ]
-        result['directors'] = directors
-
-        result['tmdb_id'] = film.tmdb_id
-
-        movies['results'].append(result)
-
-    return jsonify(movies)
\ No newline at end of file
+    if _is_page_request():
+        return _get_criterion_page()
+
+    snapshot = catalog.snapshot.get()
+
+    # Each encoding of the body has its own ETag.
+    gzipped = 'gzip' in request.accept_encodings
+    etag = f"{snapshot.etag}-gzip" if gzipped else snapshot.etag
+
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(snapshot.gzipped if gzipped else snapshot.body,
+                                      status=snapshot.status_code,
+                                      mimetype='application/json')
+        if gzipped:
+            response.headers['Content-Encoding'] = 'gzip'
+
+    response.set_etag(etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    # Browsers may keep the response but must check it is current.
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+# Integer filters of facet requests, passed on to the catalog engine.
+FACET_FILTERS = ('decade', 'year_min', 'year_max', 'director_id')
+
+
+@bp.route("/criterion-facets")
+@limiter.limit("120 per minute, 5 per second")
+def get_criterion_facets():
+    """Counts Criterion films by decade and by director, and lists a slice
+    of them, for browsing by facet. Answered by the in-memory catalog
+    engine; see catalogengine module.
+
+    Args (in query string, all optional):
+        decade: Integer; only films released in decade starting that year, e.g. 1960.
+        year_min, year_max: Integers; only films released within these years.
+        director_id: Integer; only films directed by person of this id.
+        order: String representing column films are sorted by: 'year'
+            (default), 'title', 'directors' or 'spine_num'.
+        desc: 'true' to sort from last to first.
+        start: Integer representing index of first film listed.
+        length: Integer representing number of films listed, at most
+            catalog.MAX_PAGE_LENGTH (default).
+
+    Returns:
+        JSON object with the following fields:
+        In case of errors:
+            'success': Boolean set to False.
+            'err_message': String containing error message.
+        Otherwise:
+            'success': Boolean set to True.
+            'num_results': Integer indicating number of films matching filters.
+            'decades': Object of numbers of films by decade, e.g. {"1960": 12}.
+            'directors': List of the directors of most films matching
+                filters, each with 'id', 'name' and 'count' of films.
+            'results': List of dictionaries representing films, as in
+                /criterion-films, with 'spine_num' too.
+    """
+    try:
+        filters = {name: int(request.args[name]) for name in FACET_FILTERS
+                   if name in request.args}
+        start = int(request.args.get('start', 0))
+        length = int(request.args.get('length', catalog.MAX_PAGE_LENGTH))
+    except ValueError:
+        return _page_request_error(f"{', '.join(FACET_FILTERS)}, start and length "
+                                   "must be integers.")
+    order = request.args.get('order', 'year')
+    if order not in ORDER_COLUMNS:
+        return _page_request_error(f"Can't sort by {order}.")
+
+    facets = engine.facets(**filters)
+    facets['results'] = engine.films(order=order, descending=request.args.get('desc') == 'true',
+                                     start=max(0, start),
+                                     length=max(0, min(length, catalog.MAX_PAGE_LENGTH)),
+                                     **filters)
+    return dict(success=True, **facets), 200
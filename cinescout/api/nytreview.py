@@ -4,11 +4,11 @@ from typing import Dict
 
 from datetime import datetime
 
-from flask import jsonify, request
+from flask import request, url_for
 from flask_login import current_user, login_required
 
 from cinescout.movies import Movie
-from cinescout.reviews import NytMovieReview
+from cinescout import reviewstore, reviewjobs
 from cinescout.api import bp
 
 
@@ -26,12 +26,48 @@ def _nyt_response_error(response : Dict) -> Dict:
      return {'success': False, 'err_message': err_message}, status_code
 
 
+def _review_payload(response : Dict) -> tuple:
+    """Private function that turns response of reviewstore.resolve_review
+    into the API's JSON payload and status code."""
+    # Handle error.
+    if response['status_code'] != 200:
+        return _nyt_response_error(response)
+
+    # No review found for specified movie despite all attempts to find one.
+    review = response['review']
+    if not review['found']:
+        message = "No review found for this movie."
+        return {'success': False, 'message': message}, 200
+        
+    # All good. Extract data.
+    result = {
+                'success': True, 
+                'review_text': review['review_text'],
+                'publication_date': review['publication_date'], 
+                'critics_pick': bool(review['critics_pick']),
+                'review_warning': not review['bullseye']
+             }
+    return result, 200
+
+
+def _lookup_review(movie : Movie) -> tuple:
+    """Private function run by review jobs: fetches review from NYT."""
+    return _review_payload(reviewstore.resolve_review(movie))
+
+
 @bp.route("/nyt-movie-review", methods=['POST'])
 def get_nyt_movie_review():
-    """Fetches movie review from NYT API.
+    """Fetches movie review from the database if the movie's review was
+    searched for before. Otherwise starts a job fetching it from NYT API
+    and answers 202 Accepted at once: poll the job's url, from the
+    'poll_url' field or the Location header, for the review.
 
     Returns:
         JSON object with the following fields:
+        In case a job was started:
+            'success': None.
+            'job_id': String identifying job.
+            'poll_url': String representing url to poll for review.
         In case NYT api returns an error:
             'success': Boolean set to False.
             'err_message': String containing error message.
@@ -56,6 +92,7 @@ def get_nyt_movie_review():
     original_title = data.get("original_title", None)
     release_year = data.get("release_year", None)
     release_date = data.get("release_date", None)
+    tmdb_id = data.get("tmdb_id", None)
 
     # No point in searching for review if query missing data.
     if not (title and original_title and release_year and release_date):
@@ -64,7 +101,8 @@ def get_nyt_movie_review():
     
     # Data should be of expected type. 
     right_data_types = (isinstance(title, str) and isinstance(original_title, str) 
-                       and isinstance(release_year, int) and isinstance(release_date, str))
+                       and isinstance(release_year, int) and isinstance(release_date, str)
+                       and (tmdb_id is None or isinstance(tmdb_id, int)))
     if not right_data_types:
         err_message = "Unable to fetch review: bad data type(s) in payload."
         return {'success': False, 'err_message': err_message}, 400
@@ -84,48 +122,46 @@ def get_nyt_movie_review():
         return {'success': False, 'message': message}
         
     # Create Movie object.
-    movie = Movie(title=title, release_year=release_year, release_date=release_date,
-                  original_title=original_title)
+    movie = Movie(id=tmdb_id, title=title, release_year=release_year,
+                  release_date=release_date, original_title=original_title)
     
-    # Fetch movie review. Try main title first.
-    print(f"Fetching NYT movie review for '{movie.title}' ({movie.release_year})...")
-    print("Making first attempt...")
-    response = NytMovieReview.get_movie_review(movie)
-    print(response)
+    # Fetch movie review from database if it was searched for before.
+    response = reviewstore.stored_review(movie)
+    if response is not None:
+        return _review_payload(response)
 
-    # Handle error.
-    if response['status_code'] != 200:
-        return _nyt_response_error(response)
+    # Else have it fetched in the background.
+    try:
+        job_id = reviewjobs.jobs.submit(movie, _lookup_review)
+    except reviewjobs.QueueFull as err:
+        return {'success': False, 'err_message': f"{err} Please try again later."}, 503
 
-    # See if there's a review to print.
-    review = response.get('review', None)
-    
-    # Make second attempt. NytMovieReview will try using a different method this time.
-    if not review:
-        print("Making second attempt...")
-        NytMovieReview.delay_next()
-        response = NytMovieReview.get_movie_review(movie, first_try=False)
-    
-    # Handle error.
-    if response['status_code'] != 200:
-        return _nyt_response_error(response)
+    poll_url = url_for('api.get_nyt_movie_review_job', job_id=job_id)
+    return ({'success': None, 'job_id': job_id, 'poll_url': poll_url}, 202,
+            {'Location': poll_url})
 
-    # No review found for specified movie despite all attempts to find one.
-    if not review: 
-        message = "No review found for this movie."
-        return {'success': False, 'message': message}
-        
-    # All good. Extract data.
-    review_text = review.text
-    publication_date = review.publication_date
-    critics_pick = bool(review.critics_pick)
-    review_warning = not response.get('bullseye', None)
-    result = {
-                'success': True, 
-                'review_text': review_text,
-                'publication_date': publication_date, 
-                'critics_pick': critics_pick,
-                'review_warning': review_warning
-             }
-    return jsonify(result)
 
+@bp.route("/nyt-movie-review/<job_id>", methods=['GET'])
+def get_nyt_movie_review_job(job_id):
+    """Returns result of review job started by POST /api/nyt-movie-review.
+
+    Returns:
+        JSON object: while job is pending, status code 202 with fields
+        'success' (None), 'job_id' and 'status' ('pending'); once done, what
+        POST /api/nyt-movie-review would have returned. Status code 404 if
+        job does not exist or expired.
+    """
+    if not current_user.is_authenticated:
+        err_message = "Current user not authenticated."
+        return {'success': False, 'err_message': err_message}, 401
+
+    job = reviewjobs.jobs.get(job_id)
+    if job is None:
+        err_message = "Review job not found: it may have expired."
+        return {'success': False, 'err_message': err_message}, 404
+
+    if job['status'] == reviewjobs.PENDING:
+        return ({'success': None, 'job_id': job_id, 'status': job['status']}, 202,
+                {'Retry-After': '1'})
+
+    return job['result']
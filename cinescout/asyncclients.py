@@ -0,0 +1,233 @@
+"""Asyncio clients of external movie APIs, for callers that keep many
+upstream calls in flight at once, e.g. reviewbatch fetching the TMDB data of
+the films it is about to resolve:
+
+    results = await asyncio.gather(*(AsyncTmdbMovie.get_movie_info_by_id(id)
+                                     for id in tmdb_ids))
+
+Calls are made with aiohttp, over one session per API and event loop, so
+connections are kept alive between the calls a loop makes; a semaphore per
+API and loop caps how many of them are in flight at once. Sessions belong
+to the loop that made them: close them with close_sessions() before the
+loop is closed.
+
+AsyncTmdbMovie shares TmdbMovie's caches, local mirror and rate limiter,
+and returns the same result dictionaries.
+"""
+
+import os
+import asyncio
+import threading
+from collections import namedtuple
+
+import aiohttp
+
+from cinescout.movies import TmdbMovie
+from cinescout.cache import STALE
+from cinescout.ratelimit import RateLimited, retry_after_seconds, TMDB_MAX_WAIT
+
+# Max number of calls in flight per API and event loop.
+TMDB_MAX_CONCURRENCY = int(os.getenv('TMDB_MAX_CONCURRENCY', 10))
+
+# Http status code, deserialized JSON body (None if body is not JSON) and
+# headers of a response.
+ApiResponse = namedtuple('ApiResponse', ['status_code', 'data', 'headers'])
+
+
+class AsyncApiClient:
+    """Makes GET requests to an external API from coroutines, over a
+    session of the running event loop.
+
+    Attributes:
+        name: String identifying API, e.g. 'tmdb'.
+        max_concurrency: Integer representing max number of calls in flight
+                         per event loop.
+    """
+
+    def __init__(self, name, max_concurrency):
+        if max_concurrency < 1:
+            raise ValueError("At least one call must be allowed in flight.")
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self._reset()
+
+    def _reset(self):
+        """Forgets sessions; (session, semaphore) of each event loop."""
+        self._loops = {}
+        self._lock = threading.Lock()
+
+    def _session(self):
+        """Returns (session, semaphore) of the running event loop, made on
+        its first call."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # Loops closed without closing their session.
+            for closed in [other for other in self._loops if other.is_closed()]:
+                del self._loops[closed]
+
+            state = self._loops.get(loop)
+            if state is None or state[0].closed:
+                print(f"Creating aiohttp session for '{self.name}'...")
+                connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+                state = (aiohttp.ClientSession(connector=connector),
+                         asyncio.Semaphore(self.max_concurrency))
+                self._loops[loop] = state
+        return state
+
+    async def get(self, url, params=None):
+        """Makes GET request, once fewer than max_concurrency calls of the
+        running loop are in flight.
+
+        Args:
+            url: String representing url requested.
+            params: Dictionary of query parameters; those set to None are
+                    left out, as requests does.
+
+        Returns:
+            res: ApiResponse object.
+        """
+        params = {key: value for key, value in (params or {}).items() if value is not None}
+        session, semaphore = self._session()
+        async with semaphore:
+            async with session.get(url, params=params) as res:
+                try:
+                    data = await res.json(content_type=None)
+                except ValueError:
+                    data = None
+                return ApiResponse(res.status, data, res.headers)
+
+    async def close(self):
+        """Closes the running loop's session and its connections."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loops.pop(loop, None)
+        if state is not None:
+            await state[0].close()
+
+
+tmdb_client = AsyncApiClient('tmdb', TMDB_MAX_CONCURRENCY)
+
+
+async def close_sessions():
+    """Closes the running loop's sessions of every API."""
+    await tmdb_client.close()
+
+
+def _reset_after_fork():
+    """Forgets sessions inherited from a parent process; see sessions."""
+    tmdb_client._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class AsyncTmdbMovie:
+    """Coroutine versions of TmdbMovie's API methods; see TmdbMovie for
+    arguments and result dictionaries.
+
+    Unlike TmdbMovie's, concurrent calls for the same movie are not
+    coalesced, and reads of the local mirror block the loop.
+    """
+
+    @classmethod
+    async def _get(cls, path, params=None):
+        """Makes GET request to tmdb API over tmdb_client; see TmdbMovie._get.
+
+        Raises:
+            RateLimited: if the call would have been queued for over
+                         TMDB_MAX_WAIT seconds. No call is made.
+
+        Returns:
+            res: ApiResponse object.
+        """
+        params = dict(params or {})
+        params['api_key'] = TmdbMovie.api_key
+        url = TmdbMovie.api_base_url + path
+        limiter = TmdbMovie.rate_limiter
+
+        for attempt in range(TmdbMovie.max_retries + 1):
+            wait = limiter.reserve(max_wait=TMDB_MAX_WAIT)
+            if wait is None:
+                if attempt:
+                    # Return TMDB's own 429.
+                    break
+                raise RateLimited('tmdb', f"TMDB call to {path} would wait over "
+                                          f"{TMDB_MAX_WAIT} s in queue.")
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            res = await tmdb_client.get(url, params=params)
+            if res.status_code != 429:
+                limiter.record_success()
+                return res
+
+            wait = retry_after_seconds(res, default=2 ** attempt)
+            limiter.back_off(wait)
+            if wait > TMDB_MAX_WAIT:
+                break
+
+        return res
+
+    @classmethod
+    async def get_movie_info_by_id(cls, id):
+        """Returns movie's result dictionary; see TmdbMovie.get_movie_info_by_id."""
+        details, details_state = TmdbMovie.details_cache.lookup(id)
+        if details_state is None:
+            result = TmdbMovie._load_mirrored_movie_info(id)
+            if result is None:
+                result = await cls._fetch_movie_info(id)
+            return result
+
+        print(f"Movie data for movie_id={id} found in cache ({details_state}).")
+        if details_state == STALE:
+            TmdbMovie.details_cache.revalidate(id, lambda: TmdbMovie._load_movie_info(id))
+
+        providers, providers_state = TmdbMovie.providers_cache.lookup(id)
+        if providers_state is None:
+            providers = TmdbMovie._load_mirrored_providers(id)
+            if providers is None:
+                providers = await cls._fetch_providers(id)
+        elif providers_state == STALE and details_state != STALE:
+            TmdbMovie.providers_cache.revalidate(id, lambda: TmdbMovie._load_providers(id))
+
+        return {'success': True, 'status_code': 200,
+                'movie': TmdbMovie(providers=providers, **details)}
+
+    @classmethod
+    async def _fetch_movie_info(cls, id):
+        """Requests movie from TMDB; caches its details and providers. See
+        TmdbMovie._fetch_movie_info."""
+        print(f"Requesting movie data from TMDB api with movie_id={id}...")
+        try:
+            res = await cls._get(f"/movie/{id}",
+                                 params={"append_to_response": TmdbMovie.movie_info_append})
+        except RateLimited as err:
+            print(f"FAILED! movie_id={id}: {err}")
+            return {'success': False, 'status_code': err.status_code, 'movie': None}
+
+        if res.status_code != 200:
+            print(f"FAILED! movie_id={id}: status_code={res.status_code}")
+            return {'success': False, 'status_code': res.status_code, 'movie': None}
+
+        return {'success': True, 'status_code': 200,
+                'movie': TmdbMovie._store_movie_info(id, res.data)}
+
+    @classmethod
+    async def _fetch_providers(cls, id):
+        """Requests watch providers of movie from TMDB and caches them. See
+        TmdbMovie._fetch_providers."""
+        print(f"Requesting provider data from TMDB api with movie_id={id}...")
+        try:
+            res = await cls._get(f"/movie/{id}/watch/providers")
+        except RateLimited as err:
+            print(f"FAILED! movie_id={id}: {err}")
+            return {'stream': [], 'rent': []}
+
+        if res.status_code != 200:
+            print(f"FAILED! movie_id={id}: status_code={res.status_code}")
+            return {'stream': [], 'rent': []}
+
+        providers = TmdbMovie._extract_provider_data({'watch/providers': res.data})
+        TmdbMovie.providers_cache.set(id, providers)
+        return providers
@@ -0,0 +1,155 @@
+"""In-process caches for data fetched from external movie APIs."""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+# Entry states returned by TTLCache.lookup()
+FRESH = 'fresh'
+STALE = 'stale'
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries go stale after a
+    time-to-live (TTL).
+
+    Stale entries are not thrown away: callers may serve them while they
+    refresh them (stale-while-revalidate). Entries are only removed when
+    the cache is full, in least-recently-used order.
+
+    Attributes:
+        name: String used to identify cache in stats and log messages.
+        maxsize: Integer representing max number of entries kept.
+        ttl: Number of seconds an entry stays fresh by default.
+    """
+
+    def __init__(self, name, maxsize=256, ttl=300, timer=time.monotonic):
+        if maxsize < 1:
+            raise ValueError("Cache must be able to hold at least one entry.")
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._entries = OrderedDict()   # key => (value, expiry time)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._counters = {'hits': 0, 'stale_hits': 0, 'misses': 0,
+                          'evictions': 0, 'refreshes': 0}
+
+    def lookup(self, key):
+        """Gets cached value and whether it is fresh or stale.
+
+        Args:
+            key: Hashable object identifying entry.
+
+        Returns:
+            (value, state): state is FRESH or STALE; (None, None) on a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None, None
+
+            self._entries.move_to_end(key)
+            value, expires = entry
+            if self._timer() < expires:
+                self._counters['hits'] += 1
+                return value, FRESH
+
+            self._counters['stale_hits'] += 1
+            return value, STALE
+
+    def get(self, key, default=None):
+        """Returns cached value, fresh or stale, or default on a miss."""
+        value, state = self.lookup(key)
+        return default if state is None else value
+
+    def set(self, key, value, ttl=None):
+        """Caches value, evicting least-recently-used entry if cache is full.
+
+        Args:
+            key: Hashable object identifying entry.
+            value: Object to cache. It is shared by all readers, so it should
+                   not be modified once cached.
+            ttl: Number of seconds entry stays fresh; defaults to cache's ttl.
+        """
+        expires = self._timer() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def pop(self, key, default=None):
+        """Removes entry from cache and returns its value."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        """Removes all entries; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+
+    def revalidate(self, key, loader):
+        """Refreshes entry in the background unless already being refreshed.
+
+        Args:
+            key: Hashable object identifying entry.
+            loader: Function taking no arguments that fetches the data anew
+                    and updates the cache itself. Exceptions are logged and
+                    otherwise ignored so the stale entry keeps being served.
+
+        Returns:
+            True if a refresh was scheduled; False if one is already running.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._counters['refreshes'] += 1
+
+        def refresh():
+            try:
+                loader()
+            except Exception as err:
+                print(f"Refreshing '{self.name}' entry {key!r} failed: {err}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        _refresh_executor.submit(refresh)
+        return True
+
+    def stats(self):
+        """Returns dictionary of hit/miss/eviction counters and current size."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['size'] = len(self._entries)
+        stats['maxsize'] = self.maxsize
+        return stats
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+def _build_refresh_executor():
+    """Builds executor that runs background refreshes of stale entries."""
+    global _refresh_executor
+    # Refreshes are few and short: a couple of threads are plenty.
+    _refresh_executor = ThreadPoolExecutor(max_workers=2,
+                                           thread_name_prefix='cache-refresh')
+
+
+_build_refresh_executor()
+
+# Threads do not survive a fork: forked workers need their own executor.
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_build_refresh_executor)
@@ -0,0 +1,358 @@
+"""Prebuilt snapshot of the Criterion catalog served by /api/criterion-films.
+
+Building the catalog's JSON takes a query of films in criterion_films,
+one of their directors, and the serialization of every film. The snapshot does it once: it keeps the
+JSON body, its gzip-compressed form and an ETag of its content in memory,
+so the API serves bytes, or 304 Not Modified, without touching the
+database.
+
+The snapshot is thrown away whenever a session commits changes to films,
+criterion_films, persons or film_persons, or these tables are created or
+dropped, and rebuilt by the next request. Changes made by other
+processes, e.g. scripts/film_data.py, can't be seen: the snapshot is also
+rebuilt once CATALOG_SNAPSHOT_TTL seconds old, keeping its ETag if the
+catalog has not changed.
+
+Tables showing the catalog a page at a time ask catalog_page for each
+page instead: a query sorted, searched and limited by the database.
+"""
+
+import os
+import json
+import gzip
+import time
+import hashlib
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, selectinload
+
+from cinescout import db
+from cinescout.singleflight import SingleFlight
+from cinescout.models import Film, CriterionFilm, Person, FilmPerson
+
+# Max number of seconds a snapshot is served before it is rebuilt.
+CATALOG_SNAPSHOT_TTL = int(os.getenv('CATALOG_SNAPSHOT_TTL', 3600))
+
+# Models and tables the catalog is built from.
+CATALOG_MODELS = (Film, CriterionFilm, Person, FilmPerson)
+CATALOG_TABLES = frozenset(model.__tablename__ for model in CATALOG_MODELS)
+
+
+def film_result(film):
+    """Returns dictionary representing film in the catalog's JSON. Film's
+    directors should be loaded along with it, see catalog_films."""
+    return {'title': film.title,
+            'year': film.year,
+            'directors': [person.name for person in film.directors],
+            'director_ids': [person.id for person in film.directors],
+            'tmdb_id': film.tmdb_id}
+
+
+def catalog_films():
+    """Returns query of the catalog's films, their directors loaded along in
+    one more query."""
+    return (db.session.query(Film)
+            .filter(db.exists().where(CriterionFilm.film_id == Film.id))
+            .options(selectinload(Film.directors)))
+
+
+def catalog_payload():
+    """Returns tuple of the catalog's JSON object, as documented in
+    api.criterion.get_criterion_films, and its HTTP status code."""
+    criterion_films = catalog_films().all()
+
+    if not criterion_films:
+        return {'success': False,
+                'err_message': "Query for Criterion films returned no films."}, 404
+
+    results = [film_result(film) for film in criterion_films]
+    return {'success': True, 'num_results': len(results), 'results': results}, 200
+
+
+class Snapshot:
+    """Catalog's response, ready to be served.
+
+    Attributes:
+        status_code: Integer representing HTTP status of response.
+        num_results: Integer representing number of films in catalog.
+        body: Bytes of JSON body.
+        gzipped: Bytes of gzip-compressed JSON body.
+        etag: String representing ETag of body's content, unquoted.
+        built_at: Time snapshot was built at, per timer.
+    """
+    __slots__ = ('status_code', 'num_results', 'body', 'gzipped', 'etag', 'built_at')
+
+    def __init__(self, payload, status_code, built_at):
+        self.status_code = status_code
+        self.num_results = payload.get('num_results', 0)
+        self.body = json.dumps(payload, separators=(',', ':')).encode()
+        # mtime=0: same bytes for same content.
+        self.gzipped = gzip.compress(self.body, compresslevel=9, mtime=0)
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.built_at = built_at
+
+
+class CatalogSnapshot:
+    """Thread-safe holder of the catalog's snapshot, rebuilt on demand.
+
+    Once a snapshot is older than ttl, one request rebuilds it while the
+    others keep being served it. Requests finding no snapshot at all wait
+    on a single build.
+
+    Attributes:
+        ttl: Max number of seconds a snapshot is served.
+    """
+
+    def __init__(self, ttl=CATALOG_SNAPSHOT_TTL, timer=time.monotonic):
+        self.ttl = ttl
+        self._timer = timer
+        self._snapshot = None
+        # Bumped by each invalidation; snapshots built meanwhile are not kept.
+        self._generation = 0
+        # Whether a request is rebuilding the snapshot, expired.
+        self._refreshing = False
+        self._builds = SingleFlight('catalog')
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'stale_hits': 0, 'builds': 0, 'invalidations': 0}
+
+    def invalidate(self):
+        """Throws snapshot away; next get() rebuilds it."""
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+            self._counters['invalidations'] += 1
+
+    def get(self):
+        """Returns current Snapshot, building it if there is none or it is
+        older than ttl. Must be called within an app context."""
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and self._timer() - snapshot.built_at < self.ttl:
+                self._counters['hits'] += 1
+                return snapshot
+            if snapshot is not None and self._refreshing:
+                # Expired, but another request is rebuilding it.
+                self._counters['stale_hits'] += 1
+                return snapshot
+            refreshing = self._refreshing = snapshot is not None
+            generation = self._generation
+
+        try:
+            # Builds after an invalidation don't wait on one from before it.
+            return self._builds.do(generation, self._build, generation)
+        finally:
+            if refreshing:
+                with self._lock:
+                    self._refreshing = False
+
+    def _build(self, generation):
+        payload, status_code = catalog_payload()
+        snapshot = Snapshot(payload, status_code, self._timer())
+        with self._lock:
+            self._counters['builds'] += 1
+            if generation == self._generation:
+                self._snapshot = snapshot
+        print(f"Catalog snapshot built: {snapshot.num_results} films, "
+              f"{len(snapshot.body)} bytes, {len(snapshot.gzipped)} gzipped.")
+        return snapshot
+
+    def stats(self):
+        """Returns dictionary of hit/stale hit/build/invalidation counters."""
+        with self._lock:
+            return dict(self._counters)
+
+
+snapshot = CatalogSnapshot()
+
+
+# ============================ Pages ==================================
+# Tables paging through the catalog ask for one page at a time, sorted and
+# searched by the database. Orders by year and title walk one of the
+# indexes of films, (year, id) or (lower(title), id), so a page reads about
+# start + length index entries, whatever the catalog's size. Order by
+# director sorts films by the normalized name of their first-credited
+# director, looked up through film_persons' primary key.
+# Searches and director filters read ranges of the indexes of titles,
+# persons' names and film_persons, then sort the films found.
+
+# Columns pages can be sorted by, in the order of the browse page's table.
+ORDER_COLUMNS = ('title', 'year', 'directors')
+
+# Max number of films in a page.
+MAX_PAGE_LENGTH = 100
+
+
+def _sort_key(column):
+    if column == 'year':
+        return Film.year
+    if column == 'title':
+        return db.func.lower(Film.title)
+    # Films without directors first.
+    return (db.select(Person.name_key)
+            .join(FilmPerson, FilmPerson.person_id == Person.id)
+            .where(FilmPerson.film_id == Film.id, FilmPerson.role == 'director')
+            .order_by(FilmPerson.position).limit(1)
+            .correlate(Film).scalar_subquery())
+
+
+def _starts_with(column, term):
+    """Returns filter of rows where column starts with lowercase term,
+    ignoring case; a range of the index of lower(column)."""
+    # First string sorting after every string starting with term.
+    upper = term[:-1] + chr(ord(term[-1]) + 1)
+    return db.and_(db.func.lower(column) >= term, db.func.lower(column) < upper)
+
+
+def _directed_by(person_id):
+    """Returns filter of films directed by person of person_id; a range of
+    the index of film_persons by person."""
+    return Film.id.in_(db.select(FilmPerson.film_id)
+                       .where(FilmPerson.person_id == person_id, FilmPerson.role == 'director'))
+
+
+def _prefix_filter(term):
+    """Returns filter of films whose title, or name of one of whose
+    directors, starts with term, ignoring case."""
+    return db.or_(_starts_with(Film.title, term),
+                  Film.id.in_(db.select(FilmPerson.film_id)
+                              .join(Person, Person.id == FilmPerson.person_id)
+                              .where(FilmPerson.role == 'director',
+                                     _starts_with(Person.name, term))))
+
+
+def catalog_page(start=0, length=MAX_PAGE_LENGTH, order='year', descending=False, search='',
+                 director_id=None):
+    """Returns a page of the catalog's films.
+
+    Args:
+        start: Integer representing index of page's first film.
+        length: Integer representing max number of films in page, at most
+            MAX_PAGE_LENGTH.
+        order: String representing column films are sorted by; one of
+            ORDER_COLUMNS. Ties are sorted by id, so pages never overlap.
+        descending: Boolean; whether to sort from last to first.
+        search: String; only films whose title, or name of one of whose
+            directors, starts with it, ignoring case, are paged through.
+            Empty for all films.
+        director_id: Integer; only films directed by person of this id
+            are paged through. None for all films.
+
+    Returns:
+        Dictionary with the following fields:
+            'records_total': Integer representing number of films in catalog.
+            'records_filtered': Integer representing number of films
+                matching search.
+            'results': List of dictionaries representing page's films, as
+                returned by film_result.
+    """
+    if order not in ORDER_COLUMNS:
+        raise ValueError(f"Can't sort catalog by {order!r}.")
+    length = max(0, min(length, MAX_PAGE_LENGTH))
+
+    query = catalog_films()
+    # Films, not criterion_films rows: a film may have several spine numbers.
+    records_total = query.order_by(None).count()
+
+    term = search.strip().lower()
+    if term:
+        query = query.filter(_prefix_filter(term))
+    if director_id is not None:
+        query = query.filter(_directed_by(director_id))
+    if term or director_id is not None:
+        records_filtered = query.order_by(None).count()
+    else:
+        records_filtered = records_total
+
+    sort_keys = (_sort_key(order), Film.id)
+    if descending:
+        sort_keys = tuple(key.desc() for key in sort_keys)
+    films = query.order_by(*sort_keys).offset(max(0, start)).limit(length).all()
+
+    return {'records_total': records_total,
+            'records_filtered': records_filtered,
+            'results': [film_result(film) for film in films]}
+
+
+# =========================== Changes =================================
+# Sessions note the films and persons they wrote to catalog tables, and
+# once they commit, subscribers are told which: the snapshot, thrown away,
+# and catalogengine's engine, reloading them. Bulk statements on catalog
+# tables can't say which rows they wrote, nor can tables created or
+# dropped: subscribers are then told the whole catalog changed.
+
+_subscribers = []
+
+
+def on_catalog_changed(callback):
+    """Registers callback, called as callback(film_ids, person_ids) once a
+    session commits changes to catalog tables. film_ids is a set of ids of
+    films whose rows, or criterion_films or film_persons rows, changed, and
+    person_ids one of persons whose rows changed; both are None if the
+    whole catalog may have changed. Returns callback, for use as decorator."""
+    _subscribers.append(callback)
+    return callback
+
+
+def _notify(film_ids, person_ids):
+    for callback in _subscribers:
+        callback(film_ids, person_ids)
+
+
+@on_catalog_changed
+def _invalidate_snapshot(film_ids, person_ids):
+    snapshot.invalidate()
+
+
+def _film_id(obj):
+    if isinstance(obj, Film):
+        return obj.id
+    if isinstance(obj, (CriterionFilm, FilmPerson)):
+        return obj.film_id
+    return None
+
+
+@event.listens_for(Session, 'after_flush')
+def _note_catalog_flush(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        film_id = _film_id(obj)
+        if film_id is not None:
+            session.info.setdefault('catalog_films', set()).add(film_id)
+        elif isinstance(obj, Person):
+            session.info.setdefault('catalog_persons', set()).add(obj.id)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _note_catalog_statement(orm_execute_state):
+    # Bulk INSERT/UPDATE/DELETE statements bypass the flush.
+    if orm_execute_state.is_select:
+        return
+    table = getattr(orm_execute_state.statement, 'table', None)
+    if getattr(table, 'name', None) in CATALOG_TABLES:
+        orm_execute_state.session.info['catalog_rewritten'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_on_commit(session):
+    film_ids = session.info.pop('catalog_films', set())
+    person_ids = session.info.pop('catalog_persons', set())
+    if session.info.pop('catalog_rewritten', False):
+        _notify(None, None)
+    elif film_ids or person_ids:
+        _notify(film_ids, person_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_on_rollback(session):
+    for key in ('catalog_films', 'catalog_persons', 'catalog_rewritten'):
+        session.info.pop(key, None)
+
+
+def _notify_on_ddl(table, connection, **kwargs):
+    _notify(None, None)
+
+
+# Tables created or dropped, e.g. by db.create_all() or db.drop_all().
+for _table in (model.__table__ for model in CATALOG_MODELS):
+    event.listen(_table, 'after_create', _notify_on_ddl)
+    event.listen(_table, 'after_drop', _notify_on_ddl)
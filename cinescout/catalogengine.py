@@ -0,0 +1,346 @@
+"""In-memory, columnar copy of the Criterion catalog for faceted queries.
+
+The engine holds the catalog's films as NumPy arrays: film id, release
+year, TMDB id and spine number, with directors integer-coded and their
+credits kept as two parallel arrays (film's row, director's code). Faceted
+filters (decade, year range, director), counts per decade and per
+director, and sorted slices are vectorized operations over these arrays,
+answered in microseconds without querying the database.
+
+The engine is built from the films, criterion_films, film_persons and
+persons tables on first use. Sessions committing changes to them have only
+the films they touched reloaded, and spliced into the arrays; persons
+renamed only have their names reloaded. Bulk statements on these tables,
+and tables created or dropped, make the next query rebuild it all. Like
+the catalog snapshot, it can't see changes made by other processes: it is
+also rebuilt once CATALOG_ENGINE_TTL seconds old.
+"""
+
+import os
+import time
+import threading
+
+import numpy as np
+
+from cinescout import db, catalog
+from cinescout.models import Film, CriterionFilm, Person, FilmPerson, normalize_name
+
+# Max number of seconds the engine is used before it is rebuilt.
+CATALOG_ENGINE_TTL = int(os.getenv('CATALOG_ENGINE_TTL', 3600))
+
+# Films reloaded at once, beyond which the engine is rebuilt instead.
+MAX_INCREMENTAL_FILMS = 200
+
+# Columns films can be sorted by.
+ORDER_COLUMNS = ('year', 'title', 'directors', 'spine_num')
+
+# Stands for missing TMDB ids and spine numbers in arrays.
+MISSING = -1
+
+
+class _Columns:
+    """Catalog's films as arrays, one row per film, plus their credits.
+
+    Attributes:
+        film_ids, years, tmdb_ids, spine_nums: Integer arrays of films.
+        titles: Object array of films' titles.
+        credit_rows, credit_codes: Integer arrays; director of code
+            credit_codes[i] directed film of row credit_rows[i]. Credits
+            are in films' credit order.
+    """
+    __slots__ = ('film_ids', 'years', 'tmdb_ids', 'spine_nums', 'titles',
+                 'credit_rows', 'credit_codes', '_orders')
+
+    def __init__(self, film_ids, years, tmdb_ids, spine_nums, titles,
+                 credit_rows, credit_codes):
+        self.film_ids = film_ids
+        self.years = years
+        self.tmdb_ids = tmdb_ids
+        self.spine_nums = spine_nums
+        self.titles = titles
+        self.credit_rows = credit_rows
+        self.credit_codes = credit_codes
+        # Rows in order of each column, sorted when first needed.
+        self._orders = {}
+
+    def __len__(self):
+        return len(self.film_ids)
+
+    def order(self, column, name_keys=None):
+        """Returns array of rows sorted by column, ties by film id.
+
+        Films are sorted by directors as catalog.catalog_page sorts them:
+        by the name_keys entry of the code of their first-credited
+        director, films without directors first.
+        """
+        if column not in self._orders:
+            if column == 'title':
+                keys = np.char.lower(self.titles.astype(str))
+            elif column == 'directors':
+                keys = np.full(len(self), '', dtype=object)
+                # Credits are in films' credit order: first of each row's.
+                rows, first = np.unique(self.credit_rows, return_index=True)
+                keys[rows] = name_keys[self.credit_codes[first]]
+                keys = keys.astype(str)
+            elif column == 'spine_num':
+                # Films without a number last.
+                keys = np.where(self.spine_nums == MISSING, np.iinfo(np.int64).max,
+                                self.spine_nums)
+            else:
+                keys = self.years
+            self._orders[column] = np.lexsort((self.film_ids, keys))
+        return self._orders[column]
+
+
+class CatalogEngine:
+    """Thread-safe, in-memory engine answering faceted queries of the
+    catalog. Queries must be made within an app context.
+
+    Attributes:
+        ttl: Max number of seconds engine is used before it is rebuilt.
+    """
+
+    def __init__(self, ttl=CATALOG_ENGINE_TTL, timer=time.monotonic):
+        self.ttl = ttl
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._columns = None
+        self._built_at = None
+        # Directors' codes by person id; their person ids and names by code.
+        self._codes = {}
+        self._person_ids = []
+        self._names = []
+        # Codes in order of names, sorted when first needed.
+        self._by_name = None
+        # Changes committed since engine was last brought up to date.
+        self._changed_films = set()
+        self._changed_persons = set()
+        self._counters = {'builds': 0, 'updates': 0, 'films_reloaded': 0}
+
+    # **** CHANGES ****
+
+    def invalidate(self):
+        """Throws engine away; next query rebuilds it."""
+        with self._lock:
+            self._columns = None
+
+    def films_changed(self, film_ids, person_ids=()):
+        """Notes films, and persons, whose rows changed; they are reloaded
+        by next query."""
+        with self._lock:
+            self._changed_films.update(film_ids)
+            self._changed_persons.update(person_ids)
+
+    # **** LOADING ****
+
+    def _code(self, person_id, name):
+        code = self._codes.get(person_id)
+        if code is None:
+            code = self._codes[person_id] = len(self._person_ids)
+            self._person_ids.append(person_id)
+            self._names.append(name)
+            self._by_name = None
+        return code
+
+    def _load(self, film_ids=None):
+        """Returns _Columns of catalog's films of film_ids, or of all
+        catalog's films if None, read from the database."""
+        spine_nums = (db.select(CriterionFilm.film_id,
+                                db.func.min(CriterionFilm.spine_num).label('spine_num'))
+                      .group_by(CriterionFilm.film_id).subquery())
+        films = (db.select(Film.id, Film.year, Film.tmdb_id, spine_nums.c.spine_num, Film.title)
+                 .join(spine_nums, spine_nums.c.film_id == Film.id).order_by(Film.id))
+        credits = (db.select(FilmPerson.film_id, Person.id, Person.name)
+                   .join(Person, Person.id == FilmPerson.person_id)
+                   .where(FilmPerson.role == 'director')
+                   .order_by(FilmPerson.film_id, FilmPerson.position))
+        if film_ids is not None:
+            films = films.where(Film.id.in_(film_ids))
+            credits = credits.where(FilmPerson.film_id.in_(film_ids))
+
+        rows = db.session.execute(films).all()
+        row_of = {row[0]: index for index, row in enumerate(rows)}
+        credit_rows, credit_codes = [], []
+        for film_id, person_id, name in db.session.execute(credits):
+            # Films not in the catalog have credits too.
+            if film_id in row_of:
+                credit_rows.append(row_of[film_id])
+                credit_codes.append(self._code(person_id, name))
+
+        def column(index):
+            return np.array([MISSING if row[index] is None else row[index] for row in rows],
+                            dtype=np.int64)
+
+        return _Columns(column(0), column(1), column(2), column(3),
+                        np.array([row[4] for row in rows], dtype=object),
+                        np.array(credit_rows, dtype=np.int64),
+                        np.array(credit_codes, dtype=np.int64))
+
+    def _build(self):
+        self._codes, self._person_ids, self._names, self._by_name = {}, [], [], None
+        self._columns = self._load()
+        self._built_at = self._timer()
+        self._changed_films.clear()
+        self._changed_persons.clear()
+        self._counters['builds'] += 1
+
+    def _update(self):
+        """Splices changed films into columns, and renames changed persons."""
+        columns, film_ids = self._columns, sorted(self._changed_films)
+        if film_ids:
+            reloaded = self._load(film_ids)
+            kept = ~np.isin(columns.film_ids, film_ids)
+            # Rows kept are renumbered: row i becomes new_rows[i].
+            new_rows = np.cumsum(kept) - 1
+            kept_credits = kept[columns.credit_rows]
+            offset = int(kept.sum())
+            columns = _Columns(
+                *(np.concatenate((old[kept], new)) for old, new in (
+                    (columns.film_ids, reloaded.film_ids), (columns.years, reloaded.years),
+                    (columns.tmdb_ids, reloaded.tmdb_ids),
+                    (columns.spine_nums, reloaded.spine_nums),
+                    (columns.titles, reloaded.titles))),
+                np.concatenate((new_rows[columns.credit_rows[kept_credits]],
+                                reloaded.credit_rows + offset)),
+                np.concatenate((columns.credit_codes[kept_credits], reloaded.credit_codes)))
+            self._counters['films_reloaded'] += len(film_ids)
+
+        person_ids = [person_id for person_id in self._changed_persons if person_id in self._codes]
+        if person_ids:
+            for person_id, name in db.session.execute(
+                    db.select(Person.id, Person.name).where(Person.id.in_(person_ids))):
+                self._names[self._codes[person_id]] = name
+            self._by_name = None
+            columns._orders.pop('directors', None)
+
+        self._columns = columns
+        self._changed_films.clear()
+        self._changed_persons.clear()
+        self._counters['updates'] += 1
+
+    def _current(self):
+        """Returns up-to-date columns; called with lock held."""
+        if (self._columns is None or self._timer() - self._built_at >= self.ttl
+                or len(self._changed_films) > MAX_INCREMENTAL_FILMS):
+            self._build()
+        elif self._changed_films or self._changed_persons:
+            self._update()
+        return self._columns
+
+    # **** QUERIES ****
+
+    def _mask(self, columns, decade=None, year_min=None, year_max=None, director_id=None):
+        mask = np.ones(len(columns), dtype=bool)
+        if decade is not None:
+            mask &= columns.years // 10 == decade // 10
+        if year_min is not None:
+            mask &= columns.years >= year_min
+        if year_max is not None:
+            mask &= columns.years <= year_max
+        if director_id is not None:
+            directed = np.zeros(len(columns), dtype=bool)
+            code = self._codes.get(director_id)
+            if code is not None:
+                directed[columns.credit_rows[columns.credit_codes == code]] = True
+            mask &= directed
+        return mask
+
+    def count(self, **filters):
+        """Returns number of films matching filters.
+
+        Args:
+            decade: Integer; films released in decade starting that year, e.g. 1960.
+            year_min, year_max: Integers; films released within these years.
+            director_id: Integer; films directed by person of this id.
+        """
+        with self._lock:
+            columns = self._current()
+            return int(self._mask(columns, **filters).sum())
+
+    def films(self, order='year', descending=False, start=0, length=None, **filters):
+        """Returns list of dictionaries representing films matching filters,
+        sorted by order, from start and at most length of them.
+
+        Dictionaries have the fields of catalog.film_result, and
+        'spine_num': Integer of film's spine number, or None. Filters are
+        those of count.
+        """
+        if order not in ORDER_COLUMNS:
+            raise ValueError(f"Can't sort catalog by {order!r}.")
+        with self._lock:
+            columns = self._current()
+            mask = self._mask(columns, **filters)
+            name_keys = None
+            if order == 'directors':
+                name_keys = np.array([normalize_name(name) for name in self._names], dtype=object)
+            rows = columns.order(order, name_keys)
+            if descending:
+                rows = rows[::-1]
+            rows = rows[mask[rows]]
+            stop = None if length is None else start + length
+            rows = rows[start:stop]
+
+            # Credits of the slice's films, in credit order.
+            credited = np.isin(columns.credit_rows, rows)
+            directors = {}
+            for row, code in zip(columns.credit_rows[credited].tolist(),
+                                 columns.credit_codes[credited].tolist()):
+                directors.setdefault(row, []).append(code)
+
+            results = []
+            for row in rows.tolist():
+                codes = directors.get(row, [])
+                tmdb_id, spine_num = int(columns.tmdb_ids[row]), int(columns.spine_nums[row])
+                results.append({'title': columns.titles[row],
+                                'year': int(columns.years[row]),
+                                'directors': [self._names[code] for code in codes],
+                                'director_ids': [self._person_ids[code] for code in codes],
+                                'tmdb_id': None if tmdb_id == MISSING else tmdb_id,
+                                'spine_num': None if spine_num == MISSING else spine_num})
+            return results
+
+    def facets(self, top_directors=10, **filters):
+        """Returns counts of films matching filters, as a dictionary:
+            'num_results': Integer; number of films.
+            'decades': Dictionary of numbers of films by decade, e.g. {1960: 12}.
+            'directors': List of dictionaries of the top_directors persons
+                having directed the most films, each with their 'id',
+                'name' and 'count' of films; ties by name.
+        Filters are those of count.
+        """
+        with self._lock:
+            columns = self._current()
+            mask = self._mask(columns, **filters)
+            decades, decade_counts = np.unique(columns.years[mask] // 10 * 10, return_counts=True)
+            codes = columns.credit_codes[mask[columns.credit_rows]]
+            counts = np.bincount(codes, minlength=len(self._names))
+            if self._by_name is None:
+                self._by_name = np.array(sorted(range(len(self._names)),
+                                                key=self._names.__getitem__), dtype=np.int64)
+            # Most films first, ties in order of names.
+            top = self._by_name[np.argsort(-counts[self._by_name], kind='stable')]
+            top = top[counts[top] > 0].tolist()
+            return {'num_results': int(mask.sum()),
+                    'decades': dict(zip(decades.tolist(), decade_counts.tolist())),
+                    'directors': [{'id': self._person_ids[code], 'name': self._names[code],
+                                   'count': int(counts[code])}
+                                  for code in top[:top_directors]]}
+
+    def stats(self):
+        """Returns dictionary of build/update counters and number of films."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['num_films'] = 0 if self._columns is None else len(self._columns)
+            return stats
+
+
+engine = CatalogEngine()
+
+
+# Told of changes committed to catalog tables; see catalog module.
+@catalog.on_catalog_changed
+def _update_engine(film_ids, person_ids):
+    if film_ids is None:
+        engine.invalidate()
+    else:
+        engine.films_changed(film_ids, person_ids)
@@ -7,6 +7,7 @@ from cinescout.models import User, Film, CriterionFilm, FilmListItem
 from cinescout.main.forms import  SearchByTitleForm, SearchByPersonForm
 from cinescout.movies import TmdbMovie
 from cinescout.reviews import NytMovieReview
+from cinescout import catalog
 
 from cinescout.main import bp
 
@@ -42,8 +43,9 @@ def get_user_movie_list():
 @bp.route("/browse")
 def browse():
     """Displays list of critically-acclaimed movies."""
-    # Ensure that film query works alright before trying to render anything on the template.
-    if db.session.query(Film).join(CriterionFilm).all():
+    # Ensure that there are films to list before trying to render anything on the template.
+    # Snapshot is the one /api/criterion-films serves, so usually no query is needed.
+    if catalog.snapshot.get().num_results:
         return render_template("browse.html", criterion_films_exist=True)
     else:
         err_message = f"Unable to load Criterion films: error fetching results from database."
@@ -178,9 +180,10 @@ def filmography(person_id):
 
     name = request.args.get("name")
 
-    print(f"Getting filmography data for {name}...")
+    print(f"Getting filmography and bio data for {name}...")
 
-    filmography_data = TmdbMovie.get_movie_list_by_person_id(person_id)
+    # One API call for both the person's credits and bio data.
+    filmography_data = TmdbMovie.get_filmography_by_person_id(person_id)
 
     if not filmography_data['success']:
         # Bad HTTP response from API call or...
@@ -193,18 +196,9 @@ def filmography(person_id):
                                      crew=None,
                                      no_films=True)
 
-
-    print(f"Getting person bio data for {name}...")
-    bio_data = TmdbMovie.get_bio_data_by_person_id(person_id)
-
-    if not bio_data['success']:
-        # Bad HTTP response from API call or...
-        if bio_data['status_code'] != 200:
-            abort(bio_data['status_code'])
-
     # Double checking whether person queried is actually who we're looking
     # for.
-    tmdb_person_name = bio_data['name']
+    tmdb_person_name = filmography_data['name']
 
     # Possibility name erased from url. In that case, just set it to the
     # name from the query.
@@ -227,7 +221,7 @@ def filmography(person_id):
                              crew=filmography_data.get('crew'),
                              no_films=False,
                              name=name,
-                             person_image_url=bio_data.get('image_url'))
+                             person_image_url=filmography_data.get('image_url'))
 
 
 @bp.route("/about", methods=['GET'])
@@ -1,5 +1,10 @@
 """Implements database table models via SqlAlchemy ORM."""
 
+from datetime import datetime
+from itertools import chain
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, validates
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 
@@ -49,22 +54,133 @@ class Film(db.Model):
     # appear in any children tables either (e.g. CriterionFilm). 
     criterionfilms = db.relationship("CriterionFilm", cascade="all, delete-orphan")
 
+    # Orders and searches of the catalog's pages; see catalog.catalog_page.
+    __table_args__ = (db.Index('ix_films_year', 'year', 'id'),
+                      db.Index('ix_films_title', db.func.lower(title), id))
+
+    # People credited in film, deleted along with it.
+    credits = db.relationship("FilmPerson", cascade="all, delete-orphan")
+
+    # Film's directors, in credits' order. Film.director is the text they
+    # are credited from, e.g. "Fred Newmeyer & Sam Taylor"; see
+    # _credit_directors.
+    directors = db.relationship("Person", secondary="film_persons", order_by="FilmPerson.position",
+                                primaryjoin="and_(Film.id == FilmPerson.film_id, "
+                                            "FilmPerson.role == 'director')",
+                                viewonly=True)
+
+    def credit_directors(self, persons):
+        """Credits list of Person objects, in order, as film's directors."""
+        self.credits = ([credit for credit in self.credits if credit.role != 'director']
+                        + [FilmPerson(person=person, role='director', position=position)
+                           for position, person in enumerate(persons)])
+
     def __repr__(self):
         return f"{self.id}, {self.title}, {self.year}, {self.tmdb_id}, {self.director}"
 
 
+def normalize_name(name):
+    """Returns key persons are looked up by: name stripped, its spaces
+    collapsed and case folded, e.g. "jean-luc godard" for " Jean-Luc  Godard"."""
+    return ' '.join(name.split()).casefold()
+
+
+def split_directors(director):
+    """Returns list of names of directors in a film's director text,
+    e.g. ["Fred Newmeyer", "Sam Taylor"] for "Fred Newmeyer & Sam Taylor"."""
+    # A name listed twice, whatever its case or spacing, is credited once.
+    names = {}
+    for name in (director.split('&') if director else []):
+        if name.strip():
+            names.setdefault(normalize_name(name), name.strip())
+    return list(names.values())
+
+
+class Person(db.Model):
+    """Model that represents people credited in films, e.g. directors."""
+
+    __tablename__ = "persons"
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(80), nullable=False)
+    # Name normalized by normalize_name; set along with name.
+    name_key = db.Column(db.String(80), index=True, unique=True, nullable=False)
+    tmdb_id = db.Column(db.Integer, index=True, unique=True, nullable=True)
+
+    # Searches by name, ignoring case.
+    __table_args__ = (db.Index('ix_persons_name', db.func.lower(name)),)
+
+    # Films directed by person, looked up through index of film_persons.
+    films = db.relationship("Film", secondary="film_persons", viewonly=True,
+                            primaryjoin="and_(Person.id == FilmPerson.person_id, "
+                                        "FilmPerson.role == 'director')")
+
+    @validates('name')
+    def _set_name_key(self, key, name):
+        self.name_key = normalize_name(name)
+        return name
+
+    def __repr__(self):
+        return f"{self.id}, {self.name}, tmdb_id: {self.tmdb_id}"
+
+
+class FilmPerson(db.Model):
+    """Model that represents a person's credit in a film, e.g. as director."""
+
+    __tablename__ = "film_persons"
+    film_id = db.Column(db.Integer, db.ForeignKey('films.id', ondelete='CASCADE'), primary_key=True)
+    person_id = db.Column(db.Integer, db.ForeignKey('persons.id', ondelete='CASCADE'), primary_key=True)
+    role = db.Column(db.String(16), primary_key=True, default='director')
+    # Order of person in film's credits for role.
+    position = db.Column(db.Integer, nullable=False, default=0)
+
+    person = db.relationship('Person')
+
+    # A person's films: primary key covers a film's persons.
+    __table_args__ = (db.Index('ix_film_persons_person', 'person_id', 'role', 'film_id'),)
+
+    def __repr__(self):
+        return f"film_id: {self.film_id}, person_id: {self.person_id}, {self.role} #{self.position}"
+
+
+@event.listens_for(Session, 'before_flush')
+def _credit_directors(session, flush_context, instances):
+    """Credits directors named in director text of films added or changed,
+    unless their credits were set too. Persons are looked up by normalized
+    name, and added, named as in the first film naming them, if not found."""
+    films = [obj for obj in chain(session.new, session.dirty) if isinstance(obj, Film)
+             and inspect(obj).attrs.director.history.has_changes()
+             and not inspect(obj).attrs.credits.history.has_changes()]
+    if not films:
+        return
+
+    keys = {normalize_name(name)
+            for name in chain.from_iterable(split_directors(film.director) for film in films)}
+    persons = {obj.name_key: obj for obj in session.new if isinstance(obj, Person)}
+    if keys:
+        with session.no_autoflush:
+            found = session.query(Person).filter(Person.name_key.in_(keys)).all()
+        for person in found:
+            persons.setdefault(person.name_key, person)
+
+    for film in films:
+        film.credit_directors([persons.setdefault(normalize_name(name), Person(name=name))
+                               for name in split_directors(film.director)])
+
+
 class CriterionFilm(db.Model):
     """Model that represents films from The Criterion Collection."""
 
     __tablename__ = "criterion_films"
     id = db.Column(db.Integer, primary_key=True)
-    film_id = db.Column(db.Integer, db.ForeignKey('films.id'), nullable=False)
+    film_id = db.Column(db.Integer, db.ForeignKey('films.id'), index=True, nullable=False)
+    # Film's number in the collection, as on its spine.
+    spine_num = db.Column(db.Integer, nullable=True)
     
     # Create a backref so foreign keys can show up in flask-admin.
     films = db.relationship('Film', backref=db.backref('CriterionFilm', lazy=True))
 
     def __repr__(self):
-        return f"{self.id}, film_id: {self.film_id}"
+        return f"{self.id}, film_id: {self.film_id}, spine_num: {self.spine_num}"
 
 
 class PersonalFilm(db.Model):
@@ -95,3 +211,43 @@ class FilmListItem(db.Model):
 
     def __repr__(self):
         return f"{self.id}, user_id: {self.user_id}, title: {self.title}, year: {self.year}, tmdb_id: {self.tmdb_id}, date: {self.date}, original title: {self.original_title}"
+
+
+class TmdbMirrorMovie(db.Model):
+    """Model that represents a local copy of a film's TMDB data: details,
+    credits and watch providers, as returned by /movie/{id}. Filled by
+    scripts/tmdb_mirror.py for every film in the catalog."""
+
+    __tablename__ = "tmdb_movies"
+    id = db.Column(db.Integer, primary_key=True)
+    tmdb_id = db.Column(db.Integer, index=True, unique=True, nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    synced_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"{self.id}, tmdb_id: {self.tmdb_id}, synced_at: {self.synced_at}"
+
+
+class NytReviewResult(db.Model):
+    """Model that represents the outcome of searching NYT for a film's review:
+    the review found, or that none was found."""
+
+    __tablename__ = "nyt_review_results"
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    original_title = db.Column(db.String(200), nullable=False)
+    release_year = db.Column(db.Integer, nullable=False)
+    release_date = db.Column(db.String(10), nullable=False)
+    found = db.Column(db.Boolean, nullable=False)
+    review_text = db.Column(db.Text, nullable=True)
+    critics_pick = db.Column(db.Boolean, nullable=True)
+    bullseye = db.Column(db.Boolean, nullable=True)
+    publication_date = db.Column(db.String(10), nullable=True)
+    resolved_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # One result per film, looked up by all four fields at once.
+    __table_args__ = (db.Index('ix_nyt_review_results_film', 'title', 'original_title',
+                               'release_year', 'release_date', unique=True),)
+
+    def __repr__(self):
+        return f"{self.id}, {self.title}, {self.release_year}, found: {self.found}, resolved_at: {self.resolved_at}"
@@ -1,13 +1,41 @@
 """Classes to handle api requests to external sources for movie information."""
 
 import os
-from datetime import datetime
+import sys
+from datetime import datetime, date
 from typing import Dict
 
-import requests
 from urllib import parse
 from textwrap import dedent
 
+from sqlalchemy.exc import SQLAlchemyError
+
+from cinescout import app, sessions
+from cinescout.models import TmdbMirrorMovie
+from cinescout.cache import TTLCache, STALE
+from cinescout.singleflight import SingleFlight
+from cinescout.ratelimit import (TokenBucket, RateLimited, retry_after_seconds,
+                                 TMDB_RATE_LIMIT, TMDB_BURST, TMDB_MAX_WAIT)
+
+# Max number of movies whose data is kept in memory, and number of seconds
+# before their details/credits and their watch providers go stale.
+MOVIE_CACHE_SIZE = int(os.getenv('TMDB_MOVIE_CACHE_SIZE', 1024))
+DETAILS_TTL = int(os.getenv('TMDB_DETAILS_TTL', 24 * 60 * 60))
+PROVIDERS_TTL = int(os.getenv('TMDB_PROVIDERS_TTL', 60 * 60))
+
+# Max number of title/person searches whose results are kept in memory, and
+# number of seconds before they go stale.
+SEARCH_CACHE_SIZE = int(os.getenv('TMDB_SEARCH_CACHE_SIZE', 512))
+SEARCH_TTL = int(os.getenv('TMDB_SEARCH_TTL', 60 * 60))
+
+
+def normalize_query(query):
+    """Returns search query in canonical form: surrounding whitespace
+    removed, inner whitespace collapsed and case folded, e.g.
+    '  Mulholland   DRIVE ' => 'mulholland drive'.
+    """
+    return " ".join(query.split()).casefold()
+
 
 class Person:
     """Class representing a person in the film industry.
@@ -17,6 +45,9 @@ class Person:
         name: String representing person's name
         known_for: what the person is best known for in the movie industry.
     """
+    # Many of these are kept in memory by the caches: no per-instance __dict__.
+    __slots__ = ('id', 'name', 'known_for')
+
     def __init__(self, id, name, known_for):
         self.id = id
         self.name = name
@@ -26,6 +57,64 @@ class Person:
         return f"name: {self.name}, id: {self.id}, known_for: {self.known_for}"
 
 
+class Credit:
+    """Class representing a person's credit on a film.
+
+    Credits can also be read like the dictionaries they replace, e.g.
+    credit['name'], so templates need not care which one they get.
+
+    Attributes:
+        id: Integer representing person in external database.
+        name: String representing person's name.
+    """
+    # A cached movie holds dozens to hundreds of these.
+    __slots__ = ('id', 'name')
+
+    def __init__(self, id=None, name=None):
+        self.id = id
+        self.name = name
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __repr__(self):
+        fields = ", ".join(f"{attr}={getattr(self, attr)!r}"
+                           for attr in Credit.__slots__ + self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class CastCredit(Credit):
+    """Class representing an actor's credit on a film.
+
+    Attributes:
+        character: String representing role played by actor.
+    """
+    __slots__ = ('character',)
+
+    def __init__(self, id=None, name=None, character=None):
+        Credit.__init__(self, id, name)
+        self.character = character
+
+
+class CrewCredit(Credit):
+    """Class representing a crew member's credit on a film.
+
+    Attributes:
+        job: String representing crew member's job, e.g. 'Director'.
+    """
+    __slots__ = ('job',)
+
+    def __init__(self, id=None, name=None, job=None):
+        Credit.__init__(self, id, name)
+        self.job = job
+
+
 class Movie:
     """Class representing a film.
 
@@ -36,7 +125,13 @@ class Movie:
         release_date: String representing date movie released.
         overview: String containing summary of movie's premise.
         runtime: Integer representing runtime of movie in minutes.
+        original_title: String representing film's orginal title.
+        filmcredits: Dictionary of tuples of CastCredit ('cast') and
+                     CrewCredit ('crew') objects.
     """
+    __slots__ = ('id', 'title', 'release_year', 'release_date', 'overview',
+                 'runtime', 'original_title', 'filmcredits')
+
     def __init__(self, id=None, title=None,
                 release_year=None, release_date=None, overview=None,
                 runtime=None, original_title=None, filmcredits=None):
@@ -199,11 +294,23 @@ class TmdbMovie(Movie):
         poster_base_url: String representing prefix url to access images of
                         movie posters.
         poster_size: String representing size of poster image.
-        delay: Integer representing delay before calling tmdb api.
         imdb_base_url: String representing prefix url to access IMDB movie
                        page.
         tmdb_base_url: String representing prefix url to access TMDB movie
                        page.
+        api_base_url: String representing prefix url of all tmdb API calls.
+        movie_info_append: String of sub-requests appended to a movie's
+                           details, e.g. its credits.
+        details_cache: TTLCache of movie details and credits, by tmdb id.
+        providers_cache: TTLCache of movie watch providers, by tmdb id.
+        search_cache: TTLCache of title and person search results, by kind
+                      of search and normalized query.
+        rate_limiter: TokenBucket spacing out all tmdb API calls made by
+                      the process; its stats() report queue wait times.
+        max_retries: Integer representing max number of times a call
+                     answered 429 Too Many Requests is retried.
+        inflight: SingleFlight coalescing concurrent identical movie and
+                  search requests into one upstream call.
 
     Attributes:
         id: Integer representing movie in external database.
@@ -223,13 +330,26 @@ class TmdbMovie(Movie):
         providers: Dictionary containing names of streaming and rental services to 
                    watch the film. 
     """
+    __slots__ = ('poster_full_url', 'imdb_full_url', 'tmdb_full_url',
+                 'providers')
+
     # Class attributes
     api_key = os.getenv('TMDB_API_KEY')
     poster_base_url = "https://image.tmdb.org/t/p/"
     poster_size = "w300"
-    delay = 1
     imdb_base_url = "https://www.imdb.com/title/"
     tmdb_base_url = "https://www.themoviedb.org/movie/"
+    api_base_url = "https://api.themoviedb.org/3"
+    movie_info_append = "credits,watch/providers"
+    details_cache = TTLCache('movie details', maxsize=MOVIE_CACHE_SIZE,
+                             ttl=DETAILS_TTL)
+    providers_cache = TTLCache('movie providers', maxsize=MOVIE_CACHE_SIZE,
+                               ttl=PROVIDERS_TTL)
+    search_cache = TTLCache('search results', maxsize=SEARCH_CACHE_SIZE,
+                            ttl=SEARCH_TTL)
+    rate_limiter = TokenBucket('tmdb', rate=TMDB_RATE_LIMIT, capacity=TMDB_BURST)
+    max_retries = 2
+    inflight = SingleFlight('tmdb')
 
     def __init__(self, id=None, title=None,
                  release_year=None, release_date=None, overview=None,
@@ -243,10 +363,61 @@ class TmdbMovie(Movie):
         self.tmdb_full_url = tmdb_full_url
         self.providers = providers
 
+    @classmethod
+    def _get(cls, path, params=None):
+        """Makes GET request to tmdb API over the process's pooled session.
+
+        Calls wait their turn in rate_limiter's queue. A call answered 429
+        makes the limiter back off for as long as TMDB asks (Retry-After),
+        then is retried, up to max_retries times. Calls refused by the
+        limiter itself do not make it back off.
+
+        Args:
+            path: String representing API endpoint, e.g. '/search/movie'.
+            params: Dictionary of query parameters; API key is added to them.
+
+        Raises:
+            RateLimited: if the call would have been queued for over
+                         TMDB_MAX_WAIT seconds. No call is made.
+
+        Returns:
+            res: requests.Response object. Its status code is 429 if TMDB
+                 still answered 429 once retries were used up, or if a retry
+                 would have been queued for over TMDB_MAX_WAIT seconds.
+        """
+        params = dict(params or {})
+        params['api_key'] = cls.api_key
+        url = cls.api_base_url + path
+
+        for attempt in range(cls.max_retries + 1):
+            if not cls.rate_limiter.acquire(max_wait=TMDB_MAX_WAIT):
+                if attempt:
+                    # Return TMDB's own 429.
+                    break
+                raise RateLimited('tmdb', f"TMDB call to {path} would wait over "
+                                          f"{TMDB_MAX_WAIT} s in queue.")
+
+            res = sessions.get_session('tmdb').get(url, params=params)
+            if res.status_code != 429:
+                cls.rate_limiter.record_success()
+                return res
+
+            # No point in queuing calls longer than they may wait.
+            wait = retry_after_seconds(res, default=2 ** attempt)
+            cls.rate_limiter.back_off(wait)
+            if wait > TMDB_MAX_WAIT:
+                break
+
+        return res
+
     @classmethod
     def get_movie_list_by_title(cls, title):
         """Returns dictionary containing list of movies and metadata.
 
+        Results are cached by normalized title (see normalize_query), so the
+        same search typed with different case or spacing is only sent to
+        TMDB once every SEARCH_TTL seconds.
+
         Args:
             title: String representing movie's title.
 
@@ -260,57 +431,73 @@ class TmdbMovie(Movie):
         # Setup return value
         result = {'success': True, 'status_code': 200, 'movies': None}
 
-        # Make API call
-        print(f"Calling tmdb API...", end="")
-        res = requests.get("https://api.themoviedb.org/3/search/movie",
-                            params={"api_key": cls.api_key,
-                                    "query": title.strip()})
+        status_code, movies = cls._cached_search('movie', title,
+                                                 cls._search_movies)
 
         # Check response status; check whether movie found
-        if res.status_code != 200:
-            print("FAILED!")
+        if status_code != 200:
             result['success'] = False
-            result['status_code'] = res.status_code
-            result['movies'] = None
+            result['status_code'] = status_code
             return result
 
-        print("SUCCESS!")
-        tmdb_data = res.json()
-
         # No dice.
-        if tmdb_data["total_results"] == 0:
+        if not movies:
             print(f"No movies found for movie titled '{title}'😭")
             result['success'] = False
-            result['movies'] = None
             return result
 
-        # Movies found!
-        if tmdb_data["total_results"] >= 1:
-            print("Movies found!")
-            movies = []
+        # Movies found! Ready to send!
+        result['movies'] = list(movies)
+        return result
 
-            # Process tmdb data to create Movie objects. Add them to list.
-            for movie in tmdb_data["results"]:
-                release_date = movie.get('release_date')
+    @classmethod
+    def _search_movies(cls, query):
+        """Requests movies matching title from TMDB.
+
+        Args:
+            query: String representing normalized movie title.
 
-                if movie.get('release_date') == None or movie.get('release_date') == '':
-                    release_date = '0001-01-01'
+        Returns:
+            (status_code, movies): Http response code of tmdb API call and
+                                   tuple of Movie objects sorted by release
+                                   date, descending; None if call failed.
+        """
+        # Make API call
+        print(f"Calling tmdb API...", end="")
+        try:
+            res = cls._get("/search/movie", params={"query": query})
+        except RateLimited as err:
+            print(f"FAILED! {err}")
+            return err.status_code, None
 
-                movie = Movie(id=movie.get('id'),
-                              title=movie.get('title'),
-                              original_title=movie.get('original_title'),
-                              overview=movie.get('overview'),
-                              release_date=release_date)
+        if res.status_code != 200:
+            print("FAILED!")
+            return res.status_code, None
 
-                movies.append(movie)
+        print("SUCCESS!")
+        tmdb_data = res.json()
 
-            # Sort movies by release date, descending order
-            movies.sort(key=lambda x: datetime.strptime(x.release_date, '%Y-%m-%d'),
-                     reverse=True)
+        # Process tmdb data to create Movie objects. Add them to list.
+        movies = []
+        for movie in tmdb_data["results"]:
+            release_date = movie.get('release_date')
 
-            # Ready to send!
-            result['movies'] = movies
-            return result
+            if movie.get('release_date') == None or movie.get('release_date') == '':
+                release_date = '0001-01-01'
+
+            movie = Movie(id=movie.get('id'),
+                          title=movie.get('title'),
+                          original_title=movie.get('original_title'),
+                          overview=movie.get('overview'),
+                          release_date=release_date)
+
+            movies.append(movie)
+
+        # Sort movies by release date, descending order
+        movies.sort(key=lambda x: cls._release_date_key(x.release_date),
+                    reverse=True)
+
+        return res.status_code, tuple(movies)
 
 
     @classmethod
@@ -319,6 +506,9 @@ class TmdbMovie(Movie):
         based on person's name and field they have worked in in the movie
         industry.
 
+        Everyone TMDB finds for a (normalized) name is cached, so filtering
+        the same search by another field does not call TMDB again.
+
         Args:
             name: String object representing person's name.
             known_for: String object representing person's occupation.
@@ -334,22 +524,56 @@ class TmdbMovie(Movie):
         # Setup return value
         result = {'success': True, 'status_code': 200, 'persons':[]}
 
-        # Get people data from TMDB
-        print(f"Requesting person data from TMDB api for '{name}', '{known_for}'...",
-              end="")
-        res = requests.get("https://api.themoviedb.org/3/search/person",
-                            params={"api_key": cls.api_key,
-                                    "query": name.strip()})
+        status_code, persons = cls._cached_search('person', name,
+                                                  cls._search_persons)
 
         # Check response status
-        # Check whether movie found
-        if res.status_code != 200:
-            print(f"FAILED! status_code={res.status_code}")
+        if status_code != 200:
             result['success'] = False
-            result['status_code'] = res.status_code
+            result['status_code'] = status_code
             result['persons'] = None
             return result
 
+        if not persons:
+            print(f"No results found for '{name}', '{known_for}'.")
+            result['success'] = False
+            result['persons'] = None
+            return result
+
+        # Keep everyone or just those working in specified field.
+        print("Building person list...")
+        if known_for == 'All':
+            result['persons'] = list(persons)
+        else:
+            result['persons'] = [person for person in persons
+                                 if person.known_for == known_for]
+
+        return result
+
+    @classmethod
+    def _search_persons(cls, query):
+        """Requests people matching name from TMDB, whatever their field.
+
+        Args:
+            query: String representing normalized name of person.
+
+        Returns:
+            (status_code, persons): Http response code of tmdb API call and
+                                    tuple of Person objects; None if call
+                                    failed.
+        """
+        # Get people data from TMDB
+        print(f"Requesting person data from TMDB api for '{query}'...", end="")
+        try:
+            res = cls._get("/search/person", params={"query": query})
+        except RateLimited as err:
+            print(f"FAILED! {err}")
+            return err.status_code, None
+
+        if res.status_code != 200:
+            print(f"FAILED! status_code={res.status_code}")
+            return res.status_code, None
+
         print("SUCCESS!")
         print("Extracting person data from from TMDB JSON response....")
 
@@ -358,37 +582,48 @@ class TmdbMovie(Movie):
 
         print(f"Number of tmdb person results found: {tmdb_persons_data['total_results']}")
 
-        if tmdb_persons_data["total_results"] == 0:
-            print(f"No results found for '{name}', '{known_for}'.")
-            result['success'] = False
-            result['persons'] = None
-            return result
+        # Load persons data into Person objects
+        persons = tuple(Person(id=person_data['id'],
+                               name=person_data['name'],
+                               known_for=person_data['known_for_department'])
+                        for person_data in tmdb_persons_data['results'])
 
-        # Load persons data into Person objects and append them to list
-        persons = []
+        return res.status_code, persons
 
-        # Create Person object for all TMDB results or just those working
-        # in specified field.
-        print("Building person list...")
-        if known_for == 'All':
-            # Add everyone.
-            for person_data in tmdb_persons_data['results']:
-                person = Person(id=person_data['id'],
-                                name=person_data['name'],
-                                known_for=person_data['known_for_department'])
-                persons.append(person)
-        else:
-            # Add only those with matching work field.
-            for person_data in tmdb_persons_data['results']:
-                if person_data['known_for_department'] == known_for:
-                    person = Person(id=person_data['id'],
-                                    name=person_data['name'],
-                                    known_for=person_data['known_for_department'])
-                    persons.append(person)
+    @classmethod
+    def _cached_search(cls, kind, query, search):
+        """Returns search results from cache, calling search on a miss.
 
-        result['persons'] = persons
+        Failed calls are not cached. Stale results are returned right away
+        and refreshed in the background.
 
-        return result
+        Args:
+            kind: String representing what is searched for, e.g. 'movie'.
+            query: String representing title or name typed by user.
+            search: Function taking normalized query and returning tuple of
+                    status code and results.
+
+        Returns:
+            (status_code, results): See search function. Shared by concurrent
+                                    callers on a miss: do not modify.
+        """
+        query = normalize_query(query)
+        key = (kind, query)
+
+        def load():
+            status_code, results = search(query)
+            if status_code == 200:
+                cls.search_cache.set(key, results)
+            return status_code, results
+
+        results, state = cls.search_cache.lookup(key)
+        if state is None:
+            return cls.inflight.do(('search',) + key, load)
+
+        print(f"Results of {kind} search for '{query}' found in cache ({state}).")
+        if state == STALE:
+            cls.search_cache.revalidate(key, load)
+        return 200, results
 
     @classmethod
     def get_bio_data_by_person_id(cls, person_id):
@@ -416,8 +651,13 @@ class TmdbMovie(Movie):
         # Make request.
         print(f"Requesting person data from TMDB api with person_id={person_id}...",
                 end="")
-        res = requests.get(f"https://api.themoviedb.org/3/person/{person_id}",
-                            params={"api_key": cls.api_key})
+        try:
+            res = cls._get(f"/person/{person_id}")
+        except RateLimited as err:
+            print(f"FAILED! {err}")
+            result['success'] = False
+            result['status_code'] = err.status_code
+            return result
 
 
         # Check request.
@@ -434,17 +674,34 @@ class TmdbMovie(Movie):
         # Deserialize JSON response object
         tmdb_person_data = res.json()
 
+        result['name'], result['image_url'] = cls._extract_bio_data(tmdb_person_data)
+
+        # return url or none.
+        return result
+
+    @classmethod
+    def _extract_bio_data(cls, tmdb_person_data):
+        """Extracts name and image url from TMDB JSON response for a person.
+
+        Args:
+            tmdb_person_data: Dictionary-like object representing a TMDB JSON
+                              response for a requested person.
+
+        Returns:
+            (name, image_url): Strings; image_url is None if TMDB has no
+                               image of person.
+        """
         # Useful to double-check we're getting the data for the person
         # we really want to know about.
-        result['name'] = tmdb_person_data['name']
+        name = tmdb_person_data['name']
 
         # See whether relative url or null returned.
         if tmdb_person_data['profile_path'] is None:
-            return result
+            return name, None
 
         # Check for empty strings, just in case.
         if tmdb_person_data['profile_path'].strip() == '':
-            return result
+            return name, None
 
         # Build image url for person.
         # Use 'w185' size for image (relatively small).
@@ -452,10 +709,7 @@ class TmdbMovie(Movie):
         # for valid image sizes.
         img_full_url = cls.poster_base_url + 'w185' + tmdb_person_data['profile_path']
 
-        result['image_url'] = img_full_url
-
-        # return url or none.
-        return result
+        return name, img_full_url
 
 
     @classmethod
@@ -484,8 +738,14 @@ class TmdbMovie(Movie):
         # Get person data from TMDB
         print(f"Requesting person data from TMDB api with person_id={person_id}...",
                 end="")
-        res = requests.get(f"https://api.themoviedb.org/3/person/{person_id}/movie_credits",
-                            params={"api_key": cls.api_key})
+        try:
+            res = cls._get(f"/person/{person_id}/movie_credits")
+        except RateLimited as err:
+            print(f"FAILED! {err}")
+            result['success'] = False
+            result['status_code'] = err.status_code
+            result['movies'] = None
+            return result
 
         # Check response status
         # Check whether movie found
@@ -502,82 +762,150 @@ class TmdbMovie(Movie):
         # Deserialize JSON response object
         tmdb_filmography_data = res.json()
 
-        # Get movies where person was in the film
-        print("Building movie list...")
-        cast = []
-        for movie_credit in tmdb_filmography_data['cast']:
-            release_date = movie_credit.get('release_date')
+        result['cast'], result['crew'] = cls._extract_filmography(tmdb_filmography_data)
+
+        return result
+
+    @staticmethod
+    def _release_date_key(release_date):
+        """Returns sort key of a 'YYYY-MM-DD' release date, parsed once.
+
+        date.fromisoformat is much faster than datetime.strptime and raises
+        ValueError on the same malformed dates.
+        """
+        return date.fromisoformat(release_date)
+
+    @classmethod
+    def _extract_filmography(cls, tmdb_filmography_data):
+        """Builds cast and crew lists from TMDB movie credits of a person.
 
+        Runs in linear time (bar the sorts), however many credits a person
+        has: release dates are parsed once per film, and crew credits are
+        grouped by TMDB id in a single pass.
+
+        Args:
+            tmdb_filmography_data: Dictionary-like object representing a TMDB
+                                   JSON response for a person's movie credits.
+
+        Returns:
+            (cast, crew): Lists of dictionaries sorted by release date,
+                          newest first; see get_movie_list_by_person_id.
+        """
+        def build_movie(movie_credit):
+            """Returns Movie object and sort key for a credit."""
             # Put in placeholder release date if none found in TMDB data.
             # Useful for sorting later on.
-            if movie_credit.get('release_date') == None or movie_credit.get('release_date') == '':
-                release_date = '0001-01-01'
+            release_date = movie_credit.get('release_date') or '0001-01-01'
 
             movie = Movie(id=movie_credit.get('id'),
                           title=movie_credit.get('title'),
                           original_title=movie_credit.get('original_title'),
                           release_date=release_date)
+            return movie, cls._release_date_key(release_date)
+
+        # Get movies where person was in the film
+        print("Building movie list...")
+        cast = []
+        cast_keys = []
+        for movie_credit in tmdb_filmography_data['cast']:
+            movie, sort_key = build_movie(movie_credit)
 
             # Add name of character portrayed in film.
             character = movie_credit.get('character')
             cast.append({'movie': movie, 'character': character})
+            cast_keys.append(sort_key)
 
-        # Sort movies by release date, descending order
-        cast.sort(key=lambda x: datetime.strptime(x['movie'].release_date, '%Y-%m-%d'),
-                 reverse=True)
+        # Get movies where person was part of the crew.
+        # A person may have had several jobs on a film (e.g. Director/Producer).
+        # To avoid having Movie objects for the same film but different jobs,
+        # group credits by film id and combine their jobs, in credit order.
+        crew_by_id = {}
+        for movie_credit in tmdb_filmography_data['crew']:
+            movie_id = movie_credit.get('id')
+            job = movie_credit.get('job')
 
-        result['cast'] = cast
+            group = crew_by_id.get(movie_id) if movie_id is not None else None
+            if group is not None:
+                group['jobs'].append(job)
+                continue
+
+            movie, sort_key = build_movie(movie_credit)
+            group = {'movie': movie, 'jobs': [job], 'key': sort_key}
+            # Credits without an id cannot be matched with anything.
+            crew_by_id[movie_id if movie_id is not None else object()] = group
 
-        # Get movies where person was part of the crew.
         crew = []
-        for movie_credit in tmdb_filmography_data['crew']:
-            release_date = movie_credit.get('release_date')
+        crew_keys = []
+        for group in crew_by_id.values():
+            jobs = [job for job in group['jobs'] if job]
+            crew.append({'movie': group['movie'],
+                         'job': ", ".join(jobs) if jobs else None})
+            crew_keys.append(group['key'])
+
+        # Sort movies by release date, descending order. Sorting is stable,
+        # so films released the same day keep TMDB's order.
+        cast = cls._sort_by_keys(cast, cast_keys)
+        crew = cls._sort_by_keys(crew, crew_keys)
+
+        return cast, crew
+
+    @staticmethod
+    def _sort_by_keys(items, keys):
+        """Returns items sorted by precomputed keys, largest first."""
+        order = sorted(range(len(items)), key=keys.__getitem__, reverse=True)
+        return [items[i] for i in order]
+    
 
-            # Put in placeholder release date if none found in TMDB data.
-            # Useful for sorting later on.
-            if movie_credit.get('release_date') == None or movie_credit.get('release_date') == '':
-                release_date = '0001-01-01'
+    @classmethod
+    def get_filmography_by_person_id(cls, person_id):
+        """Returns bio data and movie credits of a person in a single API
+        call, by having TMDB append the credits to the person's details.
 
-            movie = Movie(id=movie_credit.get('id'),
-                          title=movie_credit.get('title'),
-                          original_title=movie_credit.get('original_title'),
-                          release_date=release_date)
+        Args:
+            person_id: Integer representing id of person in TMDB database.
 
-            # Add person's job associated with film.
-            job = movie_credit.get('job')
-            crew.append({'movie': movie, 'job': job})
+        Returns:
+            result: A dictionary with six fields:
+                success: True or False, depending on wheter person found.
+                status_code: Status code of Http response of api call.
+                name: String representing cast/crew member's 'working' name.
+                image_url: String representing absolute url for cast/crew
+                           member's image; None if no image found.
+                cast: List of movies person acted in; see
+                      get_movie_list_by_person_id.
+                crew: List of movies person worked on as crew member; see
+                      get_movie_list_by_person_id.
+        """
+        # Setup return value
+        result = {'success': True, 'status_code': 200, 'name': None,
+                  'image_url': None, 'cast': [], 'crew': []}
 
-        crew.sort(key=lambda x: datetime.strptime(x['movie'].release_date, '%Y-%m-%d'),
-                 reverse=True)
+        print(f"Requesting person data and credits from TMDB api with person_id={person_id}...",
+                end="")
+        try:
+            res = cls._get(f"/person/{person_id}",
+                           params={"append_to_response": "movie_credits"})
+        except RateLimited as err:
+            print(f"FAILED! {err}")
+            result['success'] = False
+            result['status_code'] = err.status_code
+            return result
 
-        # A person may have had several jobs on a film (e.g. Director/Producer)
-        # To avoid having Movie objects for the same film but different jobs,
-        # search duplicate movies, combine jobs into single object and
-        # delete the duplicates.
-
-        # Index of film in crew list being looked at.
-        curr = 0
-        # Index of film in crew list that is being compared with film at curr.
-        next = curr + 1
-
-        # Carry out search, merge and deletion of duplicate data.
-        while curr < len(crew) and next < len(crew):
-            # In a sorted list, two movies with the same title are next
-            # to each other.
-            if crew[curr]['movie'].title != crew[next]['movie'].title:
-                curr += 1
-                next = curr + 1
-            else:
-                # Add job name from duplicate to original.
-                crew[curr]['job'] += ", " + crew[next]['job']
-
-                # Delete the duplicate.
-                del crew[next]
-
-        result['crew'] = crew
+        if res.status_code != 200:
+            print(f"FAILED! status_code={res.status_code}")
+            result['success'] = False
+            result['status_code'] = res.status_code
+            return result
+
+        print("SUCCESS!")
+        print("Extracting person data and credits from TMDB JSON response....")
+        tmdb_person_data = res.json()
+
+        result['name'], result['image_url'] = cls._extract_bio_data(tmdb_person_data)
+        result['cast'], result['crew'] = cls._extract_filmography(
+                                                tmdb_person_data['movie_credits'])
 
         return result
-    
 
     @classmethod
     def _extract_provider_data(cls, tmdb_movie_data : Dict, country_code: str='CA') -> Dict:
@@ -626,6 +954,14 @@ class TmdbMovie(Movie):
         """Returns data structure contiaining Movie object and metadata based
         on movie id.
 
+        Movies in the local TMDB mirror (see scripts/tmdb_mirror.py) are read
+        from it; others are requested from TMDB. Movie details and credits,
+        which rarely change, and watch providers, which change often, are
+        then cached separately for DETAILS_TTL and PROVIDERS_TTL seconds.
+        Stale data is returned right away while it is refreshed in the
+        background. Concurrent calls for a movie that is not cached wait on
+        the first one and share its result.
+
         Args:
             id: Integer representing a movie in TMDB database.
 
@@ -636,15 +972,197 @@ class TmdbMovie(Movie):
                 movie: Movie object with all salient attributes filled-in;
                       None if api call returns no data.
         """
+        details, details_state = cls.details_cache.lookup(id)
+
+        # Never seen this movie or it has been evicted: fetch everything.
+        if details_state is None:
+            return cls.inflight.do(('movie', id), cls._load_movie_info, id)
+
+        print(f"Movie data for movie_id={id} found in cache ({details_state}).")
+        if details_state == STALE:
+            # Full refresh updates providers as well.
+            cls.details_cache.revalidate(id, lambda: cls._load_movie_info(id))
+
+        providers, providers_state = cls.providers_cache.lookup(id)
+        if providers_state is None:
+            # Can't show page without them; cheap to fetch on their own.
+            providers = cls.inflight.do(('providers', id), cls._load_providers, id)
+        elif providers_state == STALE and details_state != STALE:
+            cls.providers_cache.revalidate(id, lambda: cls._load_providers(id))
+
+        return {'success': True, 'status_code': 200,
+                'movie': cls(providers=providers, **details)}
+
+    @classmethod
+    def cache_stats(cls):
+        """Returns hit/miss/eviction counters of movie-info and search caches."""
+        return {'details': cls.details_cache.stats(),
+                'providers': cls.providers_cache.stats(),
+                'search': cls.search_cache.stats()}
+
+    @classmethod
+    def _read_mirror(cls, id):
+        """Returns movie's TMDB data from the local mirror, and its age.
+
+        Args:
+            id: Integer representing a movie in TMDB database.
+
+        Returns:
+            (tmdb_movie_data, age): Dictionary of /movie/{id} response with
+                credits and watch providers, and number of seconds since
+                it was synced; (None, None) if movie not mirrored or mirror
+                unavailable.
+        """
+        try:
+            # Own app context: also called from background refreshes.
+            with app.app_context():
+                mirrored = TmdbMirrorMovie.query.filter_by(tmdb_id=id).first()
+                if mirrored is None:
+                    return None, None
+                age = (datetime.utcnow() - mirrored.synced_at).total_seconds()
+                return mirrored.payload, age
+        except SQLAlchemyError as err:
+            print(f"Could not read TMDB mirror: {err}")
+            return None, None
+
+    @classmethod
+    def _load_movie_info(cls, id):
+        """Gets movie from local mirror, else from TMDB, and caches it.
+
+        Watch providers read from the mirror are only fresh for what is left
+        of PROVIDERS_TTL since it was synced; once stale, they are fetched
+        from TMDB.
+
+        Args:
+            id: Integer representing a movie in TMDB database.
+
+        Returns:
+            result: See get_movie_info_by_id.
+        """
+        result = cls._load_mirrored_movie_info(id)
+        if result is None:
+            return cls._fetch_movie_info(id)
+        return result
+
+    @classmethod
+    def _load_mirrored_movie_info(cls, id):
+        """Gets movie from local mirror and caches it; see _load_movie_info.
+
+        Returns:
+            result: See get_movie_info_by_id; None if movie is not mirrored.
+        """
+        tmdb_movie_data, age = cls._read_mirror(id)
+        if tmdb_movie_data is None:
+            return None
+
+        print(f"Movie data for movie_id={id} found in TMDB mirror.")
+        movie = cls._store_movie_info(id, tmdb_movie_data,
+                                      providers_ttl=max(0, PROVIDERS_TTL - age))
+        return {'success': True, 'status_code': 200, 'movie': movie}
+
+    @classmethod
+    def _load_providers(cls, id):
+        """Gets watch providers of movie from local mirror if synced less
+        than PROVIDERS_TTL seconds ago, else from TMDB, and caches them. See
+        _fetch_providers."""
+        providers = cls._load_mirrored_providers(id)
+        if providers is None:
+            return cls._fetch_providers(id)
+        return providers
+
+    @classmethod
+    def _load_mirrored_providers(cls, id):
+        """Gets watch providers of movie from local mirror and caches them;
+        None if movie is not mirrored, or was synced over PROVIDERS_TTL
+        seconds ago."""
+        tmdb_movie_data, age = cls._read_mirror(id)
+        if tmdb_movie_data is None or age >= PROVIDERS_TTL:
+            return None
+
+        providers = cls._extract_provider_data(tmdb_movie_data)
+        cls.providers_cache.set(id, providers, ttl=PROVIDERS_TTL - age)
+        return providers
+
+    @classmethod
+    def _fetch_providers(cls, id):
+        """Requests watch providers of movie from TMDB and caches them.
+
+        Args:
+            id: Integer representing a movie in TMDB database.
+
+        Returns:
+            providers: Dictionary; see _extract_provider_data. Lists are
+                       empty if the request fails.
+        """
+        print(f"Requesting provider data from TMDB api with movie_id={id}...",
+                end="")
+        try:
+            res = cls._get(f"/movie/{id}/watch/providers")
+        except RateLimited as err:
+            print(f"FAILED! {err}")
+            return {'stream': [], 'rent': []}
+
+        if res.status_code != 200:
+            print(f"FAILED! status_code={res.status_code}")
+            return {'stream': [], 'rent': []}
+
+        print("SUCCESS!")
+        providers = cls._extract_provider_data({'watch/providers': res.json()})
+        cls.providers_cache.set(id, providers)
+        return providers
+
+    @classmethod
+    def _extract_credits(cls, tmdbcredits):
+        """Returns cast and crew of a movie as compact credit objects.
+
+        Jobs repeat across movies ('Director', 'Editor', ...), so they are
+        interned: every cached movie shares the same string objects.
+
+        Args:
+            tmdbcredits: Dictionary of 'cast' and 'crew' lists, as returned
+                         by TMDB's /movie/{id}/credits.
+
+        Returns:
+            filmcredits: Dictionary with a tuple of CastCredit objects
+                         ('cast') and one of CrewCredit objects ('crew').
+        """
+        cast = tuple(CastCredit(id=credit.get('id'), name=credit.get('name'),
+                                character=credit.get('character'))
+                     for credit in tmdbcredits['cast'])
+        crew = tuple(CrewCredit(id=credit.get('id'), name=credit.get('name'),
+                                job=cls._intern(credit.get('job')))
+                     for credit in tmdbcredits['crew'])
+        return {'cast': cast, 'crew': crew}
+
+    @staticmethod
+    def _intern(string):
+        """Returns interned copy of string; None stays None."""
+        return sys.intern(string) if string else string
+
+    @classmethod
+    def _fetch_movie_info(cls, id):
+        """Requests movie from TMDB; caches its details and providers.
+
+        Args:
+            id: Integer representing a movie in TMDB database.
+
+        Returns:
+            result: See get_movie_info_by_id.
+        """
         # Setup return value
         result = {'success': True, 'status_code': 200, 'movie': None}
 
         # Get movie info TMDB database
         print(f"Requesting movie data from TMDB api with movie_id={id}...",
                 end="")
-        res = requests.get(f"https://api.themoviedb.org/3/movie/{id}",
-                            params={"api_key": cls.api_key, 
-                                    "append_to_response": "credits,watch/providers"})
+        try:
+            res = cls._get(f"/movie/{id}",
+                           params={"append_to_response": cls.movie_info_append})
+        except RateLimited as err:
+            print(f"FAILED! {err}")
+            result['success'] = False
+            result['status_code'] = err.status_code
+            return result
 
         # Check whether movie found
         if res.status_code != 200:
@@ -655,66 +1173,68 @@ class TmdbMovie(Movie):
             print("SUCCESS!")
 
             # Deserialize JSON response object
-            print("Extracting movie data from TMDB JSON response....")
-            tmdb_movie_data = res.json()
-
-            # Get year movie was released. Should a release date no exist,
-            # set it to zero: we users to be able to add the movie to
-            # their personal lists even if not all the important info is there.
-            if tmdb_movie_data.get('release_date'):
-                release_year = int(tmdb_movie_data['release_date'].split('-')[0].strip())
-            else:
-                release_year = 0    # release year unknown
-
-            # Build full url for movie poster.
-            poster_full_url = None
-            if tmdb_movie_data['poster_path']:
-                poster_full_url = cls.poster_base_url + cls.poster_size + tmdb_movie_data['poster_path']
-
-            # Build full url for IMDB
-            imdb_full_url = None
-            if tmdb_movie_data['imdb_id']:
-                imdb_full_url = cls.imdb_base_url + tmdb_movie_data['imdb_id']
-
-            # Build full url for TMDB
-            tmdb_full_url = cls.tmdb_base_url + str(id)
-
-            # Extract credits data
-            filmcredits = None
-            if tmdb_movie_data['credits']:
-                # Iterate over response dict to extract essesntial info.
-                filmcredits = {'cast': [], 'crew':[]}
-                tmdbcredits = tmdb_movie_data['credits']
-                # Cast
-                for credit in tmdbcredits['cast']:
-                    filmcredits['cast'].append({'name':credit.get('name', None), 
-                                                'character': credit.get('character', None),
-                                                'id': credit.get('id', None)})
-                # Crew
-                for credit in tmdbcredits['crew']:
-                    filmcredits['crew'].append({'name': credit.get('name', None), 
-                                                'job': credit.get('job', None),
-                                                'id':  credit.get('id', None)})
-            
-            # Extract watch/providers data
-            providers = cls._extract_provider_data(tmdb_movie_data)
-            
-            print("Building Movie object...")
-            movie = cls(id=id, title=tmdb_movie_data['title'],
-                        release_year=release_year,
-                        release_date=tmdb_movie_data.get('release_date'),
-                        overview=tmdb_movie_data['overview'],
-                        runtime=tmdb_movie_data['runtime'],
-                        original_title=tmdb_movie_data.get('original_title'),
-                        poster_full_url=poster_full_url,
-                        imdb_full_url=imdb_full_url,
-                        tmdb_full_url=tmdb_full_url,
-                        filmcredits=filmcredits,
-                        providers=providers)
-
-            result['movie'] = movie
+            result['movie'] = cls._store_movie_info(id, res.json())
 
         return result
 
+    @classmethod
+    def _store_movie_info(cls, id, tmdb_movie_data, providers_ttl=None):
+        """Extracts movie data from a TMDB /movie/{id} response, with credits
+        and watch providers appended, and caches it.
+
+        Args:
+            id: Integer representing a movie in TMDB database.
+            tmdb_movie_data: Dictionary of deserialized JSON response.
+            providers_ttl: Number of seconds watch providers stay fresh;
+                           defaults to PROVIDERS_TTL.
+
+        Returns:
+            movie: TmdbMovie object with all salient attributes filled-in.
+        """
+        print("Extracting movie data from TMDB JSON response....")
+
+        # Get year movie was released. Should a release date no exist,
+        # set it to zero: we users to be able to add the movie to
+        # their personal lists even if not all the important info is there.
+        if tmdb_movie_data.get('release_date'):
+            release_year = int(tmdb_movie_data['release_date'].split('-')[0].strip())
+        else:
+            release_year = 0    # release year unknown
 
+        # Build full url for movie poster.
+        poster_full_url = None
+        if tmdb_movie_data['poster_path']:
+            poster_full_url = cls.poster_base_url + cls.poster_size + tmdb_movie_data['poster_path']
 
+        # Build full url for IMDB
+        imdb_full_url = None
+        if tmdb_movie_data['imdb_id']:
+            imdb_full_url = cls.imdb_base_url + tmdb_movie_data['imdb_id']
+
+        # Build full url for TMDB
+        tmdb_full_url = cls.tmdb_base_url + str(id)
+
+        # Extract credits data
+        filmcredits = None
+        if tmdb_movie_data['credits']:
+            filmcredits = cls._extract_credits(tmdb_movie_data['credits'])
+
+        # Extract watch/providers data
+        providers = cls._extract_provider_data(tmdb_movie_data)
+        
+        # Everything but the providers: they go stale much faster.
+        details = dict(id=id, title=tmdb_movie_data['title'],
+                       release_year=release_year,
+                       release_date=tmdb_movie_data.get('release_date'),
+                       overview=tmdb_movie_data['overview'],
+                       runtime=tmdb_movie_data['runtime'],
+                       original_title=tmdb_movie_data.get('original_title'),
+                       poster_full_url=poster_full_url,
+                       imdb_full_url=imdb_full_url,
+                       tmdb_full_url=tmdb_full_url,
+                       filmcredits=filmcredits)
+        cls.details_cache.set(id, details)
+        cls.providers_cache.set(id, providers, ttl=providers_ttl)
+
+        print("Building Movie object...")
+        return cls(providers=providers, **details)
@@ -0,0 +1,212 @@
+"""Local archive of NYT movie review metadata, searched instead of NYT's api.
+
+A dump of NYT review metadata (JSON lines with display_title,
+publication_date, opening_date, summary_short and critics_pick) is loaded
+with scripts/nyt_archive.py into a SQLite file with a full-text index of
+titles. NytMovieReview asks the archive for candidate reviews first, the
+same way it queries NYT, and only calls NYT's api when the archive has
+none.
+
+The index uses SQLite's FTS5 trigram tokenizer, so a title's words also
+match inside longer titles and regardless of case; SQLite builds older
+than 3.34 lack it, in which case titles are indexed by whole words.
+
+The archive is a SQLite file whichever database the app uses, as full-text
+search is specific to each database engine. Its path can be set with
+NYT_ARCHIVE_PATH; without the file, reviews are searched on NYT as before.
+"""
+
+import os
+import re
+import json
+import sqlite3
+import threading
+
+from config import basedir
+
+NYT_ARCHIVE_PATH = os.getenv('NYT_ARCHIVE_PATH',
+                             os.path.join(basedir, 'data', 'nyt_archive.db'))
+
+# Max number of candidates per search, as in a page of NYT api results.
+CANDIDATE_LIMIT = 20
+
+# Words too common to tell titles apart; only searched for if a title has
+# no other.
+STOP_WORDS = frozenset(("the", "and", "for", "les", "der", "die", "das", "los",
+                        "las", "del", "von", "une", "des", "with"))
+
+FIELDS = ('display_title', 'publication_date', 'opening_date', 'summary_short',
+          'critics_pick')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    display_title TEXT NOT NULL,
+    publication_date TEXT,
+    opening_date TEXT,
+    summary_short TEXT,
+    critics_pick INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS ix_reviews_title_date
+    ON reviews (display_title, publication_date);
+CREATE INDEX IF NOT EXISTS ix_reviews_title_lower ON reviews (lower(display_title));
+"""
+
+
+def _fts_schema(tokenizer):
+    return (f"CREATE VIRTUAL TABLE IF NOT EXISTS reviews_fts USING fts5("
+            f"display_title, content='reviews', content_rowid='id', tokenize='{tokenizer}')")
+
+
+def _add_years(date, years):
+    """Returns ISO date string moved by a number of years."""
+    year, rest = date.split('-', 1)
+    return f"{int(year) + years}-{rest}"
+
+
+class NytArchive:
+    """Read access to the archive file, one connection per thread.
+
+    Attributes:
+        path: String representing path of archive file.
+    """
+
+    def __init__(self, path=NYT_ARCHIVE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        """Returns this thread's read-only connection; None if there is no
+        archive."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if not os.path.exists(self.path):
+                return None
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True,
+                                   check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            tokenizer = conn.execute("SELECT value FROM meta WHERE key = 'tokenizer'").fetchone()
+            self._local.conn = conn
+            self._local.tokenizer = tokenizer[0] if tokenizer else 'unicode61'
+        return conn
+
+    def available(self):
+        """Returns whether there is an archive to search."""
+        try:
+            return self._connection() is not None
+        except sqlite3.Error as err:
+            print(f"NYT archive unavailable: {err}")
+            return False
+
+    def close(self):
+        """Closes this thread's connection, e.g. after archive was rebuilt."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _match_query(self, title):
+        """Returns FTS5 query matching titles sharing a word with title;
+        None if title has no word the index can match."""
+        min_length = 3 if self._local.tokenizer == 'trigram' else 1
+        words = [word for word in re.findall(r"\w+", title.lower()) if len(word) >= min_length]
+        distinct = [word for word in words if word not in STOP_WORDS] or words
+        if not distinct:
+            return None
+        return " OR ".join('"' + word.replace('"', '""') + '"' for word in dict.fromkeys(distinct))
+
+    def _search(self, title, date_field, start, end):
+        """Returns NYT api-like response of reviews whose title shares words
+        with title, with date_field within [start, end]."""
+        conn = self._connection()
+        dated = f"r.{date_field} BETWEEN ? AND ?"
+        match = self._match_query(title)
+        if match is not None:
+            rows = conn.execute(
+                f"SELECT r.* FROM reviews_fts JOIN reviews r ON r.id = reviews_fts.rowid "
+                f"WHERE reviews_fts MATCH ? AND {dated} ORDER BY rank LIMIT ?",
+                (match, start, end, CANDIDATE_LIMIT)).fetchall()
+        else:
+            # Title too short for index, e.g. 'M'.
+            rows = conn.execute(
+                f"SELECT r.* FROM reviews r WHERE lower(r.display_title) = ? AND {dated} LIMIT ?",
+                (title.strip().lower(), start, end, CANDIDATE_LIMIT)).fetchall()
+
+        # Like NYT's, results are ordered by date.
+        results = sorted((dict(row) for row in rows), key=lambda row: row[date_field] or '')
+        for result in results:
+            del result['id']
+        return {'status': 'OK', 'num_results': len(results), 'results': results}
+
+    def search_by_release_year(self, title, release_year, max_year_gap):
+        """Returns reviews of title published from release_year to
+        max_year_gap years later; see NytMovieReview._title_release_year_query."""
+        return self._search(title, 'publication_date', f"{release_year}-01-01",
+                            f"{release_year + max_year_gap}-12-31")
+
+    def search_by_release_date(self, title, release_date, max_year_gap):
+        """Returns reviews of title that opened from release_date to
+        max_year_gap years later; see NytMovieReview._title_release_date_query."""
+        return self._search(title, 'opening_date', release_date,
+                            _add_years(release_date, max_year_gap))
+
+
+def create_archive(path, tokenizer='trigram'):
+    """Creates archive file's tables if needed; returns connection to it.
+
+    The trigram tokenizer is replaced by unicode61 (whole words) where
+    SQLite lacks it.
+    """
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'tokenizer'").fetchone()
+    if row is None:
+        try:
+            conn.execute(_fts_schema(tokenizer))
+        except sqlite3.OperationalError:
+            print(f"SQLite lacks {tokenizer} tokenizer; indexing whole words instead.")
+            tokenizer = 'unicode61'
+            conn.execute(_fts_schema(tokenizer))
+        conn.execute("INSERT INTO meta (key, value) VALUES ('tokenizer', ?)", (tokenizer,))
+    conn.commit()
+    return conn
+
+
+def ingest(path, lines, tokenizer='trigram'):
+    """Loads reviews from JSON lines into archive, in one transaction.
+    Reviews already there (same title and publication date) are updated.
+
+    Args:
+        path: String representing path of archive file.
+        lines: Iterable of strings, each a JSON review record.
+
+    Returns:
+        counts: Tuple of number of records loaded and skipped (no title).
+    """
+    conn = create_archive(path, tokenizer)
+    loaded, skipped = 0, 0
+    rows = []
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if not (record.get('display_title') or '').strip():
+            skipped += 1
+            continue
+        record['critics_pick'] = int(bool(record.get('critics_pick')))
+        rows.append(tuple(record.get(field) for field in FIELDS))
+        loaded += 1
+
+    with conn:
+        conn.executemany(
+            f"INSERT INTO reviews ({', '.join(FIELDS)}) VALUES (?, ?, ?, ?, ?) "
+            f"ON CONFLICT (display_title, publication_date) DO UPDATE SET "
+            f"opening_date = excluded.opening_date, summary_short = excluded.summary_short, "
+            f"critics_pick = excluded.critics_pick", rows)
+        conn.execute("INSERT INTO reviews_fts (reviews_fts) VALUES ('rebuild')")
+    conn.close()
+    return loaded, skipped
+
+
+archive = NytArchive()
@@ -0,0 +1,234 @@
+"""Decides which NYT review, if any, is that of a film.
+
+NytMovieReview queries NYT's movie review search API and hands the response
+to match_review, which picks a review out of its results. Nothing here makes
+HTTP calls, prints or keeps state: a film and an NYT payload always give the
+same decision, so decisions can be replayed and benchmarked offline (see
+benchmarks/bench_nyt_matching.py).
+"""
+
+from cinescout import titlematch
+
+# Percentage the likelihood that two strings match per Levenshtein distance
+# ratio. See NytMovieReview.threshold.
+THRESHOLD = 80
+
+# Max number of years between when a movie was released and its review
+# published. See NytMovieReview.max_year_gap.
+MAX_YEAR_GAP = 5
+
+
+def decision(success, message=None, result=None, bullseye=None):
+    """Returns decision object.
+
+    Args:
+        success: True if a review was picked.
+        message: String describing why no review was picked; None otherwise.
+        result: Dictionary of NYT api 'results' list picked; None if none was.
+        bullseye: True if review is an exact match; False if it is the best
+                  that could be found. None if no review was picked.
+    """
+    return {'success': success, 'message': message, 'result': result,
+            'bullseye': bullseye}
+
+
+def no_review(message):
+    """Returns decision that no review of film could be picked."""
+    return decision(success=False, message=message)
+
+
+def should_try_original_title(movie, nyt_data):
+    """Returns whether NYT should be searched again with film's original
+    title, NYT having found nothing under its title."""
+    return nyt_data["num_results"] == 0 and movie.original_title != movie.title
+
+
+def searched_title(movie, original_title_used=False):
+    """Returns normalized title NYT results should be compared to."""
+    title = movie.original_title if original_title_used else movie.title
+    return titlematch.normalize_title(title)
+
+
+def publication_year(nyt_data_result):
+    """Returns year review was published as an integer; None if unknown."""
+    nyt_pub_date = nyt_data_result.get('publication_date')
+    if not nyt_pub_date:
+        return None
+    return int(nyt_pub_date.split('-')[0].strip())
+
+
+def review_year(nytreview):
+    """Returns year a NYT review was published; should that not exist, then
+    the year the movie opened. None if neither is known.
+
+    Args:
+        nytreview: An element from NYT api 'results' list.
+    """
+    nyt_date = nytreview.get('publication_date') or nytreview.get('opening_date')
+    if not nyt_date:
+        return None
+    return int(nyt_date.split('-')[0].strip())
+
+
+def reviewed_within(release_year, year, grace_period):
+    """Returns whether a review of year was published after a film's release
+    and within grace_period years of it."""
+    return year is not None and 0 <= year - release_year <= grace_period
+
+
+# +++++++ SINGLE RESULT ++++++++
+def verify_result(movie, nyt_data_result, original_title_used=False,
+                  threshold=THRESHOLD, max_year_gap=MAX_YEAR_GAP):
+    """Checks whether single NYT api review result can be reliably trusted.
+    Verification checks two aspects of the returned review: when it was
+    published, and the title of movie it reviews.
+
+    Args:
+        movie: Movie object representing movie searched for.
+        nyt_data_result: Dictionary containing data from NYT api for a
+                         single review.
+        original_title_used: Boolean indicating whether film's original
+                             title was used to query the api.
+
+    Returns:
+        decision: See decision function.
+    """
+    # Ensure that all reviews have a publication date.
+    # Don't trust them otherwise.
+    nyt_pub_year = publication_year(nyt_data_result)
+    if nyt_pub_year is None:
+        return no_review("Unable to verify review: it has no publication date.")
+
+    # Film review cannot have been published before a film's realease.
+    if nyt_pub_year < movie.release_year:
+        return no_review("Review no good: A review cannot be published before a film's release.")
+
+    # Film reviews that are published 'too late' are not trustworthy.
+    if nyt_pub_year - movie.release_year > max_year_gap:
+        return no_review("Review unlikely: review published too many years after film release.")
+
+    # See whether film's title is highly similar to title used in NYT
+    # review. NYT may have used original movie title instead of more
+    # widely-known, often Anglicized, movie title.
+    if not titlematch.good_enough_mask(searched_title(movie, original_title_used),
+                                       [nyt_data_result.get('display_title')],
+                                       threshold)[0]:
+        return no_review("Not a close enough match: Film title does not match title of film in review.")
+
+    # Reviews published later than release year may be of a namesake.
+    return decision(success=True, result=nyt_data_result,
+                    bullseye=nyt_pub_year == movie.release_year)
+
+
+# +++++++ MUTLIPLE RESULTS ++++++++
+def exact_match(movie, nytreviews):
+    """Returns NYT review that has exactly the same title and year as
+    movie; None should an exact match not be found.
+
+    Args:
+        movie: Movie object containing salient movie data.
+        nytreviews: List of dictionaries containing review data from NYT api
+                    response.
+    """
+    # Matches should be capitalization and space-neutral
+    title = titlematch.normalize_title(movie.title)
+    for nytreview in nytreviews:
+        if (titlematch.normalize_title(nytreview.get('display_title')) == title
+                and review_year(nytreview) == movie.release_year):
+            return nytreview
+    return None
+
+
+def filter_year(release_year, nytreviews, grace_period):
+    """Returns list of NYT reviews that were written after a movie's
+    release_year and within a grace period; list can be empty.
+
+    Args:
+        release_year: Integer representing movie release year.
+        nytreviews: List of dictionaries containing review data from NYT api
+                    response.
+        grace_period: Integer representing number of years after a film's
+                      release for a review to be 'valid'.
+    """
+    return [nytreview for nytreview in nytreviews
+            if reviewed_within(release_year, review_year(nytreview), grace_period)]
+
+
+def filter_title(movie_title, nytreviews, threshold=THRESHOLD):
+    """Returns list of NYT reviews whose titles are good-enough matches for
+    movie_title; list can be empty."""
+    mask = titlematch.good_enough_mask(movie_title,
+                                       [nytreview.get('display_title') for nytreview in nytreviews],
+                                       threshold)
+    return [nytreview for nytreview, match in zip(nytreviews, mask) if match]
+
+
+def highest_levenshtein(movie_title, nytreviews):
+    """Returns NYT review whose title is closest to movie_title; None if
+    several are equally close."""
+    # Exact match worth more than partial one; no ties allowed.
+    index = titlematch.best_match(movie_title,
+                                  [nytreview.get('display_title') for nytreview in nytreviews])
+    return None if index is None else nytreviews[index]
+
+
+def match_review(movie, nyt_data, original_title_used=False,
+                 threshold=THRESHOLD, max_year_gap=MAX_YEAR_GAP):
+    """Picks review of movie out of NYT api search response.
+
+    Args:
+        movie: Movie object with title, original title and release year.
+        nyt_data: Dictionary of NYT api search response, with fields
+                  'num_results' and 'results'.
+        original_title_used: Boolean indicating whether film's original
+                             title was used to query the api.
+        threshold: Integer of [0, 100]; min similarity of titles.
+        max_year_gap: Integer representing max number of years between
+                      release of movie and its review.
+
+    Returns:
+        decision: A dictionary with the following fields
+            success: True or False, depending on whether review picked.
+            message: String repr. why no review was picked; None otherwise.
+            result: Element of nyt_data['results'] picked; None if none.
+            bullseye: A boolean indicating whether review picked is an
+                      exact match, or a best-that-could-be found one.
+    """
+    # No results.
+    if nyt_data["num_results"] == 0:
+        return no_review("No review found for this movie.")
+
+    nytreviews = nyt_data['results']
+
+    # One result. Just because one result returned doesn't mean it's right!
+    if nyt_data["num_results"] == 1:
+        return verify_result(movie, nytreviews[0], original_title_used,
+                             threshold=threshold, max_year_gap=max_year_gap)
+
+    # Multiple results. Try to find exact match first.
+    nytreview = exact_match(movie, nytreviews)
+    if nytreview:
+        return decision(success=True, result=nytreview, bullseye=True)
+
+    # No exact match. Maybe review was written a later year than its release.
+    filtered_reviews = filter_year(movie.release_year, nytreviews, max_year_gap)
+    if not filtered_reviews:
+        return no_review("Multiple reviews: No review found within grace period.")
+
+    # With the shortlist, find ones with the closest-matching movie title.
+    movie_title = searched_title(movie, original_title_used)
+    filtered_reviews = filter_title(movie_title, filtered_reviews, threshold)
+    if not filtered_reviews:
+        return no_review("Multiple reviews: none passed title filtering.")
+
+    # If there's only one review, we can assume that it's likely a good match.
+    if len(filtered_reviews) == 1:
+        return decision(success=True, result=filtered_reviews[0], bullseye=False)
+
+    # Still more than one review that could be the right one. Title that
+    # matches the closest to one searched for will be the deciding factor.
+    nytreview = highest_levenshtein(movie_title, filtered_reviews)
+    if not nytreview:
+        return no_review("No luck: Multiple reviews with same Levenshtein score.")
+
+    return decision(success=True, result=nytreview, bullseye=False)
@@ -0,0 +1,140 @@
+"""Hand-made answers for films whose NYT review can't be found by search.
+
+Some films defeat the usual search, e.g. two films of the same title and
+year, or a film NYT reviewed under another title. Their answers are kept
+in a JSON data file (data/nyt_overrides.json; path can be set with
+NYT_OVERRIDES_PATH), a list of overrides such as
+
+    {"tmdb_id": 9314, "title": "Nineteen Eighty-Four", "year": 1984,
+     "query": {"query": "1984", "opening-date": "1985-01-01:1985-12-31"},
+     "note": "Reviewed as '1984' on its US release."}
+
+An override applies to the film of its tmdb_id, or else of its title and
+year; an "original_title" narrows it down to the film of that original
+title. It answers with one of:
+    "review": the pinned review: display_title, publication_date,
+              summary_short and critics_pick. No api call is made.
+    "review": null, meaning NYT did not review the film. No call either.
+    "query": parameters of the single NYT api search whose first result
+             is the film's review.
+
+Overrides are looked up in dictionaries, and reloaded whenever the file
+changes, so new ones need neither code changes nor a restart.
+"""
+
+import os
+import json
+import threading
+
+from config import basedir
+
+NYT_OVERRIDES_PATH = os.getenv('NYT_OVERRIDES_PATH',
+                               os.path.join(basedir, 'data', 'nyt_overrides.json'))
+
+REVIEW = 'review'
+NO_REVIEW = 'no review'
+QUERY = 'query'
+
+
+def title_key(title, year, original_title=None):
+    """Returns key of film by title and year, and original title if given."""
+    key = f"{(title or '').strip().lower()}|{year}"
+    if original_title is not None:
+        key += f"|{original_title.strip().lower()}"
+    return key
+
+
+def parse_override(entry):
+    """Returns override of data file entry, with its kind.
+
+    Raises:
+        ValueError: if entry has neither 'review' nor 'query', or no film
+                    to apply to.
+    """
+    if not entry.get('tmdb_id') and not (entry.get('title') and entry.get('year')):
+        raise ValueError(f"Override applies to no film: {entry}")
+    if 'query' in entry:
+        kind = QUERY
+    elif 'review' in entry:
+        kind = REVIEW if entry['review'] else NO_REVIEW
+    else:
+        raise ValueError(f"Override has neither review nor query: {entry}")
+    return dict(entry, kind=kind)
+
+
+class ReviewOverrides:
+    """Overrides read from data file, by tmdb_id and by title and year.
+
+    Attributes:
+        path: String representing path of data file.
+    """
+
+    def __init__(self, path=NYT_OVERRIDES_PATH):
+        self.path = path
+        self._by_tmdb_id = {}
+        self._by_title = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def load(self, entries):
+        """Replaces overrides with those of list of data file entries."""
+        by_tmdb_id, by_title = {}, {}
+        for entry in entries:
+            override = parse_override(entry)
+            if override.get('tmdb_id'):
+                by_tmdb_id[int(override['tmdb_id'])] = override
+            if override.get('title') and override.get('year'):
+                key = title_key(override['title'], override['year'],
+                                override.get('original_title'))
+                by_title[key] = override
+        self._by_tmdb_id, self._by_title = by_tmdb_id, by_title
+
+    def _refresh(self):
+        """Reloads data file if it changed since last loaded."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            entries = []
+            if mtime is not None:
+                try:
+                    with open(self.path) as overrides_file:
+                        entries = json.load(overrides_file)
+                except (OSError, ValueError) as err:
+                    # Keep overrides loaded last.
+                    print(f"Could not load NYT review overrides: {err}")
+                    return
+            try:
+                self.load(entries)
+            except ValueError as err:
+                print(f"Could not load NYT review overrides: {err}")
+                return
+            self._mtime = mtime
+            print(f"{len(entries)} NYT review overrides loaded from {self.path}.")
+
+    def lookup(self, movie):
+        """Returns override of movie; None if it has none.
+
+        Args:
+            movie: Movie object; its id, if any, is its tmdb_id.
+        """
+        self._refresh()
+        if movie.id:
+            override = self._by_tmdb_id.get(int(movie.id))
+            if override is not None:
+                return override
+        if movie.original_title:
+            override = self._by_title.get(title_key(movie.title, movie.release_year,
+                                                    movie.original_title))
+            if override is not None:
+                return override
+        return self._by_title.get(title_key(movie.title, movie.release_year))
+
+
+overrides = ReviewOverrides()
@@ -0,0 +1,210 @@
+"""Plans the NYT searches made to find a film's review, from what worked for
+films of the same kind.
+
+A review can be searched for in four ways ('strategies'): by the film's
+title or its original title, among reviews published within years of its
+release year, or of films that opened within years of its release date.
+Each search costs an NYT call, paced seconds apart. NytMovieReview used to
+always try them in that order; the planner instead records, for each kind
+('class') of film, e.g. foreign-language, pre-1970 or subtitled ones, how
+often each strategy found the review and how long it took, and orders
+strategies by their chance of success so that fewer calls are made on
+average.
+
+A strategy that has seldom worked for a class of film is skipped, except
+for every EXPLORE_EVERY-th lookup of that class, so the planner notices
+should it start working. Until a class has stats of its own, it is planned
+from those of all films, and those from the usual order.
+
+Stats are kept per process; scripts/resolve_reviews.py writes them to a
+JSON file (path can be set with NYT_PLANNER_STATS) that processes started
+later load.
+"""
+
+import os
+import json
+import threading
+
+from config import basedir
+from cinescout import titlematch
+
+NYT_PLANNER_STATS = os.getenv('NYT_PLANNER_STATS',
+                              os.path.join(basedir, 'data', 'nyt_planner_stats.json'))
+
+TITLE_BY_YEAR = 'title by year'
+ORIGINAL_BY_YEAR = 'original title by year'
+TITLE_BY_DATE = 'title by date'
+ORIGINAL_BY_DATE = 'original title by date'
+
+# Usual order of strategies, and their assumed success rates before any
+# stats are recorded; they keep strategies in that order.
+STRATEGIES = (TITLE_BY_YEAR, ORIGINAL_BY_YEAR, TITLE_BY_DATE, ORIGINAL_BY_DATE)
+PRIOR_RATES = {TITLE_BY_YEAR: .5, ORIGINAL_BY_YEAR: .4, TITLE_BY_DATE: .3,
+               ORIGINAL_BY_DATE: .2}
+
+# Number of lookups a prior counts as when blended with recorded stats.
+PRIOR_WEIGHT = 5
+
+# A strategy that found the review in under SKIP_RATE of at least
+# MIN_TRIES tries for a class is skipped, but every EXPLORE_EVERY-th time.
+SKIP_RATE = .02
+MIN_TRIES = 30
+EXPLORE_EVERY = 20
+
+# Films released before this year are 'early' ones.
+EARLY_YEAR = 1970
+
+
+def uses_original_title(strategy):
+    """Returns whether strategy searches by film's original title."""
+    return strategy in (ORIGINAL_BY_YEAR, ORIGINAL_BY_DATE)
+
+
+def by_release_year(strategy):
+    """Returns whether strategy searches by release year (else by date)."""
+    return strategy in (TITLE_BY_YEAR, ORIGINAL_BY_YEAR)
+
+
+def has_original_title(movie):
+    """Returns whether movie's original title differs from its title."""
+    return (bool(movie.original_title) and titlematch.normalize_title(movie.original_title)
+            != titlematch.normalize_title(movie.title))
+
+
+def film_class(movie):
+    """Returns class of movie planned for, e.g. 'foreign,early'; 'other'
+    if it has none of the traits strategies are known to depend on."""
+    traits = []
+    if has_original_title(movie):
+        traits.append('foreign')
+    if movie.release_year and int(movie.release_year) < EARLY_YEAR:
+        traits.append('early')
+    if ':' in (movie.title or '') or ' - ' in (movie.title or ''):
+        traits.append('subtitled')
+    return ','.join(traits) or 'other'
+
+
+def _new_counts():
+    return {'tries': 0, 'found': 0, 'total_latency': 0.0}
+
+
+class QueryPlanner:
+    """Thread-safe record of how NYT search strategies fare, per class of
+    film, and planner of searches from it.
+
+    Attributes:
+        path: String representing path of JSON file stats are saved to.
+    """
+
+    def __init__(self, path=NYT_PLANNER_STATS):
+        self.path = path
+        self._lock = threading.Lock()
+        self._overall = {strategy: _new_counts() for strategy in STRATEGIES}
+        self._classes = {}
+        self._lookups = {}
+        self._counters = {'lookups': 0, 'searches': 0, 'skipped': 0}
+        if path and os.path.exists(path):
+            self.load()
+
+    def _rate(self, counts, prior):
+        return (counts['found'] + PRIOR_WEIGHT * prior) / (counts['tries'] + PRIOR_WEIGHT)
+
+    def plan(self, movie):
+        """Returns strategies to search for movie's review with, in order.
+
+        Strategies are ordered by their estimated chance of finding the
+        review, that of the film's class blended with that of all films;
+        ties keep the usual order.
+        """
+        cls = film_class(movie)
+        strategies = [strategy for strategy in STRATEGIES
+                      if has_original_title(movie) or not uses_original_title(strategy)]
+
+        with self._lock:
+            self._counters['lookups'] += 1
+            self._lookups[cls] = self._lookups.get(cls, 0) + 1
+            explore = self._lookups[cls] % EXPLORE_EVERY == 0
+            class_stats = self._classes.get(cls, {})
+
+            rates = {}
+            for strategy in strategies:
+                overall = self._rate(self._overall[strategy], PRIOR_RATES[strategy])
+                counts = class_stats.get(strategy, _new_counts())
+                rates[strategy] = (self._rate(counts, overall), counts['tries'])
+
+            planned = [strategy for strategy in strategies
+                       if explore or rates[strategy][1] < MIN_TRIES
+                       or rates[strategy][0] >= SKIP_RATE]
+            # Never skip them all.
+            planned = planned or strategies
+            self._counters['skipped'] += len(strategies) - len(planned)
+
+        return sorted(planned, key=lambda strategy: -rates[strategy][0])
+
+    def record(self, movie, strategy, found, latency):
+        """Records outcome of a search for movie's review.
+
+        Args:
+            movie: Movie object searched for.
+            strategy: String representing strategy searched with.
+            found: Boolean; whether search found the review.
+            latency: Number of seconds search took, pacing included.
+        """
+        cls = film_class(movie)
+        with self._lock:
+            self._counters['searches'] += 1
+            class_stats = self._classes.setdefault(cls, {})
+            for counts in (self._overall[strategy],
+                           class_stats.setdefault(strategy, _new_counts())):
+                counts['tries'] += 1
+                counts['found'] += int(bool(found))
+                counts['total_latency'] += latency
+
+    @staticmethod
+    def _summary(counts):
+        tries = counts['tries']
+        return {'tries': tries, 'found': counts['found'],
+                'success_rate': counts['found'] / tries if tries else None,
+                'mean_latency': counts['total_latency'] / tries if tries else None}
+
+    def stats(self):
+        """Returns dictionary of lookup/search counters, mean number of
+        searches per lookup, and success rate and mean latency (in
+        seconds) of each strategy, overall and per class of film."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['searches_per_lookup'] = (stats['searches'] / stats['lookups']
+                                            if stats['lookups'] else 0.0)
+            stats['strategies'] = {strategy: self._summary(counts)
+                                   for strategy, counts in self._overall.items()}
+            stats['classes'] = {cls: {strategy: self._summary(counts)
+                                      for strategy, counts in class_stats.items()}
+                                for cls, class_stats in self._classes.items()}
+        return stats
+
+    def save(self):
+        """Writes stats to file; a crash midway leaves the old one whole."""
+        with self._lock:
+            data = {'overall': self._overall, 'classes': self._classes}
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w') as stats_file:
+                json.dump(data, stats_file, indent=1)
+        os.replace(temp_path, self.path)
+
+    def load(self):
+        """Replaces stats with those saved to file; keeps them if the file
+        can't be read."""
+        try:
+            with open(self.path) as stats_file:
+                data = json.load(stats_file)
+            overall = {strategy: dict(_new_counts(), **data['overall'].get(strategy, {}))
+                       for strategy in STRATEGIES}
+            classes = {cls: {strategy: dict(_new_counts(), **counts)
+                             for strategy, counts in class_stats.items()
+                             if strategy in STRATEGIES}
+                       for cls, class_stats in data['classes'].items()}
+        except (OSError, ValueError, KeyError, AttributeError, TypeError) as err:
+            print(f"Could not load NYT planner stats: {err}")
+            return
+        with self._lock:
+            self._overall, self._classes = overall, classes
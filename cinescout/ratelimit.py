@@ -0,0 +1,491 @@
+"""Client-side rate limiting of calls to external movie APIs."""
+
+import os
+import time
+import heapq
+import itertools
+import threading
+import contextlib
+import contextvars
+from collections import deque
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+# Max number of TMDB calls per second, and number of calls that may be made
+# in a burst after a quiet spell. TMDB allows about 50 calls per second per
+# IP address: when the app runs in several worker processes, divide the rate
+# by their number, as each process has its own limiter.
+TMDB_RATE_LIMIT = float(os.getenv('TMDB_RATE_LIMIT', 40))
+TMDB_BURST = int(os.getenv('TMDB_BURST', 20))
+
+# Max number of seconds a TMDB call may be queued before it is failed.
+TMDB_MAX_WAIT = float(os.getenv('TMDB_MAX_WAIT', 5))
+
+# Max number of NYT calls per minute, per NYT's terms of service, and max
+# number of seconds a NYT call may be queued before it is failed. As for
+# TMDB, divide the number of calls by the number of worker processes.
+NYT_CALLS_PER_MINUTE = int(os.getenv('NYT_CALLS_PER_MINUTE', 10))
+NYT_MAX_WAIT = float(os.getenv('NYT_MAX_WAIT', 15))
+
+# Max number of NYT calls per day, per NYT's terms of service, and number of
+# them, and of the calls per minute, that only interactive lookups may use.
+NYT_CALLS_PER_DAY = int(os.getenv('NYT_CALLS_PER_DAY', 4000))
+NYT_INTERACTIVE_DAILY_RESERVE = int(os.getenv('NYT_INTERACTIVE_DAILY_RESERVE', 500))
+NYT_INTERACTIVE_SLOTS = int(os.getenv('NYT_INTERACTIVE_SLOTS', 2))
+
+# Max number of seconds a prefetch or batch NYT call may be queued.
+NYT_BACKGROUND_MAX_WAIT = float(os.getenv('NYT_BACKGROUND_MAX_WAIT', 600))
+
+# Priority classes of API calls, highest first: lookups users wait for,
+# lookups of films users are likely to look at soon, and bulk work.
+INTERACTIVE = 'interactive'
+PREFETCH = 'prefetch'
+BATCH = 'batch'
+PRIORITIES = (INTERACTIVE, PREFETCH, BATCH)
+
+# Priority class of calls made in current thread or task.
+_priority = contextvars.ContextVar('api_call_priority', default=INTERACTIVE)
+
+
+def current_priority():
+    """Returns priority class of API calls made in current thread or task;
+    INTERACTIVE unless set with priority()."""
+    return _priority.get()
+
+
+@contextlib.contextmanager
+def priority(level):
+    """Context manager making API calls of the enclosed block, in current
+    thread or task, of priority class level, e.g.
+
+        with priority(BATCH):
+            reviewstore.resolve_review(movie)
+    """
+    if level not in PRIORITIES:
+        raise ValueError(f"Unknown priority class: {level}")
+    token = _priority.set(level)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimited(Exception):
+    """Raised when a call to an external API is refused before it is sent:
+    it would have waited too long for its turn, or the day's budget of calls
+    is spent.
+
+    Unlike a 429 answered by the API, it says nothing of the API's own
+    limits, so limiters do not back off on it. Results of lookups it stops
+    report status_code, as for a 429 answered by the API.
+
+    Attributes:
+        api: String identifying API, e.g. 'nyt'.
+        status_code: Integer representing Http status code reported.
+    """
+    status_code = 429
+
+    def __init__(self, api, message):
+        super().__init__(message)
+        self.api = api
+
+
+class TokenBucket:
+    """Thread-safe token bucket that spaces out calls to an API.
+
+    Each call takes a token; tokens come back at `rate` per second, up to
+    `capacity`. Calls finding the bucket empty are queued: each reserves
+    the next token to come and sleeps until then, so calls go out in the
+    order they arrived.
+
+    The rate adapts to the API (AIMD): it is halved whenever the API answers
+    429 Too Many Requests, and grows back by a twentieth of max_rate per
+    successful call.
+
+    Attributes:
+        name: String used to identify limiter in stats and log messages.
+        max_rate: Number of calls per second allowed when all is well.
+        rate: Number of calls per second currently allowed.
+        capacity: Integer representing max number of calls in a burst.
+    """
+
+    def __init__(self, name, rate, capacity, timer=time.monotonic,
+                 sleep=time.sleep):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("Rate must be positive and capacity at least 1.")
+        self.name = name
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self._timer = timer
+        self._sleep = sleep
+        self._tokens = capacity
+        # Tokens accrue from this time on; in the future while backing off.
+        self._last = timer()
+        self._lock = threading.Lock()
+        self._counters = {'calls': 0, 'queued': 0, 'rejected': 0,
+                          'backoffs': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+
+    def _refill(self, now):
+        """Adds tokens accrued since last refill. Call with lock held."""
+        if now > self._last:
+            self._tokens = min(self.capacity,
+                               self._tokens + (now - self._last) * self.rate)
+            self._last = now
+
+    def acquire(self, max_wait=None):
+        """Takes a token, sleeping until one is available.
+
+        Args:
+            max_wait: Max number of seconds to wait; None to wait as long as
+                      needed.
+
+        Returns:
+            True if a token was taken; False if it would have taken longer
+            than max_wait, in which case none is taken.
+        """
+        wait = self.reserve(max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            self._sleep(wait)
+        return True
+
+    def reserve(self, max_wait=None):
+        """Takes a token without waiting for it, for callers that do their
+        own waiting, e.g. coroutines with asyncio.sleep().
+
+        Args:
+            max_wait: Max number of seconds caller is willing to wait; None
+                      for no limit.
+
+        Returns:
+            wait: Number of seconds caller must wait before making its call;
+                  None if that would be over max_wait, in which case no
+                  token is taken.
+        """
+        with self._lock:
+            now = self._timer()
+            self._refill(now)
+            wait = max(0.0, self._last - now) + max(0.0, 1 - self._tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                self._counters['rejected'] += 1
+                return None
+
+            # Reserve token; tokens go negative while calls are queued.
+            self._tokens -= 1
+            self._counters['calls'] += 1
+            if wait > 0:
+                self._counters['queued'] += 1
+                self._counters['total_wait'] += wait
+                self._counters['max_wait'] = max(self._counters['max_wait'], wait)
+        return wait
+
+    def back_off(self, seconds):
+        """Halves rate and stops handing out tokens for a number of seconds,
+        e.g. after the API answered 429 with a Retry-After header."""
+        with self._lock:
+            now = self._timer()
+            self._refill(now)
+            self.rate = max(self.max_rate / 64, self.rate / 2)
+            self._tokens = min(self._tokens, 0)
+            self._last = max(self._last, now + seconds)
+            self._counters['backoffs'] += 1
+        print(f"Rate limiter '{self.name}' backing off for {seconds:.1f} s, "
+              f"now at {self.rate:.1f} calls/s.")
+
+    def record_success(self):
+        """Grows rate back towards max_rate after a successful call."""
+        if self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def stats(self):
+        """Returns dictionary of call/queue counters, queue wait times in
+        seconds and current rate."""
+        with self._lock:
+            stats = dict(self._counters)
+        stats['mean_wait'] = stats['total_wait'] / stats['queued'] if stats['queued'] else 0.0
+        stats['rate'] = self.rate
+        return stats
+
+
+class Pacer:
+    """Thread-safe scheduler keeping calls to an API within a number of
+    calls per period, e.g. 10 per minute.
+
+    Each call reserves a time slot: right away if fewer than `calls` slots
+    were reserved over the last `period` seconds, else `period` seconds
+    after the oldest of them. Calls thus only wait once the budget is
+    spent, and then in the order they arrived.
+
+    Attributes:
+        name: String used to identify pacer in stats and log messages.
+        calls: Integer representing max number of calls per period.
+        period: Number of seconds of the sliding window calls are counted in.
+    """
+
+    def __init__(self, name, calls, period, timer=time.monotonic,
+                 sleep=time.sleep):
+        if calls < 1 or period <= 0:
+            raise ValueError("At least one call per positive period must be allowed.")
+        self.name = name
+        self.calls = calls
+        self.period = period
+        self._timer = timer
+        self._sleep = sleep
+        self._slots = deque(maxlen=calls)   # last `calls` slots reserved
+        self._lock = threading.Lock()
+        self._counters = {'calls': 0, 'queued': 0, 'rejected': 0,
+                          'total_wait': 0.0, 'max_wait': 0.0}
+
+    def reserve(self, max_wait=None):
+        """Reserves next free slot, without waiting for it.
+
+        Args:
+            max_wait: Max number of seconds slot may be away; None for no
+                      limit.
+
+        Returns:
+            wait: Number of seconds until slot; None if over max_wait, in
+                  which case no slot is reserved.
+        """
+        with self._lock:
+            now = self._timer()
+            slot = now
+            if len(self._slots) == self.calls:
+                slot = max(now, self._slots[0] + self.period)
+            wait = slot - now
+            if max_wait is not None and wait > max_wait:
+                self._counters['rejected'] += 1
+                return None
+
+            self._slots.append(slot)
+            self._counters['calls'] += 1
+            if wait > 0:
+                self._counters['queued'] += 1
+                self._counters['total_wait'] += wait
+                self._counters['max_wait'] = max(self._counters['max_wait'], wait)
+            return wait
+
+    def next_slot(self):
+        """Returns number of seconds until a slot is free; 0 if one is."""
+        with self._lock:
+            if len(self._slots) < self.calls:
+                return 0.0
+            return max(0.0, self._slots[0] + self.period - self._timer())
+
+    def wait_turn(self, max_wait=None):
+        """Reserves next free slot and sleeps until it comes.
+
+        Returns:
+            True if call may go ahead; False if its slot would have been
+            over max_wait seconds away.
+        """
+        wait = self.reserve(max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            print(f"Pacer '{self.name}': waiting {wait:.1f} s for next slot...")
+            self._sleep(wait)
+        return True
+
+    def stats(self):
+        """Returns dictionary of call/queue counters and queue wait times
+        in seconds."""
+        with self._lock:
+            stats = dict(self._counters)
+        stats['mean_wait'] = stats['total_wait'] / stats['queued'] if stats['queued'] else 0.0
+        return stats
+
+
+class PriorityScheduler:
+    """Thread-safe scheduler handing out a Pacer's slots to calls by
+    priority class, within a daily budget as well.
+
+    Calls queue until their turn: INTERACTIVE calls ahead of PREFETCH ones,
+    ahead of BATCH ones, and in the order they arrived within a class.
+    Prefetch and batch calls may not use the last interactive_slots slots
+    of the pacer's window, nor the last daily_reserve calls of the day's
+    budget, so that they never crowd out interactive calls. Once the day's
+    budget (UTC) is spent, calls are failed at once rather than queued.
+
+    Attributes:
+        pacer: Pacer whose slots are handed out.
+        calls_per_day: Integer representing max number of calls per day.
+        daily_reserve: Integer representing number of calls per day kept
+                       for interactive calls.
+        interactive_slots: Integer representing number of pacer's slots
+                           kept for interactive calls.
+    """
+
+    def __init__(self, pacer, calls_per_day, daily_reserve=0, interactive_slots=0,
+                 timer=time.monotonic, clock=time.time):
+        if not 0 <= daily_reserve < calls_per_day or not 0 <= interactive_slots < pacer.calls:
+            raise ValueError("Reserves must leave some calls to prefetch and batch work.")
+        self.pacer = pacer
+        self.calls_per_day = calls_per_day
+        self.daily_reserve = daily_reserve
+        self.interactive_slots = interactive_slots
+        self._timer = timer
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._queue = []                  # heap of (rank, arrival) tickets
+        self._arrivals = itertools.count()
+        self._background = deque()        # times of prefetch/batch calls
+        self._paused_until = 0.0
+        self._day = None
+        self._day_calls = 0
+        self._counters = {level: {'calls': 0, 'queued': 0, 'rejected': 0, 'over_budget': 0,
+                                  'total_wait': 0.0, 'max_wait': 0.0}
+                          for level in PRIORITIES}
+        self._backoffs = 0
+
+    def _day_budget(self, level):
+        """Returns number of calls level may still make today. Call with
+        lock held."""
+        day = datetime.fromtimestamp(self._clock(), timezone.utc).date()
+        if day != self._day:
+            self._day, self._day_calls = day, 0
+        limit = self.calls_per_day
+        if level != INTERACTIVE:
+            limit -= self.daily_reserve
+        return max(0, limit - self._day_calls)
+
+    def _background_wait(self, now):
+        """Returns number of seconds until prefetch and batch calls may have
+        a slot of the pacer's window. Call with lock held."""
+        while self._background and self._background[0] <= now - self.pacer.period:
+            self._background.popleft()
+        if len(self._background) < self.pacer.calls - self.interactive_slots:
+            return 0.0
+        return self._background[0] + self.pacer.period - now
+
+    def _wait_for_turn(self, ticket, level, deadline):
+        """Waits until call of ticket may go ahead. Call with lock held.
+
+        Returns:
+            True once it may; False if day's budget ran out or deadline
+            passed meanwhile.
+        """
+        while True:
+            now = self._timer()
+            wait = max(0.0, self._paused_until - now)
+            if self._queue[0] == ticket:
+                wait = max(wait, self.pacer.next_slot())
+                if level != INTERACTIVE:
+                    wait = max(wait, self._background_wait(now))
+                if wait <= 0:
+                    return self._day_budget(level) > 0
+            elif wait <= 0:
+                # Calls ahead will wake us once they go.
+                wait = None
+
+            if deadline is not None:
+                if deadline - now <= 0 or (self._queue[0] == ticket and now + wait > deadline):
+                    return False
+                wait = deadline - now if wait is None else min(wait, deadline - now)
+            self._cond.wait(wait)
+
+    def acquire(self, max_wait=None, level=None):
+        """Waits for call's turn, then takes a slot of the pacer for it.
+
+        Args:
+            max_wait: Max number of seconds to wait; None for no limit.
+            level: Priority class of call; current_priority() if None.
+
+        Returns:
+            True if call may go ahead; False if it would have had to wait
+            over max_wait seconds, or if the day's budget is spent.
+        """
+        level = level or current_priority()
+        counters = self._counters[level]
+        ticket = (PRIORITIES.index(level), next(self._arrivals))
+        with self._cond:
+            if self._day_budget(level) <= 0:
+                counters['over_budget'] += 1
+                print(f"Scheduler '{self.pacer.name}': daily budget of {level} calls spent.")
+                return False
+
+            start = self._timer()
+            deadline = None if max_wait is None else start + max_wait
+            heapq.heappush(self._queue, ticket)
+            try:
+                may_go = self._wait_for_turn(ticket, level, deadline)
+            finally:
+                self._queue.remove(ticket)
+                heapq.heapify(self._queue)
+                self._cond.notify_all()
+
+            if not may_go:
+                key = 'over_budget' if self._day_budget(level) <= 0 else 'rejected'
+                counters[key] += 1
+                return False
+
+            now = self._timer()
+            self.pacer.reserve()
+            self._day_calls += 1
+            if level != INTERACTIVE:
+                self._background.append(now)
+            wait = now - start
+            counters['calls'] += 1
+            if wait > 0:
+                counters['queued'] += 1
+                counters['total_wait'] += wait
+                counters['max_wait'] = max(counters['max_wait'], wait)
+        return True
+
+    def back_off(self, seconds):
+        """Stops handing out slots for a number of seconds, e.g. after the
+        API answered 429 with a Retry-After header."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, self._timer() + seconds)
+            self._backoffs += 1
+            self._cond.notify_all()
+        print(f"Scheduler '{self.pacer.name}' backing off for {seconds:.1f} s.")
+
+    def remaining(self, level=None):
+        """Returns number of calls of priority class level (current one if
+        None) that may still be made today."""
+        with self._cond:
+            return self._day_budget(level or current_priority())
+
+    def stats(self):
+        """Returns dictionary of call/queue counters and queue wait times in
+        seconds per priority class, and calls made and left today."""
+        with self._cond:
+            stats = {level: dict(counters) for level, counters in self._counters.items()}
+            remaining = self._day_budget(INTERACTIVE)
+            stats['day_calls'] = self._day_calls
+            stats['day_remaining'] = remaining
+            stats['backoffs'] = self._backoffs
+        for level in PRIORITIES:
+            queued = stats[level]['queued']
+            stats[level]['mean_wait'] = stats[level]['total_wait'] / queued if queued else 0.0
+        return stats
+
+
+def retry_after_seconds(res, default):
+    """Returns number of seconds a 429/503 response asks clients to wait.
+
+    Args:
+        res: requests.Response or asyncclients.ApiResponse object.
+        default: Number of seconds returned if response has no valid
+                 Retry-After header.
+    """
+    value = res.headers.get('Retry-After')
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    # Retry-After may also be an HTTP date.
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
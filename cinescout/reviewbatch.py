@@ -0,0 +1,201 @@
+"""Resolves NYT reviews of catalog films and films on users' lists ahead of
+time, so that movie pages find them in the database.
+
+A pass walks films on users' lists (movie_lists), then catalog films
+(films), and resolves the review of each one whose outcome is not stored
+yet, or is a stale 'no review found' (see reviewstore). NYT calls go
+through NytMovieReview's scheduler, like those of movie pages, but behind
+them: films on users' lists as prefetch calls, catalog films as batch ones.
+A pass stops once the day's budget of such calls is spent; it may also be
+capped to a number of NYT calls. The TMDB data NYT is searched with is
+fetched PREFETCH_SIZE films at a time, concurrently (see asyncclients).
+
+Films done are written to a checkpoint file as the pass goes, so a pass
+that was interrupted, or ran out of calls, resumes where it stopped. Run
+passes with scripts/resolve_reviews.py.
+"""
+
+import os
+import json
+import time
+import asyncio
+
+from cinescout import db, reviewstore
+from cinescout.models import Film, FilmListItem
+from cinescout.movies import Movie
+from cinescout.asyncclients import AsyncTmdbMovie, close_sessions
+from cinescout.reviews import NytMovieReview
+from cinescout.ratelimit import priority, PREFETCH, BATCH
+
+# Number of films resolved between two writes of the checkpoint file.
+CHECKPOINT_EVERY = 10
+
+# Number of seconds to wait before retrying a film when NYT, or the pacer,
+# answers 429, and max number of retries.
+RETRY_DELAY = 60
+MAX_RETRIES = 3
+
+# Number of films whose TMDB data is fetched at once, ahead of resolving
+# their reviews one by one.
+PREFETCH_SIZE = 20
+
+
+class Checkpoint:
+    """Keys of the films a pass is done with, kept in a JSON file.
+
+    Attributes:
+        path: String representing path of checkpoint file.
+        done: Set of strings representing keys of films done.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path) as checkpoint_file:
+                self.done = set(json.load(checkpoint_file).get('done', []))
+
+    def save(self):
+        """Writes checkpoint file; a crash midway leaves the old one whole."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as checkpoint_file:
+            json.dump({'done': sorted(self.done)}, checkpoint_file)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        """Forgets films done, once a pass is over."""
+        self.done = set()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def batch_targets():
+    """Returns list of (key, tmdb_id, list_item) tuples of the films to
+    resolve, films on users' lists first, each film once.
+
+    list_item is the FilmListItem the film comes from; None for catalog
+    films.
+    """
+    targets = {}
+    for item in FilmListItem.query.order_by(FilmListItem.id):
+        key = f"tmdb:{item.tmdb_id}" if item.tmdb_id else f"list:{item.title}|{item.year}"
+        targets.setdefault(key, (key, item.tmdb_id, item))
+
+    films = (db.session.query(Film.tmdb_id).filter(Film.tmdb_id.isnot(None))
+             .distinct().order_by(Film.tmdb_id))
+    for tmdb_id, in films:
+        key = f"tmdb:{tmdb_id}"
+        targets.setdefault(key, (key, tmdb_id, None))
+    return list(targets.values())
+
+
+async def target_movie(tmdb_id, list_item):
+    """Returns Movie object to search NYT for, with the fields movie pages
+    key reviews by; None if they can't be had."""
+    if tmdb_id:
+        result = await AsyncTmdbMovie.get_movie_info_by_id(tmdb_id)
+        if result['success']:
+            return result['movie']
+        print(f"TMDB lookup failed for movie_id={tmdb_id}: status_code={result['status_code']}")
+        if list_item is None:
+            return None
+
+    return Movie(title=list_item.title, original_title=list_item.original_title or list_item.title,
+                 release_year=list_item.year, release_date=list_item.date)
+
+
+async def target_movies(targets):
+    """Returns dictionary of Movie objects of targets (see target_movie) by
+    key; their TMDB data is fetched concurrently."""
+    movies = await asyncio.gather(*(target_movie(tmdb_id, list_item)
+                                    for _, tmdb_id, list_item in targets))
+    return {key: movie for (key, _, _), movie in zip(targets, movies)}
+
+
+def resolve_target(movie, retry_delay=RETRY_DELAY, sleep=time.sleep):
+    """Resolves movie's review, retrying when told to slow down.
+
+    Returns:
+        outcome: String; one of 'cached', 'found', 'not found', 'skipped'
+                 (can't be searched for yet) or 'failed'.
+    """
+    if not (movie.title and movie.release_year and movie.release_date):
+        return 'skipped'
+
+    if reviewstore.stored_review(movie) is not None:
+        return 'cached'
+
+    for attempt in range(MAX_RETRIES + 1):
+        response = reviewstore.resolve_review(movie)
+        if response['status_code'] != 429 or attempt == MAX_RETRIES:
+            break
+        print(f"NYT asks to slow down: retrying in {retry_delay} s...")
+        sleep(retry_delay)
+
+    if response['status_code'] != 200:
+        print(f"Could not resolve review: {response['status_code']}, {response.get('message')}")
+        return 'failed'
+    if response.get('message'):
+        # Future release: outcome not stored.
+        return 'skipped'
+    return 'found' if response['review']['found'] else 'not found'
+
+
+def run_pass(checkpoint, max_calls=None, retry_delay=RETRY_DELAY, sleep=time.sleep):
+    """Resolves reviews of the films checkpoint is not done with.
+
+    Args:
+        checkpoint: Checkpoint object of pass.
+        max_calls: Max number of NYT calls to make; None for no limit. The
+                   pass stops once it is reached, keeping its checkpoint.
+
+    Returns:
+        stats: Dictionary of number of films per outcome (see
+               resolve_target), NYT calls made and whether pass is over.
+    """
+    stats = {'cached': 0, 'found': 0, 'not found': 0, 'skipped': 0, 'failed': 0,
+             'calls': 0, 'complete': False}
+    calls_at_start = NytMovieReview.pacer.stats()['calls']
+    targets = [target for target in batch_targets() if target[0] not in checkpoint.done]
+    print(f"Resolving NYT reviews of {len(targets)} films...")
+
+    # One loop for the whole pass, so TMDB connections outlive a prefetch.
+    loop = asyncio.new_event_loop()
+    movies = {}
+    try:
+        for count, (key, tmdb_id, list_item) in enumerate(targets, start=1):
+            stats['calls'] = NytMovieReview.pacer.stats()['calls'] - calls_at_start
+            if max_calls is not None and stats['calls'] >= max_calls:
+                print(f"NYT call budget of {max_calls} spent; stopping.")
+                checkpoint.save()
+                return stats
+
+            # Users may well look up films on their lists soon.
+            level = BATCH if list_item is None else PREFETCH
+            if NytMovieReview.scheduler.remaining(level) <= 0:
+                print(f"Today's NYT budget of {level} calls spent; stopping.")
+                checkpoint.save()
+                return stats
+
+            if key not in movies:
+                movies = loop.run_until_complete(
+                    target_movies(targets[count - 1:count - 1 + PREFETCH_SIZE]))
+            movie = movies[key]
+            with priority(level):
+                outcome = 'failed' if movie is None else resolve_target(movie, retry_delay, sleep)
+            print(f"#{count} {key}: {outcome}")
+            stats[outcome] += 1
+
+            # Failed films are tried again next pass.
+            if outcome != 'failed':
+                checkpoint.done.add(key)
+            if count % CHECKPOINT_EVERY == 0:
+                checkpoint.save()
+    finally:
+        loop.run_until_complete(close_sessions())
+        loop.close()
+
+    stats['calls'] = NytMovieReview.pacer.stats()['calls'] - calls_at_start
+    stats['complete'] = True
+    checkpoint.clear()
+    return stats
@@ -0,0 +1,137 @@
+"""Runs NYT review lookups in the background, for the review API to poll.
+
+Finding a review can take several paced NYT calls. Rather than holding a
+web worker all that time, the review API submits a job and answers at once
+with its id; the movie page then polls for the job's result. Jobs run on a
+small pool of threads shared by all requests of the process.
+
+Requests for a film whose job is still pending get that job's id, so each
+film is only looked up once at a time. Finished jobs are kept JOB_TTL
+seconds for late polls, then forgotten.
+"""
+
+import os
+import time
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from cinescout import app, reviewstore
+
+# Number of threads looking up reviews, and max number of jobs pending,
+# per worker process. NYT calls are paced anyway, so there is little point
+# in many threads.
+REVIEW_JOB_WORKERS = int(os.getenv('REVIEW_JOB_WORKERS', 4))
+MAX_PENDING_JOBS = int(os.getenv('MAX_PENDING_JOBS', 100))
+
+# Number of seconds a finished job's result can be polled for.
+JOB_TTL = int(os.getenv('REVIEW_JOB_TTL', 300))
+
+PENDING = 'pending'
+DONE = 'done'
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while MAX_PENDING_JOBS are pending."""
+
+
+class ReviewJobs:
+    """Thread-safe registry of review lookup jobs, run on a bounded pool.
+
+    Attributes:
+        max_workers: Integer representing max number of jobs run at once.
+        max_pending: Integer representing max number of jobs pending.
+        ttl: Number of seconds finished jobs are kept.
+    """
+
+    def __init__(self, max_workers=REVIEW_JOB_WORKERS, max_pending=MAX_PENDING_JOBS,
+                 ttl=JOB_TTL, timer=time.monotonic):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._timer = timer
+        self._jobs = {}      # job id => job dictionary
+        self._by_film = {}   # film key => id of its pending job
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='review-job')
+
+    def _prune(self, now):
+        """Forgets finished jobs older than ttl. Call with lock held."""
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job['status'] == DONE and now - job['finished_at'] > self.ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, movie, func):
+        """Submits job calling func(movie), unless one is pending for movie.
+
+        Args:
+            movie: Movie object whose review is looked up.
+            func: Function returning the job's result; runs in an app context.
+
+        Raises:
+            QueueFull: if max_pending jobs are pending.
+
+        Returns:
+            job_id: String identifying job.
+        """
+        key = reviewstore.film_key(movie)
+        with self._lock:
+            now = self._timer()
+            self._prune(now)
+            job_id = self._by_film.get(key)
+            if job_id is not None:
+                return job_id
+            if len(self._by_film) >= self.max_pending:
+                raise QueueFull("Too many review lookups pending.")
+
+            job_id = secrets.token_urlsafe(16)
+            self._jobs[job_id] = {'status': PENDING, 'result': None,
+                                  'submitted_at': now, 'finished_at': None}
+            self._by_film[key] = job_id
+
+        self._executor.submit(self._run, job_id, key, movie, func)
+        return job_id
+
+    def _run(self, job_id, key, movie, func):
+        """Runs job and records its result."""
+        try:
+            with app.app_context():
+                result = func(movie)
+        except Exception as err:
+            print(f"Review job {job_id} failed: {err!r}")
+            result = ({'success': False, 'err_message': "Review lookup failed."}, 500)
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(status=DONE, result=result, finished_at=self._timer())
+            del self._by_film[key]
+
+    def get(self, job_id):
+        """Returns copy of job dictionary, with fields status and result;
+        None if there is no such job, or it expired."""
+        with self._lock:
+            self._prune(self._timer())
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def stats(self):
+        """Returns dictionary of number of jobs pending and kept."""
+        with self._lock:
+            return {'pending': len(self._by_film), 'jobs': len(self._jobs)}
+
+
+def _build_jobs():
+    """Builds registry of the process's jobs."""
+    global jobs
+    jobs = ReviewJobs()
+
+
+_build_jobs()
+
+# Threads, and the jobs they were running, do not survive a fork: forked
+# workers start with a registry of their own.
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_build_jobs)
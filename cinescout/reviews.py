@@ -4,10 +4,22 @@ import os
 import time
 from datetime import datetime
 
-import requests                  # API calls
-from fuzzywuzzy import fuzz      # For determining how similar two movie titles are.
-
+import requests
+from cinescout import sessions   # API calls
 from cinescout.movies import TmdbMovie 
+from cinescout.singleflight import SingleFlight
+from cinescout import nytmatch      # Which NYT review is that of a movie.
+from cinescout.nytarchive import archive
+from cinescout.nytoverrides import overrides, REVIEW, NO_REVIEW
+from cinescout.nytplanner import (QueryPlanner, TITLE_BY_YEAR, ORIGINAL_BY_YEAR,
+                                  TITLE_BY_DATE, ORIGINAL_BY_DATE, film_class,
+                                  has_original_title, uses_original_title, by_release_year)
+from cinescout import titlematch    # How similar two movie titles are.
+from cinescout.ratelimit import (Pacer, PriorityScheduler, NYT_CALLS_PER_MINUTE, NYT_MAX_WAIT,
+                                 NYT_CALLS_PER_DAY, NYT_INTERACTIVE_DAILY_RESERVE,
+                                 NYT_INTERACTIVE_SLOTS, NYT_BACKGROUND_MAX_WAIT,
+                                 INTERACTIVE, RateLimited, current_priority,
+                                 retry_after_seconds)
 
 
 class MovieReview:
@@ -19,7 +31,7 @@ class MovieReview:
         text: String containing summary of movie review.
         publication_date: String representing date review was published.
     """
-
+    __slots__ = ('title', 'year', 'text', 'publication_date')
 
     def __init__(self, title=None, year=None, text=None, publication_date=None):
         self.title = title
@@ -47,13 +59,20 @@ class NytMovieReview(MovieReview):
 
     Class Attributes:
         api_key: String representing API key required to access NYT's API.
-        delay: Integer representing delay before calling NYT api.
+        pacer: Pacer keeping calls to NYT api, from all threads, within
+               NYT's limit per minute; its stats() report wait times.
+        scheduler: PriorityScheduler handing out pacer's slots, within
+                   NYT's daily limit, to interactive lookups first, then
+                   to prefetch and batch work; see ratelimit.priority.
         threshold: Integer of [0, 100] representing the Levenshtein distance
                    ratio as a result of fuzzy string comparison.
         max_year_gap: Integer representing the max number of years between
                       the release of a movie and it being reviewed.
-        exceptions: Dictionary containing titles (string) and years (int) of
-                    movies who need cannot be queried the usual way.
+        api_url: String representing url of NYT movie review search API.
+        inflight: SingleFlight coalescing concurrent searches for the same
+                  review into one series of API calls.
+        planner: QueryPlanner ordering the searches of find_movie_review;
+                 its stats() report how each way of searching fares.
 
     Attributes:
         title: String representing the title of movie reviewed.
@@ -62,32 +81,71 @@ class NytMovieReview(MovieReview):
         publication_date: String representing date review was published.
         critics_pick: Boolean representing whether movie is NYT critic's pick.
     """
+    __slots__ = ('critics_pick',)
 
     # Class Attributes
 
     # New York Times API movie review key
     api_key = os.getenv('NYT_API_KEY')
 
-    # Number of seconds to wait before making next call to NYT api
-    delay = 3
+    # Spaces out calls to NYT api
+    pacer = Pacer('nyt', calls=NYT_CALLS_PER_MINUTE, period=60)
+
+    # Gives users' lookups precedence over background work
+    scheduler = PriorityScheduler(pacer, calls_per_day=NYT_CALLS_PER_DAY,
+                                  daily_reserve=NYT_INTERACTIVE_DAILY_RESERVE,
+                                  interactive_slots=NYT_INTERACTIVE_SLOTS)
 
     # Percentage the likelihood that two strings match per Levenshtein distance
     # ratio. An arbitrary value that seems reasnoable.
-    threshold = 80
+    threshold = nytmatch.THRESHOLD
 
     # Max number of years between when a movie was released and its review
     # published.
-    max_year_gap = 5
+    max_year_gap = nytmatch.MAX_YEAR_GAP
+
+    api_url = "https://api.nytimes.com/svc/movies/v2/reviews/search.json"
+
+    inflight = SingleFlight('nyt')
 
-    # Movies that cannot be queried the usual way, probably because two movies
-    # of the same title came out the same year.
-    exceptions = { "Black Rain": 1989, "Nineteen Eighty-Four": 1984}
+    # Orders searches by what worked for similar films.
+    planner = QueryPlanner()
 
     def __init__(self, title=None, year=None, text=None, publication_date=None,
                 critics_pick=None):
         MovieReview.__init__(self, title, year, text, publication_date)
         self.critics_pick = critics_pick
 
+    @classmethod
+    def _get(cls, params):
+        """Queries NYT movie review API over the process's pooled session,
+        once scheduler gives the call its turn.
+
+        Args:
+            params: Dictionary of query parameters; API key is added to them.
+
+        Raises:
+            RateLimited: if the call would have had to wait over
+                         NYT_MAX_WAIT seconds (NYT_BACKGROUND_MAX_WAIT for
+                         prefetch and batch calls), or if the day's budget
+                         of calls is spent. No call is made.
+
+        Returns:
+            res: requests.Response object.
+        """
+        max_wait = NYT_MAX_WAIT if current_priority() == INTERACTIVE else NYT_BACKGROUND_MAX_WAIT
+        if not cls.scheduler.acquire(max_wait=max_wait):
+            raise RateLimited('nyt', f"NYT call would wait over {max_wait} s for its turn, "
+                                     "or exceed daily budget.")
+
+        params = dict(params)
+        params['api-key'] = cls.api_key
+        res = sessions.get_session('nyt').get(cls.api_url, params=params)
+        if res.status_code == 429:
+            # Budget out of step with NYT's count, e.g. other processes.
+            cls.scheduler.back_off(retry_after_seconds(res, default=60))
+        return res
+
     @staticmethod
     def clean_review_text(review_text):
         """Removes unwanted characters that may appear in NYT review text
@@ -117,11 +175,6 @@ class NytMovieReview(MovieReview):
         cleaned_text = temp_text
         return cleaned_text
 
-    @classmethod
-    def delay_next(cls):
-        """Delays execution of next line of code by passed number of seconds"""
-        time.sleep(cls.delay)
-
     @classmethod
     def good_enough_match(cls, extdb_title, nyt_title):
         """Determines whether the movie titles from the external database and
@@ -145,127 +198,158 @@ class NytMovieReview(MovieReview):
         if not extdb_title or not nyt_title:
             raise ValueError("Titles cannot be blank or None type.")
 
-        # Calculate Levenshtein similarity ratios.
-        ratio = fuzz.ratio(extdb_title.strip().lower(),
-                           nyt_title.strip().lower())
-
-        partial_ratio = fuzz.partial_ratio(extdb_title.strip().lower(),
-                           nyt_title.strip().lower())
-
-        print(f"Levenshtein similarity ratio, full = {ratio}")
-        print(f"Levenshtein similarity ratio, partial = {partial_ratio}")
-
         # Are the two title similar enough to be confident they refer to same
-        # movie?
-        if ratio >= cls.threshold or (ratio >= 50 and partial_ratio >= cls.threshold):
-            return True
-        else:
-            return False
+        # movie? Full Levenshtein similarity ratio must reach threshold, or
+        # be at least 50 with partial ratio reaching threshold.
+        return titlematch.good_enough_mask(extdb_title, [nyt_title], cls.threshold)[0]
 
     @classmethod
-    def get_movie_review_for_exception(cls, movie):
+    def get_movie_review_for_override(cls, movie, override):
         """Processes special cases where film review exists but is otherwise
-        impossible to find given current algorithms.
+        impossible to find given current algorithms; see nytoverrides.
 
         Args:
             movie: Movie object
-
-        Raises:
-            ValueError: if processing a film that is not an exception.
+            override: Dictionary of override that applies to movie.
 
         Returns:
             Dictionary: Two fields
                 'status_code': Integer representing Http response code.
                 'review': Review object. None if no review is to be found.
          """
-        print("Processing exceptions...")
+        print(f"Override for '{movie.title}' ({movie.release_year}): {override.get('note')}")
 
-        # Black Rain, 1989
-        # The Japanese film's original title is in Japanese.
-        if movie.title.lower().strip() == 'black rain' and movie.release_year == 1989:
+        if override['kind'] == NO_REVIEW:
+            return {'status_code': 200, 'review': None}
 
-            # The Michael Douglas movie has same main and original title.
-            if movie.title != movie.original_title:
-                print(f"{movie.title}, {movie.release_year} => Japanese version!")
-                print("Review does exist in NYT database.")
-                return {'status_code': 200, 'review': None}
-            else:
-                print(f"{movie.title}, {movie.release_year} => Michael Douglas version!")
-                print("Getting review for film!")
-
-                # The dates on which a movie is released and reviewed likely differ.
-                # Most movies will have been reviewed in the same year they were
-                # released, however.
-                opening_date_start = f"{movie.release_year}-01-01"
-                opening_date_end = f"{movie.release_year}-12-31"
-
-                print("Making initial request to NYT Movie Review API...", end="")
-                res = requests.get("https://api.nytimes.com/svc/movies/v2/reviews/search.json",
-                                        params={"api-key": cls.api_key,
-                                                "opening-date": f"{opening_date_start}:{opening_date_end}",
-                                                "query": movie.title.strip()})
+        if override['kind'] == REVIEW:
+            nyt_data_result = override['review']
+        else:
+            print("Making request to NYT Movie Review API...", end="")
+            try:
+                res = cls._get(params=override['query'])
+            except RateLimited as err:
+                print(f"FAILED! {err}")
+                return {'status_code': err.status_code, 'review': None}
+
+            # Request to NYT failed...
+            if res.status_code != 200:
+                print(f"FAILED! Http response status code = {res.status_code}")
+                return {'status_code': res.status_code, 'review': None}
+
+            print("SUCCESS!")
+            results = res.json().get('results') or []
+            if not results:
+                return {'status_code': res.status_code, 'review': None}
+            nyt_data_result = results[0]
+
+        # Build review object.
+        review = cls(title=movie.title, year=movie.release_year,
+                     text=cls.clean_review_text(nyt_data_result.get('summary_short')),
+                     publication_date=nyt_data_result.get('publication_date'),
+                     critics_pick=nyt_data_result.get('critics_pick'))
+
+        return {'status_code': 200, 'review': review}
 
-                # Request to NYT failed...
-                if res.status_code != 200:
-                    print(f"FAILED! Http response status code = {res.status_code}")
-                    return {'status_code': res.status_code, 'review': None}
+    @classmethod
+    def _title_release_year_query(cls, title, release_year):
+        """First query made to NYT api to find movie review.
+        Results in ascending ordred per review publication year.
 
-                print("SUCCESS!")
+        Args:
+            title: String representing film's title.
+            release_year: Integer representing film's release year.
 
-                # All good. Extract data.
-                nyt_data = res.json()
+        Returns:
+            res: JSON response object from NYT server.
+        """
+        # Look from beginning of year. The film's release date may differ
+        # from that of the NYT. For the NYT, it may have been released
+        # earlier, so reviewed earlier. Accept results within several years of review year.
+        start = f"{release_year}-01-01"
+        end = f"{release_year + cls.max_year_gap}-12-31"
 
-                # Build review object.
-                review = cls(title=movie.title, year=movie.release_year,
-                             text=cls.clean_review_text(nyt_data['results'][0].get('summary_short')),
-                             publication_date=nyt_data['results'][0].get('publication_date'),
-                             critics_pick=nyt_data['results'][0].get('critics_pick'))
+        res = cls._get(params={"publication-date": f"{start}:{end}",
+                               "order": "by-publication-date",
+                               "query": title.strip()})
+        return res
 
-                return {'status_code': res.status_code, 'review': review}
+    @classmethod
+    def _title_release_date_query(cls, title, release_date):
+        """Second query made to NYT api to find movie review.
+        Results in ascending ordred per opening date.
 
-            # '1984', 1984
-            # Written ad 'Nineteen Eighty-Four' in tmdb.
-        elif movie.title.lower().strip() == 'nineteen eighty-four' and movie.release_year == 1984:
+        Args:
+            title: String representing film's title.
+            release_date: String representing film's release date.
 
-                print(f"'1984', {movie.release_year} => John Hurt version!")
-                print("Getting review for film!")
+        Returns:
+            res: JSON response object from NYT server.
+        """
+        # End-date for query should be however many years after
+        # a film has opened that the programmer has decided for it to be
+        # 'acceptable' consider reviews.
+        date_parts = release_date.split('-', 1)
+        end_year = int(date_parts[0]) + cls.max_year_gap
+        end_date = f"{end_year}-{date_parts[1]}"
 
-                # Film reviewed in US in 1985
-                opening_date_start = f"1985-01-01"
-                opening_date_end = f"1985-12-31"
+        # Date to send with API request.
+        opening_date = f"{release_date}:{end_date}"
 
-                print("Making initial request to NYT Movie Review API...", end="")
-                res = requests.get("https://api.nytimes.com/svc/movies/v2/reviews/search.json",
-                                        params={"api-key": cls.api_key,
-                                                "opening-date": f"{opening_date_start}:{opening_date_end}",
-                                                "query": '1984'})
+        res = cls._get(params={"opening-date": opening_date,
+                               "order": "by-opening-date",
+                               "query": title.strip()})
 
-                # Request to NYT failed...
-                if res.status_code != 200:
-                    print(f"FAILED! Http response status code = {res.status_code}")
-                    return {'status_code': res.status_code, 'review': None}
+        return res
 
-                print("SUCCESS!")
+    @classmethod
+    def _search(cls, title, movie, first_try, use_archive=True):
+        """Searches for reviews of movie under title: in the local NYT
+        archive first, then, should it have no candidates, on NYT api.
 
-                # All good. Extract data.
-                nyt_data = res.json()
+        Args:
+            title: String representing title searched for.
+            movie: Movie object representing movie searched for.
+            first_try: Boolean; True to search by release year, False by
+                       release date.
+            use_archive: Boolean; False to search NYT api only.
 
-                # Build review object.
-                review = cls(title='1984', year=movie.release_year,
-                             text=cls.clean_review_text(nyt_data['results'][0].get('summary_short')),
-                             publication_date=nyt_data['results'][0].get('publication_date'),
-                             critics_pick=nyt_data['results'][0].get('critics_pick'))
+        Returns:
+            (status_code, nyt_data, from_archive): Http status code of NYT
+                api call (200 if archive had candidates), deserialized
+                search results (or error message), and True if they came
+                from the archive.
+        """
+        if use_archive and archive.available():
+            if first_try:
+                nyt_data = archive.search_by_release_year(title, movie.release_year,
+                                                          cls.max_year_gap)
+            else:
+                nyt_data = archive.search_by_release_date(title, movie.release_date,
+                                                          cls.max_year_gap)
+            if nyt_data['num_results']:
+                print(f"{nyt_data['num_results']} candidate(s) found in NYT archive.")
+                return 200, nyt_data, True
+            print("No candidates in NYT archive: querying NYT api...")
 
-                return {'status_code': res.status_code, 'review': review}
+        if first_try:
+            res = cls._title_release_year_query(title, movie.release_year)
         else:
-            raise ValueError("Film that is not a special case being processed as one!")
+            res = cls._title_release_date_query(title, movie.release_date)
+        return res.status_code, res.json(), False
 
     @classmethod
     def get_movie_review(cls, movie, first_try=True):
         """Attempts to return NYT movie review based on movie data.
 
+        Concurrent calls for the same movie and attempt wait on the first
+        one and share its result, which should therefore not be modified.
+
         Args:
             movie: Movie object representing movie searched for.
+            first_try: Boolean; True to search by release year, False by
+                       release date. Either way, the original title is
+                       searched for should the title find nothing.
 
         Raises:
             ValueError: if pertinent movie data needed to query NYT's api
@@ -286,404 +370,113 @@ class NytMovieReview(MovieReview):
 
 
         """
-        # ==================== INNER FUNCTIONS ==============================
-        def get_result(success=None, status_code=None, message=None,
-                        review=None, bullseye=None, future_release=None):
-            """Returns result object. See outerfunction doctstring
-            for more details."""
-            result = {
-                      'success': success,
-                      'status_code': status_code,
-                      'message': message,
-                      'review': review,
-                      'bullseye': bullseye,
-                      'future_release': future_release
-                    }
-            return result
-
-        def error_result(message, status_code=None):
-            """Returns particular result object when review cannot be found
-            due to an error (http error, missing movie information, etc.)"""
-            return get_result(success=False,
-                              status_code=status_code,
-                              message=message)
-
-        def nyt_api_title_query(title):
-            """Queries for NYT review based on title."""
-            url = "https://api.nytimes.com/svc/movies/v2/reviews/search.json"
-            res = requests.get(url, params={"api-key": cls.api_key,
-                                            "query": title.strip()})
-            return res
-
-        def nyt_api_title_release_year_query(title, release_year):
-            """First query made to NYT api to find movie review.
-            Results in ascending ordred per review publication year.
-
-            Args:
-                title: String representing film's title.
-                release_year: Integer representing film's release year.
-
-            Returns:
-                res: JSON response object from NYT server.
-            """
-
-            # Look from beginning of year. The film's release date may differ
-            # from that of the NYT. For the NYT, it may have been released
-            # earlier, so reviewed earlier. Accept results within several years of review year.
-            start = f"{release_year}-01-01"
-            end = f"{release_year + cls.max_year_gap}-12-31"
-           
-            url = "https://api.nytimes.com/svc/movies/v2/reviews/search.json"
-
-            res = requests.get(url, params={"api-key": cls.api_key,
-                                            "publication-date": f"{start}:{end}",
-                                            "order": "by-publication-date",
-                                            "query": title.strip()})
-            return res
-
-        def nyt_api_title_release_date_query(title, release_date):
-            """Second query made to NYT api to find movie review.
-            Results in ascending ordred per opening date.
-
-            Args:
-                title: String representing film's title.
-                release_date: String representing film's release date.
-
-            Returns:
-                res: JSON response object from NYT server.
-            """
-            url = "https://api.nytimes.com/svc/movies/v2/reviews/search.json"
-
-            # End-date for query should be however many years after
-            # a film has opened that the programmer has decided for it to be
-            # 'acceptable' consider reviews.
-            date_parts = release_date.split('-', 1)
-            end_year = int(date_parts[0]) + cls.max_year_gap
-            end_date = f"{end_year}-{date_parts[1]}"
-
-            # Date to send with API request.
-            opening_date = f"{release_date}:{end_date}"
-
-            res = requests.get(url, params={"api-key": cls.api_key,
-                                            "opening-date": opening_date,
-                                            "order": "by-opening-date",
-                                            "query": title.strip()})
-
-            return res
-
-        def build_NYTReview_object(movie, nyt_data_result):
-            """Returns NYTReview object based on NYT api response data for a
-            single review and a Movie object.
-
-            Args:
-                movie: Movie object representing movie searched for.
-                nyt_data_result: Dictionary containing data from NYT api for
-                                 a single review.
-            Returns:
-                review: An NYTMovieReview object.
-            """
-
-            # Extract info from NYT api result.
-            nyt_critics_pick = nyt_data_result['critics_pick']
-            nyt_summary_short = nyt_data_result['summary_short']
-
-            if nyt_summary_short is not None:
-                if nyt_summary_short.strip() == "":
-                    nyt_summary_short = "No summary review provided."
-
-            review = cls(title=movie.title, year=movie.release_year,
-                         text=cls.clean_review_text(nyt_summary_short),
-                         critics_pick=nyt_critics_pick,
-                         publication_date=nyt_data_result.get('publication_date'))
-
-            return review
-
-        # +++++++ SINGLE RESULT ++++++++
-        def get_publication_year(nyt_data_result):
-            """Extracts publication year of review.
-
-            Args:
-                nyt_data_result: Dictionary containing data from NYT api for
-                                 a single review.
-
-            Returns:
-                nyt_pub_year: String representing publication date.
-            """
-            nyt_pub_date = nyt_data_result.get('publication_date')
-            nyt_pub_year = int(nyt_pub_date.split('-')[0].strip())
-            return nyt_pub_year
-
-        def film_reviewed_in_last_X_years(release_year, nyt_pub_year,
-                                          acceptable_range):
-            """Determines whether film was reviewed within X years of being
-            released.
-
-            Args:
-                release_year: Integer representing release year of film.
-                nyt_pub_year: Integer representing year review was published.
-                acceptable_range: Integer representing the max number of years
-                                  a review could be published for a film.
-            """
-            # Film review is too old.
-            if (nyt_pub_year - release_year) > acceptable_range:
-                return False
-
-            # No, it isn't.
-            return True
-
-        def verify_result(nyt_data_result, original_title_used=False):
-            """Checks whether single NYT api review result can be reliably
-            trusted. Verification checks two aspects of the returned review:
-            when it was published, and the title of movie it reviews.
-
-            Args:
-                nyt_data_result: Dictionary containing data from NYT api for
-                                 a single review.
-                original_title_used: Boolean indicating whether film's
-                                    original title was used to query the api.
-            Returns:
-                result: A dictionary containing the final result data
-                        after analysis.
-            """
-
-            # Ensure that all reviews have a publication date.
-            # Don't trust them otherwise.
-            if not nyt_data_result.get('publication_date'):
-                message = "Unable to verify review: it has no publication date."
-                print(f"{message}: {movie.title}, ({movie.release_year})")
-                result = get_result(success=False,
-                                  status_code=response.status_code,
-                                  message=message)
-                return result
-
-            # Get publication year from publication date
-            nyt_pub_year = get_publication_year(nyt_data_result)
-
-            # Film review cannot have been published before a film's realease.
-            if nyt_pub_year != movie.release_year:
-                if nyt_pub_year < movie.release_year:
-                    message = "Review no good: A review cannot be published before a film's release."
-                    print(f"{message}: {movie.title}, ({movie.release_year})")
-                    result = get_result(success=False,
-                                      status_code=response.status_code,
-                                      message=message)
-                    return result
-
-                # Film reviews that are published 'too late' are not trustworthy.
-                if not film_reviewed_in_last_X_years(release_year=movie.release_year,
-                                                nyt_pub_year=nyt_pub_year,
-                                                acceptable_range=cls.max_year_gap):
-
-                    message = "Review unlikely: review published too many years after film release."
-                    print(f"{message}: {movie.title}")
-                    result = get_result(success=False,
-                                      status_code=response.status_code,
-                                      message=message)
-                    return result
-
-            # See whether film's title is highly similar to title used in
-            # NYT review.
-            # NYT may have used original movie title instead of
-            # more widely-known, often Anglicized, movie title.
-            if original_title_used:
-                searched_title = movie.original_title.strip().lower()
-            else:
-                searched_title = movie.title.strip().lower()
-
-            # Clean NYT title for movie so differences in case and spacing
-            # doesn't give us false negatives.
-            nyt_movie_title = nyt_data_result.get('display_title').strip().lower()
-
-            # Check whether TMDB movie title and move title in NYT review
-            # are similar.
-            similar_titles = cls.good_enough_match(searched_title,
-                                                    nyt_movie_title)
-
-            if not similar_titles:
-                message = "Not a close enough match: Film title does not match title of film in review."
-                print(f"{message}: {movie.title}, ({movie.release_year})")
-                result = get_result(success=False,
-                                  status_code=response.status_code,
-                                  message=message)
-                return result
-
-            # All good. Build a review object.
-            print("Best review possible found. Building review object...")
-            review = build_NYTReview_object(movie, nyt_data_result)
-
-            # Let caller know whehter review is an exact match or not.
-            if nyt_pub_year != movie.release_year or not similar_titles:
-                print("Some risk that this is the wrong review.")
-                bullseye = False
-            else:
-                print("Zero or low risk that this is the wrong review.")
-                bullseye = True
+        key = (movie.title, movie.original_title, movie.release_year,
+               movie.release_date, first_try)
+        return cls.inflight.do(key, cls._get_movie_review, movie, first_try)
 
-            result = get_result(success=True,
-                                status_code=response.status_code,
-                                review=review,
-                                bullseye=bullseye)
-
-            return result
-
-        # +++++++ MUTLIPLE RESULTS ++++++++
-        def nyt_review_year(nytreview):
-            """Returns year a NYT review was published; should that not exist,
-            then the year the movie opened.
-
-            Args:
-                nytreview: An element from NYT api 'results' list.
-
-            Returns:
-                review_year: Integer representing desired year.
-            """
-            if nytreview['publication_date']:
-                nyt_date = nytreview['publication_date']
-            else:
-                nyt_date = nytreview['opening_date']
-
-            review_year = int(nyt_date.split('-')[0].strip())
-
-            return review_year
-
-        def exact_match(movie, nytreviews):
-            """Attempts to find NYT review that has exactly the same title
-            and year as the passed Movie object.
-
-            Args:
-                movie: Movie object containing salient movie data.
-                nytreviews: List of dictionaries containing review data from
-                            NYT api response.
-
-            Returns:
-                nytreview: An element from said list if an exact match found.
-                None: A None type object should an exact match not be found.
-            """
-            # Matches should be capitalization and space-neutral
-            movie_obj_title = movie.title.strip().lower()
-
-            for nytreview in nytreviews:
-                # Idem reason.
-                review_movietitle = nytreview['display_title'].strip().lower()
-
-                # Compare titles.
-                if movie_obj_title == review_movietitle:
-
-                    # Compare release years.
-                    if movie.release_year == nyt_review_year(nytreview):
-                        return nytreview
-
-            # No match.
-            return None
-
-        def filter_year(release_year, nytreviews, grace_period):
-            """Builds and returns list of NYT reviews that were written
-            after a movie's release_year and within a grace period
-
-            Args:
-                release_year: Integer representing movie release year.
-                nytreviews: List of dictionaries containing review data from
-                            NYT api response.
-                grace_period: Integer representing number of years after
-                              a film's release for a review to be 'valid'.
-
-            Returns:
-                filtered_list: A list of NYT reviews that pass the filter
-                               tests; list can be empty.
-            """
-            filtered_reviews = []
-
-            for nytreview in nytreviews:
-                review_year = nyt_review_year(nytreview)
-
-                if review_year >= release_year:
-                    if (review_year - release_year) <= grace_period:
-                        filtered_reviews.append(nytreview)
-
-            return filtered_reviews
-
-        def filter_title(movie_title, nytreviews):
-            """Filters NYT data api response for titles that are
-            good-enough matches.
-
-            Args:
-                movie_title: String representing movie title.
-                nytreviews: List of dictionaries containing review data from
-                            NYT api response.
-
-            Returns:
-                filtered_list: A list of NYT reviews that pass the filter
-                               tests; list can be empty.
-            """
-            filtered_list = []
+    @classmethod
+    def find_movie_review(cls, movie):
+        """Attempts to return NYT movie review based on movie data, trying
+        every way of searching for it, in the order planner expects to
+        need the fewest NYT calls; see nytplanner. Arguments, exceptions
+        and result as in get_movie_review.
+        """
+        key = (movie.title, movie.original_title, movie.release_year,
+               movie.release_date, 'planned')
+        return cls.inflight.do(key, cls._find_movie_review, movie)
 
-            for nytreview in nytreviews:
-                nyt_movie_title = nytreview.get('display_title').lower().strip()
+    @staticmethod
+    def _result(success=None, status_code=None, message=None,
+                review=None, bullseye=None, future_release=None):
+        """Returns result object. See get_movie_review docstring for more
+        details."""
+        result = {
+                  'success': success,
+                  'status_code': status_code,
+                  'message': message,
+                  'review': review,
+                  'bullseye': bullseye,
+                  'future_release': future_release
+                }
+        return result
 
-                if cls.good_enough_match(movie_title, nyt_movie_title):
-                    filtered_list.append(nytreview)
+    @classmethod
+    def _error_result(cls, message, status_code=None):
+        """Returns particular result object when review cannot be found
+        due to an error (http error, missing movie information, etc.)"""
+        return cls._result(success=False, status_code=status_code, message=message)
 
-            return filtered_list
+    @classmethod
+    def _build_review(cls, movie, nyt_data_result):
+        """Returns NYTReview object based on NYT api response data for a
+        single review and a Movie object.
 
-        def highest_levenshtein(searched_title, nyt_data_results):
-            """Returns NYT movie review that has the highest Levenshtein score."""
+        Args:
+            movie: Movie object representing movie searched for.
+            nyt_data_result: Dictionary containing data from NYT api for
+                             a single review.
+        Returns:
+            review: An NYTMovieReview object.
+        """
 
-            # An exact match should be worth more than a partial one.
-            weight_full = 2
-            weight_partial = 1
+        # Extract info from NYT api result.
+        nyt_critics_pick = nyt_data_result['critics_pick']
+        nyt_summary_short = nyt_data_result['summary_short']
 
-            # Calculate score of first title. Let it be the max.
-            full_ratio = fuzz.ratio(searched_title,
-                                    nyt_data_results[0]['display_title'].strip().lower())
-            partial_ratio = fuzz.partial_ratio(searched_title,
-                                    nyt_data_results[0]['display_title'].strip().lower())
+        if nyt_summary_short is not None:
+            if nyt_summary_short.strip() == "":
+                nyt_summary_short = "No summary review provided."
 
-            score_max = weight_full * full_ratio + weight_full + partial_ratio * weight_partial
-            index = 0 # index of review with best score
+        review = cls(title=movie.title, year=movie.release_year,
+                     text=cls.clean_review_text(nyt_summary_short),
+                     critics_pick=nyt_critics_pick,
+                     publication_date=nyt_data_result.get('publication_date'))
 
-            # We need to be sure that the result we're returning is the only
-            # result with the highest score.
-            two_results_same_score = False
+        return review
 
-            for i in range(1, len(nyt_data_results)):
-                # Calculate score for each film.
-                full_ratio = fuzz.ratio(searched_title,
-                                        nyt_data_results[i]['display_title'].strip().lower())
-                partial_ratio = fuzz.partial_ratio(searched_title,
-                                        nyt_data_results[i]['display_title'].strip().lower())
+    @classmethod
+    def _get_movie_review(cls, movie, first_try):
+        """Does the work of get_movie_review; see it for arguments and result."""
+        result = cls._check_movie(movie)
+        if result is not None:
+            return result
 
-                score_i = weight_full * full_ratio + weight_full + partial_ratio * weight_partial
+        if first_try:
+            strategies = [TITLE_BY_YEAR, ORIGINAL_BY_YEAR]
+        else:
+            strategies = [TITLE_BY_DATE, ORIGINAL_BY_DATE]
+        if not has_original_title(movie):
+            strategies = strategies[:1]
+        return cls._run_strategies(movie, strategies)
 
-                # Update accordingly if new max found or tie.
-                if score_i > score_max:
-                    score_max = score_i
-                    index = i
-                    two_results_same_score = False
-                elif score_i == score_max:
-                    two_results_same_score = True
+    @classmethod
+    def _find_movie_review(cls, movie):
+        """Does the work of find_movie_review; see it for arguments and result."""
+        result = cls._check_movie(movie)
+        if result is not None:
+            return result
 
-            # No ties allowed.
-            if two_results_same_score:
-                return None
+        strategies = cls.planner.plan(movie)
+        print(f"Search plan for '{movie.title}' ({film_class(movie)}): {', '.join(strategies)}.")
+        return cls._run_strategies(movie, strategies, record=True)
 
-            # All is well: one result found.
-            return nyt_data_results[index]
+    @classmethod
+    def _check_movie(cls, movie):
+        """Returns result of movie's review lookup if it is known without
+        searching NYT; None if NYT has to be searched.
 
+        Raises:
+            ValueError: if pertinent movie data needed to query NYT's api
+                        is missing.
+        """
         # =========================== ALGORITHM =============================
 
         # 1. Ensure that movie title, release year and release date all exist
         #    before proceeeding.
         # 2. Check whether movie is a future release. If so, there's no review,
         #    so return right away.
-        # 3. Check whether film is a special 'exception': a film in which the
+        # 3. Check whether film has an override: a film in which the
         #    algorithm will not find becuase of its unique 'situation.'
-        # 4. Query NYT api. Selecting the right one whether its the first or
-        #    second call to this method to fetch a review.
-        # 5. Check the api's response. Return if something's gone wrong.
-        # 6. Unpack the response object.
-        # 7. Process response if no results are returned.
-        # 8. Process response if one result is returned.
-        # 9. Process response if multiple results are returned.
 
         #                               ***
 
@@ -710,204 +503,132 @@ class NytMovieReview(MovieReview):
         if release_dt > today:
             message = "No review: film has yet to be released."
             print(message)
-            return get_result(success=False,
-                              message=message,
-                              future_release=True)
+            return cls._result(success=False,
+                               message=message,
+                               future_release=True)
 
-        # 3. Check whether film is a special 'exception': a film in which the
+        # 3. Check whether film has an override: a film in which the
         #    algorithm will not find becuase of its unique 'situation.'
-
-        # An exception movie must have the same title and release year as a
-        # a movie on the exception list.
-        if cls.exceptions.get(movie.title) == movie.release_year:
+        override = overrides.lookup(movie)
+        if override is not None:
             # Get the movie review directly.
-            review_result = cls.get_movie_review_for_exception(movie)
-
-            # No review found for some inexplicable reason...
-            if not review_result['review']:
-                message = "Error: processing exceptions failed."
-                result = error_result(message=message,
-                                      status_code=review_result['status_code'])
+            review_result = cls.get_movie_review_for_override(movie, override)
+
+            if review_result['status_code'] != 200:
+                result = cls._error_result(message="Error: processing override failed.",
+                                           status_code=review_result['status_code'])
+            elif not review_result['review']:
+                result = cls._result(success=False,
+                                     status_code=review_result['status_code'],
+                                     message="No review found for this movie.")
             else:
-                # All good.
-                result = get_result(success=True,
-                                    status_code=review_result['status_code'],
-                                    review=review_result['review'])
-
-            return result
+                # All good. Not matched, so no bullseye, as before overrides.
+                result = cls._result(success=True,
+                                     status_code=review_result['status_code'],
+                                     review=review_result['review'])
 
-        # 4. Query NYT api. Selecting the right one whether its the first or
-        #    second call to this method to fetch a review.
-        if first_try:
-            response = nyt_api_title_release_year_query(movie.title,
-                                                        movie.release_year)
-        else:
-            response = nyt_api_title_release_date_query(movie.title,
-                                                        movie.release_date)
-
-        # 5. Check the api's response. Return if something's gone wrong.
-        if response.status_code != 200:
-            err_data = response.json()
-            message = f"{err_data.get('message', None)}"
-            result = error_result(message=message, 
-                                  status_code=response.status_code)
             return result
 
-        # 6. Unpack the response object.
-        nyt_data = response.json()
+        return None
 
-        # Flag for check later on to make sure the right titles are
-        # compared.
-        original_title_used = False
+    @classmethod
+    def _run_strategies(cls, movie, strategies, record=False):
+        """Searches for movie's review with each strategy in turn, until one
+        finds it or fails; see nytplanner for strategies.
 
-        # 7. Process response if no results are returned.
-        if nyt_data["num_results"] == 0:
-            print("No reviews found.")
+        As NYT results are ranked by title, the original title is not
+        searched for if the title found reviews within the same dates.
 
-            # Foreign films may be in their original titles.
-            if movie.original_title != movie.title:
+        Args:
+            movie: Movie object representing movie searched for.
+            strategies: List of strings representing strategies.
+            record: Boolean; True to record outcomes with planner.
 
-                # Delay request, so as not to timeout NYT api.
+        Returns:
+            result: Result of last search made; see get_movie_review.
+        """
+        result = None
+        title_results = {}
+        for strategy in strategies:
+            if uses_original_title(strategy) and title_results.get(by_release_year(strategy)):
+                continue
+            if uses_original_title(strategy):
                 print(f"Checking original title: {movie.original_title}...")
-                print(f"Waiting {cls.delay} seconds...")
-                cls.delay_next()
-
-                if first_try:
-                    response = nyt_api_title_release_year_query(movie.original_title,
-                                                                movie.release_year)
-                else:
-                    response = nyt_api_title_release_date_query(movie.original_title,
-                                                                movie.release_date)
-
-
-                if response.status_code != 200:
-                    message = "Error: Http response status code = {res.status_code}"
-                    result = error_result(message=message,
-                                          status_code=response.status_code)
-                    return result
-
-                # Update response data.
-                nyt_data = response.json()
-
-                # Found at least one review with original title; important to
-                # know for later.
-                original_title_used = True
-
-            # Still no luck with foreign title.
-            if nyt_data["num_results"] == 0:
-                message = "No review found for this movie."
-                print(f"{message}: {movie.title}")
-                result = get_result(success=False,
-                                  status_code=response.status_code,
-                                  message=message)
-                return result
-
-        # 8. Process response if one result is returned.
-        if nyt_data["num_results"] == 1:
-            print("One review found.")
-
-            # Single result. Naturally going to be first item.
-            nyt_data_result = nyt_data['results'][0]
-
-            # Just because one result returned doesn't mean it's right!
-            result = verify_result(nyt_data_result, original_title_used)
-
-            return result
-
-        # 9. Process response if multiple results are returned.
-        if nyt_data["num_results"] > 1:
-            print("Multiple reviews found.")
 
-            nytreviews = nyt_data['results']
-
-            # Try to find exact match first.
-            nytreview = exact_match(movie, nytreviews)
-
-            # Success!
-            if nytreview:
-                print("Exact match found!")
-                review_obj = build_NYTReview_object(movie, nytreview)
-                result = get_result(success=True,
-                                    status_code=response.status_code,
-                                    review=review_obj,
-                                    bullseye=True)
+            start = time.perf_counter()
+            result, num_results = cls._search_and_match(movie, strategy)
+            if result['status_code'] != 200:
                 return result
-
-            # No exact match. Maybe review was written a later year than
-            # its release.
-            print("Filtering by release year...")
-            filtered_reviews = filter_year(release_year=movie.release_year,
-                                           nytreviews=nytreviews,
-                                           grace_period=cls.max_year_gap)
-
-            # All the reviews were written 'way' later than film was released.
-            # None were thus trustworthy, so none were returned.
-            if not filtered_reviews:
-                message = "Multiple reviews: No review found within grace period."
-                print(f"{message}: {movie.title}")
-                result = get_result(success=False,
-                                  status_code=response.status_code,
-                                  message=message)
+            if record:
+                cls.planner.record(movie, strategy, result['success'],
+                                   time.perf_counter() - start)
+            if result['success']:
                 return result
+            if not uses_original_title(strategy):
+                title_results[by_release_year(strategy)] = num_results
+        return result
 
-            # With the shortlist of filtered movies above, let's try to find
-            # ones with the closest-matching movie title.
-            print("Filtering by title....")
+    @classmethod
+    def _search_and_match(cls, movie, strategy):
+        """Searches for movie's review with strategy (steps 4 to 6).
 
-            # Make sure to pass the right title before filtering the results!
-            # NYT may have used original movie title instead of
-            # more widely-known, often Anglicized, movie title.
-            if original_title_used:
-                movie_title = movie.original_title.strip().lower()
-            else:
-                movie_title = movie.title.strip().lower()
-
-            filtered_reviews = filter_title(movie_title, filtered_reviews)
-
-            # None of the filtered reviews had titles that matched closely
-            # enough.
-            if not filtered_reviews:
-                message = "Multiple reviews: none passed title filtering."
-                print(f"{message}: {movie.title}")
-                result = get_result(success=False,
-                                  status_code=response.status_code,
-                                  message=message)
-                return result
+        Returns:
+            Tuple of result (see get_movie_review) and number of reviews
+            the search found.
+        """
+        # =========================== ALGORITHM =============================
 
-            # If there's only one review, we can assume that it's likely a
-            # a good match.
-            if len(filtered_reviews) == 1:
-                print("Review found! Hopefully it's the right one.")
-                review_obj = build_NYTReview_object(movie, filtered_reviews[0])
-                result = get_result(success=True,
-                                    status_code=response.status_code,
-                                    review=review_obj,
-                                    bullseye=False)
-                return result
+        # 4. Query NYT archive or api by title or original title, and by
+        #    release year or date, per strategy.
+        # 5. Check the api's response. Return if something's gone wrong.
+        # 6. Pick review out of results; see nytmatch module.
 
-            # Still more than one review that could be the right one.
-            # Title that matches the closest to one searched for will be the
-            # deciding factor.
-            if len(filtered_reviews) > 1:
-                print("Choosing review with highest Levenshtein score...")
-                nytreview = highest_levenshtein(movie_title, filtered_reviews)
-
-            # Out of tricks. Time to give up.
-            if not nytreview:
-                message = "No luck: Multiple reviews with same Levenshtein score."
-                print(f"{message}: {movie.title}")
-                result = get_result(success=False,
-                                  status_code=response.status_code,
-                                  message=message)
-                return result
+        #                               ***
 
-            # Success!
-            else:
-                print("Review with highest Levenshtein score selected!")
-                print("Hopefully it's the right one.")
-                review_obj = build_NYTReview_object(movie, nytreview)
-                result = get_result(success=True,
-                                    status_code=response.status_code,
-                                    review=review_obj,
-                                    bullseye=False)
-                return result
\ No newline at end of file
+        # 4. Query NYT archive or api by title or original title, and by
+        #    release year or date, per strategy.
+        original_title_used = uses_original_title(strategy)
+        title = movie.original_title if original_title_used else movie.title
+        for use_archive in (True, False):
+            try:
+                status_code, nyt_data, from_archive = cls._search(
+                    title, movie, by_release_year(strategy), use_archive=use_archive)
+            except RateLimited as err:
+                print(f"FAILED! {err}")
+                return cls._error_result(message=str(err), status_code=err.status_code), 0
+
+            # 5. Check the api's response. Return if something's gone wrong.
+            if status_code != 200:
+                message = f"{nyt_data.get('message', None)}"
+                result = cls._error_result(message=message,
+                                           status_code=status_code)
+                return result, 0
+
+            # 6. Pick review out of results; see nytmatch module.
+            print(f"{nyt_data['num_results']} review(s) found.")
+            decision = nytmatch.match_review(movie, nyt_data, original_title_used,
+                                             threshold=cls.threshold,
+                                             max_year_gap=cls.max_year_gap)
+
+            # The archive is only as complete as its last ingest: none of
+            # its candidates matching, NYT api may still have the review.
+            if decision['success'] or not from_archive:
+                break
+            print("No match among NYT archive's candidates: querying NYT api...")
+
+        if not decision['success']:
+            print(f"{decision['message']}: {movie.title}, ({movie.release_year})")
+            return cls._result(success=False,
+                               status_code=status_code,
+                               message=decision['message']), nyt_data['num_results']
+
+        if decision['bullseye']:
+            print("Zero or low risk that this is the wrong review.")
+        else:
+            print("Some risk that this is the wrong review.")
+
+        review_obj = cls._build_review(movie, decision['result'])
+        return cls._result(success=True,
+                           status_code=status_code,
+                           review=review_obj,
+                           bullseye=decision['bullseye']), nyt_data['num_results']
@@ -0,0 +1,164 @@
+"""Keeps the outcome of NYT review searches in the database.
+
+Finding a film's review can take up to four NYT API calls, with pauses in
+between. Its outcome, the review or the fact that there is none, is stored
+in the nyt_review_results table, so the next lookup for the film is a
+single indexed read. Reviews are kept for good; 'no review found' outcomes
+are searched for again once NEGATIVE_TTL seconds old, in case NYT has
+reviewed the film since.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from cinescout import db
+from cinescout.models import NytReviewResult
+from cinescout.reviews import NytMovieReview
+from cinescout.nytoverrides import overrides, REVIEW, NO_REVIEW
+from cinescout.singleflight import SingleFlight
+
+# Number of seconds before a 'no review found' outcome is searched again.
+NEGATIVE_TTL = int(os.getenv('NYT_NEGATIVE_TTL', 7 * 24 * 60 * 60))
+
+# Concurrent lookups of the same film share one search and one write.
+_inflight = SingleFlight('nyt review results')
+
+
+def film_key(movie):
+    """Returns tuple of the fields a film's outcome is stored under."""
+    return (movie.title, movie.original_title, movie.release_year,
+            movie.release_date)
+
+
+def find_result(movie):
+    """Returns NytReviewResult stored for movie; None if there is none."""
+    title, original_title, release_year, release_date = film_key(movie)
+    return NytReviewResult.query.filter_by(title=title,
+                                           original_title=original_title,
+                                           release_year=release_year,
+                                           release_date=release_date).first()
+
+
+def is_fresh(stored, now=None):
+    """Returns whether stored outcome can be used without searching NYT."""
+    if stored.found:
+        return True
+    now = now or datetime.utcnow()
+    return stored.resolved_at + timedelta(seconds=NEGATIVE_TTL) > now
+
+
+def _as_review(stored):
+    """Returns stored outcome as a dictionary: ORM objects must not be
+    shared between the requests (and sessions) that waited on a search."""
+    return {'found': stored.found, 'review_text': stored.review_text,
+            'critics_pick': stored.critics_pick, 'bullseye': stored.bullseye,
+            'publication_date': stored.publication_date}
+
+
+def resolve_review(movie):
+    """Returns NYT review of movie, from the database or else from NYT.
+
+    Args:
+        movie: Movie object with title, original title, release year and
+               release date filled in.
+
+    Returns:
+        response: A dictionary with three fields:
+            status_code: Integer repr. status code of NYT api response; 200
+                         if read from database.
+            message: String repr. description of error; None otherwise.
+            review: Dictionary with fields found, review_text, critics_pick,
+                    bullseye and publication_date; None on error.
+    """
+    response = stored_review(movie)
+    if response is not None:
+        return response
+
+    return _inflight.do(film_key(movie), _search_and_save, movie)
+
+
+def stored_review(movie):
+    """Returns NYT review of movie if pinned by an override, or if its
+    outcome is stored and fresh, as resolve_review would; None if NYT has
+    to be searched."""
+    # Overrides win over outcomes stored before they were made.
+    override = overrides.lookup(movie)
+    if override is not None and override['kind'] in (REVIEW, NO_REVIEW):
+        pinned = override['review']
+        review = {'found': False, 'review_text': None, 'critics_pick': None,
+                  'bullseye': None, 'publication_date': None}
+        if pinned:
+            review = {'found': True,
+                      'review_text': NytMovieReview.clean_review_text(pinned.get('summary_short')),
+                      'critics_pick': bool(pinned.get('critics_pick')), 'bullseye': None,
+                      'publication_date': pinned.get('publication_date')}
+        return {'status_code': 200, 'message': None, 'review': review}
+
+    try:
+        stored = find_result(movie)
+    except SQLAlchemyError as err:
+        print(f"Could not read NYT review results: {err}")
+        db.session.rollback()
+        return None
+
+    if stored is None or not is_fresh(stored):
+        return None
+
+    print(f"NYT review outcome for '{movie.title}' ({movie.release_year}) found in database.")
+    return {'status_code': 200, 'message': None, 'review': _as_review(stored)}
+
+
+def _search_and_save(movie):
+    """Searches NYT for movie's review, every way the query planner deems
+    worth trying, and stores the outcome. See resolve_review."""
+    print(f"Fetching NYT movie review for '{movie.title}' ({movie.release_year})...")
+    response = NytMovieReview.find_movie_review(movie)
+
+    # Nothing to store: it may well be reviewed once released.
+    if response.get('future_release'):
+        return {'status_code': 200, 'message': response['message'],
+                'review': {'found': False, 'review_text': None, 'critics_pick': None,
+                           'bullseye': None, 'publication_date': None}}
+
+    # Errors may be temporary (e.g. 429): don't store them.
+    if response['status_code'] != 200:
+        return {'status_code': response['status_code'],
+                'message': response.get('message'), 'review': None}
+
+    review = response.get('review')
+    outcome = {'found': bool(review),
+               'review_text': review.text if review else None,
+               'critics_pick': bool(review.critics_pick) if review else None,
+               'bullseye': response.get('bullseye') if review else None,
+               'publication_date': review.publication_date if review else None}
+    save_result(movie, outcome)
+    return {'status_code': 200, 'message': None, 'review': outcome}
+
+
+def save_result(movie, outcome):
+    """Stores outcome of search for movie's review, replacing any older one.
+
+    Args:
+        movie: Movie object searched for.
+        outcome: Dictionary of NytReviewResult fields; see resolve_review.
+    """
+    try:
+        stored = find_result(movie)
+        if stored is None:
+            title, original_title, release_year, release_date = film_key(movie)
+            stored = NytReviewResult(title=title, original_title=original_title,
+                                     release_year=release_year,
+                                     release_date=release_date)
+            db.session.add(stored)
+        for field, value in outcome.items():
+            setattr(stored, field, value)
+        stored.resolved_at = datetime.utcnow()
+        db.session.commit()
+    except IntegrityError:
+        # Another worker process stored it first; theirs will do.
+        db.session.rollback()
+    except SQLAlchemyError as err:
+        print(f"Could not save NYT review result: {err}")
+        db.session.rollback()
@@ -0,0 +1,91 @@
+"""Manages pooled HTTP sessions used to call external movie APIs.
+
+Every call made with a bare requests.get() opens a new TCP (and TLS)
+connection to the remote server. Sessions keep connections alive between
+calls, so only the first request made by a process pays for the handshake.
+"""
+
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Number of distinct hosts whose connection pools are kept per session.
+POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 4))
+
+# Max number of keep-alive connections per host; should be at least the
+# number of threads a worker process uses to serve requests.
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 10))
+
+# One session per external API (e.g. 'tmdb'), per process.
+_sessions = {}
+_lock = threading.Lock()
+_pid = os.getpid()
+
+
+def _reset_after_fork():
+    """Forgets sessions inherited from a parent process.
+
+    Sockets must not be shared between processes (e.g. gunicorn workers
+    forked from a master that already imported the app), so each child
+    builds its own sessions. The parent's sessions are dropped rather than
+    closed so the parent's connections are left untouched.
+    """
+    global _sessions, _lock, _pid
+    _sessions = {}
+    _lock = threading.Lock()
+    _pid = os.getpid()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _build_session(pool_connections, pool_maxsize):
+    """Returns new session whose adapters keep a pool of live connections."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session(name, pool_connections=None, pool_maxsize=None):
+    """Gets the pooled session of the current process for an external API.
+
+    Args:
+        name: String identifying API the session is used for, e.g. 'tmdb'.
+        pool_connections: Integer overriding POOL_CONNECTIONS; only used when
+                          the session is first created.
+        pool_maxsize: Integer overriding POOL_MAXSIZE; only used when the
+                      session is first created.
+
+    Returns:
+        session: requests.Session object shared by all threads of process.
+    """
+    # Fallback for platforms without os.register_at_fork.
+    if os.getpid() != _pid:
+        _reset_after_fork()
+
+    session = _sessions.get(name)
+    if session is not None:
+        return session
+
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            print(f"Creating pooled HTTP session for '{name}'...")
+            session = _build_session(pool_connections or POOL_CONNECTIONS,
+                                     pool_maxsize or POOL_MAXSIZE)
+            _sessions[name] = session
+    return session
+
+
+def close_sessions():
+    """Closes all sessions of the current process and their connections."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
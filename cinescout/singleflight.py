@@ -0,0 +1,72 @@
+"""Coalesces concurrent identical calls to external movie APIs.
+
+When many requests for the same page arrive at once (e.g. a link to a movie
+was just shared), each would otherwise fire its own upstream call before the
+first one had a chance to fill the cache. With SingleFlight, the first
+caller makes the call and the others wait for it and share its result.
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Thread-safe registry of calls in flight, by key.
+
+    Results are handed as is to every caller waiting on them, so they
+    should not be modified. Calls are only coalesced while in flight:
+    nothing is remembered once they return.
+
+    Attributes:
+        name: String used to identify registry in stats and log messages.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}   # key => Future of call in flight
+        self._lock = threading.Lock()
+        self._counters = {'calls': 0, 'shared': 0}
+
+    def do(self, key, func, *args, **kwargs):
+        """Returns func(*args, **kwargs), or the result of the identical call
+        already in flight.
+
+        Args:
+            key: Hashable object identifying call, e.g. ('movie', tmdb_id).
+            func: Function to call if no call with that key is in flight.
+
+        Raises:
+            Exception raised by func, in the caller and all who waited on it.
+        """
+        with self._lock:
+            self._counters['calls'] += 1
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self._counters['shared'] += 1
+
+        if not leader:
+            print(f"Waiting on '{self.name}' call {key!r} already in flight...")
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        """Returns dictionary of number of calls, calls that shared another's
+        result, and calls in flight."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['in_flight'] = len(self._calls)
+        return stats
@@ -25,7 +25,7 @@ document.addEventListener('DOMContentLoaded', () => {
     // Once time's up, hide the spinner that's been running since page has loaded.
     hideSpinner();
 
-    // Make AJAX request for table data; display table.
+    // Set up table paging through server api; display table.
     fetchCriterionTableData();
 
   }, TIME_MAX);
@@ -43,122 +43,86 @@ function hideSpinner () {
 
 
 /**
-* Makes AJAX request to server api for Criterion movie data.
+* Makes DataTables request pages of Criterion movie data from server api:
+* the server sorts, searches and pages through the films.
 */
 function fetchCriterionTableData() {
   const url = "/api/criterion-films";
-  console.log(`Making AJAX request to ${url}...`);
+  console.log(`Paging through ${url}...`);
 
-  const request = new XMLHttpRequest();
-  request.open('GET', url);
-
-  // Callback function.
-  request.onload = () => {
-      const data = JSON.parse(request.responseText);
+  // Use DataTables jQuery extension to provide sortable rows and other features.
+  $(document).ready( function () {
+    // dom => for positioning Search filter box to the left; info and pagination below.
+    // serverSide => Each page, sort and search is a request to url.
+    // searchDelay => Wait for typing to pause before searching.
+    // order => Should display movies from oldest to newest
+    $('#criterion-table').DataTable( {
+        "dom": '<"wrapper"ft><"wrapper"ip>',
+        'serverSide': true,
+        'ajax': {
+          'url': url,
+          'error': (xhr) => {
+            const data = xhr.responseJSON || {};
+            console.error(`Error: ${data.err_message}, ` + xhr.status);
+            alert(`Error: Failed to load CriterionTable data:\n${data.err_message}, ` + xhr.status);
+          }
+        },
+        'searchDelay': 400,
+        'paging': true,
+        'pageLength': 50,
+        'lengthChange': false,
+        'order': [[1, "asc"]],
+        'responsive': true,
+        'columns': [
+          { 'data': 'title', 'render': renderTitle },
+          { 'data': 'year' },
+          { 'data': 'directors', 'render': renderDirectors }
+        ]
+      } );
 
-      if (data.success && request.status === 200){
-        console.log("Horray! Criterion film results returned: " + request.status);
+    // ** DISABLE until back/forward cache issue resolved ***
+    // showMovieSpinners(MOVIE_SPINNER_DELAY);
 
-        const films = data.results;
-        populateTable(films);
+    // Display table.
+    document.querySelector("#table-footnote-container").style.visibility = 'visible';
+  } );
+};
 
-        // ** DISABLE until back/forward cache issue resolved ***
-        // showMovieSpinners(MOVIE_SPINNER_DELAY);
 
-        // Display table.
-        document.querySelector("#table-footnote-container").style.visibility = 'visible';
+/**
+* Escapes text for use in HTML.
+*/
+function escapeHtml (text) {
+  const div = document.createElement('div');
+  div.appendChild(document.createTextNode(`${text}`));
+  return div.innerHTML;
+}
 
-        // console.log(data.num_results);
-        // console.log(data.results);
-      }
-      else {
-        // Film could not be added for some reason...
-        console.error(`Error: ${data.err_message}, ` + request.status);
-        alert(`Error: Failed to load CriterionTable data:\n${data.err_message}, ` + request.status);
-      }
-    }
 
-  // Send data
-  request.send();
-};
+/**
+* Renders title cell: a link to the movie page of given title.
+*/
+function renderTitle (title, type, film) {
+  if (type !== 'display') {
+    return title;
+  }
+  // Add a space between the spinner and the title's text.
+  return `<a href="/movie/${film.tmdb_id}" class="text-white table-cell movie-link">${escapeHtml(title)}&nbsp;</a>`;
+}
 
 
 /**
-* Populates table rows with data.
+* Renders directors cell: hyperlinks for directors with & in between.
 */
-function populateTable (films) {
-
-  let criterionTable = document.getElementById("criterion-table").getElementsByTagName('tbody')[0];
-
-  films.forEach(film => {
-    // console.log(`${film.title}, ${film.year}, ${film.directors}`);
-
-    // Create row.
-    let row = criterionTable.insertRow();
-
-    // Create cells in row.
-    let cellTitle = row.insertCell(0);
-    let cellYear = row.insertCell(1);
-    let cellDirectors = row.insertCell(2);
-
-    // Create anchor that will link to movie page of given title.
-    const linkTitle = document.createElement('a');
-    linkTitle.href = `/movie/${film.tmdb_id}`
-    linkTitle.className = 'text-white table-cell movie-link';
-    const textTitle = document.createTextNode(`${film.title}`);
-    linkTitle.appendChild(textTitle);
-    // Add a space between the spinner and the title's text.
-    linkTitle.innerHTML += '&nbsp;';
-
-    // ** DISABLE spinners until you can resolve the back/forward cache issue **
-    // // Append spinner to movie titles that shows when title is clicked.
-    // const spinnerTitle = document.createElement('span');
-    // spinnerTitle.className = "spinner-border spinner-border-sm";
-    // linkTitle.appendChild(spinnerTitle);
-
-    // Ready to add title to cell to cell.
-    cellTitle.append(linkTitle);
-
-    // Add year film was released to table.
-    cellYear.innerHTML = film.year;
-
-    // Create list of hyperlinks for directors; append & in between.
-
-    // Many of the names in directors are not know specifically for 'Directing'
-    // E.g. Charlie Chaplin is better known for 'Acting'
-    const known_for = 'All';
-
-    // Go through list of directors...
-    for (let i = 0; i < film.directors.length; i++){
-      // Create hyperlink for each director.
-      const linkDirector = document.createElement('a');
-      linkDirector.href = `/person-search?name=${film.directors[i]}&known_for=${known_for}`
-      linkDirector.className = 'text-white table-cell';
-      const textDirector = document.createTextNode(`${film.directors[i]}`);
-      linkDirector.appendChild(textDirector);
-
-      // Append that link to the table cell for directors
-      cellDirectors.append(linkDirector)
-
-      // Determine whether to add an ampersand or just stop.
-      if (i === film.directors.length - 1){
-        break;
-      } else{
-        cellDirectors.append(' & ');
-      }
-    }
-  });
-
-  // Use DataTables jQuery extension to provide sortable rows and other features.
-  $(document).ready( function () {
-    // dom => for positioning Search filter box to the left.
-    // paging => Don't want pagination feature on.
-    // order => Should display movies from oldest to newest
-    $('#criterion-table').DataTable( {
-        "dom": '<"wrapper"ft>',
-        'paging': false,
-        'order': [[1, "asc"]],
-        'responsive': true
-      } );
-  } );
+function renderDirectors (directors, type) {
+  if (type !== 'display') {
+    return directors.join(' & ');
+  }
+  // Many of the names in directors are not know specifically for 'Directing'
+  // E.g. Charlie Chaplin is better known for 'Acting'
+  const known_for = 'All';
+
+  return directors.map(director =>
+    `<a href="/person-search?name=${encodeURIComponent(director)}&known_for=${known_for}" class="text-white table-cell">${escapeHtml(director)}</a>`
+  ).join(' & ');
 }
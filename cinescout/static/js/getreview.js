@@ -18,8 +18,12 @@ document.addEventListener('DOMContentLoaded', () => {
     
     const url = '/api/nyt-movie-review'
 
+    // Milliseconds between polls while review is looked up on server.
+    const pollInterval = 1000
+
     // Body data: needs to be fetched from movie page.
     const film = {
+        tmdb_id: parseInt(document.querySelector("#tmdb-id").value) || null,
         title: document.querySelector("#title").value,
         original_title: document.querySelector("#original-title").value, 
         release_year: parseInt(document.querySelector("#year").value), 
@@ -36,16 +40,28 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
-    // Make API query...
+    // Parses response; review still being looked up if status is 202.
+    const readResponse = response => {
+        return response.json().then(data => {
+            if (!response.ok)
+                throw new Error(`HTTP Error ${response.status}: ${data.err_message}`);
+            return {pending: response.status === 202, data: data};
+        });
+    }
+
+    // Polls job started by server until it has the review.
+    const pollJob = pollUrl => {
+        return new Promise(resolve => setTimeout(resolve, pollInterval))
+        .then(() => fetch(pollUrl))
+        .then(readResponse)
+        .then(result => result.pending ? pollJob(pollUrl) : result.data);
+    }
+
+    // Make API query: review comes back at once if server has it, else
+    // server starts looking it up and gives url to poll.
     fetch(url, options)
-    .then(response => {
-        if(response.ok){
-            return response.json()    
-        } else {
-            errData = response.json()
-            throw new Error(`HTTP Error ${response.status}: ${errData.err_message}`);
-        }
-    })
+    .then(readResponse)
+    .then(result => result.pending ? pollJob(result.data.poll_url) : result.data)
     .then(reviewData => {
         // Review text or failure message will go here.
         const reviewTextElem = document.querySelector('.review-text');
@@ -0,0 +1,134 @@
+"""Batch fuzzy comparison of movie titles, used to pick NYT reviews.
+
+Scores are those of fuzzywuzzy's fuzz.ratio ('full') and fuzz.partial_ratio
+('partial'), computed with python-Levenshtein directly: one query title is
+normalized once and scored against all candidate titles in a single call,
+without fuzzywuzzy's per-call argument checks. Candidates sharing a title
+are only scored once.
+"""
+
+import Levenshtein
+
+# Min full ratio a title needs for a high partial ratio to make it a match.
+MIN_FULL_RATIO = 50
+
+# Weights of full and partial ratios when ranking candidates: an exact match
+# should be worth more than a partial one.
+WEIGHT_FULL = 2
+WEIGHT_PARTIAL = 1
+
+
+def normalize_title(title):
+    """Returns title in the form titles are compared in; None becomes ''."""
+    return (title or "").strip().lower()
+
+
+def _intr(ratio):
+    """Returns ratio of [0, 1] as a correctly rounded percentage."""
+    return int(round(100 * ratio))
+
+
+def full_ratio(a, b):
+    """Returns fuzz.ratio of two normalized titles."""
+    if a == b:
+        return 100
+    if not a or not b:
+        return 0
+    return _intr(Levenshtein.ratio(a, b))
+
+
+def partial_ratio(a, b):
+    """Returns fuzz.partial_ratio of two normalized titles: full ratio of
+    shorter title and its best-aligned substring of the longer one."""
+    if a == b:
+        return 100
+    if not a or not b:
+        return 0
+
+    shorter, longer = (a, b) if len(a) <= len(b) else (b, a)
+    blocks = Levenshtein.matching_blocks(Levenshtein.opcodes(shorter, longer),
+                                         shorter, longer)
+    best = 0.0
+    for short_start, long_start, _ in blocks:
+        long_start = max(long_start - short_start, 0)
+        ratio = Levenshtein.ratio(shorter, longer[long_start:long_start + len(shorter)])
+        if ratio > .995:
+            return 100
+        best = max(best, ratio)
+    return _intr(best)
+
+
+def score_matrix(query, titles):
+    """Scores query title against every candidate title.
+
+    Args:
+        query: String representing title searched for.
+        titles: List of strings representing candidate titles.
+
+    Returns:
+        scores: List of [full, partial] ratios, one row per title.
+    """
+    query = normalize_title(query)
+    scored = {}
+    scores = []
+    for title in titles:
+        title = normalize_title(title)
+        if title not in scored:
+            scored[title] = [full_ratio(query, title), partial_ratio(query, title)]
+        scores.append(scored[title])
+    return scores
+
+
+def good_enough_mask(query, titles, threshold):
+    """Returns list of booleans telling which titles match query closely
+    enough to refer to the same film.
+
+    Partial ratios are only computed for titles whose full ratio does not
+    settle the question on its own. Blank titles never match.
+
+    Args:
+        query: String representing title searched for.
+        titles: List of strings representing candidate titles.
+        threshold: Integer of [0, 100]; see NytMovieReview.threshold.
+    """
+    query = normalize_title(query)
+    decided = {}
+    mask = []
+    for title in titles:
+        title = normalize_title(title)
+        if title not in decided:
+            full = full_ratio(query, title)
+            if not title:
+                decided[title] = False
+            elif full >= threshold or full < MIN_FULL_RATIO:
+                decided[title] = full >= threshold
+            else:
+                decided[title] = partial_ratio(query, title) >= threshold
+        mask.append(decided[title])
+    return mask
+
+
+def best_match(query, titles):
+    """Returns index of title scoring highest against query, weighting full
+    ratio over partial ratio.
+
+    Returns:
+        index: Integer; None if titles is empty or the highest score is
+               shared, in which case there is no telling which is right.
+    """
+    if not titles:
+        return None
+
+    # N.B. Constant WEIGHT_FULL term kept from the original formula; it
+    # does not change the ranking.
+    weighted = [WEIGHT_FULL * full + WEIGHT_FULL + WEIGHT_PARTIAL * partial
+                for full, partial in score_matrix(query, titles)]
+
+    # A tie only counts if no higher score follows it.
+    index, tie = 0, False
+    for i in range(1, len(weighted)):
+        if weighted[i] > weighted[index]:
+            index, tie = i, False
+        elif weighted[i] == weighted[index]:
+            tie = True
+    return None if tie else index
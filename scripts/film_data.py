@@ -1,8 +1,15 @@
-"""Script that imports film data from criterion.csv file."""
+"""Script that imports film data from criterion.csv file.
+
+Films are imported in bulk, in a single transaction: keys of films and
+persons already in the database are loaded up front, then CSV rows are
+streamed and inserted BATCH_SIZE at a time, one multi-row statement per
+table. See benchmarks/bench_film_import.py for its throughput.
+"""
 
 import sys
 import os
 import csv
+import time
 
 print("Building path that will allow python to find to app resources...")
 PROJ_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -10,7 +17,8 @@ sys.path.insert(0, PROJ_PATH)
 print(f"New path inserted into sys.path:\n{PROJ_PATH}")
 
 from cinescout import app, db
-from cinescout.models import User, Film, CriterionFilm, PersonalFilm, FilmListItem
+from cinescout.models import (User, Film, CriterionFilm, PersonalFilm, FilmListItem,
+                              Person, FilmPerson, normalize_name, split_directors)
 
 # So script can find the input files.
 DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data"))
@@ -19,64 +27,160 @@ DATA_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../data"))
 CRITERION_FILE = os.path.join(DATA_PATH, "criterion.csv")
 # PERSONAL_FILE = os.path.join(DATA_PATH, "personal.csv")
 
+# Number of CSV rows inserted per batch of statements.
+BATCH_SIZE = 5000
 
-def in_db(title, year):
-    """Checks that film is not already in database.
 
-    Returns:
-        True: if list of results has one item or more.
-        False: if the list of results is empty.
-    """
-    result = Film.query.filter(Film.title==title, Film.year==year).all()
-    return bool(result)
+def read_rows(file_name):
+    """Yields (title, year, director, spine_num, tmdb_id) of each film in
+    file, streamed; numbers are integers or None."""
+    with open(file_name, newline='') as csvfile:
+        reader = csv.reader(csvfile)
+
+        # Skip the header line
+        next(reader, None)
+
+        for release_year, title, director, spine_num, tmdb_id, iffy in reader:
+            # Clean up title. Replace @ symbols with commas.
+            # (@ were manually added in criterion.csv to replace commas
+            # in movie titles.)
+            title = title.replace('@', ',').strip()
+            yield (title, int(release_year), director or None,
+                   int(spine_num) if spine_num else None, int(tmdb_id) if tmdb_id else None)
+
+
+class BulkLoader:
+    """Inserts films, their directors and their rows of a ModelClass table
+    (e.g. CriterionFilm) in batches, one executemany statement per table and
+    batch. Keys of films and persons already in the database are loaded
+    once, so that no row costs a query of its own.
 
+    Attributes:
+        counts: Dictionary of numbers of rows read and inserted.
+    """
 
-def update_table(file_name, ModelClass):
-    """Updates db table with data from file."""
+    def __init__(self, ModelClass):
+        self.ModelClass = ModelClass
+        # Ids of films by (title, year), and of persons by normalized name.
+        self.film_ids = {(title, year): film_id for film_id, title, year
+                         in db.session.execute(db.select(Film.id, Film.title, Film.year))}
+        self.person_ids = {name_key: person_id for person_id, name_key
+                           in db.session.execute(db.select(Person.id, Person.name_key))}
+        # Films already in ModelClass table.
+        self.listed = set(db.session.scalars(db.select(ModelClass.film_id)))
+        # Lowest spine numbers of films listed by this import.
+        self.spine_nums = {}
+        self.counts = {'rows': 0, 'films': 0, 'persons': 0, 'credits': 0, 'listed': 0}
+
+    def _insert(self, model, rows, returning=()):
+        """Inserts rows into model's table; returns rows of returning columns."""
+        if not rows:
+            return []
+        # Core statement: skips the ORM's per-row bookkeeping.
+        statement = db.insert(model.__table__)
+        if returning:
+            return db.session.execute(statement.returning(*returning), rows).all()
+        db.session.execute(statement, rows)
+        return []
+
+    def load(self, rows):
+        """Inserts batch of rows, as yielded by read_rows."""
+        new_films = {}
+        for title, year, director, spine_num, tmdb_id in rows:
+            if (title, year) not in self.film_ids:
+                new_films.setdefault((title, year), {'title': title, 'year': year,
+                                                     'director': director, 'tmdb_id': tmdb_id})
+
+        # New persons' names by normalized name, as first named.
+        names = {}
+        for film in new_films.values():
+            for name in split_directors(film['director']):
+                if normalize_name(name) not in self.person_ids:
+                    names.setdefault(normalize_name(name), name)
+        # Sorted, so persons are numbered in the same order every time.
+        for person_id, name_key in self._insert(
+                Person, [{'name': names[key], 'name_key': key} for key in sorted(names)],
+                (Person.__table__.c.id, Person.__table__.c.name_key)):
+            self.person_ids[name_key] = person_id
+        for film_id, title, year in self._insert(Film, list(new_films.values()),
+                                                 (Film.__table__.c.id, Film.__table__.c.title,
+                                                  Film.__table__.c.year)):
+            self.film_ids[(title, year)] = film_id
+
+        credits = [{'film_id': self.film_ids[key], 'person_id': self.person_ids[normalize_name(name)],
+                    'role': 'director', 'position': position}
+                   for key, film in new_films.items()
+                   for position, name in enumerate(split_directors(film['director']))]
+        self._insert(FilmPerson, credits)
+
+        # A film listed more than once keeps its lowest spine number, as
+        # migration c2e9b5a7f310 numbers them: films listed by an earlier
+        # batch are renumbered should a later row have a lower one.
+        listed = {}
+        renumbered = {}
+        for title, year, director, spine_num, tmdb_id in rows:
+            film_id = self.film_ids[(title, year)]
+            if film_id not in self.listed:
+                self.listed.add(film_id)
+                self.spine_nums[film_id] = spine_num
+                listed[film_id] = {'film_id': film_id}
+            elif film_id in self.spine_nums and spine_num is not None:
+                lowest = self.spine_nums[film_id]
+                if lowest is None or spine_num < lowest:
+                    self.spine_nums[film_id] = spine_num
+                    if film_id not in listed:
+                        renumbered[film_id] = spine_num
+        if hasattr(self.ModelClass, 'spine_num'):
+            for film_id, row in listed.items():
+                row['spine_num'] = self.spine_nums[film_id]
+            if renumbered:
+                table = self.ModelClass.__table__
+                db.session.execute(
+                    db.update(table).where(table.c.film_id == db.bindparam('listed_film_id'))
+                                    .values(spine_num=db.bindparam('lowest_spine_num')),
+                    [{'listed_film_id': film_id, 'lowest_spine_num': spine_num}
+                     for film_id, spine_num in renumbered.items()])
+        self._insert(self.ModelClass, list(listed.values()))
+
+        for key, number in (('rows', len(rows)), ('films', len(new_films)),
+                            ('persons', len(names)), ('credits', len(credits)),
+                            ('listed', len(listed))):
+            self.counts[key] += number
+
+
+def update_table(file_name, ModelClass, batch_size=BATCH_SIZE):
+    """Updates db table with data from file, in one transaction: films not
+    in database yet, their directors, added to the persons table and
+    credited to them, and rows of films not in ModelClass table yet.
 
+    Returns:
+        Dictionary of numbers of rows read and inserted, and of 'seconds'
+        the import took.
+    """
+    start = time.perf_counter()
+    loader = BulkLoader(ModelClass)
+    batch = []
     try:
-        # Import data
-        with open(file_name, newline='') as csvfile:
-            reader = csv.reader(csvfile)
-
-            # Skip the header line
-            next(reader, None)
-
-            # To inform user of current of record being outputted.
-            count = 1
-
-            # Insert data into database.
-            for release_year, title, director, spine_num, tmdb_id, iffy in reader:
-
-                # Clean up title. Replace @ symbols with commas.
-                # (@ were manually added in criterion.csv to replace commas
-                # in movie titles.)
-                title = title.replace('@', ',').strip()
-
-                if not in_db(title, release_year):
-                    # Add to main table
-                    film = Film(title=title, year=release_year,
-                                tmdb_id=tmdb_id, director=director)
-                    db.session.add(film)
-                    db.session.commit()
-                    print(f"#{count}: Inserting record into table '{Film.__tablename__}': {title}, {release_year}, {tmdb_id}")
-                else:
-                    # Query film id
-                    film = Film.query.filter(Film.title==title).first()
-
-                # Add to ModelClass table.
-                film_id = film.id
-                modelclass_obj = ModelClass(film_id=film_id)
-                db.session.add(modelclass_obj)
-                db.session.commit()
-                print(f"#{count}: Inserting record into table '{ModelClass.__tablename__}': {title}, {release_year}")
-
-                count += 1
-
-            print("Insertion of data from 'criterion.csv' into database complete.")
+        for row in read_rows(file_name):
+            batch.append(row)
+            if len(batch) == batch_size:
+                loader.load(batch)
+                batch = []
+                print(f"#{loader.counts['rows']}: {loader.counts['films']} films inserted...")
+        loader.load(batch)
+        db.session.commit()
+    except (OSError, ValueError) as err:
+        db.session.rollback()
+        print(f"{type(err).__name__}: {err}. Nothing imported.")
+        return None
 
-    except OSError as err:
-        print("OSError: {0}".format(err))
+    seconds = time.perf_counter() - start
+    counts = dict(loader.counts, seconds=seconds)
+    print(f"Insertion of data from '{os.path.basename(file_name)}' into database complete: "
+          f"{counts['rows']} rows read, {counts['films']} films, {counts['persons']} persons and "
+          f"{counts['listed']} rows of table '{ModelClass.__tablename__}' inserted in "
+          f"{seconds:.2f} s ({counts['rows'] / max(seconds, 1e-9):.0f} rows/s).")
+    return counts
 
 
 if __name__ == "__main__":
@@ -136,6 +240,10 @@ if __name__ == "__main__":
         for film in Film.query.all():
             print(film)
 
+        print("\n**PERSONS**")
+        for person in Person.query.all():
+            print(person)
+
         print("\n**CRITERION FILMS**")
         for film in CriterionFilm.query.all():
             print(film)
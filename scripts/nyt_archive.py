@@ -0,0 +1,50 @@
+"""Script that loads a dump of NYT movie review metadata into the local NYT
+archive, which NytMovieReview searches before calling NYT's api.
+
+The dump is a JSON lines file, one review per line, with the fields of NYT
+api results: display_title, publication_date, opening_date, summary_short
+and critics_pick. Loading a dump again updates reviews already archived.
+
+Usage: python scripts/nyt_archive.py DUMP [--archive FILE] [--rebuild]
+"""
+
+import sys
+import os
+import time
+import argparse
+
+print("Building path that will allow python to find to app resources...")
+PROJ_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJ_PATH)
+print(f"New path inserted into sys.path:\n{PROJ_PATH}")
+
+from cinescout import nytarchive
+
+
+def main(dump, archive_path=nytarchive.NYT_ARCHIVE_PATH, rebuild=False):
+    if rebuild and os.path.exists(archive_path):
+        print(f"Removing {archive_path}...")
+        os.remove(archive_path)
+
+    print(f"Loading {dump} into {archive_path}...")
+    start = time.perf_counter()
+    with open(dump) as dump_file:
+        loaded, skipped = nytarchive.ingest(archive_path, dump_file)
+    elapsed = time.perf_counter() - start
+
+    return (f"Script complete. {loaded} reviews loaded, {skipped} without title skipped, "
+            f"in {elapsed:.1f} s.")
+
+
+# Launch script.
+if __name__ == "__main__":
+    print("===== Running NYT_ARCHIVE.PY script =====")
+    parser = argparse.ArgumentParser(description="Load NYT review metadata into local archive.")
+    parser.add_argument('dump', help="JSON lines file of NYT review metadata")
+    parser.add_argument('--archive', default=nytarchive.NYT_ARCHIVE_PATH,
+                        help="archive file to load reviews into")
+    parser.add_argument('--rebuild', action='store_true',
+                        help="start from an empty archive")
+    args = parser.parse_args()
+
+    print(main(args.dump, archive_path=args.archive, rebuild=args.rebuild))
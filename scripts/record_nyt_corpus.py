@@ -0,0 +1,122 @@
+"""Script that records NYT search responses for every Criterion film, for
+benchmarks/bench_nyt_matching.py to replay.
+
+For each film in data/criterion.csv, its original title and release date are
+requested from TMDB, then NYT is searched the way NytMovieReview does on its
+first try: by title, then by original title if that found nothing. Responses
+are appended to the corpus file, one JSON line per film, so an interrupted
+run picks up where it left off.
+
+Each line's 'expected' review is the one the matching engine picks when
+recorded, with 'label' set to 'engine'. Check them by hand: correct those
+that are wrong and set 'label' to 'verified'; accuracy is measured against
+them.
+
+NYT allows 10 calls per minute: recording all films takes a few hours.
+
+Usage: python scripts/record_nyt_corpus.py [--output FILE] [--limit N]
+"""
+
+import sys
+import os
+import csv
+import json
+import argparse
+
+print("Building path that will allow python to find to app resources...")
+PROJ_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJ_PATH)
+print(f"New path inserted into sys.path:\n{PROJ_PATH}")
+
+from cinescout import app, nytmatch
+from cinescout.movies import TmdbMovie
+from cinescout.reviews import NytMovieReview
+
+# Input file
+CRITERION_FILE = os.path.join(PROJ_PATH, "data", "criterion.csv")
+
+# Output file
+CORPUS_FILE = os.path.join(PROJ_PATH, "data", "nyt_corpus.jsonl")
+
+
+def recorded_tmdb_ids(path):
+    """Returns set of tmdb_ids of films already in corpus file."""
+    if not os.path.exists(path):
+        return set()
+    with open(path) as corpus_file:
+        return {json.loads(line)['film'].get('tmdb_id') for line in corpus_file if line.strip()}
+
+
+def record_film(tmdb_id):
+    """Searches NYT for film's review.
+
+    Returns:
+        entry: Dictionary of corpus line; None if a TMDB or NYT call failed.
+    """
+    result = TmdbMovie.get_movie_info_by_id(tmdb_id)
+    if not result['success']:
+        print(f"TMDB lookup failed! status_code={result['status_code']}")
+        return None
+    movie = result['movie']
+
+    responses = []
+    res = NytMovieReview._title_release_year_query(movie.title, movie.release_year)
+    if res.status_code == 200:
+        responses.append(res.json())
+        original_title_used = nytmatch.should_try_original_title(movie, responses[0])
+        if original_title_used:
+            res = NytMovieReview._title_release_year_query(movie.original_title,
+                                                           movie.release_year)
+            if res.status_code == 200:
+                responses.append(res.json())
+    if res.status_code != 200:
+        print(f"NYT search failed! status_code={res.status_code}")
+        return None
+
+    decision = nytmatch.match_review(movie, responses[-1], original_title_used)
+    expected = None
+    if decision['success']:
+        expected = {'display_title': decision['result'].get('display_title'),
+                    'publication_date': decision['result'].get('publication_date')}
+
+    return {'film': {'tmdb_id': tmdb_id, 'title': movie.title,
+                     'original_title': movie.original_title,
+                     'release_year': movie.release_year,
+                     'release_date': movie.release_date},
+            'responses': responses, 'expected': expected, 'label': 'engine'}
+
+
+def main(output=CORPUS_FILE, limit=None):
+    done = recorded_tmdb_ids(output)
+    with open(CRITERION_FILE, newline='') as csvfile:
+        tmdb_ids = [int(row['tmdb_id']) for row in csv.DictReader(csvfile)
+                    if row['tmdb_id'] and row['tmdb_id'] != 'None']
+    tmdb_ids = [tmdb_id for tmdb_id in tmdb_ids if tmdb_id not in done][:limit]
+
+    print(f"Recording NYT responses for {len(tmdb_ids)} films...")
+    recorded = 0
+    with open(output, 'a') as corpus_file:
+        for count, tmdb_id in enumerate(tmdb_ids, start=1):
+            print(f"#{count}: movie_id={tmdb_id}...")
+            entry = record_film(tmdb_id)
+            if entry is None:
+                continue
+            corpus_file.write(json.dumps(entry) + "\n")
+            corpus_file.flush()
+            recorded += 1
+
+    return f"Script complete. {recorded} films recorded to {output}."
+
+
+# Launch script.
+if __name__ == "__main__":
+    print("===== Running RECORD_NYT_CORPUS.PY script =====")
+    parser = argparse.ArgumentParser(description="Record NYT search responses of Criterion films.")
+    parser.add_argument('--output', default=CORPUS_FILE,
+                        help="JSON lines file responses are appended to")
+    parser.add_argument('--limit', type=int, default=None,
+                        help="max number of films to record")
+    args = parser.parse_args()
+
+    with app.app_context():
+        print(main(output=args.output, limit=args.limit))
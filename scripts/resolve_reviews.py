@@ -0,0 +1,80 @@
+"""Script that resolves NYT reviews of films on users' lists and catalog
+films ahead of time, and stores them in the database so movie pages find
+them there. See cinescout/reviewbatch.py.
+
+Run once, or as a background worker with --every, which starts a new pass
+every so many minutes. An interrupted pass resumes from its checkpoint
+file. The script has its own NYT pacer: lower NYT_CALLS_PER_MINUTE for it
+and the web app so that, together, they stay within NYT's limit.
+
+After each pass, the NYT query planner's stats are written to
+NYT_PLANNER_STATS, so that the web app, once restarted, plans its searches
+from them; see cinescout/nytplanner.py.
+
+Usage: python scripts/resolve_reviews.py [--max-calls N] [--every MINUTES]
+                                         [--checkpoint FILE]
+"""
+
+import sys
+import os
+import time
+import argparse
+
+print("Building path that will allow python to find to app resources...")
+PROJ_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJ_PATH)
+print(f"New path inserted into sys.path:\n{PROJ_PATH}")
+
+from cinescout import app, db, reviewbatch
+from cinescout.models import NytReviewResult
+from cinescout.reviews import NytMovieReview
+
+# Checkpoint of pass in progress.
+CHECKPOINT_FILE = os.path.join(PROJ_PATH, "data", "resolve_reviews.checkpoint.json")
+
+
+def main(max_calls=None, checkpoint_path=CHECKPOINT_FILE):
+    # Table may predate the review store if database built with film_data.py.
+    NytReviewResult.__table__.create(db.engine, checkfirst=True)
+
+    checkpoint = reviewbatch.Checkpoint(checkpoint_path)
+    if checkpoint.done:
+        print(f"Resuming pass: {len(checkpoint.done)} films already done.")
+
+    stats = reviewbatch.run_pass(checkpoint, max_calls=max_calls)
+    NytMovieReview.planner.save()
+    planner_stats = NytMovieReview.planner.stats()
+    for strategy, strategy_stats in planner_stats['strategies'].items():
+        if strategy_stats['tries']:
+            print(f"Search by {strategy}: found {strategy_stats['success_rate']:.0%} "
+                  f"of {strategy_stats['tries']} times, "
+                  f"{strategy_stats['mean_latency']:.1f} s on average.")
+    print(f"{planner_stats['searches_per_lookup']:.2f} searches per lookup.")
+
+    status = "complete" if stats['complete'] else "stopped, to be resumed"
+    return (f"Pass {status}. {stats['found']} reviews found, {stats['not found']} films "
+            f"without one, {stats['cached']} already stored, {stats['skipped']} skipped, "
+            f"{stats['failed']} failed; {stats['calls']} NYT calls.")
+
+
+# Launch script.
+if __name__ == "__main__":
+    print("===== Running RESOLVE_REVIEWS.PY script =====")
+    parser = argparse.ArgumentParser(description="Resolve and store NYT reviews of films ahead of time.")
+    parser.add_argument('--max-calls', type=int, default=None,
+                        help="max number of NYT calls per pass")
+    parser.add_argument('--every', type=float, default=None,
+                        help="keep running, starting a pass every this many minutes")
+    parser.add_argument('--checkpoint', default=CHECKPOINT_FILE,
+                        help="file recording progress of pass")
+    args = parser.parse_args()
+
+    with app.app_context():
+        while True:
+            started = time.monotonic()
+            print(main(max_calls=args.max_calls, checkpoint_path=args.checkpoint))
+            if args.every is None:
+                break
+            pause = max(0, args.every * 60 - (time.monotonic() - started))
+            print(f"Next pass in {pause / 60:.1f} minutes.")
+            time.sleep(pause)
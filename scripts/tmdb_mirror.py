@@ -0,0 +1,116 @@
+"""Script that copies TMDB data of every film in the database to the local
+TMDB mirror, so their pages can be served without calling TMDB.
+
+Each film's details, credits and watch providers are requested in one call
+and stored as is in the 'tmdb_movies' table. Run it again, e.g. daily, to
+keep the mirror up to date; --stale-after only resyncs films whose copy is
+older than the given number of hours.
+
+Usage: python scripts/tmdb_mirror.py [--stale-after HOURS] [--delay SECONDS]
+"""
+
+import sys
+import os
+import time
+import argparse
+from datetime import datetime, timedelta
+
+print("Building path that will allow python to find to app resources...")
+PROJ_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, PROJ_PATH)
+print(f"New path inserted into sys.path:\n{PROJ_PATH}")
+
+from cinescout import app, db
+from cinescout.models import Film, TmdbMirrorMovie
+from cinescout.movies import TmdbMovie
+from cinescout.ratelimit import RateLimited
+
+# Extra seconds to wait between TMDB API calls. TmdbMovie's rate limiter
+# already keeps the script within TMDB's limits.
+TMDB_API_DELAY = 0
+
+# Number of films synced per database transaction.
+COMMIT_EVERY = 50
+
+
+def catalog_tmdb_ids():
+    """Returns sorted list of distinct tmdb_ids of films in database."""
+    rows = db.session.query(Film.tmdb_id).filter(Film.tmdb_id.isnot(None)).distinct()
+    return sorted(tmdb_id for tmdb_id, in rows if tmdb_id)
+
+
+def sync_movie(tmdb_id, mirrored, now):
+    """Requests movie from TMDB and stores it in the mirror.
+
+    Args:
+        tmdb_id: Integer representing a movie in TMDB database.
+        mirrored: TmdbMirrorMovie object to update; None to add a new one.
+        now: datetime of sync.
+
+    Returns:
+        status_code: Status code of Http response.
+    """
+    try:
+        res = TmdbMovie._get(f"/movie/{tmdb_id}",
+                             params={"append_to_response": TmdbMovie.movie_info_append})
+    except RateLimited as err:
+        print(err)
+        return err.status_code
+    if res.status_code != 200:
+        return res.status_code
+
+    if mirrored is None:
+        mirrored = TmdbMirrorMovie(tmdb_id=tmdb_id)
+        db.session.add(mirrored)
+    mirrored.payload = res.json()
+    mirrored.synced_at = now
+    return res.status_code
+
+
+def main(stale_after=None, delay=TMDB_API_DELAY):
+    # Table may predate the mirror if database built with film_data.py.
+    TmdbMirrorMovie.__table__.create(db.engine, checkfirst=True)
+
+    now = datetime.utcnow()
+    mirrored = {movie.tmdb_id: movie for movie in TmdbMirrorMovie.query.all()}
+    tmdb_ids = catalog_tmdb_ids()
+    if stale_after is not None:
+        cutoff = now - timedelta(hours=stale_after)
+        tmdb_ids = [tmdb_id for tmdb_id in tmdb_ids
+                    if tmdb_id not in mirrored or mirrored[tmdb_id].synced_at < cutoff]
+
+    print(f"Syncing {len(tmdb_ids)} films with TMDB...")
+    synced, failed = 0, []
+    for count, tmdb_id in enumerate(tmdb_ids, start=1):
+        print(f"#{count}: Requesting movie_id={tmdb_id}...", end="")
+        status_code = sync_movie(tmdb_id, mirrored.get(tmdb_id), now)
+        if status_code == 200:
+            print("SUCCESS!")
+            synced += 1
+        else:
+            print(f"FAILED! status_code={status_code}")
+            failed.append(tmdb_id)
+
+        if count % COMMIT_EVERY == 0:
+            db.session.commit()
+        if delay:
+            time.sleep(delay)
+
+    db.session.commit()
+    if failed:
+        print(f"Could not sync movie_ids: {', '.join(map(str, failed))}")
+    return f"Script complete. {synced} films synced, {len(failed)} failed."
+
+
+# Launch script.
+if __name__ == "__main__":
+    print("===== Running TMDB_MIRROR.PY script =====")
+    parser = argparse.ArgumentParser(description="Copy TMDB data of catalog films to local mirror.")
+    parser.add_argument('--stale-after', type=float, default=None,
+                        help="only resync films mirrored more than this many hours ago")
+    parser.add_argument('--delay', type=float, default=TMDB_API_DELAY,
+                        help="extra seconds to wait between TMDB API calls")
+    args = parser.parse_args()
+
+    with app.app_context():
+        print(main(stale_after=args.stale_after, delay=args.delay))
@@ -12,20 +12,63 @@ if __name__ == "__main__":
     from test_api_criterion import *
     from test_api_nytreview import *
     from test_api_usermovielist import *
+    from test_asyncclients import *
     from test_auth import *
+    from test_cache import *
+    from test_catalog import *
+    from test_catalogengine import *
+    from test_film_data import *
     from test_main import *
     from test_movies import *
+    from test_nytarchive import *
+    from test_nytmatch import *
+    from test_nytoverrides import *
+    from test_nytplanner import *
+    from test_persons import *
+    from test_ratelimit import *
+    from test_reviewbatch import *
+    from test_reviewjobs import *
     from test_reviews import *
+    from test_reviewstore import *
+    from test_sessions import *
+    from test_singleflight import *
+    from test_titlematch import *
 
     # List object makes it easier to add a test case in the future.
     test_cases = [
         CriterionApiTests,
         NytReviewApiTests,
         UserMovieListApiTests,
+        AsyncClientTests,
         AuthTests,
+        CacheTests,
+        CatalogTests,
+        CatalogEngineTests,
+        CompactModelTests,
+        FilmDataTests,
         MainViewsTests,
         MovieTests,
+        TmdbMovieCacheTests,
+        TmdbMirrorTests,
+        TmdbSearchCacheTests,
+        TmdbFilmographyTests,
+        NytArchiveTests,
+        NytMatchTests,
+        NytOverridesTests,
+        NytPlannerTests,
+        PersonsTests,
+        ReviewBatchTests,
+        ReviewJobsTests,
         NytMovieReviewTests,
+        ReviewStoreTests,
+        TokenBucketTests,
+        PacerTests,
+        PrioritySchedulerTests,
+        TmdbRateLimitTests,
+        SessionTests,
+        SingleFlightTests,
+        UpstreamCoalescingTests,
+        TitleMatchTests,
     ]
 
     # Load tests, build suite and run.
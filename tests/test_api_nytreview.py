@@ -6,10 +6,15 @@ import os
 os.environ['DATABASE_URL'] = 'sqlite://'
 
 import time
+import threading
 import unittest
+from unittest import mock
 
 # Add this line to whatever test script you write
-from context import app, db, basedir, User
+from context import app, db, basedir, User, NytMovieReview
+from cinescout.models import NytReviewResult
+from cinescout import reviewjobs
+from test_reviewstore import nyt_response
 
 
 class NytReviewApiTests(unittest.TestCase):
@@ -85,6 +90,16 @@ class NytReviewApiTests(unittest.TestCase):
             follow_redirects=True
         )
 
+    def post_and_wait(self, movie_data, timeout=120):
+        """Posts query; should server start a job, polls it until done.
+        Returns final response."""
+        response = self.client.post(self.end_point, json=movie_data, follow_redirects=True)
+        deadline = time.monotonic() + timeout
+        while response.status_code == 202 and time.monotonic() < deadline:
+            time.sleep(0.05)
+            response = self.client.get(response.get_json()['poll_url'])
+        return response
+
     # +++++++++++++++++++++++++++++++ TESTS: nytreview.py +++++++++++++++++++++++++++++++++
     def test_not_logged_in(self):
         response = self.client.post(self.end_point, json=self.movie_data, follow_redirects=True)
@@ -97,7 +112,7 @@ class NytReviewApiTests(unittest.TestCase):
     # Review found.
     def test_review_found(self):
         self.login("Alex", "123")
-        response = self.client.post(self.end_point, json=self.movie_data, follow_redirects=True)
+        response = self.post_and_wait(self.movie_data)
         json_data = response.get_json()
         self.assertEqual(response.status_code, 200)
         self.assertTrue(json_data['success'])
@@ -172,12 +187,20 @@ class NytReviewApiTests(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertFalse(json_data['success'])
     
+    def test_bad_tmdb_id(self):
+        self.login("Alex", "123")
+        self.movie_data['tmdb_id'] = "9314"
+        response = self.client.post(self.end_point, json=self.movie_data, follow_redirects=True)
+        json_data = response.get_json()
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(json_data['success'])
+    
     # Review does not exist.
     # Non-existent film because of incorrect info.
     def test_no_title(self):
         self.login("Alex", "123")
         self.movie_data['title'] = self.movie_data['original_title'] = 'Mulholland Five'
-        response = self.client.post(self.end_point, json=self.movie_data, follow_redirects=True)
+        response = self.post_and_wait(self.movie_data)
         json_data = response.get_json()
         self.assertEqual(response.status_code, 200)
         self.assertFalse(json_data['success'])
@@ -198,6 +221,95 @@ class NytReviewApiTests(unittest.TestCase):
         self.assertFalse(json_data['success'])
         self.assertIn("this film has yet to be released.", json_data['message'])
 
+    # Review searched for before: read from database, NYT not called.
+    def test_review_from_database(self):
+        self.login("Alex", "123")
+        db.session.add(NytReviewResult(found=True, review_text="Stored review.",
+                                       critics_pick=True, bullseye=False,
+                                       publication_date='1995-03-03', **self.movie_data))
+        db.session.commit()
+        response = self.client.post(self.end_point, json=self.movie_data, follow_redirects=True)
+        json_data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(json_data['success'])
+        self.assertEqual(json_data['review_text'], "Stored review.")
+        self.assertTrue(json_data['critics_pick'])
+        self.assertTrue(json_data['review_warning'])
+
+    def test_no_review_from_database(self):
+        self.login("Alex", "123")
+        db.session.add(NytReviewResult(found=False, **self.movie_data))
+        db.session.commit()
+        response = self.client.post(self.end_point, json=self.movie_data, follow_redirects=True)
+        json_data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(json_data['success'])
+        self.assertIn("No review found", json_data['message'])
+
+    # Review not stored: looked up by a background job.
+    def test_review_job(self):
+        self.login("Alex", "123")
+        review = NytMovieReview(title="Exotica", year=1994, text="Tax inspector obsessed with stripper.",
+                                publication_date='1995-03-03', critics_pick=0)
+        release = threading.Event()
+
+        def find_movie_review(movie):
+            release.wait(5)
+            return nyt_response(review, bullseye=True)
+
+        with mock.patch.object(NytMovieReview, 'find_movie_review',
+                               side_effect=find_movie_review) as get:
+            response = self.client.post(self.end_point, json=self.movie_data)
+            json_data = response.get_json()
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.headers['Location'], json_data['poll_url'])
+
+            # Same film while job pending: same job.
+            again = self.client.post(self.end_point, json=self.movie_data).get_json()
+            self.assertEqual(again['job_id'], json_data['job_id'])
+            self.assertEqual(self.client.get(json_data['poll_url']).status_code, 202)
+
+            release.set()
+            response = self.post_and_wait(self.movie_data)
+            self.assertEqual(get.call_count, 1)
+
+        json_data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(json_data['success'])
+        self.assertIn('Tax inspector', json_data['review_text'])
+        self.assertFalse(json_data['review_warning'])
+
+        # Outcome now stored: answered at once.
+        response = self.client.post(self.end_point, json=self.movie_data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()['success'])
+
+    def test_review_job_error(self):
+        self.login("Alex", "123")
+        with mock.patch.object(NytMovieReview, 'find_movie_review',
+                               return_value=nyt_response(status_code=429)):
+            response = self.post_and_wait(self.movie_data)
+        self.assertEqual(response.status_code, 429)
+        self.assertFalse(response.get_json()['success'])
+
+    def test_unknown_review_job(self):
+        self.login("Alex", "123")
+        response = self.client.get(f"{self.end_point}/no-such-job")
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.get_json()['success'])
+
+    def test_review_job_not_logged_in(self):
+        response = self.client.get(f"{self.end_point}/no-such-job")
+        self.assertEqual(response.status_code, 401)
+
+    def test_review_jobs_queue_full(self):
+        self.login("Alex", "123")
+        with mock.patch.object(reviewjobs.jobs, 'submit',
+                               side_effect=reviewjobs.QueueFull("Too many review lookups pending.")):
+            response = self.client.post(self.end_point, json=self.movie_data)
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.get_json()['success'])
+
     # Too many requests, 429
     # Won't write unit test. Manually tested in Postman: works.
 
@@ -0,0 +1,224 @@
+"""Unit-test script of asyncclients module"""
+
+import os
+
+# Use in-memory database for testing.
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import json
+import time
+import asyncio
+import threading
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add this line to whatever test script you write
+from context import app, TmdbMovie
+from cinescout import asyncclients, reviewbatch
+from cinescout.asyncclients import AsyncApiClient, AsyncTmdbMovie
+from cinescout.cache import TTLCache
+from cinescout.ratelimit import TokenBucket
+from test_movies import fake_movie_data
+
+
+class StubTmdbServer(ThreadingHTTPServer):
+    """Local stand-in for TMDB's /movie/{id} endpoint. Counts connections
+    and requests, and the most requests it had in flight at once.
+
+    Attributes:
+        delay: Number of seconds to wait before answering.
+        too_many: Number of requests still to be answered 429.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubTmdbHandler)
+        self.delay = 0
+        self.too_many = 0
+        self.lock = threading.Lock()
+        self.counters = {'connections': 0, 'requests': 0, 'in_flight': 0, 'max_in_flight': 0}
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class StubTmdbHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.counters['connections'] += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        counters = self.server.counters
+        with self.server.lock:
+            counters['requests'] += 1
+            counters['in_flight'] += 1
+            counters['max_in_flight'] = max(counters['max_in_flight'], counters['in_flight'])
+            too_many = self.server.too_many > 0
+            self.server.too_many -= too_many
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            counters['in_flight'] -= 1
+
+        movie_id = int(self.path.split('?')[0].split('/')[2])
+        status_code, body = (429, {}) if too_many else (200, fake_movie_data(movie_id))
+        payload = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        if too_many:
+            self.send_header('Retry-After', '0')
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class AsyncClientTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up AsyncClientTests...")
+        self.server = StubTmdbServer()
+        self.patches = [
+            mock.patch.object(TmdbMovie, 'api_base_url', self.server.base_url),
+            mock.patch.object(TmdbMovie, 'details_cache',
+                              TTLCache('details', maxsize=10, ttl=100)),
+            mock.patch.object(TmdbMovie, 'providers_cache',
+                              TTLCache('providers', maxsize=10, ttl=100)),
+            mock.patch.object(TmdbMovie, 'rate_limiter',
+                              TokenBucket('tmdb', rate=1000, capacity=1000)),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down AsyncClientTests...")
+        for patch in self.patches:
+            patch.stop()
+        self.server.stop()
+
+    def run_calls(self, *coroutines):
+        """Runs coroutines concurrently in a loop of their own; returns their results."""
+        async def main():
+            try:
+                return await asyncio.gather(*coroutines)
+            finally:
+                await asyncclients.close_sessions()
+        return asyncio.run(main())
+
+    def test_no_call_in_flight_refused(self):
+        with self.assertRaises(ValueError):
+            AsyncApiClient('tmdb', 0)
+
+    def test_one_session_per_loop(self):
+        client = AsyncApiClient('tmdb', 4)
+        url = f"{self.server.base_url}/movie/1"
+
+        async def calls():
+            sessions = []
+            for _ in range(3):
+                await client.get(url)
+                sessions.append(client._session()[0])
+            await client.close()
+            return sessions
+
+        sessions = asyncio.run(calls())
+        self.assertIs(sessions[0], sessions[2])
+        self.assertTrue(sessions[0].closed)
+        # Connection kept alive between calls.
+        self.assertEqual(self.server.counters['connections'], 1)
+
+        other_sessions = asyncio.run(calls())
+        self.assertIsNot(other_sessions[0], sessions[0])
+        self.assertEqual(client._loops, {})
+
+    def test_sessions_of_closed_loops_dropped(self):
+        client = AsyncApiClient('tmdb', 4)
+        url = f"{self.server.base_url}/movie/1"
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(client.get(url))
+        self.assertIn(loop, client._loops)
+        session = client._loops[loop][0]
+        loop.run_until_complete(session.close())
+        loop.close()
+
+        asyncio.run(client.get(url))
+        self.assertNotIn(loop, client._loops)
+
+    def test_calls_in_flight_capped(self):
+        client = AsyncApiClient('tmdb', 2)
+        self.server.delay = 0.05
+
+        async def calls():
+            try:
+                return await asyncio.gather(*(client.get(f"{self.server.base_url}/movie/{i}")
+                                              for i in range(6)))
+            finally:
+                await client.close()
+
+        responses = asyncio.run(calls())
+        self.assertEqual([res.status_code for res in responses], [200] * 6)
+        self.assertEqual(self.server.counters['max_in_flight'], 2)
+        self.assertEqual(self.server.counters['connections'], 2)
+
+    def test_same_result_as_sync(self):
+        async_result, = self.run_calls(AsyncTmdbMovie.get_movie_info_by_id(577922))
+        TmdbMovie.details_cache.clear()
+        TmdbMovie.providers_cache.clear()
+        sync_result = TmdbMovie.get_movie_info_by_id(577922)
+
+        self.assertTrue(async_result['success'])
+        self.assertEqual(self.server.counters['requests'], 2)
+        for field in ('id', 'title', 'release_date', 'runtime', 'providers'):
+            self.assertEqual(getattr(async_result['movie'], field),
+                             getattr(sync_result['movie'], field))
+        self.assertEqual(repr(async_result['movie'].filmcredits),
+                         repr(sync_result['movie'].filmcredits))
+
+    def test_second_call_served_from_cache(self):
+        first, = self.run_calls(AsyncTmdbMovie.get_movie_info_by_id(577922))
+        second, = self.run_calls(AsyncTmdbMovie.get_movie_info_by_id(577922))
+        self.assertEqual(self.server.counters['requests'], 1)
+        self.assertEqual(second['movie'].title, first['movie'].title)
+        self.assertEqual(TmdbMovie.details_cache.stats()['hits'], 1)
+
+    def test_retried_after_429(self):
+        self.server.too_many = 1
+        result, = self.run_calls(AsyncTmdbMovie.get_movie_info_by_id(577922))
+        self.assertTrue(result['success'])
+        self.assertEqual(self.server.counters['requests'], 2)
+        self.assertEqual(TmdbMovie.rate_limiter.stats()['backoffs'], 1)
+
+    def test_queue_full_lookup_fails(self):
+        TmdbMovie.rate_limiter = TokenBucket('tmdb', rate=0.001, capacity=1)
+        TmdbMovie.rate_limiter.acquire()
+        result, = self.run_calls(AsyncTmdbMovie.get_movie_info_by_id(577922))
+        self.assertFalse(result['success'])
+        self.assertEqual(result['status_code'], 429)
+        self.assertEqual(self.server.counters['requests'], 0)
+        self.assertEqual(TmdbMovie.rate_limiter.stats()['backoffs'], 0)
+
+    def test_batch_targets_fetched_concurrently(self):
+        self.server.delay = 0.05
+        targets = [(f"tmdb:{i}", i, None) for i in range(1, 5)]
+        movies, = self.run_calls(reviewbatch.target_movies(targets))
+        self.assertEqual(list(movies), [key for key, _, _ in targets])
+        self.assertEqual(movies['tmdb:3'].id, 3)
+        self.assertEqual(self.server.counters['max_in_flight'], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
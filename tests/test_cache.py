@@ -0,0 +1,102 @@
+"""Unit-test script of cache module"""
+
+import threading
+import unittest
+
+# Add this line to whatever test script you write
+from context import app
+from cinescout.cache import TTLCache, FRESH, STALE
+
+
+class FakeClock:
+    """Timer whose time only moves when told to."""
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class CacheTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up CacheTests...")
+        self.clock = FakeClock()
+        self.cache = TTLCache('test', maxsize=2, ttl=10, timer=self.clock)
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down CacheTests...")
+
+    def test_miss(self):
+        self.assertEqual(self.cache.lookup('a'), (None, None))
+        self.assertEqual(self.cache.get('a', 'default'), 'default')
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+    def test_fresh_hit(self):
+        self.cache.set('a', 1)
+        self.clock.now = 9
+        self.assertEqual(self.cache.lookup('a'), (1, FRESH))
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_stale_hit(self):
+        self.cache.set('a', 1)
+        self.clock.now = 10
+        self.assertEqual(self.cache.lookup('a'), (1, STALE))
+        self.assertEqual(self.cache.stats()['stale_hits'], 1)
+
+    def test_ttl_per_entry(self):
+        self.cache.set('a', 1, ttl=100)
+        self.clock.now = 50
+        self.assertEqual(self.cache.lookup('a'), (1, FRESH))
+
+    def test_lru_eviction(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        # Touch 'a' so 'b' is the least recently used entry.
+        self.cache.lookup('a')
+        self.cache.set('c', 3)
+        self.assertIn('a', self.cache)
+        self.assertNotIn('b', self.cache)
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_bad_maxsize(self):
+        self.assertRaises(ValueError, TTLCache, 'test', 0)
+
+    def test_revalidate(self):
+        self.cache.set('a', 1)
+        self.clock.now = 10
+        done = threading.Event()
+
+        def loader():
+            self.cache.set('a', 2)
+            done.set()
+
+        self.assertTrue(self.cache.revalidate('a', loader))
+        self.assertTrue(done.wait(5))
+        self.assertEqual(self.cache.lookup('a'), (2, FRESH))
+
+    def test_revalidate_once_per_key(self):
+        release = threading.Event()
+        self.assertTrue(self.cache.revalidate('a', release.wait))
+        self.assertFalse(self.cache.revalidate('a', release.wait))
+        release.set()
+        self.assertEqual(self.cache.stats()['refreshes'], 1)
+
+    def test_revalidate_error_keeps_entry(self):
+        self.cache.set('a', 1)
+        done = threading.Event()
+
+        def loader():
+            done.set()
+            raise RuntimeError("Upstream down.")
+
+        self.cache.revalidate('a', loader)
+        self.assertTrue(done.wait(5))
+        self.assertEqual(self.cache.get('a'), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
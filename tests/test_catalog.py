@@ -0,0 +1,352 @@
+"""Unit-test script of catalog module and of /api/criterion-films"""
+
+import os
+
+# Use in-memory database for testing.
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import time
+import gzip
+import threading
+import unittest
+from unittest import mock
+
+from sqlalchemy import event, update
+
+# Add this line to whatever test script you write
+from context import app, db, Film, CriterionFilm
+from cinescout.models import Person, FilmPerson
+from cinescout import catalog, limiter
+from cinescout.catalog import CatalogSnapshot
+
+
+class FakeClock:
+    """Timer whose time only moves when told to."""
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+class CatalogTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up CatalogTests...")
+        self.appctx = app.app_context()
+        self.appctx.push()
+        db.create_all()
+        self.client = app.test_client()
+        limiter.enabled = False
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down CatalogTests...")
+        limiter.enabled = True
+        db.session.remove()
+        db.drop_all()
+        self.appctx.pop()
+
+    def add_film(self, title, year, director, tmdb_id=None):
+        film = Film(title=title, year=year, director=director, tmdb_id=tmdb_id)
+        db.session.add(film)
+        db.session.commit()
+        db.session.add(CriterionFilm(film_id=film.id))
+        db.session.commit()
+        return film
+
+    def get_films(self, **headers):
+        return self.client.get('/api/criterion-films', headers=headers)
+
+    def test_no_films(self):
+        response = self.get_films()
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('no films', response.get_json()['err_message'])
+
+    def test_films_served(self):
+        self.add_film("Jules and Jim", 1962, "François Truffaut", tmdb_id=1628)
+        self.add_film("Tokyo Drifter", 1966, "Seijun Suzuki & Kazue Nagatsuka")
+        response = self.get_films()
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Content-Encoding', response.headers)
+        data = response.get_json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['num_results'], 2)
+        self.assertEqual(data['results'][0], {'title': "Jules and Jim", 'year': 1962,
+                                              'directors': ["François Truffaut"],
+                                              'director_ids': [1], 'tmdb_id': 1628})
+        self.assertEqual(data['results'][1]['directors'], ["Seijun Suzuki", "Kazue Nagatsuka"])
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+
+    def test_gzip(self):
+        self.add_film("Jules and Jim", 1962, "François Truffaut")
+        plain = self.get_films()
+        zipped = self.get_films(**{'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(zipped.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(zipped.get_data()), plain.get_data())
+        self.assertNotEqual(zipped.headers['ETag'], plain.headers['ETag'])
+        self.assertIn('Accept-Encoding', zipped.headers['Vary'])
+
+    def test_not_modified(self):
+        self.add_film("Jules and Jim", 1962, "François Truffaut")
+        etag = self.get_films().headers['ETag']
+        response = self.get_films(**{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b"")
+        self.assertEqual(response.headers['ETag'], etag)
+
+    def test_served_without_database(self):
+        self.add_film("Jules and Jim", 1962, "François Truffaut")
+        self.get_films()
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            for _ in range(3):
+                self.assertEqual(self.get_films().status_code, 200)
+            # Browse page uses the snapshot too.
+            self.assertEqual(self.client.get('/browse').status_code, 200)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        self.assertEqual(statements, [])
+
+    def test_invalidated_on_commit(self):
+        self.add_film("Jules and Jim", 1962, "François Truffaut")
+        etag = self.get_films().headers['ETag']
+        self.add_film("Tokyo Drifter", 1966, "Seijun Suzuki")
+        response = self.get_films(**{'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['num_results'], 2)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_invalidated_by_bulk_statement(self):
+        self.add_film("Jules and Jim", 1962, "François Truffaut")
+        self.get_films()
+        db.session.execute(update(Person).values(name="Truffaut"))
+        db.session.commit()
+        self.assertEqual(self.get_films().get_json()['results'][0]['directors'], ["Truffaut"])
+
+    def test_subscribers_told_of_changes(self):
+        changes = []
+        callback = catalog.on_catalog_changed(lambda *ids: changes.append(ids))
+        try:
+            film = self.add_film("Jules and Jim", 1962, "François Truffaut")
+            person = Person.query.one()
+            person.name = "Truffaut"
+            db.session.commit()
+            db.session.execute(update(Film).values(year=1961))
+            db.session.commit()
+        finally:
+            catalog._subscribers.remove(callback)
+        self.assertEqual(changes, [({film.id}, {person.id}), ({film.id}, set()),
+                                   (set(), {person.id}), (None, None)])
+
+    def test_rollback_keeps_snapshot(self):
+        self.add_film("Jules and Jim", 1962, "François Truffaut")
+        self.get_films()
+        invalidations = catalog.snapshot.stats()['invalidations']
+        db.session.add(Film(title="Tokyo Drifter", year=1966))
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(catalog.snapshot.stats()['invalidations'], invalidations)
+        self.assertEqual(self.get_films().get_json()['num_results'], 1)
+
+    def test_rebuilt_after_ttl(self):
+        self.add_film("Jules and Jim", 1962, "François Truffaut")
+        clock = FakeClock()
+        snapshot = CatalogSnapshot(ttl=60, timer=clock)
+        first = snapshot.get()
+        self.assertIs(snapshot.get(), first)
+        clock.now = 61
+        rebuilt = snapshot.get()
+        self.assertIsNot(rebuilt, first)
+        # Same catalog, same ETag.
+        self.assertEqual(rebuilt.etag, first.etag)
+        self.assertEqual(snapshot.stats()['builds'], 2)
+
+    def slow_payloads(self):
+        """Returns events (started, release) and patch of catalog_payload
+        waiting for release once started."""
+        started, release = threading.Event(), threading.Event()
+        def payload():
+            started.set()
+            release.wait(5)
+            return {'success': True, 'num_results': 0, 'results': []}, 200
+        return started, release, mock.patch.object(catalog, 'catalog_payload',
+                                                   side_effect=payload)
+
+    def test_one_rebuild_after_ttl(self):
+        self.add_film("Jules and Jim", 1962, "François Truffaut")
+        clock = FakeClock()
+        snapshot = CatalogSnapshot(ttl=60, timer=clock)
+        first = snapshot.get()
+        clock.now = 61
+        started, release, patch = self.slow_payloads()
+        with patch as payload:
+            rebuilder = threading.Thread(target=snapshot.get)
+            rebuilder.start()
+            started.wait(5)
+            # Others are served the expired snapshot meanwhile.
+            self.assertIs(snapshot.get(), first)
+            self.assertIs(snapshot.get(), first)
+            release.set()
+            rebuilder.join(5)
+        payload.assert_called_once()
+        self.assertIsNot(snapshot.get(), first)
+        self.assertEqual(snapshot.stats()['stale_hits'], 2)
+        self.assertEqual(snapshot.stats()['builds'], 2)
+
+    def test_one_build_without_snapshot(self):
+        snapshot = CatalogSnapshot()
+        started, release, patch = self.slow_payloads()
+        results = []
+        with patch as payload:
+            threads = [threading.Thread(target=lambda: results.append(snapshot.get()))
+                       for _ in range(3)]
+            threads[0].start()
+            started.wait(5)
+            for thread in threads[1:]:
+                thread.start()
+            while snapshot._builds.stats()['shared'] < 2:
+                time.sleep(0.01)
+            release.set()
+            for thread in threads:
+                thread.join(5)
+        payload.assert_called_once()
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_browse_without_films(self):
+        response = self.client.get('/browse')
+        self.assertIn(b"Unable to load Criterion films", response.get_data())
+
+    # **** PAGES ****
+
+    def add_catalog(self):
+        self.add_film("Jules and Jim", 1962, "François Truffaut")
+        self.add_film("The 400 Blows", 1959, "François Truffaut")
+        self.add_film("Tokyo Drifter", 1966, "Seijun Suzuki")
+        self.add_film("Ikiru", 1952, "Akira Kurosawa")
+        self.add_film("Rashomon", 1950, "Akira Kurosawa")
+        # Not in the catalog.
+        db.session.add(Film(title="Jaws", year=1975, director="Steven Spielberg"))
+        db.session.commit()
+
+    def get_page(self, **args):
+        args.setdefault('draw', 1)
+        return self.client.get('/api/criterion-films', query_string=args)
+
+    def titles(self, page):
+        return [film['title'] for film in page['results']]
+
+    def test_page_sorted_by_year(self):
+        self.add_catalog()
+        first = catalog.catalog_page(start=0, length=2)
+        self.assertEqual(self.titles(first), ["Rashomon", "Ikiru"])
+        self.assertEqual(first['records_total'], 5)
+        self.assertEqual(first['records_filtered'], 5)
+        last = catalog.catalog_page(start=4, length=2)
+        self.assertEqual(self.titles(last), ["Tokyo Drifter"])
+
+    def test_page_sorted_by_title_and_director(self):
+        self.add_catalog()
+        page = catalog.catalog_page(order='title', descending=True)
+        self.assertEqual(self.titles(page), ["Tokyo Drifter", "The 400 Blows", "Rashomon",
+                                             "Jules and Jim", "Ikiru"])
+        # Ties sorted by id.
+        page = catalog.catalog_page(order='directors')
+        self.assertEqual(self.titles(page), ["Ikiru", "Rashomon", "Jules and Jim",
+                                             "The 400 Blows", "Tokyo Drifter"])
+        with self.assertRaises(ValueError):
+            catalog.catalog_page(order='tmdb_id')
+
+    def test_page_sorted_by_persons_names(self):
+        self.add_catalog()
+        person = Person.query.filter_by(name="Akira Kurosawa").one()
+        person.name = "Kurosawa Akira"
+        db.session.commit()
+        page = catalog.catalog_page(order='directors')
+        self.assertEqual(self.titles(page), ["Jules and Jim", "The 400 Blows", "Ikiru",
+                                             "Rashomon", "Tokyo Drifter"])
+
+    def test_page_searched(self):
+        self.add_catalog()
+        page = catalog.catalog_page(search=" AKIRA ")
+        self.assertEqual(self.titles(page), ["Rashomon", "Ikiru"])
+        self.assertEqual(page['records_filtered'], 2)
+        self.assertEqual(page['records_total'], 5)
+        # Titles and directors starting with the search only.
+        self.assertEqual(self.titles(catalog.catalog_page(search="j")), ["Jules and Jim"])
+        self.assertEqual(catalog.catalog_page(search="kurosawa")['records_filtered'], 0)
+
+    def test_page_counts_films_once(self):
+        self.add_catalog()
+        # Second spine number of a film already in the catalog.
+        film = Film.query.filter_by(title="Ikiru").one()
+        db.session.add(CriterionFilm(film_id=film.id))
+        db.session.commit()
+        page = catalog.catalog_page()
+        self.assertEqual(page['records_total'], 5)
+        self.assertEqual(page['records_filtered'], 5)
+        self.assertEqual(len(page['results']), 5)
+        self.assertEqual(catalog.catalog_page(search="akira")['records_filtered'], 2)
+
+    def test_page_length_capped(self):
+        for year in range(catalog.MAX_PAGE_LENGTH + 5):
+            db.session.add(Film(title=f"Film {year}", year=1900 + year))
+        db.session.flush()
+        db.session.add_all(CriterionFilm(film_id=film.id) for film in Film.query.all())
+        db.session.commit()
+        page = catalog.catalog_page(length=1000)
+        self.assertEqual(len(page['results']), catalog.MAX_PAGE_LENGTH)
+
+    def test_page_request(self):
+        self.add_catalog()
+        response = self.get_page(draw=3, start=1, length=2, **{'order[0][column]': 0,
+                                                               'order[0][dir]': 'desc',
+                                                               'search[value]': "t"})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['draw'], 3)
+        self.assertEqual(data['recordsTotal'], 5)
+        self.assertEqual(data['recordsFiltered'], 2)
+        self.assertEqual([film['title'] for film in data['data']], ["The 400 Blows"])
+        self.assertEqual(data['data'][0]['directors'], ["François Truffaut"])
+
+    def test_page_request_all(self):
+        self.add_catalog()
+        data = self.get_page(length=-1).get_json()
+        self.assertEqual(len(data['data']), 5)
+
+    def test_bad_page_request(self):
+        self.assertEqual(self.get_page(draw="x").status_code, 400)
+        response = self.get_page(**{'order[0][column]': 7})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.get_json()['success'])
+
+    def test_page_query_uses_indexes(self):
+        self.add_catalog()
+        plans = {}
+        def explain(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("SELECT films.id"):
+                plans[order].extend(row[-1] for row in cursor.connection.execute(
+                    "EXPLAIN QUERY PLAN " + statement, parameters))
+        event.listen(db.engine, 'before_cursor_execute', explain)
+        try:
+            for order in catalog.ORDER_COLUMNS:
+                plans[order] = []
+                catalog.catalog_page(order=order, descending=True)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', explain)
+        for order in ('title', 'year'):
+            self.assertIn(f"SCAN films USING INDEX ix_films_{order}", plans[order])
+            # No sort of the whole catalog; directors are loaded by the page.
+            self.assertFalse([plan for plan in plans[order] if 'TEMP B-TREE' in plan])
+        # Films' first directors are looked up by film_persons' primary key.
+        self.assertTrue([plan for plan in plans['directors']
+                         if plan.startswith("SEARCH film_persons") and '(film_id=?)' in plan])
+
+
+if __name__ == "__main__":
+    unittest.main()
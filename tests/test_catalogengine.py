@@ -0,0 +1,176 @@
+"""Unit-test script of catalogengine module and of /api/criterion-facets"""
+
+import os
+
+# Use in-memory database for testing.
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import unittest
+
+from sqlalchemy import update
+
+# Add this line to whatever test script you write
+from context import app, db, Film, CriterionFilm
+from cinescout import limiter
+from cinescout.models import Person
+from cinescout.catalogengine import CatalogEngine, engine
+from test_catalog import FakeClock
+
+
+class CatalogEngineTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up CatalogEngineTests...")
+        self.appctx = app.app_context()
+        self.appctx.push()
+        db.create_all()
+        self.client = app.test_client()
+        limiter.enabled = False
+
+        self.add_film("Jules and Jim", 1962, "François Truffaut", spine_num=460)
+        self.add_film("The 400 Blows", 1959, "François Truffaut", spine_num=5)
+        self.add_film("Tokyo Drifter", 1966, "Seijun Suzuki", spine_num=39)
+        self.add_film("Ikiru", 1952, "Akira Kurosawa", spine_num=221, tmdb_id=3782)
+        self.add_film("Safety Last!", 1923, "Fred Newmeyer & Sam Taylor")
+        # Not in the catalog.
+        db.session.add(Film(title="Jaws", year=1975, director="Steven Spielberg"))
+        db.session.commit()
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down CatalogEngineTests...")
+        limiter.enabled = True
+        db.session.remove()
+        db.drop_all()
+        self.appctx.pop()
+
+    def add_film(self, title, year, director, spine_num=None, tmdb_id=None):
+        film = Film(title=title, year=year, director=director, tmdb_id=tmdb_id)
+        db.session.add(film)
+        db.session.commit()
+        db.session.add(CriterionFilm(film_id=film.id, spine_num=spine_num))
+        db.session.commit()
+        return film
+
+    def person_id(self, name):
+        return Person.query.filter_by(name=name).one().id
+
+    def titles(self, **query):
+        return [film['title'] for film in engine.films(**query)]
+
+    def test_counts(self):
+        self.assertEqual(engine.count(), 5)
+        self.assertEqual(engine.count(decade=1960), 2)
+        self.assertEqual(engine.count(year_min=1952, year_max=1962), 3)
+        self.assertEqual(engine.count(director_id=self.person_id("François Truffaut")), 2)
+        self.assertEqual(engine.count(director_id=self.person_id("Steven Spielberg")), 0)
+        self.assertEqual(engine.count(director_id=12345), 0)
+
+    def test_sorted_slices(self):
+        self.assertEqual(self.titles(), ["Safety Last!", "Ikiru", "The 400 Blows",
+                                         "Jules and Jim", "Tokyo Drifter"])
+        self.assertEqual(self.titles(order='title', start=1, length=2),
+                         ["Jules and Jim", "Safety Last!"])
+        # Films without a spine number last.
+        self.assertEqual(self.titles(order='spine_num', descending=True)[0], "Safety Last!")
+        self.assertEqual(self.titles(order='spine_num')[:2], ["The 400 Blows", "Tokyo Drifter"])
+        self.assertEqual(self.titles(order='directors', decade=1950), ["Ikiru", "The 400 Blows"])
+        with self.assertRaises(ValueError):
+            engine.films(order='tmdb_id')
+
+    def test_film_fields(self):
+        ikiru, = engine.films(year_max=1955, year_min=1950)
+        self.assertEqual(ikiru, {'title': "Ikiru", 'year': 1952, 'directors': ["Akira Kurosawa"],
+                                 'director_ids': [self.person_id("Akira Kurosawa")],
+                                 'tmdb_id': 3782, 'spine_num': 221})
+        safety, = engine.films(decade=1920)
+        self.assertEqual(safety['directors'], ["Fred Newmeyer", "Sam Taylor"])
+        self.assertIsNone(safety['spine_num'])
+        self.assertIsNone(safety['tmdb_id'])
+
+    def test_facets(self):
+        facets = engine.facets(top_directors=2)
+        self.assertEqual(facets['num_results'], 5)
+        self.assertEqual(facets['decades'], {1920: 1, 1950: 2, 1960: 2})
+        self.assertEqual(facets['directors'][0], {'id': self.person_id("François Truffaut"),
+                                                  'name': "François Truffaut", 'count': 2})
+        # Ties by name.
+        self.assertEqual(facets['directors'][1]['name'], "Akira Kurosawa")
+        self.assertEqual(engine.facets(decade=1960)['decades'], {1960: 2})
+
+    def test_updated_incrementally(self):
+        engine.count()
+        stats = engine.stats()
+        film = Film.query.filter_by(title="Tokyo Drifter").one()
+        film.director = "Seijun Suzuki & Kazue Nagatsuka"
+        film.year = 1967
+        self.add_film("Branded to Kill", 1967, "Seijun Suzuki", spine_num=38)
+        # Same year: sorted by id.
+        self.assertEqual(self.titles(director_id=self.person_id("Seijun Suzuki")),
+                         ["Tokyo Drifter", "Branded to Kill"])
+        self.assertEqual(engine.count(director_id=self.person_id("Kazue Nagatsuka")), 1)
+        # Other films' credits survive the splice.
+        self.assertEqual(self.titles(director_id=self.person_id("Sam Taylor")), ["Safety Last!"])
+        self.assertEqual(engine.stats()['builds'], stats['builds'])
+        self.assertEqual(engine.stats()['films_reloaded'], stats['films_reloaded'] + 2)
+
+    def test_deleted_film(self):
+        engine.count()
+        db.session.delete(Film.query.filter_by(title="Ikiru").one())
+        db.session.commit()
+        self.assertEqual(engine.count(), 4)
+        self.assertEqual(engine.count(director_id=self.person_id("Akira Kurosawa")), 0)
+
+    def test_person_renamed(self):
+        self.assertEqual(self.titles(order='directors', decade=1950), ["Ikiru", "The 400 Blows"])
+        person = Person.query.filter_by(name="Akira Kurosawa").one()
+        person.name = "Kurosawa Akira"
+        db.session.commit()
+        self.assertEqual(engine.films(decade=1950, order='title')[0]['directors'],
+                         ["Kurosawa Akira"])
+        # Sorted by first-credited director's name, as renamed.
+        self.assertEqual(self.titles(order='directors', decade=1950), ["The 400 Blows", "Ikiru"])
+
+    def test_rebuilt_after_bulk_statement(self):
+        engine.count()
+        builds = engine.stats()['builds']
+        db.session.execute(update(Film).values(year=2000))
+        db.session.commit()
+        self.assertEqual(engine.count(decade=2000), 5)
+        self.assertEqual(engine.stats()['builds'], builds + 1)
+
+    def test_rollback_forgotten(self):
+        engine.count()
+        updates = engine.stats()['updates']
+        db.session.add(Film(title="Ran", year=1985))
+        db.session.flush()
+        db.session.rollback()
+        self.assertEqual(engine.count(), 5)
+        self.assertEqual(engine.stats()['updates'], updates)
+
+    def test_rebuilt_after_ttl(self):
+        clock = FakeClock()
+        own = CatalogEngine(ttl=60, timer=clock)
+        own.count()
+        clock.now = 61
+        own.count()
+        self.assertEqual(own.stats()['builds'], 2)
+
+    def test_facets_api(self):
+        response = self.client.get('/api/criterion-facets',
+                                   query_string={'decade': 1950, 'order': 'title', 'length': 1})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertTrue(data['success'])
+        self.assertEqual(data['num_results'], 2)
+        self.assertEqual(data['decades'], {'1950': 2})
+        self.assertEqual([film['title'] for film in data['results']], ["Ikiru"])
+
+    def test_bad_facets_api(self):
+        self.assertEqual(self.client.get('/api/criterion-facets?decade=sixties').status_code, 400)
+        self.assertEqual(self.client.get('/api/criterion-facets?order=tmdb_id').status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
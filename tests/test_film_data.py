@@ -0,0 +1,138 @@
+"""Unit-test script of scripts/film_data.py's catalog import"""
+
+import os
+
+# Use in-memory database for testing.
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import sys
+import shutil
+import tempfile
+import unittest
+
+# Add this line to whatever test script you write
+from context import app, db, Film, CriterionFilm
+from cinescout.models import Person, FilmPerson
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "scripts")))
+import film_data
+
+HEADER = "release_year,title,director,spine_num,tmdb_id,iffy\n"
+
+
+class FilmDataTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up FilmDataTests...")
+        self.appctx = app.app_context()
+        self.appctx.push()
+        db.create_all()
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down FilmDataTests...")
+        shutil.rmtree(self.tempdir)
+        db.session.remove()
+        db.drop_all()
+        self.appctx.pop()
+
+    def write_csv(self, *rows):
+        path = os.path.join(self.tempdir, "criterion.csv")
+        with open(path, 'w') as csvfile:
+            csvfile.write(HEADER + "".join(row + "\n" for row in rows))
+        return path
+
+    def test_rows_imported(self):
+        path = self.write_csv("1952,Ikiru,Akira Kurosawa,221,3782,False",
+                              "1961,Yojimbo,Akira Kurosawa,52,11878,False",
+                              "1966,Tokyo Drifter,Seijun Suzuki,39,,False")
+        counts = film_data.update_table(path, CriterionFilm)
+        self.assertEqual((counts['rows'], counts['films'], counts['persons'], counts['listed']),
+                         (3, 3, 2, 3))
+        ikiru = Film.query.filter_by(title="Ikiru").one()
+        self.assertEqual((ikiru.year, ikiru.tmdb_id), (1952, 3782))
+        self.assertEqual(CriterionFilm.query.filter_by(film_id=ikiru.id).one().spine_num, 221)
+        self.assertIsNone(Film.query.filter_by(title="Tokyo Drifter").one().tmdb_id)
+
+    def test_repeated_rows_one_film(self):
+        path = self.write_csv("1923,Safety Last!,Fred Newmeyer,40,22596,False",
+                              "1923,Safety Last!,Fred Newmeyer,41,22596,False",
+                              # Same title, other year: another film.
+                              "1938,Safety Last!,Fred Newmeyer,42,,False")
+        # Repeats within a batch, and across batches.
+        for batch_size in (film_data.BATCH_SIZE, 1):
+            db.drop_all()
+            db.create_all()
+            counts = film_data.update_table(path, CriterionFilm, batch_size=batch_size)
+            self.assertEqual((counts['films'], counts['listed']), (2, 2))
+            self.assertEqual(Film.query.filter_by(year=1923).count(), 1)
+            self.assertEqual(CriterionFilm.query.count(), 2)
+            self.assertEqual(Person.query.count(), 1)
+
+    def test_lowest_spine_kept(self):
+        path = self.write_csv("1923,Safety Last!,Fred Newmeyer,41,22596,False",
+                              "1952,Ikiru,Akira Kurosawa,221,3782,False",
+                              "1923,Safety Last!,Fred Newmeyer,40,22596,False",
+                              "1923,Safety Last!,Fred Newmeyer,,22596,False")
+        # Lower number in the same batch, and in a later one.
+        for batch_size in (film_data.BATCH_SIZE, 1):
+            db.drop_all()
+            db.create_all()
+            film_data.update_table(path, CriterionFilm, batch_size=batch_size)
+            safety = Film.query.filter_by(title="Safety Last!").one()
+            self.assertEqual(CriterionFilm.query.filter_by(film_id=safety.id).one().spine_num, 40)
+            ikiru = Film.query.filter_by(title="Ikiru").one()
+            self.assertEqual(CriterionFilm.query.filter_by(film_id=ikiru.id).one().spine_num, 221)
+
+    def test_reimport_inserts_nothing(self):
+        path = self.write_csv("1952,Ikiru,Akira Kurosawa,221,3782,False",
+                              "1923,Safety Last!,Fred Newmeyer & Sam Taylor,40,22596,False")
+        film_data.update_table(path, CriterionFilm)
+        counts = film_data.update_table(path, CriterionFilm)
+        self.assertEqual(counts['rows'], 2)
+        self.assertEqual((counts['films'], counts['persons'], counts['credits'], counts['listed']),
+                         (0, 0, 0, 0))
+        self.assertEqual((Film.query.count(), Person.query.count(), FilmPerson.query.count(),
+                          CriterionFilm.query.count()), (2, 3, 3, 2))
+
+    def test_malformed_row_rolls_back(self):
+        path = self.write_csv("1952,Ikiru,Akira Kurosawa,221,3782,False",
+                              "1961,Yojimbo,Akira Kurosawa,52,11878,False",
+                              "nineteen sixty-six,Tokyo Drifter,Seijun Suzuki,39,,False")
+        # Batches before the malformed row are inserted, then rolled back.
+        self.assertIsNone(film_data.update_table(path, CriterionFilm, batch_size=1))
+        self.assertEqual((Film.query.count(), Person.query.count(), FilmPerson.query.count(),
+                          CriterionFilm.query.count()), (0, 0, 0, 0))
+        path = self.write_csv("1952,Ikiru,Akira Kurosawa,221,3782,False",
+                              "1961,Yojimbo,Akira Kurosawa")
+        self.assertIsNone(film_data.update_table(path, CriterionFilm))
+        self.assertEqual(Film.query.count(), 0)
+
+    def test_directors_credited(self):
+        path = self.write_csv("1923,Safety Last!,Fred Newmeyer & Sam Taylor,40,22596,False",
+                              "1925,The Freshman,Sam Taylor & Fred Newmeyer,41,,False")
+        counts = film_data.update_table(path, CriterionFilm)
+        self.assertEqual((counts['persons'], counts['credits']), (2, 4))
+        safety = Film.query.filter_by(title="Safety Last!").one()
+        self.assertEqual([person.name for person in safety.directors],
+                         ["Fred Newmeyer", "Sam Taylor"])
+        self.assertEqual(FilmPerson.query.filter_by(film_id=safety.id, role='director').count(), 2)
+        freshman = Film.query.filter_by(title="The Freshman").one()
+        self.assertEqual([person.name for person in freshman.directors],
+                         ["Sam Taylor", "Fred Newmeyer"])
+
+    def test_directors_normalized(self):
+        path = self.write_csv("1960,Breathless,Jean-Luc Godard,1,,False",
+                              "1967,Weekend,jean-luc  godard,2,,False")
+        film_data.update_table(path, CriterionFilm, batch_size=1)
+        path = self.write_csv("1963,Contempt,JEAN-LUC GODARD,3,,False")
+        film_data.update_table(path, CriterionFilm)
+        godard, = Person.query.all()
+        self.assertEqual(godard.name, "Jean-Luc Godard")
+        self.assertEqual(FilmPerson.query.filter_by(person_id=godard.id).count(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
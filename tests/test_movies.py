@@ -1,9 +1,39 @@
 """Unit-test script of movies module"""
 
+import time
+import threading
 import unittest
+from datetime import timedelta
+from unittest import mock
 
 # Add this line to whatever test script you write
-from context import app, Movie, TmdbMovie
+from context import app, db, Movie, TmdbMovie
+from cinescout.movies import normalize_query, Person, CastCredit, CrewCredit, PROVIDERS_TTL
+from cinescout.reviews import NytMovieReview
+from cinescout.cache import TTLCache
+from cinescout.models import TmdbMirrorMovie
+
+
+class FakeResponse:
+    """Stands in for requests.Response returned by TmdbMovie._get."""
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+
+    def json(self):
+        return self.data
+
+
+def fake_movie_data(movie_id, title="Tenet", provider="Crave"):
+    """Returns minimal TMDB /movie/{id} payload."""
+    return {'title': title, 'original_title': title, 'release_date': '2020-08-22',
+            'overview': "Time runs out.", 'runtime': 150,
+            'poster_path': None, 'imdb_id': None,
+            'credits': {'cast': [{'name': "John David Washington",
+                                  'character': "Protagonist", 'id': 1}],
+                        'crew': [{'name': "Christopher Nolan",
+                                  'job': "Director", 'id': 2}]},
+            'watch/providers': {'results': {'CA': {'flatrate': [{'provider_name': provider}]}}}}
 
 
 class MovieTests(unittest.TestCase):
@@ -183,5 +213,341 @@ class MovieTests(unittest.TestCase):
         self.assertRaises(ValueError, self.testmovie.get_query, search_engine)
 
 
+class TmdbMovieCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up TmdbMovieCacheTests...")
+        self.now = 0
+        timer = lambda: self.now
+        self.patches = [
+            mock.patch.object(TmdbMovie, 'details_cache',
+                              TTLCache('details', maxsize=10, ttl=100, timer=timer)),
+            mock.patch.object(TmdbMovie, 'providers_cache',
+                              TTLCache('providers', maxsize=10, ttl=10, timer=timer)),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down TmdbMovieCacheTests...")
+        for patch in self.patches:
+            patch.stop()
+
+    def test_second_call_served_from_cache(self):
+        with mock.patch.object(TmdbMovie, '_get',
+                               return_value=FakeResponse(fake_movie_data(577922))) as get:
+            first = TmdbMovie.get_movie_info_by_id(577922)
+            second = TmdbMovie.get_movie_info_by_id(577922)
+
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(second['movie'].title, "Tenet")
+        self.assertEqual(second['movie'].providers, first['movie'].providers)
+        self.assertEqual(TmdbMovie.cache_stats()['details']['hits'], 1)
+
+    def test_errors_not_cached(self):
+        with mock.patch.object(TmdbMovie, '_get',
+                               return_value=FakeResponse({}, status_code=404)) as get:
+            TmdbMovie.get_movie_info_by_id(1)
+            result = TmdbMovie.get_movie_info_by_id(1)
+
+        self.assertEqual(get.call_count, 2)
+        self.assertFalse(result['success'])
+        self.assertEqual(result['status_code'], 404)
+
+    def test_stale_providers_refreshed_in_background(self):
+        with mock.patch.object(TmdbMovie, '_get',
+                               return_value=FakeResponse(fake_movie_data(577922))):
+            TmdbMovie.get_movie_info_by_id(577922)
+
+        # Providers stale, details still fresh.
+        self.now = 50
+        refreshed = threading.Event()
+        new_providers = {'results': {'CA': {'flatrate': [{'provider_name': "Netflix"}]}}}
+
+        def get(path, params=None):
+            self.assertEqual(path, "/movie/577922/watch/providers")
+            refreshed.set()
+            return FakeResponse(new_providers)
+
+        with mock.patch.object(TmdbMovie, '_get', side_effect=get):
+            result = TmdbMovie.get_movie_info_by_id(577922)
+            # Stale providers served right away...
+            self.assertEqual(result['movie'].providers['stream'], ["Crave"])
+            self.assertTrue(refreshed.wait(5))
+
+        # ...and fresh ones once refresh is done.
+        for _ in range(50):
+            if TmdbMovie.providers_cache.lookup(577922)[1] == 'fresh':
+                break
+            time.sleep(0.01)
+        result = TmdbMovie.get_movie_info_by_id(577922)
+        self.assertEqual(result['movie'].providers['stream'], ["Netflix"])
+
+
+class TmdbMirrorTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up TmdbMirrorTests...")
+        self.patches = [
+            mock.patch.object(TmdbMovie, 'details_cache', TTLCache('details', maxsize=10)),
+            mock.patch.object(TmdbMovie, 'providers_cache', TTLCache('providers', maxsize=10)),
+        ]
+        for patch in self.patches:
+            patch.start()
+        with app.app_context():
+            TmdbMirrorMovie.__table__.create(db.engine, checkfirst=True)
+            db.session.add(TmdbMirrorMovie(tmdb_id=577922, payload=fake_movie_data(577922)))
+            db.session.commit()
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down TmdbMirrorTests...")
+        for patch in self.patches:
+            patch.stop()
+        with app.app_context():
+            db.session.remove()
+            TmdbMirrorMovie.__table__.drop(db.engine)
+
+    def test_mirrored_movie_no_network(self):
+        with mock.patch.object(TmdbMovie, '_get') as get:
+            result = TmdbMovie.get_movie_info_by_id(577922)
+        get.assert_not_called()
+        self.assertTrue(result['success'])
+        self.assertEqual(result['movie'].title, "Tenet")
+        self.assertEqual(result['movie'].filmcredits['crew'][0]['name'], "Christopher Nolan")
+        self.assertEqual(result['movie'].providers['stream'], ["Crave"])
+
+    def test_mirrored_movie_cached(self):
+        TmdbMovie.get_movie_info_by_id(577922)
+        with mock.patch.object(TmdbMovie, '_read_mirror') as read_mirror:
+            TmdbMovie.get_movie_info_by_id(577922)
+        read_mirror.assert_not_called()
+
+    def test_mirrored_providers_expire(self):
+        with app.app_context():
+            mirrored = TmdbMirrorMovie.query.one()
+            mirrored.synced_at -= timedelta(seconds=PROVIDERS_TTL + 1)
+            db.session.commit()
+        # Details still read from the mirror, stale providers served at once.
+        result = TmdbMovie.get_movie_info_by_id(577922)
+        self.assertEqual(result['movie'].providers['stream'], ["Crave"])
+        self.assertEqual(TmdbMovie.providers_cache.lookup(577922)[1], 'stale')
+        # Then refreshed from TMDB, not the mirror.
+        fresh = FakeResponse({'results': {'CA': {'flatrate': [{'provider_name': "Netflix"}]}}})
+        with mock.patch.object(TmdbMovie, '_get', return_value=fresh) as get:
+            self.assertEqual(TmdbMovie._load_providers(577922)['stream'], ["Netflix"])
+        get.assert_called_once_with("/movie/577922/watch/providers")
+        self.assertEqual(TmdbMovie.providers_cache.lookup(577922)[1], 'fresh')
+
+    def test_unmirrored_movie_fetched(self):
+        with mock.patch.object(TmdbMovie, '_get',
+                               return_value=FakeResponse(fake_movie_data(27205, "Inception"))) as get:
+            result = TmdbMovie.get_movie_info_by_id(27205)
+        get.assert_called_once()
+        self.assertEqual(result['movie'].title, "Inception")
+
+    def test_mirror_missing(self):
+        with app.app_context():
+            TmdbMirrorMovie.__table__.drop(db.engine)
+        self.assertEqual(TmdbMovie._read_mirror(577922), (None, None))
+        # tearDown drops it again.
+        with app.app_context():
+            TmdbMirrorMovie.__table__.create(db.engine)
+
+
+class TmdbSearchCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up TmdbSearchCacheTests...")
+        self.patch = mock.patch.object(TmdbMovie, 'search_cache',
+                                       TTLCache('search', maxsize=2, ttl=100))
+        self.patch.start()
+        self.movies = FakeResponse({'total_results': 2, 'results': [
+            {'id': 1, 'title': "Mulholland Drive", 'original_title': "Mulholland Drive",
+             'overview': "", 'release_date': '2001-05-16'},
+            {'id': 2, 'title': "Mulholland Drive (pilot)", 'original_title': "",
+             'overview': "", 'release_date': ''}]})
+        self.persons = FakeResponse({'total_results': 2, 'results': [
+            {'id': 1, 'name': "David Lynch", 'known_for_department': "Directing"},
+            {'id': 2, 'name': "David Lynch", 'known_for_department': "Acting"}]})
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down TmdbSearchCacheTests...")
+        self.patch.stop()
+
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("  Mulholland \t DRIVE\n"), "mulholland drive")
+
+    def test_title_search_normalized(self):
+        with mock.patch.object(TmdbMovie, '_get', return_value=self.movies) as get:
+            first = TmdbMovie.get_movie_list_by_title("Mulholland Drive")
+            second = TmdbMovie.get_movie_list_by_title("  mulholland   drive ")
+
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(get.call_args.kwargs['params'], {'query': "mulholland drive"})
+        self.assertEqual([m.id for m in first['movies']], [1, 2])
+        self.assertEqual([m.id for m in second['movies']], [1, 2])
+
+    def test_title_search_no_results(self):
+        empty = FakeResponse({'total_results': 0, 'results': []})
+        with mock.patch.object(TmdbMovie, '_get', return_value=empty) as get:
+            TmdbMovie.get_movie_list_by_title("43543nkjerhtrehtkreture")
+            result = TmdbMovie.get_movie_list_by_title("43543nkjerhtrehtkreture")
+
+        self.assertEqual(get.call_count, 1)
+        self.assertFalse(result['success'])
+        self.assertEqual(result['status_code'], 200)
+        self.assertIsNone(result['movies'])
+
+    def test_title_search_error_not_cached(self):
+        with mock.patch.object(TmdbMovie, '_get',
+                               return_value=FakeResponse({}, status_code=429)) as get:
+            TmdbMovie.get_movie_list_by_title("Tenet")
+            result = TmdbMovie.get_movie_list_by_title("Tenet")
+
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(result['status_code'], 429)
+
+    def test_person_search_known_for_from_one_fetch(self):
+        with mock.patch.object(TmdbMovie, '_get', return_value=self.persons) as get:
+            everyone = TmdbMovie.get_person_list_by_name_known_for("David Lynch", "All")
+            directors = TmdbMovie.get_person_list_by_name_known_for("david lynch", "Directing")
+            writers = TmdbMovie.get_person_list_by_name_known_for("DAVID LYNCH", "Writing")
+
+        self.assertEqual(get.call_count, 1)
+        self.assertEqual(len(everyone['persons']), 2)
+        self.assertEqual([p.id for p in directors['persons']], [1])
+        self.assertTrue(writers['success'])
+        self.assertEqual(writers['persons'], [])
+
+    def test_search_cache_bounded(self):
+        with mock.patch.object(TmdbMovie, '_get', return_value=self.movies):
+            for title in ("a", "b", "c"):
+                TmdbMovie.get_movie_list_by_title(title)
+
+        self.assertEqual(len(TmdbMovie.search_cache), 2)
+        self.assertEqual(TmdbMovie.cache_stats()['search']['evictions'], 1)
+
+
+class TmdbFilmographyTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up TmdbFilmographyTests...")
+        self.person_data = {
+            'name': "Agnès Varda", 'profile_path': '/varda.jpg',
+            'movie_credits': {
+                'cast': [{'id': 1, 'title': "Faces Places", 'original_title': "Visages Villages",
+                          'release_date': '2017-06-28', 'character': "Herself"},
+                         {'id': 2, 'title': "The Beaches of Agnès", 'original_title': "",
+                          'release_date': '2008-12-17', 'character': "Herself"}],
+                'crew': [{'id': 3, 'title': "Cléo from 5 to 7", 'original_title': "",
+                          'release_date': '1962-04-11', 'job': "Director"},
+                         {'id': 3, 'title': "Cléo from 5 to 7", 'original_title': "",
+                          'release_date': '1962-04-11', 'job': "Screenplay"},
+                         {'id': 4, 'title': "Vagabond", 'original_title': "",
+                          'release_date': '', 'job': "Director"}]}}
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down TmdbFilmographyTests...")
+
+    def test_filmography_one_call(self):
+        with mock.patch.object(TmdbMovie, '_get',
+                               return_value=FakeResponse(self.person_data)) as get:
+            result = TmdbMovie.get_filmography_by_person_id(12)
+
+        get.assert_called_once_with("/person/12",
+                                    params={"append_to_response": "movie_credits"})
+        self.assertTrue(result['success'])
+        self.assertEqual(result['name'], "Agnès Varda")
+        self.assertEqual(result['image_url'], TmdbMovie.poster_base_url + 'w185/varda.jpg')
+        self.assertEqual([c['movie'].id for c in result['cast']], [1, 2])
+        self.assertEqual([(c['movie'].id, c['job']) for c in result['crew']],
+                         [(3, "Director, Screenplay"), (4, "Director")])
+
+    def test_crew_grouped_by_id(self):
+        credits = {'cast': [], 'crew': [
+            {'id': 1, 'title': "Solaris", 'release_date': '1972-03-20', 'job': "Director"},
+            {'id': 2, 'title': "Solaris", 'release_date': '2002-11-27', 'job': "Director"},
+            {'id': 3, 'title': "Stalker", 'release_date': '1979-05-25', 'job': "Director"},
+            {'id': 1, 'title': "Solaris", 'release_date': '1972-03-20', 'job': "Screenplay"},
+            {'id': 3, 'title': "Stalker", 'release_date': '1979-05-25', 'job': "Set Designer"}]}
+        cast, crew = TmdbMovie._extract_filmography(credits)
+
+        self.assertEqual(cast, [])
+        # Same titles, different films: kept apart. Non-adjacent jobs merged.
+        self.assertEqual([(c['movie'].id, c['job']) for c in crew],
+                         [(2, "Director"), (3, "Director, Set Designer"),
+                          (1, "Director, Screenplay")])
+
+    def test_same_release_date_keeps_tmdb_order(self):
+        credits = {'crew': [], 'cast': [
+            {'id': i, 'title': f"Short {i}", 'release_date': '1895-12-28', 'character': ""}
+            for i in range(5)]}
+        cast, crew = TmdbMovie._extract_filmography(credits)
+        self.assertEqual([c['movie'].id for c in cast], [0, 1, 2, 3, 4])
+
+    def test_bad_release_date(self):
+        credits = {'crew': [], 'cast': [
+            {'id': 1, 'title': "Tenet", 'release_date': '22/08/2020', 'character': ""}]}
+        self.assertRaises(ValueError, TmdbMovie._extract_filmography, credits)
+
+    def test_filmography_not_found(self):
+        with mock.patch.object(TmdbMovie, '_get',
+                               return_value=FakeResponse({}, status_code=404)):
+            result = TmdbMovie.get_filmography_by_person_id(12)
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['status_code'], 404)
+
+
+class CompactModelTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up CompactModelTests...")
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down CompactModelTests...")
+
+    def test_no_instance_dict(self):
+        for obj in (Movie(), TmdbMovie(), Person(1, "Agnès Varda", "Directing"),
+                    NytMovieReview(), CastCredit(), CrewCredit()):
+            self.assertFalse(hasattr(obj, '__dict__'), type(obj).__name__)
+
+    def test_credit_read_like_dict(self):
+        credit = CastCredit(id=1, name="John David Washington", character="Protagonist")
+        self.assertEqual(credit['name'], "John David Washington")
+        self.assertEqual(credit['character'], "Protagonist")
+        self.assertEqual(credit.get('job', 'none'), 'none')
+        self.assertRaises(KeyError, lambda: credit['job'])
+
+    def test_credits_extracted(self):
+        filmcredits = TmdbMovie._extract_credits(fake_movie_data(577922)['credits'])
+        cast, crew = filmcredits['cast'], filmcredits['crew']
+        self.assertEqual((cast[0].id, cast[0].name, cast[0].character),
+                         (1, "John David Washington", "Protagonist"))
+        self.assertEqual((crew[0].id, crew[0]['name'], crew[0]['job']),
+                         (2, "Christopher Nolan", "Director"))
+
+    def test_jobs_shared_across_movies(self):
+        # Separate JSON payloads hold separate, equal strings.
+        first = {'cast': [], 'crew': [{'id': 1, 'name': "A", 'job': "".join(["Dir", "ector"])}]}
+        second = {'cast': [], 'crew': [{'id': 2, 'name': "B", 'job': "".join(["Dir", "ector"])}]}
+        self.assertIs(TmdbMovie._extract_credits(first)['crew'][0].job,
+                      TmdbMovie._extract_credits(second)['crew'][0].job)
+
+    def test_missing_job(self):
+        crew = TmdbMovie._extract_credits({'cast': [], 'crew': [{'id': 1, 'name': "A"}]})['crew']
+        self.assertIsNone(crew[0].job)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,138 @@
+"""Unit-test script of nytarchive module"""
+
+import os
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+# Add this line to whatever test script you write
+from context import app, Movie, NytMovieReview
+from cinescout import nytarchive, reviews
+from cinescout.nytarchive import NytArchive
+from test_movies import FakeResponse
+from test_nytmatch import nyt_data
+
+REVIEWS = [
+    {'display_title': "The Seventh Seal", 'publication_date': "1958-10-14",
+     'opening_date': "1958-10-13", 'summary_short': "Death plays chess.", 'critics_pick': 1},
+    {'display_title': "Seventh Heaven", 'publication_date': "1958-03-01",
+     'opening_date': "1958-02-27", 'summary_short': "Romance.", 'critics_pick': 0},
+    {'display_title': "The Seventh Seal", 'publication_date': "1991-01-01",
+     'opening_date': None, 'summary_short': "Revival.", 'critics_pick': 0},
+    {'display_title': "M", 'publication_date': "1933-04-03",
+     'opening_date': "1933-04-02", 'summary_short': "Fritz Lang.", 'critics_pick': 1},
+    {'display_title': "", 'publication_date': "1950-01-01"},
+]
+
+
+class NytArchiveTests(unittest.TestCase):
+
+    def setUp(self):
+        print("Setting up NytArchiveTests...")
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, "archive.db")
+        self.lines = [json.dumps(review) for review in REVIEWS]
+        self.movie = Movie(title="The Seventh Seal", original_title="Det sjunde inseglet",
+                           release_year=1957, release_date="1957-02-16")
+
+    def tearDown(self):
+        print("Tearing down NytArchiveTests...")
+        self.tempdir.cleanup()
+
+    def archive(self, tokenizer='trigram'):
+        self.assertEqual(nytarchive.ingest(self.path, self.lines, tokenizer), (4, 1))
+        archive = NytArchive(self.path)
+        self.addCleanup(archive.close)
+        return archive
+
+    def test_no_archive(self):
+        self.assertFalse(NytArchive(self.path).available())
+
+    def test_search_by_release_year(self):
+        found = self.archive().search_by_release_year("The Seventh Seal", 1957, 5)
+        # Reviews sharing a word, within date range, ordered by date.
+        self.assertEqual([(result['display_title'], result['publication_date'])
+                          for result in found['results']],
+                         [("Seventh Heaven", "1958-03-01"), ("The Seventh Seal", "1958-10-14")])
+        self.assertEqual(found['num_results'], 2)
+        self.assertEqual(found['results'][1]['critics_pick'], 1)
+
+    def test_search_by_release_date(self):
+        found = self.archive().search_by_release_date("seventh seal", "1958-06-01", 5)
+        self.assertEqual([result['display_title'] for result in found['results']],
+                         ["The Seventh Seal"])
+
+    def test_search_inside_words(self):
+        # Trigrams match parts of words, e.g. plural or compound titles.
+        found = self.archive().search_by_release_year("Seal", 1957, 5)
+        self.assertEqual(found['num_results'], 1)
+
+    def test_short_title(self):
+        found = self.archive().search_by_release_year("M", 1931, 5)
+        self.assertEqual([result['display_title'] for result in found['results']], ["M"])
+
+    def test_fallback_tokenizer(self):
+        archive = self.archive(tokenizer='unicode61')
+        found = archive.search_by_release_year("The Seventh Seal", 1957, 5)
+        self.assertEqual(found['num_results'], 2)
+        self.assertEqual(archive.search_by_release_year("M", 1931, 5)['num_results'], 1)
+
+    def test_ingest_updates(self):
+        self.archive()
+        update = dict(REVIEWS[0], summary_short="Knight plays chess.")
+        self.assertEqual(nytarchive.ingest(self.path, [json.dumps(update)]), (1, 0))
+        found = NytArchive(self.path).search_by_release_year("The Seventh Seal", 1957, 5)
+        self.assertEqual(found['num_results'], 2)
+        self.assertEqual(found['results'][1]['summary_short'], "Knight plays chess.")
+
+    def test_search_says_where_results_came_from(self):
+        nyt_review = {'display_title': "The Seventh Seal", 'publication_date': "1958-10-14",
+                      'opening_date': None, 'critics_pick': 1, 'summary_short': "Chess."}
+        with mock.patch.object(reviews, 'archive', self.archive()), \
+             mock.patch.object(NytMovieReview, '_get',
+                               return_value=FakeResponse(nyt_data(nyt_review))):
+            status_code, found, from_archive = NytMovieReview._search(
+                "The Seventh Seal", self.movie, True)
+            self.assertEqual((status_code, found['num_results'], from_archive), (200, 2, True))
+            status_code, found, from_archive = NytMovieReview._search(
+                "The Seventh Seal", self.movie, True, use_archive=False)
+            self.assertEqual((status_code, found['num_results'], from_archive), (200, 1, False))
+
+    def test_review_from_archive(self):
+        with mock.patch.object(reviews, 'archive', self.archive()), \
+             mock.patch.object(NytMovieReview, '_get') as get:
+            result = NytMovieReview.get_movie_review(self.movie)
+        get.assert_not_called()
+        self.assertTrue(result['success'])
+        self.assertEqual(result['review'].text, "Death plays chess.")
+
+    def test_api_on_archive_miss(self):
+        movie = Movie(title="Persona", original_title="Persona",
+                      release_year=1966, release_date="1966-10-18")
+        nyt_review = {'display_title': "Persona", 'publication_date': "1967-03-07",
+                      'opening_date': None, 'critics_pick': 0, 'summary_short': "Bergman."}
+        with mock.patch.object(reviews, 'archive', self.archive()), \
+             mock.patch.object(NytMovieReview, '_get',
+                               return_value=FakeResponse(nyt_data(nyt_review))) as get:
+            result = NytMovieReview.get_movie_review(movie)
+        get.assert_called_once()
+        self.assertTrue(result['success'])
+
+    def test_api_when_no_archive_candidate_matches(self):
+        movie = Movie(title="Seal", original_title="Seal",
+                      release_year=1957, release_date="1957-05-01")
+        nyt_review = {'display_title': "Seal", 'publication_date': "1957-05-02",
+                      'opening_date': None, 'critics_pick': 0, 'summary_short': "Drama."}
+        with mock.patch.object(reviews, 'archive', self.archive()), \
+             mock.patch.object(NytMovieReview, '_get',
+                               return_value=FakeResponse(nyt_data(nyt_review))) as get:
+            result = NytMovieReview.get_movie_review(movie)
+        # Archive's only candidate, 'The Seventh Seal', is another film.
+        get.assert_called_once()
+        self.assertTrue(result['success'])
+        self.assertEqual(result['review'].text, "Drama.")
+
+
+if __name__ == "__main__":
+    unittest.main()
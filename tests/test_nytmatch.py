@@ -0,0 +1,134 @@
+"""Unit-test script of nytmatch module"""
+
+import unittest
+from unittest import mock
+
+# Add this line to whatever test script you write
+from context import app, Movie, NytMovieReview
+from cinescout import nytmatch
+from test_movies import FakeResponse
+
+
+def nyt_result(display_title, publication_date, opening_date=None,
+               critics_pick=0, summary_short="A review."):
+    """Returns element of NYT api 'results' list."""
+    return {'display_title': display_title, 'publication_date': publication_date,
+            'opening_date': opening_date, 'critics_pick': critics_pick,
+            'summary_short': summary_short}
+
+
+def nyt_data(*results):
+    """Returns NYT api search response holding results."""
+    return {'status': 'OK', 'num_results': len(results), 'results': list(results)}
+
+
+class NytMatchTests(unittest.TestCase):
+    """Tests decisions of the NYT review matching engine."""
+
+    def setUp(self):
+        print("Setting up NytMatchTests...")
+        self.movie = Movie(title="The Seventh Seal", original_title="Det sjunde inseglet",
+                           release_year=1957, release_date="1957-02-16")
+
+    def tearDown(self):
+        print("Tearing down NytMatchTests...")
+
+    def test_no_results(self):
+        decision = nytmatch.match_review(self.movie, nyt_data())
+        self.assertFalse(decision['success'])
+        self.assertEqual(decision['message'], "No review found for this movie.")
+        self.assertTrue(nytmatch.should_try_original_title(self.movie, nyt_data()))
+
+    def test_single_result_same_year(self):
+        result = nyt_result("The Seventh Seal", "1957-10-14")
+        decision = nytmatch.match_review(self.movie, nyt_data(result))
+        self.assertTrue(decision['success'])
+        self.assertIs(decision['result'], result)
+        self.assertTrue(decision['bullseye'])
+
+    def test_single_result_later_year(self):
+        decision = nytmatch.match_review(self.movie, nyt_data(nyt_result("The Seventh Seal", "1958-10-14")))
+        self.assertTrue(decision['success'])
+        self.assertFalse(decision['bullseye'])
+
+    def test_single_result_rejected(self):
+        cases = [(nyt_result("The Seventh Seal", None), "no publication date"),
+                 (nyt_result("The Seventh Seal", "1950-01-01"), "before a film's release"),
+                 (nyt_result("The Seventh Seal", "1970-01-01"), "too many years"),
+                 (nyt_result("Wild Strawberries", "1957-10-14"), "Not a close enough match"),
+                 (nyt_result("", "1957-10-14"), "Not a close enough match")]
+        for result, message in cases:
+            decision = nytmatch.match_review(self.movie, nyt_data(result))
+            self.assertFalse(decision['success'])
+            self.assertIsNone(decision['result'])
+            self.assertIn(message, decision['message'])
+
+    def test_original_title_used(self):
+        result = nyt_result("Det Sjunde Inseglet", "1957-10-14")
+        self.assertFalse(nytmatch.match_review(self.movie, nyt_data(result))['success'])
+        decision = nytmatch.match_review(self.movie, nyt_data(result), original_title_used=True)
+        self.assertTrue(decision['success'])
+
+    def test_multiple_results_exact_match(self):
+        exact = nyt_result("the seventh seal ", "1957-10-14")
+        decision = nytmatch.match_review(self.movie, nyt_data(
+            nyt_result("The Seventh Seal", "1958-01-01"), exact))
+        self.assertIs(decision['result'], exact)
+        self.assertTrue(decision['bullseye'])
+
+    def test_multiple_results_filtered(self):
+        later = nyt_result("Seventh Seal", "1958-03-01")
+        decision = nytmatch.match_review(self.movie, nyt_data(
+            nyt_result("The Seventh Seal", "1990-01-01"),
+            nyt_result("Wild Strawberries", "1958-01-01"),
+            later))
+        self.assertIs(decision['result'], later)
+        self.assertFalse(decision['bullseye'])
+
+    def test_multiple_results_highest_score(self):
+        closest = nyt_result("The Seventh Seal", "1959-01-01")
+        decision = nytmatch.match_review(self.movie, nyt_data(
+            nyt_result("The Seventh Seal II", "1958-01-01"), closest))
+        self.assertIs(decision['result'], closest)
+
+    def test_multiple_results_rejected(self):
+        decision = nytmatch.match_review(self.movie, nyt_data(
+            nyt_result("The Seventh Seal", "1980-01-01"),
+            nyt_result("The Seventh Seal", "1990-01-01")))
+        self.assertIn("grace period", decision['message'])
+
+        decision = nytmatch.match_review(self.movie, nyt_data(
+            nyt_result("Wild Strawberries", "1958-01-01"),
+            nyt_result("Persona", "1958-01-01")))
+        self.assertIn("title filtering", decision['message'])
+
+        decision = nytmatch.match_review(self.movie, nyt_data(
+            nyt_result("Seventh Seal", "1958-01-01"),
+            nyt_result("Seventh Seal", "1959-01-01")))
+        self.assertIn("same Levenshtein score", decision['message'])
+
+    def test_review_year_falls_back_on_opening_date(self):
+        self.assertEqual(nytmatch.review_year(nyt_result("M", None, "1931-05-11")), 1931)
+        self.assertIsNone(nytmatch.review_year(nyt_result("M", None)))
+        # Undated results are left out rather than raising.
+        decision = nytmatch.match_review(self.movie, nyt_data(
+            nyt_result("The Seventh Seal", None), nyt_result("Seventh Seal", None)))
+        self.assertFalse(decision['success'])
+
+    def test_get_movie_review_uses_engine(self):
+        responses = [FakeResponse(nyt_data()),
+                     FakeResponse(nyt_data(nyt_result("Det sjunde inseglet", "1958-06-23",
+                                                      critics_pick=1)))]
+        with mock.patch.object(NytMovieReview, '_get', side_effect=responses) as get:
+            result = NytMovieReview.get_movie_review(self.movie)
+
+        self.assertEqual(get.call_count, 2)
+        self.assertEqual(get.call_args[1]['params']['query'], "Det sjunde inseglet")
+        self.assertTrue(result['success'])
+        self.assertFalse(result['bullseye'])
+        self.assertEqual(result['review'].publication_date, "1958-06-23")
+        self.assertEqual(result['review'].critics_pick, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+"""Unit-test script of nytoverrides module"""
+
+import os
+
+# Use in-memory database for testing.
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import json
+import time
+import tempfile
+import unittest
+from unittest import mock
+
+# Add this line to whatever test script you write
+from context import app, Movie, NytMovieReview
+from cinescout import reviews, reviewstore, nytoverrides
+from cinescout.api import nytreview
+from cinescout.nytoverrides import ReviewOverrides, parse_override, REVIEW, NO_REVIEW, QUERY
+from test_movies import FakeResponse
+from test_nytmatch import nyt_data
+
+PINNED = {'display_title': "Exotica", 'publication_date': "1995-03-03",
+          'summary_short': "Tax inspector obsessed with stripper.", 'critics_pick': 1}
+
+ENTRIES = [
+    {'tmdb_id': 9314, 'title': "Nineteen Eighty-Four", 'year': 1984,
+     'query': {'query': "1984", 'opening-date': "1985-01-01:1985-12-31"}},
+    {'title': "Black Rain", 'year': 1989, 'original_title': "Kuroi ame", 'review': None},
+    {'title': "Black Rain", 'year': 1989,
+     'query': {'query': "Black Rain", 'opening-date': "1989-01-01:1989-12-31"}},
+    {'title': "Exotica", 'year': 1994, 'review': PINNED},
+]
+
+
+class NytOverridesTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up NytOverridesTests...")
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, "overrides.json")
+        self.write(ENTRIES)
+        self.overrides = ReviewOverrides(self.path)
+        patcher = mock.patch.object(reviews, 'overrides', self.overrides)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(reviewstore, 'overrides', self.overrides)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down NytOverridesTests...")
+        self.tempdir.cleanup()
+
+    def write(self, entries):
+        with open(self.path, 'w') as overrides_file:
+            json.dump(entries, overrides_file)
+
+    def test_lookup_by_tmdb_id(self):
+        movie = Movie(id=9314, title="1984", release_year=1984)
+        self.assertEqual(self.overrides.lookup(movie)['kind'], QUERY)
+        self.assertEqual(self.overrides.lookup(movie)['query']['query'], "1984")
+
+    def test_lookup_by_title(self):
+        movie = Movie(title="Nineteen Eighty-four", release_year=1984)
+        self.assertEqual(self.overrides.lookup(movie)['tmdb_id'], 9314)
+        self.assertIsNone(self.overrides.lookup(Movie(title="Nineteen Eighty-Four",
+                                                      release_year=1956)))
+
+    def test_lookup_by_original_title(self):
+        imamura = Movie(title="Black Rain", original_title="Kuroi ame", release_year=1989)
+        scott = Movie(title="Black Rain", original_title="Black Rain", release_year=1989)
+        self.assertEqual(self.overrides.lookup(imamura)['kind'], NO_REVIEW)
+        self.assertEqual(self.overrides.lookup(scott)['kind'], QUERY)
+
+    def test_bad_entries(self):
+        with self.assertRaises(ValueError):
+            parse_override({'title': "Exotica", 'year': 1994})
+        with self.assertRaises(ValueError):
+            parse_override({'review': None})
+        self.assertEqual(parse_override(ENTRIES[3])['kind'], REVIEW)
+
+    def test_reload_on_change(self):
+        movie = Movie(title="Exotica", release_year=1994)
+        self.assertEqual(self.overrides.lookup(movie)['kind'], REVIEW)
+        self.write([{'title': "Exotica", 'year': 1994, 'review': None}])
+        os.utime(self.path, (time.time() + 5, time.time() + 5))
+        self.assertEqual(self.overrides.lookup(movie)['kind'], NO_REVIEW)
+
+    def test_bad_file_keeps_overrides(self):
+        movie = Movie(title="Exotica", release_year=1994)
+        self.assertIsNotNone(self.overrides.lookup(movie))
+        self.write([{'title': "Exotica"}])
+        os.utime(self.path, (time.time() + 5, time.time() + 5))
+        self.assertEqual(self.overrides.lookup(movie)['kind'], REVIEW)
+
+    def test_pinned_review_no_call(self):
+        movie = Movie(title="Exotica", original_title="Exotica", release_year=1994,
+                      release_date="1994-09-24")
+        with mock.patch.object(NytMovieReview, '_get') as get:
+            result = NytMovieReview.get_movie_review(movie)
+        get.assert_not_called()
+        self.assertTrue(result['success'])
+        # Not verified by matching: warned of, as before overrides.
+        self.assertIsNone(result['bullseye'])
+        self.assertEqual(result['review'].text, "Tax inspector obsessed with stripper.")
+
+    def test_no_review_no_call(self):
+        movie = Movie(title="Black Rain", original_title="Kuroi ame", release_year=1989,
+                      release_date="1989-05-13")
+        with mock.patch.object(NytMovieReview, '_get') as get:
+            result = NytMovieReview.get_movie_review(movie)
+        get.assert_not_called()
+        self.assertFalse(result['success'])
+        self.assertEqual(result['status_code'], 200)
+
+    def test_query_one_call(self):
+        movie = Movie(id=9314, title="1984", original_title="1984", release_year=1984,
+                      release_date="1984-10-10")
+        nyt_review = dict(PINNED, display_title="1984", publication_date="1985-04-12")
+        with mock.patch.object(NytMovieReview, '_get',
+                               return_value=FakeResponse(nyt_data(nyt_review))) as get:
+            result = NytMovieReview.get_movie_review(movie)
+        get.assert_called_once_with(params=ENTRIES[0]['query'])
+        self.assertTrue(result['success'])
+        self.assertIsNone(result['bullseye'])
+        self.assertEqual(result['review'].publication_date, "1985-04-12")
+
+    def test_stored_review_no_read(self):
+        movie = Movie(title="Exotica", original_title="Exotica", release_year=1994)
+        with app.app_context(), \
+             mock.patch.object(reviewstore, 'find_result') as find:
+            response = reviewstore.stored_review(movie)
+        find.assert_not_called()
+        self.assertTrue(response['review']['found'])
+        self.assertTrue(response['review']['critics_pick'])
+        self.assertEqual(response['review']['publication_date'], "1995-03-03")
+        self.assertIsNone(response['review']['bullseye'])
+        payload, status_code = nytreview._review_payload(response)
+        self.assertTrue(payload['review_warning'])
+
+    def test_default_file(self):
+        overrides = ReviewOverrides(nytoverrides.NYT_OVERRIDES_PATH)
+        self.assertIsNotNone(overrides.lookup(Movie(id=9314, title="1984", release_year=1984)))
+
+
+if __name__ == "__main__":
+    unittest.main()
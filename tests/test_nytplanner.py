@@ -0,0 +1,132 @@
+"""Unit-test script of nytplanner module"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+# Add this line to whatever test script you write
+from context import app, Movie, NytMovieReview
+from cinescout import nytplanner
+from cinescout.nytplanner import (QueryPlanner, TITLE_BY_YEAR, ORIGINAL_BY_YEAR,
+                                  TITLE_BY_DATE, ORIGINAL_BY_DATE)
+from test_nytmatch import nyt_result, nyt_data
+
+
+class NytPlannerTests(unittest.TestCase):
+
+    def setUp(self):
+        print("Setting up NytPlannerTests...")
+        self.planner = QueryPlanner(path=None)
+        self.foreign = Movie(title="The Seventh Seal", original_title="Det sjunde inseglet",
+                             release_year=1957, release_date="1957-02-16")
+        self.local = Movie(title="Exotica", original_title="Exotica",
+                           release_year=1994, release_date="1994-09-24")
+
+    def tearDown(self):
+        print("Tearing down NytPlannerTests...")
+
+    def record(self, movie, strategy, found, times):
+        for _ in range(times):
+            self.planner.record(movie, strategy, found, 1.0)
+
+    def test_film_class(self):
+        self.assertEqual(nytplanner.film_class(self.foreign), 'foreign,early')
+        self.assertEqual(nytplanner.film_class(self.local), 'other')
+        subtitled = Movie(title="Kill Bill: Vol. 1", original_title="kill bill: vol. 1",
+                          release_year=2003)
+        self.assertEqual(nytplanner.film_class(subtitled), 'subtitled')
+
+    def test_usual_order(self):
+        self.assertEqual(self.planner.plan(self.foreign),
+                         [TITLE_BY_YEAR, ORIGINAL_BY_YEAR, TITLE_BY_DATE, ORIGINAL_BY_DATE])
+        # No original title to search for.
+        self.assertEqual(self.planner.plan(self.local), [TITLE_BY_YEAR, TITLE_BY_DATE])
+
+    def test_learns_order_per_class(self):
+        self.record(self.foreign, TITLE_BY_YEAR, False, 10)
+        self.record(self.foreign, ORIGINAL_BY_YEAR, True, 10)
+        self.assertEqual(self.planner.plan(self.foreign)[0], ORIGINAL_BY_YEAR)
+
+        # Classes without stats of their own follow those of all films...
+        early = Movie(title="Pather Panchali", original_title="Pather Panchali",
+                      release_year=1955, release_date="1955-08-26")
+        self.assertEqual(self.planner.plan(early), [TITLE_BY_DATE, TITLE_BY_YEAR])
+        # ...until they have some.
+        self.record(early, TITLE_BY_YEAR, True, 5)
+        self.assertEqual(self.planner.plan(early), [TITLE_BY_YEAR, TITLE_BY_DATE])
+
+    def test_skips_strategy_that_never_works(self):
+        self.record(self.local, TITLE_BY_DATE, False, nytplanner.MIN_TRIES)
+        plans = [self.planner.plan(self.local) for _ in range(nytplanner.EXPLORE_EVERY)]
+        self.assertEqual(plans[0], [TITLE_BY_YEAR])
+        # Tried again now and then.
+        self.assertEqual(plans[-1], [TITLE_BY_YEAR, TITLE_BY_DATE])
+        self.assertEqual(self.planner.stats()['skipped'], nytplanner.EXPLORE_EVERY - 1)
+
+    def test_never_skips_all(self):
+        self.record(self.local, TITLE_BY_YEAR, False, nytplanner.MIN_TRIES)
+        self.record(self.local, TITLE_BY_DATE, False, nytplanner.MIN_TRIES)
+        self.assertEqual(len(self.planner.plan(self.local)), 2)
+
+    def test_stats(self):
+        self.planner.plan(self.local)
+        self.planner.record(self.local, TITLE_BY_YEAR, False, 3.0)
+        self.planner.record(self.local, TITLE_BY_DATE, True, 1.0)
+        stats = self.planner.stats()
+        self.assertEqual(stats['searches_per_lookup'], 2)
+        self.assertEqual(stats['strategies'][TITLE_BY_DATE]['success_rate'], 1)
+        self.assertEqual(stats['classes']['other'][TITLE_BY_YEAR]['mean_latency'], 3.0)
+        self.assertIsNone(stats['strategies'][ORIGINAL_BY_DATE]['success_rate'])
+
+    def test_save_and_load(self):
+        self.record(self.foreign, ORIGINAL_BY_YEAR, True, 10)
+        with tempfile.TemporaryDirectory() as tempdir:
+            self.planner.path = os.path.join(tempdir, "stats.json")
+            self.planner.save()
+            loaded = QueryPlanner(self.planner.path)
+        self.assertEqual(loaded.stats()['classes'], self.planner.stats()['classes'])
+        self.assertEqual(loaded.plan(self.foreign)[0], ORIGINAL_BY_YEAR)
+
+    def find(self, movie, *responses):
+        """Finds movie's review with searches answering responses in turn;
+        returns result and mock of NytMovieReview._search."""
+        with mock.patch.object(NytMovieReview, 'planner', self.planner), \
+             mock.patch.object(NytMovieReview, '_search',
+                               side_effect=[(200, data, False) for data in responses]) as search:
+            return NytMovieReview.find_movie_review(movie), search
+
+    def test_find_falls_through_plan(self):
+        review = nyt_result("The Seventh Seal", "1958-10-14", summary_short="Death plays chess.")
+        result, search = self.find(self.foreign, nyt_data(), nyt_data(), nyt_data(review))
+        self.assertTrue(result['success'])
+        self.assertEqual([call.args[0] for call in search.call_args_list],
+                         ["The Seventh Seal", "Det sjunde inseglet", "The Seventh Seal"])
+        self.assertEqual([call.args[2] for call in search.call_args_list], [True, True, False])
+        stats = self.planner.stats()['classes']['foreign,early']
+        self.assertEqual(stats[TITLE_BY_DATE]['found'], 1)
+        self.assertEqual(stats[ORIGINAL_BY_YEAR]['tries'], 1)
+
+    def test_find_skips_original_title_when_title_found_reviews(self):
+        other = nyt_result("The Seventh Continent", "1958-01-01")
+        result, search = self.find(self.foreign, nyt_data(other), nyt_data(other))
+        self.assertFalse(result['success'])
+        self.assertEqual(result['status_code'], 200)
+        self.assertEqual(search.call_count, 2)
+        self.assertEqual([call.args[0] for call in search.call_args_list],
+                         ["The Seventh Seal", "The Seventh Seal"])
+
+    def test_find_stops_on_error(self):
+        with mock.patch.object(NytMovieReview, 'planner', self.planner), \
+             mock.patch.object(NytMovieReview, '_search',
+                               return_value=(429, {'message': "Too many requests."},
+                                             False)) as search:
+            result = NytMovieReview.find_movie_review(self.local)
+        search.assert_called_once()
+        self.assertEqual(result['status_code'], 429)
+        # Failed searches say nothing of strategies.
+        self.assertEqual(self.planner.stats()['searches'], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
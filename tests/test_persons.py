@@ -0,0 +1,125 @@
+"""Unit-test script of Person and FilmPerson models, and of the catalog's
+director filters"""
+
+import os
+
+# Use in-memory database for testing.
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import unittest
+
+from sqlalchemy.exc import IntegrityError
+
+# Add this line to whatever test script you write
+from context import app, db, Film, CriterionFilm
+from cinescout import catalog, limiter
+from cinescout.models import Person, FilmPerson, normalize_name, split_directors
+
+
+class PersonsTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up PersonsTests...")
+        self.appctx = app.app_context()
+        self.appctx.push()
+        db.create_all()
+        self.client = app.test_client()
+        limiter.enabled = False
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down PersonsTests...")
+        limiter.enabled = True
+        db.session.remove()
+        db.drop_all()
+        self.appctx.pop()
+
+    def add_film(self, title, year, director):
+        film = Film(title=title, year=year, director=director)
+        db.session.add(film)
+        db.session.commit()
+        db.session.add(CriterionFilm(film_id=film.id))
+        db.session.commit()
+        return film
+
+    def person(self, name):
+        return Person.query.filter(db.func.lower(Person.name) == name.lower()).one()
+
+    def test_split_directors(self):
+        self.assertEqual(split_directors("Fred Newmeyer & Sam Taylor "),
+                         ["Fred Newmeyer", "Sam Taylor"])
+        self.assertEqual(split_directors("Sam Taylor & Sam Taylor"), ["Sam Taylor"])
+        self.assertEqual(split_directors("Sam Taylor & sam  TAYLOR"), ["Sam Taylor"])
+        self.assertEqual(split_directors(None), [])
+
+    def test_directors_credited(self):
+        film = self.add_film("Safety Last!", 1923, "Fred Newmeyer & Sam Taylor")
+        self.assertEqual([person.name for person in film.directors],
+                         ["Fred Newmeyer", "Sam Taylor"])
+        # Persons are shared between films.
+        self.add_film("The Freshman", 1925, "Fred Newmeyer & Sam Taylor")
+        self.assertEqual(Person.query.count(), 2)
+        self.assertEqual(sorted(film.title for film in self.person("sam taylor").films),
+                         ["Safety Last!", "The Freshman"])
+
+    def test_names_normalized(self):
+        self.assertEqual(normalize_name(" Jean-Luc  Godard "), "jean-luc godard")
+        self.add_film("Breathless", 1960, "Jean-Luc Godard")
+        self.add_film("Weekend", 1967, "jean-luc godard")
+        self.add_film("Contempt", 1963, " Jean-Luc   Godard")
+        godard, = Person.query.all()
+        # Named as first given.
+        self.assertEqual(godard.name, "Jean-Luc Godard")
+        self.assertEqual(len(godard.films), 3)
+        with self.assertRaises(IntegrityError):
+            db.session.add(Person(name="JEAN-LUC GODARD"))
+            db.session.commit()
+        db.session.rollback()
+
+    def test_credits_follow_director_text(self):
+        film = self.add_film("Safety Last!", 1923, "Fred Newmeyer & Sam Taylor")
+        film.director = "Sam Taylor"
+        db.session.commit()
+        self.assertEqual([person.name for person in film.directors], ["Sam Taylor"])
+        self.assertEqual(FilmPerson.query.count(), 1)
+
+    def test_credits_set_explicitly(self):
+        person = Person(name="Harold Lloyd", tmdb_id=88953)
+        film = Film(title="Safety Last!", year=1923, director="Fred Newmeyer & Sam Taylor")
+        film.credit_directors([person])
+        db.session.add(film)
+        db.session.commit()
+        self.assertEqual(film.directors, [person])
+
+    def test_credits_deleted_with_film(self):
+        film = self.add_film("Safety Last!", 1923, "Fred Newmeyer")
+        db.session.delete(film)
+        db.session.commit()
+        self.assertEqual(FilmPerson.query.count(), 0)
+        self.assertEqual(Person.query.count(), 1)
+
+    def test_page_by_director(self):
+        self.add_film("Safety Last!", 1923, "Fred Newmeyer & Sam Taylor")
+        self.add_film("Tokyo Drifter", 1966, "Seijun Suzuki")
+        taylor = self.person("Sam Taylor")
+        page = catalog.catalog_page(director_id=taylor.id)
+        self.assertEqual([film['title'] for film in page['results']], ["Safety Last!"])
+        self.assertEqual(page['results'][0]['director_ids'][1], taylor.id)
+        self.assertEqual(page['records_filtered'], 1)
+        response = self.client.get('/api/criterion-films',
+                                   query_string={'draw': 1, 'director_id': taylor.id})
+        self.assertEqual(response.get_json()['recordsFiltered'], 1)
+        response = self.client.get('/api/criterion-films',
+                                   query_string={'draw': 1, 'director_id': "taylor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_any_director(self):
+        self.add_film("Safety Last!", 1923, "Fred Newmeyer & Sam Taylor")
+        self.add_film("Tokyo Drifter", 1966, "Seijun Suzuki")
+        page = catalog.catalog_page(search="sam")
+        self.assertEqual([film['title'] for film in page['results']], ["Safety Last!"])
+
+
+if __name__ == "__main__":
+    unittest.main()
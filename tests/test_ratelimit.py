@@ -0,0 +1,382 @@
+"""Unit-test script of ratelimit module"""
+
+import time
+import threading
+import unittest
+from unittest import mock
+
+# Add this line to whatever test script you write
+from context import app, Movie, TmdbMovie, NytMovieReview
+from cinescout import reviews
+from cinescout.ratelimit import (TokenBucket, Pacer, PriorityScheduler, RateLimited,
+                                 retry_after_seconds,
+                                 priority, current_priority, INTERACTIVE, PREFETCH, BATCH)
+
+
+class FakeClock:
+    """Timer whose time only moves when slept on."""
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeResponse:
+    """Stand-in for requests.Response."""
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class TokenBucketTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up TokenBucketTests...")
+        self.clock = FakeClock()
+        self.bucket = TokenBucket('test', rate=10, capacity=2,
+                                  timer=self.clock, sleep=self.clock.sleep)
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down TokenBucketTests...")
+
+    def test_burst_not_queued(self):
+        self.assertTrue(self.bucket.acquire())
+        self.assertTrue(self.bucket.acquire())
+        self.assertEqual(self.clock.now, 0)
+        self.assertEqual(self.bucket.stats()['queued'], 0)
+
+    def test_queued_after_burst(self):
+        for _ in range(4):
+            self.bucket.acquire()
+        # Third and fourth calls wait for tokens coming back at 10/s.
+        self.assertAlmostEqual(self.clock.now, 0.2)
+        stats = self.bucket.stats()
+        self.assertEqual(stats['queued'], 2)
+        self.assertAlmostEqual(stats['max_wait'], 0.1)
+
+    def test_max_wait(self):
+        self.bucket.acquire()
+        self.bucket.acquire()
+        self.assertFalse(self.bucket.acquire(max_wait=0.05))
+        self.assertEqual(self.bucket.stats()['rejected'], 1)
+        self.assertTrue(self.bucket.acquire(max_wait=0.1))
+
+    def test_reserve_does_not_sleep(self):
+        self.assertEqual(self.bucket.reserve(), 0)
+        self.assertEqual(self.bucket.reserve(), 0)
+        self.assertAlmostEqual(self.bucket.reserve(), 0.1)
+        # Token of third call is taken: a fourth waits behind it.
+        self.assertAlmostEqual(self.bucket.reserve(), 0.2)
+        self.assertIsNone(self.bucket.reserve(max_wait=0.25))
+        self.assertEqual(self.clock.now, 0)
+        self.assertEqual(self.bucket.stats()['rejected'], 1)
+
+    def test_back_off(self):
+        self.bucket.back_off(3)
+        self.assertEqual(self.bucket.rate, 5)
+        self.assertFalse(self.bucket.acquire(max_wait=2))
+        self.assertTrue(self.bucket.acquire())
+        # Back-off, then one token at the halved rate.
+        self.assertAlmostEqual(self.clock.now, 3.2)
+
+    def test_rate_recovers(self):
+        self.bucket.back_off(0)
+        for _ in range(10):
+            self.bucket.record_success()
+        self.assertEqual(self.bucket.rate, 10)
+
+    def test_calls_spaced_across_threads(self):
+        bucket = TokenBucket('test', rate=50, capacity=1)
+        threads = [threading.Thread(target=bucket.acquire) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = bucket.stats()
+        self.assertEqual(stats['calls'], 6)
+        self.assertEqual(stats['queued'], 5)
+        # Last call queued behind the other five.
+        self.assertAlmostEqual(stats['max_wait'], 0.1, places=2)
+
+    def test_bad_rate(self):
+        self.assertRaises(ValueError, TokenBucket, 'test', 0, 1)
+
+    def test_retry_after(self):
+        self.assertEqual(retry_after_seconds(FakeResponse(429, {'Retry-After': '3'}), 1), 3)
+        self.assertEqual(retry_after_seconds(FakeResponse(429), 1), 1)
+        self.assertEqual(retry_after_seconds(FakeResponse(429, {'Retry-After': 'soon'}), 1), 1)
+        # Dates in the past mean no wait.
+        self.assertEqual(retry_after_seconds(
+            FakeResponse(429, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'}), 1), 0)
+
+
+class PacerTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up PacerTests...")
+        self.clock = FakeClock()
+        self.pacer = Pacer('test', calls=3, period=60, timer=self.clock,
+                           sleep=self.clock.sleep)
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down PacerTests...")
+
+    def test_no_wait_within_budget(self):
+        for _ in range(3):
+            self.assertTrue(self.pacer.wait_turn())
+        self.assertEqual(self.clock.now, 0)
+        self.assertEqual(self.pacer.stats()['queued'], 0)
+
+    def test_wait_once_budget_spent(self):
+        for _ in range(3):
+            self.pacer.wait_turn()
+            self.clock.now += 5
+        # Fourth call waits until the first slot leaves the window.
+        self.pacer.wait_turn()
+        self.assertEqual(self.clock.now, 60)
+        stats = self.pacer.stats()
+        self.assertEqual(stats['queued'], 1)
+        self.assertEqual(stats['max_wait'], 45)
+
+    def test_slots_reserved_in_order(self):
+        waits = [self.pacer.reserve() for _ in range(6)]
+        self.assertEqual(waits, [0, 0, 0, 60, 60, 60])
+        self.assertEqual(self.pacer.reserve(), 120)
+
+    def test_budget_back_after_quiet_spell(self):
+        for _ in range(3):
+            self.pacer.wait_turn()
+        self.clock.now = 61
+        self.assertEqual(self.pacer.reserve(), 0)
+
+    def test_max_wait(self):
+        for _ in range(3):
+            self.pacer.wait_turn()
+        self.assertFalse(self.pacer.wait_turn(max_wait=10))
+        self.assertEqual(self.clock.now, 0)
+        self.assertEqual(self.pacer.stats()['rejected'], 1)
+
+    def test_bad_budget(self):
+        self.assertRaises(ValueError, Pacer, 'test', 0, 60)
+
+    def test_nyt_call_failed_when_queue_too_long(self):
+        pacer = Pacer('nyt', calls=1, period=3600, timer=self.clock, sleep=self.clock.sleep)
+        pacer.wait_turn()
+        scheduler = PriorityScheduler(pacer, calls_per_day=100, timer=self.clock)
+        with mock.patch.object(NytMovieReview, 'scheduler', scheduler), \
+             mock.patch('cinescout.sessions.get_session') as get_session:
+            with self.assertRaises(RateLimited) as raised:
+                NytMovieReview._get({'query': "Exotica"})
+        get_session.assert_not_called()
+        self.assertEqual(raised.exception.api, 'nyt')
+        # Refused locally: NYT's limits are not in question.
+        self.assertEqual(scheduler.stats()['backoffs'], 0)
+
+    def test_nyt_lookup_fails_when_queue_too_long(self):
+        pacer = Pacer('nyt', calls=1, period=3600, timer=self.clock, sleep=self.clock.sleep)
+        pacer.wait_turn()
+        scheduler = PriorityScheduler(pacer, calls_per_day=100, timer=self.clock)
+        movie = Movie(title="Exotica", original_title="Exotica",
+                      release_year=1994, release_date='1994-11-30')
+        with mock.patch.object(NytMovieReview, 'scheduler', scheduler), \
+             mock.patch.object(reviews.archive, 'available', return_value=False), \
+             mock.patch('cinescout.sessions.get_session') as get_session:
+            result = NytMovieReview.get_movie_review(movie)
+        get_session.assert_not_called()
+        self.assertFalse(result['success'])
+        self.assertEqual(result['status_code'], 429)
+        self.assertIn("would wait", result['message'])
+
+
+class PrioritySchedulerTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up PrioritySchedulerTests...")
+        self.clock = FakeClock()
+        self.pacer = Pacer('test', calls=3, period=60, timer=self.clock,
+                           sleep=self.clock.sleep)
+        self.scheduler = PriorityScheduler(self.pacer, calls_per_day=5, daily_reserve=2,
+                                           interactive_slots=1, timer=self.clock,
+                                           clock=self.clock)
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down PrioritySchedulerTests...")
+
+    def real_time_scheduler(self, period):
+        """Returns scheduler of one call per period seconds, in real time."""
+        return PriorityScheduler(Pacer('test', calls=1, period=period), calls_per_day=100)
+
+    def acquire_in_order(self, scheduler, calls):
+        """Queues calls, list of (name, level) tuples, in turn, on a
+        scheduler whose slot is taken; returns names in the order calls
+        went ahead."""
+        order = []
+
+        def call(name, level):
+            scheduler.acquire(level=level)
+            order.append(name)
+
+        threads = []
+        for name, level in calls:
+            thread = threading.Thread(target=call, args=(name, level))
+            thread.start()
+            threads.append(thread)
+            # Next call arrives once this one is queued.
+            while len(scheduler._queue) < len(threads):
+                time.sleep(0.005)
+        for thread in threads:
+            thread.join(5)
+        return order
+
+    def test_no_wait_within_budget(self):
+        for _ in range(3):
+            self.assertTrue(self.scheduler.acquire(level=INTERACTIVE))
+        self.assertEqual(self.scheduler.stats()[INTERACTIVE]['queued'], 0)
+        self.assertEqual(self.pacer.stats()['calls'], 3)
+
+    def test_interactive_ahead_of_background(self):
+        scheduler = self.real_time_scheduler(0.1)
+        scheduler.acquire()
+        order = self.acquire_in_order(scheduler, [(level, level) for level in
+                                                  (BATCH, PREFETCH, INTERACTIVE)])
+        self.assertEqual(order, [INTERACTIVE, PREFETCH, BATCH])
+
+    def test_first_come_first_served_within_class(self):
+        scheduler = self.real_time_scheduler(0.05)
+        scheduler.acquire()
+        order = self.acquire_in_order(scheduler, [(number, BATCH) for number in range(3)])
+        self.assertEqual(order, [0, 1, 2])
+        self.assertEqual(scheduler.stats()[BATCH]['queued'], 3)
+
+    def test_slots_kept_for_interactive_calls(self):
+        self.assertTrue(self.scheduler.acquire(level=BATCH))
+        self.assertTrue(self.scheduler.acquire(level=PREFETCH))
+        self.assertFalse(self.scheduler.acquire(max_wait=10, level=BATCH))
+        self.assertTrue(self.scheduler.acquire(max_wait=10, level=INTERACTIVE))
+        self.assertEqual(self.scheduler.stats()[BATCH]['rejected'], 1)
+
+    def test_daily_budget(self):
+        self.pacer.calls = 10
+        for _ in range(3):
+            self.assertTrue(self.scheduler.acquire(level=BATCH))
+            self.clock.now += 60
+        # Last calls of the day kept for interactive ones.
+        self.assertEqual(self.scheduler.remaining(BATCH), 0)
+        self.assertFalse(self.scheduler.acquire(level=BATCH))
+        self.assertTrue(self.scheduler.acquire(level=INTERACTIVE))
+        self.assertTrue(self.scheduler.acquire(level=INTERACTIVE))
+        self.assertFalse(self.scheduler.acquire(level=INTERACTIVE))
+        stats = self.scheduler.stats()
+        self.assertEqual(stats[BATCH]['over_budget'], 1)
+        self.assertEqual(stats['day_calls'], 5)
+        self.assertEqual(stats['day_remaining'], 0)
+
+        # Budget is back the next day.
+        self.clock.now += 24 * 60 * 60
+        self.assertTrue(self.scheduler.acquire(level=BATCH))
+
+    def test_back_off(self):
+        self.scheduler.back_off(30)
+        self.assertFalse(self.scheduler.acquire(max_wait=10))
+        self.clock.now += 30
+        self.assertTrue(self.scheduler.acquire(max_wait=10))
+        self.assertEqual(self.scheduler.stats()['backoffs'], 1)
+
+    def test_priority_context(self):
+        self.assertEqual(current_priority(), INTERACTIVE)
+        with priority(BATCH):
+            self.assertEqual(current_priority(), BATCH)
+            self.scheduler.acquire()
+        self.assertEqual(current_priority(), INTERACTIVE)
+        self.assertEqual(self.scheduler.stats()[BATCH]['calls'], 1)
+        with self.assertRaises(ValueError):
+            with priority('urgent'):
+                pass
+
+    def test_bad_reserves(self):
+        self.assertRaises(ValueError, PriorityScheduler, self.pacer, 5, daily_reserve=5)
+        self.assertRaises(ValueError, PriorityScheduler, self.pacer, 5, interactive_slots=3)
+
+    def test_nyt_429_backs_off(self):
+        with mock.patch.object(NytMovieReview, 'scheduler', self.scheduler), \
+             mock.patch('cinescout.sessions.get_session') as get_session:
+            get_session.return_value.get.return_value = FakeResponse(429, {'Retry-After': '20'})
+            res = NytMovieReview._get({'query': "Exotica"})
+        self.assertEqual(res.status_code, 429)
+        self.assertEqual(self.scheduler.stats()['backoffs'], 1)
+        self.assertFalse(self.scheduler.acquire(max_wait=10))
+
+
+class TmdbRateLimitTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up TmdbRateLimitTests...")
+        self.clock = FakeClock()
+        self.patch = mock.patch.object(
+            TmdbMovie, 'rate_limiter',
+            TokenBucket('tmdb', rate=10, capacity=1, timer=self.clock,
+                        sleep=self.clock.sleep))
+        self.patch.start()
+        self.session = mock.Mock()
+        self.session_patch = mock.patch('cinescout.sessions.get_session',
+                                        return_value=self.session)
+        self.session_patch.start()
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down TmdbRateLimitTests...")
+        self.session_patch.stop()
+        self.patch.stop()
+
+    def test_429_retried(self):
+        self.session.get.side_effect = [FakeResponse(429, {'Retry-After': '2'}),
+                                        FakeResponse(200)]
+        res = TmdbMovie._get('/movie/1')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.session.get.call_count, 2)
+        # Second call waited as long as TMDB asked.
+        self.assertGreaterEqual(self.clock.now, 2)
+        self.assertEqual(TmdbMovie.rate_limiter.stats()['backoffs'], 1)
+
+    def test_gives_up_after_retries(self):
+        self.session.get.return_value = FakeResponse(429, {'Retry-After': '0'})
+        res = TmdbMovie._get('/movie/1')
+        self.assertEqual(res.status_code, 429)
+        self.assertEqual(self.session.get.call_count, TmdbMovie.max_retries + 1)
+
+    def test_long_retry_after_not_waited(self):
+        self.session.get.return_value = FakeResponse(429, {'Retry-After': '3600'})
+        self.assertEqual(TmdbMovie._get('/movie/1').status_code, 429)
+        self.assertEqual(self.session.get.call_count, 1)
+        self.assertEqual(self.clock.now, 0)
+
+    def test_queue_full(self):
+        TmdbMovie.rate_limiter.back_off(3600)
+        with self.assertRaises(RateLimited) as raised:
+            TmdbMovie._get('/movie/1')
+        self.assertEqual(raised.exception.api, 'tmdb')
+        self.session.get.assert_not_called()
+        # Refused locally: no further back-off.
+        self.assertEqual(TmdbMovie.rate_limiter.stats()['backoffs'], 1)
+
+    def test_queue_full_lookup_fails(self):
+        TmdbMovie.rate_limiter.back_off(3600)
+        result = TmdbMovie.get_bio_data_by_person_id(1)
+        self.assertFalse(result['success'])
+        self.assertEqual(result['status_code'], 429)
+        self.session.get.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,173 @@
+"""Unit-test script of reviewbatch module"""
+
+import os
+
+# Use in-memory database for testing.
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+# Add this line to whatever test script you write
+from context import app, db, User, Film, Movie, NytMovieReview
+from cinescout import reviewbatch, reviewstore
+from cinescout.asyncclients import AsyncTmdbMovie
+from cinescout.models import FilmListItem
+from cinescout.ratelimit import (Pacer, PriorityScheduler, current_priority,
+                                 PREFETCH, BATCH)
+from test_reviewstore import nyt_response
+
+
+def tmdb_result(tmdb_id):
+    """Returns result of AsyncTmdbMovie.get_movie_info_by_id for a fake movie."""
+    movie = Movie(id=tmdb_id, title=f"Film {tmdb_id}", original_title=f"Film {tmdb_id}",
+                  release_year=1990, release_date='1990-05-01')
+    return {'success': True, 'status_code': 200, 'movie': movie}
+
+
+class ReviewBatchTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up ReviewBatchTests...")
+        self.appctx = app.app_context()
+        self.appctx.push()
+        db.create_all()
+
+        user = User(username="alex", email="alex@example.com")
+        db.session.add(user)
+        db.session.commit()
+        db.session.add_all([Film(title=f"Film {i}", year=1990, tmdb_id=i) for i in (1, 2, 3)])
+        db.session.add_all([FilmListItem(user_id=user.id, title="Film 3", year=1990, tmdb_id=3),
+                            FilmListItem(user_id=user.id, title="Homemade", year=2001,
+                                         date='2001-02-03')])
+        db.session.commit()
+
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.checkpoint_path = os.path.join(self.tempdir.name, "checkpoint.json")
+        self.review = NytMovieReview(title="Film", year=1990, text="Fine.",
+                                     publication_date='1990-06-01', critics_pick=0)
+
+        # Fresh pacer: counts calls without touching the one other tests use.
+        self.pacer = Pacer('nyt', calls=1000, period=60)
+        self.scheduler = PriorityScheduler(self.pacer, calls_per_day=1000)
+        self.priorities = []
+        self.patches = [mock.patch.object(NytMovieReview, 'pacer', self.pacer),
+                        mock.patch.object(NytMovieReview, 'scheduler', self.scheduler),
+                        mock.patch.object(AsyncTmdbMovie, 'get_movie_info_by_id',
+                                          side_effect=tmdb_result)]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down ReviewBatchTests...")
+        for patch in self.patches:
+            patch.stop()
+        self.tempdir.cleanup()
+        db.session.remove()
+        db.drop_all()
+        self.appctx.pop()
+
+    def run_pass(self, responses, max_calls=None):
+        """Runs pass with NYT answering responses in turn, one NYT call each;
+        returns stats and mock of find_movie_review."""
+        responses = list(responses)
+
+        def find_movie_review(movie):
+            self.scheduler.acquire()
+            self.priorities.append(current_priority())
+            return responses.pop(0)
+
+        with mock.patch.object(NytMovieReview, 'find_movie_review',
+                               side_effect=find_movie_review) as get:
+            stats = reviewbatch.run_pass(reviewbatch.Checkpoint(self.checkpoint_path),
+                                         max_calls=max_calls, retry_delay=0,
+                                         sleep=lambda seconds: None)
+        return stats, get
+
+    def test_targets_lists_first(self):
+        keys = [key for key, _, _ in reviewbatch.batch_targets()]
+        self.assertEqual(keys, ["tmdb:3", "list:Homemade|2001", "tmdb:1", "tmdb:2"])
+
+    def test_pass_stores_outcomes(self):
+        stats, get = self.run_pass([nyt_response(self.review, bullseye=True)] * 4)
+        self.assertTrue(stats['complete'])
+        self.assertEqual(stats['found'], 4)
+        self.assertEqual(stats['calls'], 4)
+        # Films on users' lists are prefetched, ahead of catalog films.
+        self.assertEqual(self.priorities, [PREFETCH, PREFETCH, BATCH, BATCH])
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+        homemade = Movie(title="Homemade", original_title="Homemade",
+                         release_year=2001, release_date='2001-02-03')
+        self.assertTrue(reviewstore.find_result(homemade).found)
+
+        # Next pass finds them all stored.
+        stats, get = self.run_pass([])
+        self.assertEqual(stats['cached'], 4)
+        self.assertEqual(get.call_count, 0)
+
+    def test_tmdb_data_prefetched(self):
+        events = []
+
+        def get_movie_info_by_id(tmdb_id):
+            events.append(f"tmdb:{tmdb_id}")
+            return tmdb_result(tmdb_id)
+
+        def find_movie_review(movie):
+            events.append("nyt")
+            return nyt_response(self.review, bullseye=True)
+
+        with mock.patch.object(reviewbatch, 'PREFETCH_SIZE', 3), \
+             mock.patch.object(AsyncTmdbMovie, 'get_movie_info_by_id',
+                               side_effect=get_movie_info_by_id), \
+             mock.patch.object(NytMovieReview, 'find_movie_review',
+                               side_effect=find_movie_review):
+            stats = reviewbatch.run_pass(reviewbatch.Checkpoint(self.checkpoint_path))
+        self.assertEqual(stats['found'], 4)
+        # Homemade film has no TMDB id.
+        self.assertEqual(events, ["tmdb:3", "tmdb:1", "nyt", "nyt", "nyt", "tmdb:2", "nyt"])
+
+    def test_budget_stops_and_resumes_pass(self):
+        stats, _ = self.run_pass([nyt_response(self.review, bullseye=True)] * 2, max_calls=2)
+        self.assertFalse(stats['complete'])
+        self.assertEqual(stats['found'], 2)
+        with open(self.checkpoint_path) as checkpoint_file:
+            self.assertEqual(json.load(checkpoint_file)['done'], ["list:Homemade|2001", "tmdb:3"])
+
+        stats, get = self.run_pass([nyt_response(self.review, bullseye=True)] * 2)
+        self.assertTrue(stats['complete'])
+        self.assertEqual(stats['found'], 2)
+        self.assertEqual(get.call_count, 2)
+
+    def test_daily_budget_stops_pass(self):
+        self.scheduler.calls_per_day, self.scheduler.daily_reserve = 5, 2
+        stats, _ = self.run_pass([nyt_response(self.review, bullseye=True)] * 3)
+        self.assertFalse(stats['complete'])
+        self.assertEqual(stats['found'], 3)
+        self.assertTrue(os.path.exists(self.checkpoint_path))
+
+    def test_retry_when_told_to_slow_down(self):
+        too_many = nyt_response(status_code=429, message="Too many requests queued.")
+        stats, get = self.run_pass([too_many, nyt_response(self.review, bullseye=True)]
+                                   + [nyt_response(self.review, bullseye=True)] * 3)
+        self.assertEqual(stats['found'], 4)
+        self.assertEqual(get.call_count, 5)
+
+    def test_failed_film_retried_next_pass(self):
+        too_many = nyt_response(status_code=429, message="Too many requests queued.")
+        stats, _ = self.run_pass([too_many] * (reviewbatch.MAX_RETRIES + 1)
+                                 + [nyt_response(None)] * 3)
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(stats['not found'], 3)
+
+        stats, get = self.run_pass([nyt_response(self.review, bullseye=True)])
+        self.assertEqual(stats['found'], 1)
+        self.assertEqual(stats['cached'], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Unit-test script of reviewjobs module"""
+
+import threading
+import unittest
+from unittest import mock
+
+# Add this line to whatever test script you write
+from context import app, Movie
+from cinescout import reviewjobs
+from cinescout.reviewjobs import ReviewJobs, QueueFull, PENDING, DONE
+
+
+class FakeClock:
+    """Timer whose time only moves when told to."""
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def movie(title):
+    return Movie(title=title, original_title=title, release_year=1994,
+                 release_date='1994-11-30')
+
+
+class ReviewJobsTests(unittest.TestCase):
+
+    def setUp(self):
+        print("Setting up ReviewJobsTests...")
+        self.clock = FakeClock()
+        self.jobs = ReviewJobs(max_workers=2, max_pending=2, ttl=60, timer=self.clock)
+        self.release = threading.Event()
+
+    def tearDown(self):
+        print("Tearing down ReviewJobsTests...")
+        self.release.set()
+        self.jobs._executor.shutdown(wait=True)
+
+    def blocked(self, movie):
+        """Job function that waits to be released."""
+        self.release.wait(5)
+        return {'success': True, 'title': movie.title}, 200
+
+    def wait_done(self, job_id):
+        self.jobs._executor.shutdown(wait=True)
+        return self.jobs.get(job_id)
+
+    def test_job_result(self):
+        job_id = self.jobs.submit(movie("Exotica"), self.blocked)
+        self.assertEqual(self.jobs.get(job_id)['status'], PENDING)
+        self.release.set()
+        job = self.wait_done(job_id)
+        self.assertEqual(job['status'], DONE)
+        self.assertEqual(job['result'], ({'success': True, 'title': "Exotica"}, 200))
+
+    def test_pending_job_shared(self):
+        first = self.jobs.submit(movie("Exotica"), self.blocked)
+        self.assertEqual(self.jobs.submit(movie("Exotica"), self.blocked), first)
+        self.assertNotEqual(self.jobs.submit(movie("Calendar"), self.blocked), first)
+        self.assertEqual(self.jobs.stats(), {'pending': 2, 'jobs': 2})
+
+    def test_queue_full(self):
+        self.jobs.submit(movie("Exotica"), self.blocked)
+        self.jobs.submit(movie("Calendar"), self.blocked)
+        with self.assertRaises(QueueFull):
+            self.jobs.submit(movie("Chloe"), self.blocked)
+
+    def test_failed_job(self):
+        def fail(movie):
+            raise RuntimeError("boom")
+        job = self.wait_done(self.jobs.submit(movie("Exotica"), fail))
+        self.assertEqual(job['result'][1], 500)
+        self.assertFalse(job['result'][0]['success'])
+
+    def test_finished_job_expires(self):
+        self.release.set()
+        job_id = self.jobs.submit(movie("Exotica"), self.blocked)
+        self.assertIsNotNone(self.wait_done(job_id))
+        self.clock.now += 61
+        self.assertIsNone(self.jobs.get(job_id))
+
+    def test_fork_hook_not_per_instance(self):
+        with mock.patch('os.register_at_fork') as register:
+            ReviewJobs(max_workers=1)._executor.shutdown()
+        register.assert_not_called()
+
+    def test_forked_jobs_rebuilt(self):
+        parent = reviewjobs.jobs
+        self.addCleanup(setattr, reviewjobs, 'jobs', parent)
+        reviewjobs._build_jobs()
+        self.assertIsNot(reviewjobs.jobs, parent)
+        self.assertEqual(reviewjobs.jobs.stats(), {'pending': 0, 'jobs': 0})
+        reviewjobs.jobs._executor.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""Unit-test script of reviewstore module"""
+
+import os
+
+# Use in-memory database for testing.
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import event
+
+# Add this line to whatever test script you write
+from context import app, db, Movie, NytMovieReview
+from cinescout import reviewstore
+from cinescout.models import NytReviewResult
+
+
+def nyt_response(review=None, status_code=200, bullseye=None, message=None):
+    """Returns result dictionary as returned by find_movie_review."""
+    return {'success': bool(review), 'status_code': status_code,
+            'message': message, 'review': review, 'bullseye': bullseye,
+            'future_release': None}
+
+
+class ReviewStoreTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up ReviewStoreTests...")
+        self.appctx = app.app_context()
+        self.appctx.push()
+        db.create_all()
+        self.movie = Movie(title="Exotica", original_title="Exotica",
+                           release_year=1994, release_date='1994-11-30')
+        self.review = NytMovieReview(title="Exotica", year=1994,
+                                     text="Tax inspector obsessed with stripper.",
+                                     publication_date='1995-03-03', critics_pick=0)
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down ReviewStoreTests...")
+        db.session.remove()
+        db.drop_all()
+        self.appctx.pop()
+
+    def resolve(self, *responses):
+        """Resolves review with NYT answering responses in turn; returns
+        result and mock of find_movie_review."""
+        with mock.patch.object(NytMovieReview, 'find_movie_review',
+                               side_effect=list(responses)) as get:
+            return reviewstore.resolve_review(self.movie), get
+
+    def test_review_stored(self):
+        response, get = self.resolve(nyt_response(self.review, bullseye=True))
+        self.assertEqual(get.call_count, 1)
+        self.assertTrue(response['review']['found'])
+        stored = reviewstore.find_result(self.movie)
+        self.assertEqual(stored.review_text, "Tax inspector obsessed with stripper.")
+        self.assertEqual(stored.publication_date, '1995-03-03')
+        self.assertFalse(stored.critics_pick)
+        self.assertTrue(stored.bullseye)
+
+    def test_repeat_lookup_one_read(self):
+        self.resolve(nyt_response(self.review, bullseye=True))
+        db.session.remove()
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            response, get = self.resolve()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+        get.assert_not_called()
+        self.assertEqual(response['review']['review_text'],
+                         "Tax inspector obsessed with stripper.")
+        self.assertEqual(len(statements), 1)
+
+    def test_lookup_uses_index(self):
+        plan = db.session.execute(db.text(
+            "EXPLAIN QUERY PLAN SELECT * FROM nyt_review_results WHERE title = 'a' "
+            "AND original_title = 'a' AND release_year = 1 AND release_date = 'a'")).all()
+        self.assertIn('ix_nyt_review_results_film', str(plan))
+
+    def test_planned_search(self):
+        response, get = self.resolve(nyt_response(self.review))
+        get.assert_called_once_with(self.movie)
+        self.assertTrue(response['review']['found'])
+        # Not a bullseye: review page shows a warning.
+        self.assertFalse(response['review']['bullseye'])
+
+    def test_not_found_cached(self):
+        response, get = self.resolve(nyt_response())
+        self.assertFalse(response['review']['found'])
+        response, get = self.resolve()
+        get.assert_not_called()
+        self.assertFalse(response['review']['found'])
+
+    def test_not_found_expires(self):
+        self.resolve(nyt_response())
+        stored = reviewstore.find_result(self.movie)
+        stored.resolved_at -= timedelta(seconds=reviewstore.NEGATIVE_TTL + 1)
+        db.session.commit()
+
+        response, get = self.resolve(nyt_response(self.review, bullseye=True))
+        self.assertEqual(get.call_count, 1)
+        self.assertTrue(response['review']['found'])
+        self.assertEqual(NytReviewResult.query.count(), 1)
+
+    def test_review_never_expires(self):
+        self.resolve(nyt_response(self.review, bullseye=True))
+        stored = reviewstore.find_result(self.movie)
+        self.assertTrue(reviewstore.is_fresh(stored, now=datetime.utcnow() + timedelta(days=3650)))
+
+    def test_error_not_stored(self):
+        response, get = self.resolve(nyt_response(status_code=429, message="Too many requests."))
+        self.assertEqual(response['status_code'], 429)
+        self.assertIsNone(response['review'])
+        self.assertIsNone(reviewstore.find_result(self.movie))
+
+    def test_other_release_date_not_matched(self):
+        self.resolve(nyt_response(self.review, bullseye=True))
+        self.movie.release_date = '1994-09-24'
+        self.assertIsNone(reviewstore.find_result(self.movie))
+
+
+if __name__ == "__main__":
+    unittest.main()
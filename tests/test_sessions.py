@@ -0,0 +1,47 @@
+"""Unit-test script of sessions module"""
+
+import os
+import unittest
+
+# Add this line to whatever test script you write
+from context import app
+from cinescout import sessions
+
+
+class SessionTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up SessionTests...")
+        sessions.close_sessions()
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down SessionTests...")
+        sessions.close_sessions()
+
+    def test_same_session_per_name(self):
+        self.assertIs(sessions.get_session('tmdb'), sessions.get_session('tmdb'))
+
+    def test_different_session_per_api(self):
+        self.assertIsNot(sessions.get_session('tmdb'), sessions.get_session('nyt'))
+
+    def test_pool_size(self):
+        session = sessions.get_session('tmdb', pool_maxsize=3)
+        adapter = session.get_adapter('https://api.themoviedb.org/3')
+        self.assertEqual(adapter._pool_maxsize, 3)
+
+    def test_new_session_after_fork(self):
+        parent_session = sessions.get_session('tmdb')
+        # Pretend to be a freshly forked child process.
+        sessions._reset_after_fork()
+        self.assertIsNot(parent_session, sessions.get_session('tmdb'))
+
+    def test_close_sessions(self):
+        old_session = sessions.get_session('tmdb')
+        sessions.close_sessions()
+        self.assertIsNot(old_session, sessions.get_session('tmdb'))
+
+
+if __name__ == "__main__":
+    unittest.main()
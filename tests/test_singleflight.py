@@ -0,0 +1,158 @@
+"""Unit-test script of singleflight module"""
+
+import time
+import threading
+import unittest
+from unittest import mock
+
+# Add this line to whatever test script you write
+from context import app, Movie, TmdbMovie, NytMovieReview
+from cinescout.cache import TTLCache
+from cinescout.singleflight import SingleFlight
+from test_movies import FakeResponse, fake_movie_data
+
+# Number of concurrent callers in coalescing tests.
+NUM_CALLERS = 20
+
+
+def call_concurrently(func, num_callers=NUM_CALLERS):
+    """Calls func from num_callers threads released at once; returns results."""
+    barrier = threading.Barrier(num_callers)
+    results = [None] * num_callers
+
+    def call(i):
+        barrier.wait()
+        results[i] = func()
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(num_callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class SlowUpstream:
+    """Counts calls; each takes long enough for all callers to pile up."""
+    def __init__(self, result, delay=0.2):
+        self.result = result
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return self.result
+
+
+class SingleFlightTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up SingleFlightTests...")
+        self.flight = SingleFlight('test')
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down SingleFlightTests...")
+
+    def test_concurrent_calls_coalesced(self):
+        upstream = SlowUpstream('result')
+        results = call_concurrently(lambda: self.flight.do('key', upstream))
+        self.assertEqual(upstream.calls, 1)
+        self.assertEqual(results, ['result'] * NUM_CALLERS)
+        self.assertEqual(self.flight.stats(),
+                         {'calls': NUM_CALLERS, 'shared': NUM_CALLERS - 1, 'in_flight': 0})
+
+    def test_different_keys_not_coalesced(self):
+        upstream = SlowUpstream('result', delay=0)
+        self.flight.do('a', upstream)
+        self.flight.do('b', upstream)
+        self.assertEqual(upstream.calls, 2)
+
+    def test_sequential_calls_not_coalesced(self):
+        upstream = SlowUpstream('result', delay=0)
+        self.flight.do('key', upstream)
+        self.flight.do('key', upstream)
+        self.assertEqual(upstream.calls, 2)
+
+    def test_error_shared(self):
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def failing():
+            started.set()
+            release.wait(5)
+            raise RuntimeError("Upstream down.")
+
+        def call(func):
+            try:
+                self.flight.do('key', func)
+            except RuntimeError as err:
+                errors.append(err)
+
+        leader = threading.Thread(target=call, args=(failing,))
+        leader.start()
+        started.wait(5)
+        follower = threading.Thread(target=call, args=(lambda: 'never called',))
+        follower.start()
+        # Let follower start waiting on the leader's call.
+        while self.flight.stats()['shared'] == 0:
+            time.sleep(0.01)
+        release.set()
+        leader.join()
+        follower.join()
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(self.flight.stats()['in_flight'], 0)
+
+
+class UpstreamCoalescingTests(unittest.TestCase):
+
+    def setUp(self):
+        """Executes before each test."""
+        print("Setting up UpstreamCoalescingTests...")
+        self.patches = [
+            mock.patch.object(TmdbMovie, 'details_cache', TTLCache('details', maxsize=10)),
+            mock.patch.object(TmdbMovie, 'providers_cache', TTLCache('providers', maxsize=10)),
+            mock.patch.object(TmdbMovie, '_read_mirror', return_value=(None, None)),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    def tearDown(self):
+        """Executes after each test."""
+        print("Tearing down UpstreamCoalescingTests...")
+        for patch in self.patches:
+            patch.stop()
+
+    def test_movie_info_one_upstream_hit(self):
+        upstream = SlowUpstream(FakeResponse(fake_movie_data(577922)))
+        with mock.patch.object(TmdbMovie, '_get', upstream):
+            results = call_concurrently(lambda: TmdbMovie.get_movie_info_by_id(577922))
+        self.assertEqual(upstream.calls, 1)
+        self.assertTrue(all(result['movie'].title == "Tenet" for result in results))
+
+    def test_nyt_review_one_upstream_hit(self):
+        movie = Movie(title="Exotica", original_title="Exotica", release_year=1994,
+                      release_date='1994-09-24')
+        upstream = SlowUpstream({'success': True, 'status_code': 200, 'review': None})
+        with mock.patch.object(NytMovieReview, '_get_movie_review', upstream):
+            results = call_concurrently(lambda: NytMovieReview.get_movie_review(movie))
+        self.assertEqual(upstream.calls, 1)
+        self.assertTrue(all(result is results[0] for result in results))
+
+    def test_nyt_attempts_not_coalesced(self):
+        movie = Movie(title="Exotica", original_title="Exotica", release_year=1994,
+                      release_date='1994-09-24')
+        upstream = SlowUpstream({'success': True, 'status_code': 200, 'review': None}, delay=0)
+        with mock.patch.object(NytMovieReview, '_get_movie_review', upstream):
+            NytMovieReview.get_movie_review(movie)
+            NytMovieReview.get_movie_review(movie, first_try=False)
+        self.assertEqual(upstream.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
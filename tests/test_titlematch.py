@@ -0,0 +1,94 @@
+"""Unit-test script of titlematch module"""
+
+import random
+import string
+import unittest
+
+from fuzzywuzzy import fuzz
+
+# Add this line to whatever test script you write
+from context import app, NytMovieReview
+from cinescout import titlematch
+
+# Titles all scores and decisions are checked on.
+EDGE_CASE_TITLES = ["", " ", "a", "A", "The Seventh Seal", "the seventh seal ",
+                    "Seventh Seal", "The Seventh Seal (Det sjunde inseglet)",
+                    "Seal", "Amélie", "Amelie", "8½", "M", "Ran", "Rang",
+                    "Star Wars: Episode IV - A New Hope", "Star Wars"]
+
+
+def random_titles(num_titles, seed=13):
+    """Returns list of random short titles over a small alphabet, so that
+    many of them are similar."""
+    rng = random.Random(seed)
+    alphabet = "abcde " + string.ascii_uppercase[:3]
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+            for _ in range(num_titles)]
+
+
+def legacy_good_enough(extdb_title, nyt_title, threshold):
+    """Decision NytMovieReview.good_enough_match made with fuzz."""
+    ratio = fuzz.ratio(extdb_title.strip().lower(), nyt_title.strip().lower())
+    partial = fuzz.partial_ratio(extdb_title.strip().lower(), nyt_title.strip().lower())
+    return ratio >= threshold or (ratio >= 50 and partial >= threshold)
+
+
+class TitleMatchTests(unittest.TestCase):
+    """Tests batch title scoring against fuzzywuzzy."""
+
+    def setUp(self):
+        print("Setting up TitleMatchTests...")
+        self.titles = EDGE_CASE_TITLES + random_titles(300)
+
+    def tearDown(self):
+        print("Tearing down TitleMatchTests...")
+
+    def test_scores_equal_fuzz(self):
+        rng = random.Random(7)
+        for _ in range(3000):
+            a = titlematch.normalize_title(rng.choice(self.titles))
+            b = titlematch.normalize_title(rng.choice(self.titles))
+            self.assertEqual(titlematch.full_ratio(a, b), fuzz.ratio(a, b), (a, b))
+            self.assertEqual(titlematch.partial_ratio(a, b), fuzz.partial_ratio(a, b), (a, b))
+
+    def test_score_matrix(self):
+        query = "The Seventh Seal"
+        scores = titlematch.score_matrix(query, EDGE_CASE_TITLES)
+        self.assertEqual(len(scores), len(EDGE_CASE_TITLES))
+        for title, (full, partial) in zip(EDGE_CASE_TITLES, scores):
+            self.assertEqual(full, fuzz.ratio(query.lower(), title.strip().lower()))
+            self.assertEqual(partial, fuzz.partial_ratio(query.lower(), title.strip().lower()))
+
+    def test_mask_equals_legacy_decisions(self):
+        threshold = NytMovieReview.threshold
+        candidates = [title for title in self.titles if title.strip()]
+        for query in EDGE_CASE_TITLES[2:] + random_titles(40, seed=3):
+            if not query.strip():
+                continue
+            expected = [legacy_good_enough(query, title, threshold) for title in candidates]
+            self.assertEqual(titlematch.good_enough_mask(query, candidates, threshold),
+                             expected, query)
+
+    def test_mask_rejects_blank_titles(self):
+        mask = titlematch.good_enough_mask("Ran", ["", None, "  ", "Ran"], 80)
+        self.assertEqual(mask, [False, False, False, True])
+
+    def test_good_enough_match(self):
+        self.assertTrue(NytMovieReview.good_enough_match("The Seventh Seal", "the seventh seal "))
+        self.assertFalse(NytMovieReview.good_enough_match("The Seventh Seal", "Star Wars"))
+        with self.assertRaises(ValueError):
+            NytMovieReview.good_enough_match("", "Star Wars")
+
+    def test_best_match(self):
+        titles = ["Star Wars", "Star Wars: Episode IV - A New Hope", "Star Trek"]
+        self.assertEqual(titlematch.best_match("Star Wars", titles), 0)
+        self.assertIsNone(titlematch.best_match("Star Wars", []))
+
+    def test_best_match_tie(self):
+        self.assertIsNone(titlematch.best_match("Ran", ["Ran", "ran "]))
+        # A tie beaten by a later title does not count.
+        self.assertEqual(titlematch.best_match("Ran", ["Rank", "Rang", "Ran"]), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()